@@ -27,19 +27,22 @@ async def analyze_filters():
     print("ANALYZING: What worked vs what failed")
     print("="*80)
 
+    # One batch for both groups: packed model requests, run concurrently
+    results = {}
+    async for result in ai_service.generate_supersearch_filters_batch(working + failed, "sendcupcake.com"):
+        results[result["index"]] = result
+
     print("\n✅ WORKED - These found 10 leads:")
     print("-"*80)
-    for icp in working:
-        filters = await ai_service.generate_supersearch_filters(icp, "sendcupcake.com")
+    for index, icp in enumerate(working):
         print(f"\nICP: {icp}")
-        print(json.dumps(filters, indent=2))
+        print(json.dumps(results[index]["filters"], indent=2))
 
     print("\n\n❌ FAILED - These were empty:")
     print("-"*80)
-    for icp in failed:
-        filters = await ai_service.generate_supersearch_filters(icp, "sendcupcake.com")
+    for index, icp in enumerate(failed, start=len(working)):
         print(f"\nICP: {icp}")
-        print(json.dumps(filters, indent=2))
+        print(json.dumps(results[index]["filters"], indent=2))
 
     print("\n\n" + "="*80)
     print("HYPOTHESIS:")
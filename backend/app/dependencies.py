@@ -0,0 +1,45 @@
+"""
+FastAPI dependencies that hand out the application-scoped services
+"""
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request
+
+from .services.container import ServiceContainer, StorageUnavailable
+from .services.domain_inventory import DomainInventory
+from .services.domain_service import DomainService
+from .services.storage_backend import StorageBackend
+from .services.webhook_events import WebhookDispatcher
+
+
+def get_services(request: Request) -> ServiceContainer:
+    """The container built by the app lifespan"""
+    return request.app.state.services
+
+
+async def get_db(services: ServiceContainer = Depends(get_services)) -> StorageBackend:
+    """The storage backend; waits for its initialization, 503 if it failed"""
+    try:
+        return await services.get_db()
+    except StorageUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+async def get_user_id(request: Request, services: ServiceContainer = Depends(get_services)) -> Optional[str]:
+    """The signed-in user's uid (Authorization: Bearer <Firebase ID token>), None for anonymous requests"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return await services.auth.verify(token.strip())
+
+
+def get_domain_service(request: Request) -> DomainService:
+    return get_services(request).domains
+
+
+def get_domain_inventory(request: Request) -> DomainInventory:
+    return get_services(request).domain_inventory
+
+
+def get_webhook_dispatcher(request: Request) -> WebhookDispatcher:
+    return get_services(request).webhooks
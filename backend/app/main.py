@@ -1,26 +1,52 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
 import os
 import json
 import asyncio
 import httpx
+import time
+import uuid
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
-from .services.instantly import InstantlyService
-from .services.ai_copy import AICopyService
-from .services.firebase_service import FirebaseService
-from .services.unipile_service import UnipileService
-from .routes import domains
+from .services.ai_copy import icp_email_context
+from .services.lead_normalizer import linkedin_profile_id
+from .services.csv_ingest import CSVLeadParser, iter_csv_lead_batches
+from .services.container import ServiceContainer
+from .services.list_reaper import SUPERSEARCH, TEMP
+from .services.storage_backend import StorageBackend
+from .dependencies import get_db, get_services, get_user_id
+from .routes import domains, webhooks
 
 load_dotenv()
 
-app = FastAPI(title="Vibe Marketing Autopilot API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build every service once on startup and close them on shutdown
+    """
+    services = ServiceContainer.from_env()
+    app.state.services = services
+    await services.start()
+    # Slow SDK setup happens after the server starts answering /health
+    warm_up = asyncio.create_task(services.warm_up())
+    try:
+        yield
+    finally:
+        warm_up.cancel()
+        await asyncio.gather(warm_up, return_exceptions=True)
+        await services.aclose()
+
+
+app = FastAPI(title="Vibe Marketing Autopilot API", lifespan=lifespan)
 
 # Include routers
 app.include_router(domains.router, prefix="/api", tags=["domains"])
+app.include_router(webhooks.router, prefix="/api", tags=["webhooks"])
 
 # CORS middleware for Next.js frontend
 app.add_middleware(
@@ -31,16 +57,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services
-instantly_service = InstantlyService(os.getenv("INSTANTLY_API_KEY"))
-ai_service = AICopyService(os.getenv("OPENAI_API_KEY"))
-unipile_service = UnipileService(os.getenv("UNIPILE_API_KEY"))
-
-# Firebase credentials from environment variable
-firebase_creds_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-db_service = FirebaseService(firebase_creds_path)
-
-
 class CampaignRequest(BaseModel):
     campaign_name: Optional[str] = None
     url: str
@@ -63,14 +79,73 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """
+    Liveness: the process is up and serving requests
+    """
     return {"status": "healthy"}
 
 
+@app.get("/health/ready")
+async def readiness_check(services: ServiceContainer = Depends(get_services)):
+    """
+    Readiness: 503 until slow services (storage) have finished initializing
+    """
+    readiness = services.readiness()
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", **readiness})
+    return {"status": "ready", **readiness}
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats(services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
+    """
+    Hit/miss counters for the in-process caches (for tuning TTL and size)
+    """
+    return {
+        "success": True,
+        "caches": {
+            **db.cache_stats(),
+            "instantly_reads": services.instantly.reads.stats(),
+            "supersearch_filters": services.ai.filter_cache.stats()
+        }
+    }
+
+
+@app.get("/api/ai/scheduler")
+async def get_ai_scheduler_stats(services: ServiceContainer = Depends(get_services)):
+    """
+    OpenAI request queue: waits per priority class and RPM/TPM use per model
+    """
+    return {"success": True, **services.ai.openai.stats(), "speculative_copy": services.speculative_copy.stats()}
+
+
+@app.get("/api/maintenance/lead-lists")
+async def get_list_reaper_stats(services: ServiceContainer = Depends(get_services)):
+    """
+    Lead lists tracked for cleanup after their launch ends
+    """
+    return {"success": True, "reaper": services.list_reaper.stats()}
+
+
+@app.post("/api/maintenance/lead-lists/reap")
+async def reap_lead_lists(services: ServiceContainer = Depends(get_services)):
+    """
+    Delete one batch of orphaned lead lists now
+    """
+    try:
+        result = await services.list_reaper.reap_once()
+        return {"success": True, **result}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/create-campaign-stream")
-async def create_campaign_stream(request: CampaignRequest):
+async def create_campaign_stream(request: CampaignRequest, services: ServiceContainer = Depends(get_services)):
     """
     Create campaign with real-time progress updates via Server-Sent Events
     """
+    run_id = services.list_reaper.start_run("create_campaign_stream")
+
     async def generate_progress():
         try:
             # Step 1: Generate AI copy
@@ -78,7 +153,7 @@ async def create_campaign_stream(request: CampaignRequest):
             yield f"data: {json.dumps({'step': 1, 'status': 'in_progress', 'message': 'Analyzing your website and generating AI-powered email copy...', 'log': log_msg})}\n\n"
             await asyncio.sleep(0.1)
 
-            copy_variants = await ai_service.generate_email_copy(
+            copy_variants = await services.ai.generate_email_copy(
                 request.url,
                 request.target_audience
             )
@@ -104,7 +179,7 @@ async def create_campaign_stream(request: CampaignRequest):
             await asyncio.sleep(0.5)
 
             # Use AI to generate SuperSearch filters
-            search_filters = await ai_service.generate_supersearch_filters(
+            search_filters = await services.ai.generate_supersearch_filters(
                 request.target_audience,
                 request.url
             )
@@ -117,16 +192,18 @@ async def create_campaign_stream(request: CampaignRequest):
             campaign_name = request.campaign_name or f"Launch - {request.url}"
 
             # Create campaign with temporary empty lead list
-            temp_lead_list_id = await instantly_service.create_lead_list(
+            temp_lead_list_id = await services.instantly.create_lead_list(
                 name=f"Temp list for {campaign_name}"
             )
+            services.list_reaper.track(run_id, temp_lead_list_id, TEMP)
 
-            campaign_data = await instantly_service.create_campaign(
+            campaign_data = await services.instantly.create_campaign(
                 name=campaign_name,
                 lead_list_id=temp_lead_list_id,
                 variants=copy_variants
             )
             campaign_id = campaign_data.get("id", "N/A")
+            services.campaign_metrics.track(campaign_data.get("id"))
 
             log_msg = f'✅ Campaign created: {campaign_id}\n   - Now enriching leads directly into this campaign...'
             yield f"data: {json.dumps({'step': 2, 'status': 'in_progress', 'message': 'Campaign created! Now searching for leads...', 'log': log_msg})}\n\n"
@@ -138,7 +215,7 @@ async def create_campaign_stream(request: CampaignRequest):
             try:
                 # Run SuperSearch to find new leads (creates a list)
                 # Note: campaign_id parameter doesn't actually work - SuperSearch always creates a list
-                search_result = await instantly_service.search_leads_supersearch(
+                search_result = await services.instantly.search_leads_supersearch(
                     search_filters=search_filters,
                     limit=request.lead_count or 3,
                     work_email_enrichment=True,
@@ -148,6 +225,7 @@ async def create_campaign_stream(request: CampaignRequest):
                 # Get the enrichment/list resource_id
                 enrichment_id = search_result.get("resource_id") or search_result.get("id")
                 lead_list_id_from_search = enrichment_id
+                services.list_reaper.track(run_id, lead_list_id_from_search, SUPERSEARCH)
                 log_msg = f'✅ SuperSearch enrichment started!\n   Enrichment ID: {enrichment_id}\n   Finding new leads that will be added to campaign {campaign_id}...'
                 yield f"data: {json.dumps({'step': 2, 'status': 'in_progress', 'message': 'Finding and enriching new leads...', 'log': log_msg})}\n\n"
 
@@ -158,13 +236,13 @@ async def create_campaign_stream(request: CampaignRequest):
                 real_leads = []
                 try:
                     # Check enrichment status first
-                    enrichment_status = await instantly_service.get_supersearch_enrichment_status(lead_list_id_from_search)
+                    enrichment_status = await services.instantly.get_supersearch_enrichment_status(lead_list_id_from_search)
                     log_msg = f'Enrichment status: {enrichment_status.get("status", "unknown")}, Progress: {enrichment_status.get("progress", "unknown")}'
                     yield f"data: {json.dumps({'step': 2, 'status': 'in_progress', 'message': 'Checking enrichment progress...', 'log': log_msg})}\n\n"
                     await asyncio.sleep(2)
 
                     # Try to get enriched leads from history endpoint
-                    enriched_leads = await instantly_service.get_supersearch_enrichment_history(lead_list_id_from_search)
+                    enriched_leads = await services.instantly.get_supersearch_enrichment_history(lead_list_id_from_search)
                     if enriched_leads:
                         real_leads = enriched_leads[:10]  # Get first 10 leads
                         log_msg = f'Successfully fetched {len(real_leads)} real enriched leads from SuperSearch'
@@ -172,7 +250,7 @@ async def create_campaign_stream(request: CampaignRequest):
                         print(f"Sample lead: {real_leads[0] if real_leads else 'None'}")
                     else:
                         # If no leads yet, try the lead list endpoint
-                        list_leads = await instantly_service.get_leads_from_list(lead_list_id_from_search, limit=10)
+                        list_leads = await services.instantly.get_leads_from_list(lead_list_id_from_search, limit=10)
                         if list_leads:
                             real_leads = list_leads
                             log_msg = f'Successfully fetched {len(real_leads)} real leads from lead list'
@@ -291,13 +369,23 @@ async def create_campaign_stream(request: CampaignRequest):
                 poll_count = 0
                 enrichment_complete = False
 
+                last_check = time.monotonic()
+
                 while poll_count < max_polls:
-                    await asyncio.sleep(10)  # Wait 10 seconds between polls
+                    # Wait 10 seconds between polls, or less if a webhook says leads landed
+                    if services.webhooks.enabled:
+                        await services.webhooks.wait_for(
+                            ("lead_added", "enrichment_completed"), {"resource_id": enrichment_id},
+                            timeout=10, since=last_check
+                        )
+                        last_check = time.monotonic()
+                    else:
+                        await asyncio.sleep(10)
                     poll_count += 1
 
                     # Check if leads are available in the list
                     try:
-                        enriched_leads = await instantly_service.get_leads_from_list(enrichment_id, limit=1)
+                        enriched_leads = await services.instantly.get_leads_from_list(enrichment_id, limit=1)
                         if enriched_leads and len(enriched_leads) > 0:
                             enrichment_complete = True
                             log_msg = f'✅ Enrichment complete! Found {len(enriched_leads)} leads. Moving to campaign...'
@@ -317,7 +405,7 @@ async def create_campaign_stream(request: CampaignRequest):
 
                     try:
                         # Pass the lead_count limit to avoid fetching all workspace leads
-                        success = await instantly_service.move_leads_to_campaign(
+                        success = await services.instantly.move_leads_to_campaign(
                             campaign_id=campaign_id,
                             lead_list_id=enrichment_id,
                             limit=request.lead_count or 10
@@ -373,7 +461,7 @@ async def create_campaign_stream(request: CampaignRequest):
             yield f"data: {json.dumps({'step': 4, 'status': 'in_progress', 'message': 'Activating campaign in Instantly.ai...', 'log': log_msg})}\n\n"
             await asyncio.sleep(0.1)
 
-            activated = await instantly_service.activate_campaign(campaign_data["id"])
+            activated = await services.instantly.activate_campaign(campaign_data["id"])
             if activated:
                 campaign_data["status"] = "active"
             status_msg = "Campaign is now ACTIVE and sending emails" if activated else "Campaign created but not activated"
@@ -385,7 +473,8 @@ async def create_campaign_stream(request: CampaignRequest):
             yield f"data: {json.dumps({'step': 5, 'status': 'in_progress', 'message': 'Saving campaign data to database...', 'log': log_msg})}\n\n"
             await asyncio.sleep(0.1)
 
-            db_record = await db_service.save_campaign(
+            db = await services.get_db()
+            db_record = await db.save_campaign(
                 user_id=request.user_id,
                 campaign_id=campaign_data["id"],
                 url=request.url,
@@ -397,6 +486,8 @@ async def create_campaign_stream(request: CampaignRequest):
             yield f"data: {json.dumps({'step': 5, 'status': 'completed', 'message': 'Campaign saved to database', 'log': log_msg})}\n\n"
             await asyncio.sleep(0.5)
 
+            services.list_reaper.finish_run(run_id, "completed")
+
             # Final success message
             yield f"data: {json.dumps({'step': 'done', 'status': 'success', 'data': {'campaign_id': campaign_data['id'], 'lead_list_id': lead_list_id_from_search, 'variants': copy_variants}})}\n\n"
 
@@ -407,47 +498,51 @@ async def create_campaign_stream(request: CampaignRequest):
             print(f"Error creating campaign: {error_msg}")
             print(f"Full traceback:\n{full_trace}")
             yield f"data: {json.dumps({'step': 'error', 'status': 'error', 'message': error_msg or 'Unknown error occurred'})}\n\n"
+        finally:
+            # No-op after success; covers errors, early returns and client disconnects
+            services.list_reaper.finish_run(run_id, "failed")
 
     return StreamingResponse(generate_progress(), media_type="text/event-stream")
 
 
 @app.post("/api/create-campaign")
-async def create_campaign(request: CampaignRequest):
+async def create_campaign(request: CampaignRequest, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
     """
     Main endpoint to create a full campaign (non-streaming version for backwards compatibility)
     """
     try:
         # Step 1: Generate AI copy
         print(f"Generating AI copy for {request.url}...")
-        copy_variants = await ai_service.generate_email_copy(
+        copy_variants = await services.ai.generate_email_copy(
             request.url,
             request.target_audience
         )
 
         # Step 2: Create lead list (from CSV or example)
         print("Creating lead list...")
-        lead_list_id = await instantly_service.create_lead_list(
+        lead_list_id = await services.instantly.create_lead_list(
             name=f"Campaign - {request.url}",
             leads_data=request.leads_csv
         )
 
         # Step 3: Create campaign with variants
         print("Creating campaign with A/B variants...")
-        campaign_data = await instantly_service.create_campaign(
+        campaign_data = await services.instantly.create_campaign(
             name=f"Launch - {request.url}",
             lead_list_id=lead_list_id,
             variants=copy_variants
         )
+        services.campaign_metrics.track(campaign_data["id"])
 
         # Step 3.5: Activate the campaign
         print("Activating campaign...")
-        activated = await instantly_service.activate_campaign(campaign_data["id"])
+        activated = await services.instantly.activate_campaign(campaign_data["id"])
         if activated:
             campaign_data["status"] = "active"
 
         # Step 4: Store in database
         print("Saving to database...")
-        db_record = await db_service.save_campaign(
+        db_record = await db.save_campaign(
             user_id=request.user_id,
             campaign_id=campaign_data["id"],
             url=request.url,
@@ -468,21 +563,32 @@ async def create_campaign(request: CampaignRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _campaign_analytics(services: ServiceContainer, campaign_id: str) -> tuple:
+    """
+    (analytics, source): local counters if they're the whole history, else Instantly's totals reconciled with them
+    """
+    if services.campaign_metrics.is_complete(campaign_id):
+        return services.campaign_metrics.get(campaign_id), "events"
+    upstream = await services.instantly.get_campaign_analytics(campaign_id)
+    return services.campaign_metrics.reconcile(campaign_id, upstream), "instantly"
+
+
 @app.get("/api/analytics/{campaign_id}")
-async def get_campaign_analytics(campaign_id: str, user_id: str):
+async def get_campaign_analytics(campaign_id: str, user_id: str, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
     """
-    Fetch campaign analytics from Instantly
+    Campaign analytics: local event counters for campaigns tracked since launch, else an Instantly pull
     """
     try:
-        analytics = await instantly_service.get_campaign_analytics(campaign_id)
+        analytics, source = await _campaign_analytics(services, campaign_id)
 
         # Update database with latest stats
-        await db_service.update_campaign_stats(campaign_id, analytics)
+        await db.update_campaign_stats(campaign_id, analytics)
 
         return {
             "success": True,
             "campaign_id": campaign_id,
-            "analytics": analytics
+            "analytics": analytics,
+            "source": source
         }
 
     except Exception as e:
@@ -490,14 +596,41 @@ async def get_campaign_analytics(campaign_id: str, user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/analytics/{campaign_id}/sync")
+async def sync_campaign_events(campaign_id: str, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
+    """
+    Pull sent emails and replies since the last sync into the campaign's counters
+
+    Backfills campaigns that started before webhooks were configured; replays are ignored.
+    """
+    try:
+        emails = services.instantly.iter_campaign_emails(
+            campaign_id, starting_after=services.campaign_metrics.pull_cursor(campaign_id)
+        )
+        new_events = await services.campaign_metrics.pull(emails, campaign_id)
+        analytics, source = await _campaign_analytics(services, campaign_id)
+        await db.update_campaign_stats(campaign_id, analytics)
+
+        return {
+            "success": True,
+            "campaign_id": campaign_id,
+            "new_events": new_events,
+            "analytics": analytics,
+            "source": source
+        }
+    except Exception as e:
+        print(f"Error syncing campaign events: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/campaigns")
-async def get_user_campaigns(user_id: str):
+async def get_user_campaigns(user_id: str, limit: Optional[int] = None, offset: int = 0, db: StorageBackend = Depends(get_db)):
     """
-    Get all campaigns for a user
+    Get all campaigns for a user (pass limit/offset to page through them)
     """
     try:
         print(f"[DEBUG] Fetching campaigns for user_id: {user_id}")
-        campaigns = await db_service.get_user_campaigns(user_id)
+        campaigns = await db.get_user_campaigns(user_id, limit=limit, offset=offset)
         print(f"[DEBUG] Found {len(campaigns)} campaigns")
         if campaigns:
             print(f"[DEBUG] First campaign: {campaigns[0].get('url', 'no url')}")
@@ -510,8 +643,24 @@ async def get_user_campaigns(user_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/stats")
+async def get_user_stats(user_id: str, db: StorageBackend = Depends(get_db)):
+    """
+    Get aggregate campaign stats for a user's dashboard
+    """
+    try:
+        stats = await db.get_user_stats(user_id)
+        return {
+            "success": True,
+            "stats": stats
+        }
+    except Exception as e:
+        print(f"Error fetching stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/leads/{list_id}")
-async def get_leads_from_list(list_id: str):
+async def get_leads_from_list(list_id: str, services: ServiceContainer = Depends(get_services)):
     """
     Get enriched leads from a SuperSearch list
 
@@ -519,15 +668,15 @@ async def get_leads_from_list(list_id: str):
     """
     try:
         # First try to get enriched leads from history endpoint
-        leads = await instantly_service.get_supersearch_enrichment_history(list_id)
+        leads = await services.instantly.get_supersearch_enrichment_history(list_id)
 
         # If no leads from history, try the list endpoint
         if not leads:
-            leads = await instantly_service.get_leads_from_list(list_id, limit=100)
+            leads = await services.instantly.get_leads_from_list(list_id, limit=100)
 
         if not leads:
             # Check enrichment status
-            status = await instantly_service.get_supersearch_enrichment_status(list_id)
+            status = await services.instantly.get_supersearch_enrichment_status(list_id)
 
             return {
                 "success": False,
@@ -548,15 +697,15 @@ async def get_leads_from_list(list_id: str):
 
 
 @app.post("/api/create-email-account")
-async def create_email_account(user_id: str, email: str, smtp_config: dict):
+async def create_email_account(user_id: str, email: str, smtp_config: dict, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
     """
     Create a warmed email account in Instantly
     """
     try:
-        account = await instantly_service.create_email_account(email, smtp_config)
+        account = await services.instantly.create_email_account(email, smtp_config)
 
         # Save to database
-        await db_service.save_email_account(user_id, account)
+        await db.save_email_account(user_id, account)
 
         return {
             "success": True,
@@ -568,15 +717,13 @@ async def create_email_account(user_id: str, email: str, smtp_config: dict):
 
 
 @app.post("/api/upload-leads")
-async def upload_leads(request: LeadListRequest):
+async def upload_leads(request: LeadListRequest, services: ServiceContainer = Depends(get_services)):
     """
     Upload leads to Instantly
     """
     try:
-        lead_list_id = await instantly_service.upload_leads(
-            request.campaign_name,
-            request.leads
-        )
+        lead_list_id = await services.instantly.create_lead_list(name=request.campaign_name)
+        await services.instantly.upload_leads(None, lead_list_id, request.leads)
 
         return {
             "success": True,
@@ -587,12 +734,84 @@ async def upload_leads(request: LeadListRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/upload-leads/stream")
+async def upload_leads_stream(
+    request: Request,
+    campaign_name: str,
+    upload_id: Optional[str] = None,
+    lead_list_id: Optional[str] = None,
+    batch_size: int = 500,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Stream a raw CSV body (text/csv, chunked is fine) into a lead list
+
+    Rows are parsed, validated and de-duplicated as the body arrives and sent
+    to Instantly in batches. Open GET /api/upload-leads/{upload_id}/progress
+    first (pick any upload_id) to follow progress over SSE.
+    """
+    upload_id = upload_id or uuid.uuid4().hex
+    parser = CSVLeadParser()
+    uploaded = 0
+
+    try:
+        if not lead_list_id:
+            lead_list_id = await services.instantly.create_lead_list(name=campaign_name)
+        await services.upload_progress.update(upload_id, status="in_progress", lead_list_id=lead_list_id, uploaded=0, **parser.stats())
+
+        async for batch in iter_csv_lead_batches(request.stream(), parser, batch_size=batch_size):
+            uploaded += await services.instantly.add_leads_to_list(lead_list_id, batch)
+            await services.upload_progress.update(upload_id, uploaded=uploaded, **parser.stats())
+
+        await services.upload_progress.update(upload_id, status="completed", uploaded=uploaded, **parser.stats())
+        print(f"✅ Streamed {uploaded} leads into list {lead_list_id}: {parser.stats()}")
+
+        return {
+            "success": True,
+            "upload_id": upload_id,
+            "lead_list_id": lead_list_id,
+            "uploaded": uploaded,
+            **parser.stats()
+        }
+    except ValueError as e:
+        await services.upload_progress.update(upload_id, status="failed", error=str(e), uploaded=uploaded)
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error streaming leads upload: {str(e)}")
+        await services.upload_progress.update(upload_id, status="failed", error=str(e), uploaded=uploaded)
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/upload-leads/{upload_id}/progress")
+async def upload_leads_progress(upload_id: str, services: ServiceContainer = Depends(get_services)):
+    """
+    SSE progress for a streaming CSV upload (rows, valid, invalid, duplicates, uploaded)
+    """
+    async def progress_stream():
+        async for state in services.upload_progress.watch(upload_id):
+            if state is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"data: {json.dumps(state)}\n\n"
+
+    return StreamingResponse(
+        progress_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
+
 # ============================================================================
 # ICP-DRIVEN CAMPAIGN CREATION FLOW
 # ============================================================================
 
 class ICPAnalysisRequest(BaseModel):
     url: str
+    speculate: bool = True  # False opts out of pre-generating copy (only runs when SPECULATIVE_EMAIL_COPY is on)
 
 
 class LeadSearchRequest(BaseModel):
@@ -625,18 +844,37 @@ class ICPCampaignRequest(BaseModel):
 
 
 @app.post("/api/icp/analyze")
-async def analyze_url_for_icps(request: ICPAnalysisRequest):
+async def analyze_url_for_icps(
+    request: ICPAnalysisRequest,
+    http_request: Request,
+    user_id: Optional[str] = Depends(get_user_id),
+    services: ServiceContainer = Depends(get_services)
+):
     """
     Step 1: Analyze website and suggest 10 ICPs
     """
     try:
         print(f"🔍 Starting ICP analysis for URL: {request.url}")
-        icps = await ai_service.suggest_three_icps(request.url)
+        icps = await services.ai.suggest_three_icps(request.url)
         print(f"✅ ICP analysis complete. Found {len(icps)} ICPs")
+
+        # Start email copy for every suggestion now, so the one the user picks is ready sooner.
+        # The operator turns this on; the budget is charged to the signed-in user (from their ID token),
+        # else to the client address - never to anything in the body.
+        speculating = 0
+        if services.speculative_copy.enabled and request.speculate:
+            if user_id:
+                speculating = await services.speculative_copy.start(f"user:{user_id}", request.url, icps)
+            else:
+                client = http_request.client.host if http_request.client else "unknown"
+                # Several people can share an address: don't cancel each other's generations
+                speculating = await services.speculative_copy.start(f"ip:{client}", request.url, icps, replace_previous=False)
+
         return {
             "success": True,
             "icps": icps,
-            "url": request.url
+            "url": request.url,
+            "speculating": speculating
         }
     except Exception as e:
         import traceback
@@ -647,14 +885,14 @@ async def analyze_url_for_icps(request: ICPAnalysisRequest):
 
 
 @app.post("/api/icp/search-leads")
-async def search_leads_for_icp(request: LeadSearchRequest):
+async def search_leads_for_icp(request: LeadSearchRequest, services: ServiceContainer = Depends(get_services)):
     """
     Step 2: Search for leads based on selected ICP
     Returns enrichment_id to poll for completion
     """
     try:
         # Convert ICP description to SuperSearch filters using AI
-        search_filters = await ai_service.generate_supersearch_filters(
+        search_filters = await services.ai.generate_supersearch_filters(
             target_audience=request.target_audience,
             url=request.url
         )
@@ -663,7 +901,7 @@ async def search_leads_for_icp(request: LeadSearchRequest):
         print(json.dumps(search_filters, indent=2))
 
         # Start SuperSearch enrichment
-        search_result = await instantly_service.search_leads_supersearch(
+        search_result = await services.instantly.search_leads_supersearch(
             search_filters=search_filters,
             limit=request.lead_count,
             work_email_enrichment=True,
@@ -691,16 +929,20 @@ async def search_leads_for_icp(request: LeadSearchRequest):
 
 
 @app.get("/api/icp/leads/{enrichment_id}")
-async def get_lead_preview(enrichment_id: str, limit: int = 10):
+async def get_lead_preview(enrichment_id: str, limit: int = 10, since: Optional[str] = None, services: ServiceContainer = Depends(get_services)):
     """
     Step 3: Get preview of leads for user approval
     The enrichment_id is actually the resource_id (list ID) from SuperSearch
     We fetch leads directly from the list using /api/v2/leads/list
+
+    Pass the previous response's cursor as since to get only leads that are
+    new or changed ("delta": true); merge them into what you already have.
     """
     try:
         # Fetch leads directly from the list using resource_id (list ID)
         print(f"📋 Fetching leads from list: {enrichment_id}")
-        leads = await instantly_service.get_leads_from_list(enrichment_id, limit=limit)
+        leads = await services.instantly.get_lead_records_from_list(enrichment_id, limit=limit)
+        changed_leads, cursor, is_delta = services.lead_snapshots.diff(enrichment_id, leads, since=since)
 
         if not leads:
             print(f"⚠️ No leads found yet in list {enrichment_id}")
@@ -710,29 +952,34 @@ async def get_lead_preview(enrichment_id: str, limit: int = 10):
                 "leads": [],
                 "total_count": 0,
                 "enriching_count": 0,
+                "cursor": cursor,
+                "delta": is_delta,
                 "message": "Enrichment in progress... No leads found yet. Please wait a few seconds and try again."
             }
 
-        # Filter out leads without emails (still enriching)
-        enriched_leads = [lead for lead in leads if lead.get('email') and lead.get('email') != 'N/A']
-        enriching_count = len(leads) - len(enriched_leads)
+        # Leads without a valid email are still enriching
+        enriched_count = sum(1 for lead in leads if lead.email)
+        enriching_count = len(leads) - enriched_count
+        enriched_leads = [lead.to_dict() for lead in changed_leads if lead.email]
 
-        print(f"✅ Found {len(leads)} total leads in list")
-        print(f"   {len(enriched_leads)} with emails (ready)")
-        print(f"   {enriching_count} still enriching")
-
-        if enriched_leads:
-            print(f"   Sample lead: {enriched_leads[0].get('email', 'N/A')} - {enriched_leads[0].get('first_name', '')} {enriched_leads[0].get('last_name', '')}")
+        if is_delta:
+            print(f"✅ {len(leads)} leads in list, {len(enriched_leads)} new or changed since {since}")
+        else:
+            print(f"✅ Found {len(leads)} total leads in list")
+            print(f"   {enriched_count} with emails (ready)")
+            print(f"   {enriching_count} still enriching")
 
         # Return enriched leads, or if none ready yet, return all with a message
-        if enriched_leads:
+        if enriched_count:
             return {
                 "success": True,
                 "enrichment_id": enrichment_id,
                 "leads": enriched_leads,
-                "total_count": len(enriched_leads),
+                "total_count": enriched_count,
                 "enriching_count": enriching_count,
-                "message": f"Found {len(enriched_leads)} enriched leads" + (f" ({enriching_count} still enriching)" if enriching_count > 0 else "")
+                "cursor": cursor,
+                "delta": is_delta,
+                "message": f"Found {enriched_count} enriched leads" + (f" ({enriching_count} still enriching)" if enriching_count > 0 else "")
             }
         else:
             # No leads ready yet, return status
@@ -742,6 +989,8 @@ async def get_lead_preview(enrichment_id: str, limit: int = 10):
                 "leads": [],
                 "total_count": 0,
                 "enriching_count": len(leads),
+                "cursor": cursor,
+                "delta": is_delta,
                 "message": f"Enrichment in progress... {len(leads)} leads found, waiting for email verification"
             }
     except Exception as e:
@@ -749,6 +998,32 @@ async def get_lead_preview(enrichment_id: str, limit: int = 10):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/icp/leads/{enrichment_id}/wait")
+async def wait_for_enriched_leads(
+    enrichment_id: str,
+    since: int = 0,
+    target: Optional[int] = None,
+    timeout: float = 25.0,
+    limit: int = 100,
+    services: ServiceContainer = Depends(get_services)
+):
+    """
+    Long-poll: hold until new leads are enriched (or target is reached), then return only those
+
+    Pass the previous response's cursor as since. Clients waiting on the same
+    enrichment share one server-side poll loop.
+    """
+    try:
+        timeout = min(max(timeout, 0.0), 55.0)
+        result = await services.enrichment_watcher.wait(
+            enrichment_id, since=since, target=target, timeout=timeout, limit=limit
+        )
+        return {"success": True, **result}
+    except Exception as e:
+        print(f"Error waiting for enriched leads: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class EmailGenerationRequest(BaseModel):
     url: str
     selected_icp: dict  # The ICP object with name, description, pain_points, etc.
@@ -757,23 +1032,23 @@ class EmailGenerationRequest(BaseModel):
 class EmailRegenerateRequest(BaseModel):
     url: str
     selected_icp: dict
-    variant_index: int  # Which variant to regenerate (0, 1, or 2)
+    variant_index: int = Field(ge=0, le=2)  # Which variant to regenerate (0, 1, or 2)
+    variants: Optional[list] = None  # The current variants, so the new one doesn't repeat them
 
 
 @app.post("/api/icp/generate-emails")
-async def generate_icp_emails(request: EmailGenerationRequest):
+async def generate_icp_emails(request: EmailGenerationRequest, services: ServiceContainer = Depends(get_services)):
     """
     Step 3.5: Generate email variants based on ICP and website analysis
     Returns 3 email variants for user approval/editing
     """
     try:
-        target_audience = request.selected_icp.get("target_audience", "")
-        pain_points = request.selected_icp.get("pain_points", [])
-
         # Add pain points to context for better email generation
-        context = f"{target_audience}. Key pain points: {', '.join(pain_points)}"
+        context = icp_email_context(request.selected_icp)
 
-        variants = await ai_service.generate_email_copy(
+        # Picked one of the speculated ICPs: stop the others, wait for this one's copy
+        services.speculative_copy.claim(request.url, context)
+        variants = await services.ai.generate_email_copy(
             url=request.url,
             target_audience=context
         )
@@ -789,27 +1064,22 @@ async def generate_icp_emails(request: EmailGenerationRequest):
 
 
 @app.post("/api/icp/regenerate-email")
-async def regenerate_single_variant(request: EmailRegenerateRequest):
+async def regenerate_single_variant(request: EmailRegenerateRequest, services: ServiceContainer = Depends(get_services)):
     """
     Regenerate a single email variant
     """
     try:
-        target_audience = request.selected_icp.get("target_audience", "")
-        pain_points = request.selected_icp.get("pain_points", [])
-        context = f"{target_audience}. Key pain points: {', '.join(pain_points)}"
-
-        # Generate 3 variants and return the one at the requested index
-        variants = await ai_service.generate_email_copy(
+        # One new email for this slot, written to differ from the others
+        variant = await services.ai.regenerate_email_variant(
             url=request.url,
-            target_audience=context
+            target_audience=icp_email_context(request.selected_icp),
+            variant_index=request.variant_index,
+            current_variants=request.variants
         )
 
-        # Return the variant at the requested index (or first one if index out of range)
-        variant_index = min(request.variant_index, len(variants) - 1)
-
         return {
             "success": True,
-            "variant": variants[variant_index],
+            "variant": variant,
             "variant_index": request.variant_index
         }
     except Exception as e:
@@ -818,27 +1088,23 @@ async def regenerate_single_variant(request: EmailRegenerateRequest):
 
 
 @app.post("/api/icp/match-domains")
-async def match_dfy_domains(request: DFYDomainMatchRequest):
+async def match_dfy_domains(request: DFYDomainMatchRequest, services: ServiceContainer = Depends(get_services)):
     """
     Step 4: Get AI-matched DFY domains AND existing email accounts for the business
     """
     try:
-        # Import DomainService
-        from .services.domain_service import DomainService
-        domain_service = DomainService(os.getenv("INSTANTLY_API_KEY"))
-
         print(f"🔍 Fetching domains and accounts for {request.url}...")
 
-        # Get available pre-warmed DFY domains
-        available_domains = await domain_service.get_prewarmed_domains(
+        # Get available pre-warmed DFY domains (indexed, refreshed in the background)
+        available_domains = await services.domain_inventory.query(
             extensions=["com", "org", "co"]
         )
 
-        print(f"📊 Found {len(available_domains)} pre-warmed DFY domains from API")
+        print(f"📊 Found {len(available_domains)} pre-warmed DFY domains in inventory")
 
         # Get existing email accounts
         print(f"📧 Fetching existing email accounts...")
-        accounts = await instantly_service.get_accounts(limit=100, status=1)  # Only active accounts
+        accounts = await services.instantly.get_accounts(limit=100, status=1)  # Only active accounts
 
         # Extract unique domains from accounts
         existing_account_domains = list(set(
@@ -855,7 +1121,7 @@ async def match_dfy_domains(request: DFYDomainMatchRequest):
         matched_dfy_domains = []
         if available_domains:
             print(f"🤖 Using AI to match {len(available_domains)} DFY domains to business...")
-            matched_dfy_domains = await ai_service.match_dfy_domains_to_business(
+            matched_dfy_domains = await services.ai.match_dfy_domains_to_business(
                 url=request.url,
                 available_domains=available_domains
             )
@@ -876,7 +1142,7 @@ async def match_dfy_domains(request: DFYDomainMatchRequest):
 
 
 @app.post("/api/icp/create-campaign")
-async def create_icp_campaign(request: ICPCampaignRequest):
+async def create_icp_campaign(request: ICPCampaignRequest, services: ServiceContainer = Depends(get_services)):
     """
     Step 5: Create campaign with approved leads and selected domains
     This is a streaming endpoint that returns SSE updates
@@ -897,13 +1163,14 @@ async def create_icp_campaign(request: ICPCampaignRequest):
             yield f"data: {json.dumps({'step': 2, 'status': 'in_progress', 'message': 'Creating campaign in Instantly.ai'})}\n\n"
             await asyncio.sleep(0.5)
 
-            campaign_result = await instantly_service.create_campaign(
+            campaign_result = await services.instantly.create_campaign(
                 name=request.campaign_name,
                 variants=variants,
                 email_accounts=request.selected_accounts if request.selected_accounts else None
             )
 
             campaign_id = campaign_result.get("id")
+            services.campaign_metrics.track(campaign_id)
             accounts_msg = f" with {len(request.selected_accounts)} email accounts" if request.selected_accounts else ""
             log_msg = f'Campaign created with ID: {campaign_id}{accounts_msg}'
             yield f"data: {json.dumps({'step': 2, 'status': 'completed', 'message': 'Campaign created', 'log': log_msg})}\n\n"
@@ -913,7 +1180,7 @@ async def create_icp_campaign(request: ICPCampaignRequest):
             yield f"data: {json.dumps({'step': 3, 'status': 'in_progress', 'message': f'Adding {request.lead_count} leads to campaign'})}\n\n"
             await asyncio.sleep(0.5)
 
-            success = await instantly_service.move_leads_to_campaign(
+            success = await services.instantly.move_leads_to_campaign(
                 campaign_id=campaign_id,
                 lead_list_id=request.enrichment_id,
                 limit=request.lead_count
@@ -960,7 +1227,8 @@ async def create_icp_campaign(request: ICPCampaignRequest):
             campaign_data["variants"] = copy_variants
 
             # Save to Firestore
-            await db_service.save_campaign(
+            db = await services.get_db()
+            await db.save_campaign(
                 user_id=request.user_id,
                 campaign_id=campaign_id,
                 url=request.url,
@@ -1003,13 +1271,13 @@ class LinkedInCampaignRequest(BaseModel):
 
 
 @app.get("/api/linkedin/accounts")
-async def get_linkedin_accounts():
+async def get_linkedin_accounts(services: ServiceContainer = Depends(get_services)):
     """
     Get all connected LinkedIn accounts from Unipile
     """
     try:
         print("[DEBUG] Fetching LinkedIn accounts from Unipile...")
-        accounts = await unipile_service.get_linkedin_accounts()
+        accounts = await services.unipile.get_linkedin_accounts()
         print(f"[DEBUG] LinkedIn accounts found: {len(accounts)}")
         if accounts:
             print(f"[DEBUG] First account: {accounts[0]}")
@@ -1034,7 +1302,7 @@ class LinkedInConnectRequest(BaseModel):
 
 
 @app.post("/api/linkedin/connect")
-async def create_linkedin_auth_link(request: LinkedInConnectRequest):
+async def create_linkedin_auth_link(request: LinkedInConnectRequest, services: ServiceContainer = Depends(get_services)):
     """
     Generate a hosted authentication link for connecting LinkedIn account
     """
@@ -1047,7 +1315,7 @@ async def create_linkedin_auth_link(request: LinkedInConnectRequest):
             success_url += f"&campaign_id={request.campaign_id}"
             failure_url += f"&campaign_id={request.campaign_id}"
 
-        auth_url = await unipile_service.create_hosted_auth_link(
+        auth_url = await services.unipile.create_hosted_auth_link(
             provider="LINKEDIN",
             success_redirect_url=success_url,
             failure_redirect_url=failure_url
@@ -1061,13 +1329,13 @@ async def create_linkedin_auth_link(request: LinkedInConnectRequest):
 
 
 @app.post("/api/linkedin/generate-message")
-async def generate_linkedin_message(request: LinkedInCampaignRequest):
+async def generate_linkedin_message(request: LinkedInCampaignRequest, db: StorageBackend = Depends(get_db)):
     """
     Generate a LinkedIn message preview for the campaign using web search to analyze the website
     """
     try:
         # Get campaign data from Firebase
-        campaign_data = await db_service.get_campaign(request.user_id, request.campaign_id)
+        campaign_data = await db.get_campaign(request.user_id, request.campaign_id)
 
         if not campaign_data:
             raise HTTPException(status_code=404, detail="Campaign not found")
@@ -1157,13 +1425,13 @@ Your response must start with "Hi [First Name]," and end with a question mark. N
 
 
 @app.get("/api/linkedin/campaign-leads/{campaign_id}")
-async def get_campaign_leads(campaign_id: str, user_id: str, limit: int = 10):
+async def get_campaign_leads(campaign_id: str, user_id: str, limit: int = 10, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
     """
     Get leads from a campaign for preview
     """
     try:
         # Get campaign data from Firebase
-        campaign_data = await db_service.get_campaign(user_id, campaign_id)
+        campaign_data = await db.get_campaign(user_id, campaign_id)
 
         if not campaign_data:
             raise HTTPException(status_code=404, detail="Campaign not found")
@@ -1178,30 +1446,11 @@ async def get_campaign_leads(campaign_id: str, user_id: str, limit: int = 10):
                 "message": "No lead list associated with this campaign"
             }
 
-        # Get leads from Instantly
-        leads = await instantly_service.get_leads_from_list(supersearch_list_id, limit=limit)
+        # Get leads from Instantly (LinkedIn URLs are already canonicalized)
+        leads = await services.instantly.get_lead_records_from_list(supersearch_list_id, limit=limit)
 
         # Filter to only include leads with LinkedIn URLs
-        # LinkedIn URL might be in 'linkedin_url', 'linkedin', or 'personalization.linkedin'
-        linkedin_leads = []
-        for lead in leads:
-            linkedin_url = (
-                lead.get("linkedin_url") or
-                lead.get("linkedin") or
-                lead.get("personalization", {}).get("linkedin") or
-                lead.get("personalization", {}).get("linkedIn") or
-                ""
-            )
-
-            if linkedin_url:
-                linkedin_leads.append({
-                    "first_name": lead.get("first_name", ""),
-                    "last_name": lead.get("last_name", ""),
-                    "email": lead.get("email", ""),
-                    "company": lead.get("company_name", lead.get("company", "")),
-                    "title": lead.get("personalization", {}).get("job title", lead.get("title", "")),
-                    "linkedin_url": linkedin_url
-                })
+        linkedin_leads = [lead.to_linkedin_preview() for lead in leads if lead.linkedin]
 
         return {
             "success": True,
@@ -1215,13 +1464,13 @@ async def get_campaign_leads(campaign_id: str, user_id: str, limit: int = 10):
 
 
 @app.post("/api/linkedin/launch-campaign")
-async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
+async def launch_linkedin_campaign(request: LinkedInCampaignRequest, services: ServiceContainer = Depends(get_services), db: StorageBackend = Depends(get_db)):
     """
     Launch a LinkedIn campaign for existing email campaign
     """
     try:
         # Step 1: Check if LinkedIn account is connected
-        linkedin_accounts = await unipile_service.get_linkedin_accounts()
+        linkedin_accounts = await services.unipile.get_linkedin_accounts()
 
         if not linkedin_accounts:
             return {
@@ -1235,7 +1484,7 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
         account_id = linkedin_account.get("id")
 
         # Step 2: Get campaign data from Firebase
-        campaign_data = await db_service.get_campaign(request.user_id, request.campaign_id)
+        campaign_data = await db.get_campaign(request.user_id, request.campaign_id)
 
         if not campaign_data:
             raise HTTPException(status_code=404, detail="Campaign not found")
@@ -1246,8 +1495,8 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
         if not supersearch_list_id:
             raise HTTPException(status_code=400, detail="Campaign has no leads associated")
 
-        # Get leads from Instantly
-        leads = await instantly_service.get_leads_from_list(supersearch_list_id, limit=100)
+        # Get leads from Instantly (LinkedIn URLs are already canonicalized)
+        leads = await services.instantly.get_lead_records_from_list(supersearch_list_id, limit=100)
 
         if not leads or len(leads) == 0:
             raise HTTPException(status_code=400, detail="No leads found for this campaign")
@@ -1274,47 +1523,29 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
         print(f"[DEBUG] Message template: {message_template[:100]}...")
 
         for lead in leads[:10]:  # Limit to first 10 leads for testing
-            # Check multiple possible field names for LinkedIn URL (same logic as campaign-leads endpoint)
-            linkedin_url = (
-                lead.get("linkedin_url") or
-                lead.get("linkedin") or
-                lead.get("personalization", {}).get("linkedin") or
-                lead.get("personalization", {}).get("linkedIn") or
-                ""
-            )
-
-            # Normalize LinkedIn URL format - ensure it starts with https://
-            if linkedin_url and not linkedin_url.startswith("http"):
-                if linkedin_url.startswith("linkedin.com"):
-                    linkedin_url = f"https://www.{linkedin_url}"
-                elif linkedin_url.startswith("www.linkedin.com"):
-                    linkedin_url = f"https://{linkedin_url}"
+            linkedin_url = lead.linkedin
 
             # Extract profile identifier from LinkedIn URL for Unipile
             # From "https://www.linkedin.com/in/samantha-statham-acxs" -> "samantha-statham-acxs"
-            profile_id = linkedin_url
-            if linkedin_url and "/in/" in linkedin_url:
-                # Extract the part after /in/
-                profile_id = linkedin_url.split("/in/")[1].rstrip("/")
-                print(f"[DEBUG] Extracted profile ID: {profile_id}")
+            profile_id = linkedin_profile_id(linkedin_url) or linkedin_url
 
-            print(f"[DEBUG] Processing lead: {lead.get('email')} - LinkedIn URL: {linkedin_url} - Profile ID: {profile_id}")
+            print(f"[DEBUG] Processing lead: {lead.email} - LinkedIn URL: {linkedin_url} - Profile ID: {profile_id}")
 
             if not linkedin_url:
-                print(f"[DEBUG] Skipping lead {lead.get('email')} - no LinkedIn URL")
+                print(f"[DEBUG] Skipping lead {lead.email} - no LinkedIn URL")
                 failed_count += 1
                 continue
 
             try:
                 # Personalize message with lead's name
-                first_name = lead.get("first_name", "there")
+                first_name = lead.first_name or "there"
                 personalized_message = message_template.replace("[First Name]", first_name)
                 print(f"[DEBUG] Personalized message for {first_name}: {personalized_message}")
 
                 # Try to send a direct message first (only works if already connected)
                 try:
                     print(f"[DEBUG] Attempting to send direct message to {linkedin_url}")
-                    result = await unipile_service.send_linkedin_message(
+                    result = await services.unipile.send_linkedin_message(
                         account_id=account_id,
                         attendees=[linkedin_url],
                         text=personalized_message
@@ -1322,7 +1553,7 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
                     print(f"[DEBUG] Successfully sent direct message to {first_name}")
                     sent_count += 1
                     results.append({
-                        "lead": f"{first_name} {lead.get('last_name', '')}",
+                        "lead": f"{first_name} {lead.last_name or ''}",
                         "status": "message_sent",
                         "type": "direct_message"
                     })
@@ -1340,7 +1571,7 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
 
                         try:
                             # Use profile slug - Unipile will fetch the provider_id
-                            result = await unipile_service.send_linkedin_connection_request(
+                            result = await services.unipile.send_linkedin_connection_request(
                                 account_id=account_id,
                                 profile_identifier=profile_id,
                                 message=connection_note
@@ -1352,7 +1583,7 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
                             print(f"[DEBUG] Connection request failed: {str(conn_error)}")
                             raise conn_error
                         results.append({
-                            "lead": f"{first_name} {lead.get('last_name', '')}",
+                            "lead": f"{first_name} {lead.last_name or ''}",
                             "status": "connection_request_sent",
                             "type": "connection_request",
                             "note": "Message sent as connection note"
@@ -1367,7 +1598,7 @@ async def launch_linkedin_campaign(request: LinkedInCampaignRequest):
             except Exception as e:
                 failed_count += 1
                 results.append({
-                    "lead": f"{lead.get('first_name', '')} {lead.get('last_name', '')}",
+                    "lead": f"{lead.first_name or ''} {lead.last_name or ''}",
                     "status": "failed",
                     "error": str(e)
                 })
@@ -4,17 +4,13 @@ API routes for domain and email account management
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
-import os
+from ..dependencies import get_domain_inventory, get_domain_service
 from ..services.domain_service import DomainService
+from ..services.domain_inventory import DomainInventory
 
 router = APIRouter()
 
 
-def get_domain_service():
-    """Dependency to get domain service instance"""
-    return DomainService(os.getenv("INSTANTLY_API_KEY"))
-
-
 class DomainSearchRequest(BaseModel):
     extensions: Optional[List[str]] = ["com", "org", "co"]
     search: Optional[str] = None
@@ -56,13 +52,13 @@ class CancelAccountsRequest(BaseModel):
 @router.post("/domains/prewarmed")
 async def get_prewarmed_domains(
     request: DomainSearchRequest,
-    domain_service: DomainService = Depends(get_domain_service)
+    inventory: DomainInventory = Depends(get_domain_inventory)
 ):
     """
-    Get list of available pre-warmed domains
+    Get list of available pre-warmed domains (served from the DFY domain index)
     """
     try:
-        domains = await domain_service.get_prewarmed_domains(
+        domains = await inventory.query(
             extensions=request.extensions,
             search=request.search
         )
@@ -75,19 +71,50 @@ async def get_prewarmed_domains(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/domains/inventory")
+async def get_domain_inventory_stats(
+    inventory: DomainInventory = Depends(get_domain_inventory)
+):
+    """
+    Size and age of the DFY domain index
+    """
+    return {
+        "success": True,
+        **inventory.stats()
+    }
+
+
+@router.post("/domains/inventory/refresh")
+async def refresh_domain_inventory(
+    inventory: DomainInventory = Depends(get_domain_inventory)
+):
+    """
+    Rebuild the DFY domain index now (e.g. right after an order)
+    """
+    try:
+        count = await inventory.refresh()
+        return {
+            "success": True,
+            "domains": count
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/domains/check")
 async def check_domains(
     request: CheckDomainsRequest,
     domain_service: DomainService = Depends(get_domain_service)
 ):
     """
-    Check availability of domains
+    Check availability of domains (any number; checked in parallel chunks, results cached briefly)
     """
     try:
         availability = await domain_service.check_domain_availability(request.domains)
         return {
             "success": True,
-            "results": availability
+            "results": availability,
+            "count": len(availability)
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,78 @@
+"""
+API routes for incoming Instantly webhooks
+"""
+from fastapi import APIRouter, HTTPException, Depends, Request
+from typing import Optional
+from ..dependencies import get_webhook_dispatcher
+from ..services.webhook_events import WebhookDispatcher
+
+router = APIRouter()
+
+
+def _provided_secret(request: Request) -> Optional[str]:
+    """Secret from X-Webhook-Secret, a Bearer token, or ?token= (in that order)"""
+    secret = request.headers.get("x-webhook-secret")
+    if secret:
+        return secret
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        return authorization[7:].strip()
+    return request.query_params.get("token")
+
+
+@router.post("/webhooks/instantly")
+async def receive_instantly_webhook(
+    request: Request,
+    dispatcher: WebhookDispatcher = Depends(get_webhook_dispatcher)
+):
+    """
+    Receive Instantly webhook events (a single event or a JSON array)
+
+    Configure the webhook in Instantly with header X-Webhook-Secret set to
+    INSTANTLY_WEBHOOK_SECRET. Redelivered events are acknowledged but ignored.
+    """
+    if not dispatcher.enabled:
+        raise HTTPException(status_code=503, detail="Webhook receiver not configured")
+    if not dispatcher.verify(_provided_secret(request)):
+        raise HTTPException(status_code=401, detail="Invalid webhook secret")
+
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body must be JSON")
+
+    events = payload if isinstance(payload, list) else [payload]
+    accepted = duplicates = invalid = 0
+
+    for item in events:
+        try:
+            event = await dispatcher.dispatch(item)
+        except ValueError as e:
+            print(f"⚠️ Rejected webhook event: {str(e)}")
+            invalid += 1
+            continue
+        if event is None:
+            duplicates += 1
+        else:
+            accepted += 1
+
+    if invalid and not accepted and not duplicates:
+        raise HTTPException(status_code=422, detail="No valid events in webhook body")
+
+    return {
+        "success": True,
+        "accepted": accepted,
+        "duplicates": duplicates,
+        "invalid": invalid
+    }
+
+
+@router.get("/webhooks/instantly/stats")
+async def get_webhook_stats(dispatcher: WebhookDispatcher = Depends(get_webhook_dispatcher)):
+    """
+    Delivery counters for the Instantly webhook receiver
+    """
+    return {
+        "success": True,
+        "stats": dispatcher.stats()
+    }
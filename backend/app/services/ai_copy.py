@@ -1,25 +1,154 @@
-import httpx
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
+import asyncio
+import copy
+import hashlib
 import json
 import os
 
+import httpx
+
+from .ai_scheduler import Priority, QueueTimeout
+from .icp_filter_compiler import VALID_INDUSTRIES, ICPFilterCompiler
+from .openai_client import OpenAIClient, extract_json, response_output_text
+from .semantic_cache import SemanticCache
+from .state_backend import MemoryStateBackend, StateBackend
+
+# Filter format, rules and examples shared by the single and batched SuperSearch prompts
+SUPERSEARCH_FILTER_GUIDE = """{
+  "locations": [],  // Array of location objects. Format: [{"city": "San Francisco", "state": "California", "country": "United States"}, {"city": "London", "state": "", "country": "United Kingdom"}]. Use empty string "" for state if not applicable (e.g., UK cities). ALWAYS include city, state, and country fields.
+  "level": [],  // Options: "Entry level", "Mid-Senior level", "Director", "Associate", "Owner", "Executive", "Manager", "Senior", "Chief X Officer (CxO)", "Internship", "Vice President (VP)", "Unpaid / Internship", "Partner"
+  "department": [],  // Options: "Engineering", "Finance & Administration", "Human Resources", "IT & IS", "Marketing", "Operations", "Sales", "Support", "Other"
+  "employee_count": [],  // Options: "0 - 25", "25 - 100", "100 - 250", "250 - 1000", "1K - 10K", "10K - 50K", "50K - 100K", "> 100K"
+  "revenue": [],  // Options: "$0 - 1M", "$1 - 10M", "$10 - 50M", "$50 - 100M", "$100 - 250M", "$250 - 500M", "$500M - 1B", "> $1B"
+  "title": {"include": [], "exclude": []},  // Job titles as PARTIAL MATCH strings (e.g., ["CEO", "Founder", "Marketing Director"]). Use specific titles when mentioned.
+  "keyword_filter": {"include": [], "exclude": ""},  // Keywords for company descriptions. include is array, exclude is empty string. Use SPARINGLY - prefer industry/title filters.
+  "industry": {"include": [], "exclude": []},  // MUST use EXACT industry names from this list: "Agriculture & Mining", "Business Services", "Computers & Electronics", "Consumer Services", "Education", "Energy & Utilities", "Financial Services", "Government", "Healthcare, Pharmaceuticals, & Biotech", "Manufacturing", "Media & Entertainment", "Non-Profit", "Other", "Real Estate & Construction", "Retail", "Software & Internet", "Telecommunications", "Transportation & Storage", "Travel, Recreation, and Leisure", "Wholesale & Distribution"
+  "funding_type": [],  // Options: "angel", "seed", "pre_seed", "series_a", "series_b", "series_c", "series_d", "series_e", "debt_financing", "convertible_note", "equity_crowdfunding", "grant", "corporate_round", "private_equity", "post_ipo_equity"
+  "news": []  // Options: "launches", "expands_offices_to", "hires", "partners_with", "receives_financing", "recognized_as", "closes_offices_in", "acquires", "is_acquired_by", "goes_public", "reports_earnings", "announces_layoffs", "announces_new_product"
+}
+
+CRITICAL RULES:
+1. Return ONLY the JSON object, no explanations
+2. Use EXACT values from the options provided
+3. Omit filters that don't apply (don't include empty arrays/objects)
+4. For "locations", ALWAYS include all 3 fields (city, state, country). Use empty string "" for missing values
+5. For "title", extract job titles and use them in include array. These are PARTIAL MATCH. Multiple titles: ["CEO", "Founder"]
+6. For "level", use ALONGSIDE title when applicable: "founder" -> "Owner", "executive" -> "Executive", "VP" -> "Vice President (VP)", "CxO/C-suite" -> "Chief X Officer (CxO)", "senior" -> "Senior", "manager" -> "Manager", "director" -> "Director"
+7. For "industry", map tech/software/SaaS -> "Software & Internet", cybersecurity -> "Software & Internet", construction -> "Real Estate & Construction", healthcare -> "Healthcare, Pharmaceuticals, & Biotech"
+8. For "employee_count", be generous with ranges. "startup" -> ["0 - 25", "25 - 100"], "10-50" -> ["25 - 100"], "100-500" -> ["100 - 250", "250 - 1000"], "enterprise" -> ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"]
+9. For "revenue", "Series A" startups typically -> ["$10 - 50M"], well-funded -> ["$50 - 100M", "$100 - 250M"]
+10. For "keyword_filter", use VERY SPARINGLY - only for specific tech/products that don't fit elsewhere. Most things should go to industry/title
+11. AVOID using keyword_filter for industries - use the industry filter instead
+
+Examples (based on Instantly AI behavior):
+- "CEOs at tech companies" -> {"title": {"include": ["CEO"]}, "industry": {"include": ["Computers & Electronics", "Software & Internet", "Telecommunications"]}}
+- "Marketing directors in San Francisco" -> {"title": {"include": ["Marketing Director"]}, "locations": [{"city": "San Francisco", "state": "California", "country": "United States"}]}
+- "CTOs at Series A startups in New York with 10-50 employees" -> {"title": {"include": ["CTO"]}, "locations": [{"city": "New York", "state": "New York", "country": "United States"}], "employee_count": ["25 - 100"], "revenue": ["$10 - 50M"]}
+- "Founders at cybersecurity companies" -> {"title": {"include": ["Founder"]}, "industry": {"include": ["Software & Internet"]}}
+- "CEOs and founders at SaaS companies" -> {"title": {"include": ["CEO", "Founder"]}, "industry": {"include": ["Software & Internet"]}}
+- "Senior HR managers at construction companies" -> {"title": {"include": ["HR Manager"]}, "level": ["Senior"], "department": ["Human Resources"], "industry": {"include": ["Real Estate & Construction"]}}
+- "VP of Sales at B2B software companies in London with 100-500 employees" -> {"title": {"include": ["VP of Sales"]}, "locations": [{"city": "London", "state": "", "country": "United Kingdom"}], "industry": {"include": ["Software & Internet"]}, "employee_count": ["100 - 250", "250 - 1000"]}
+- "Chief Technology Officers at enterprise SaaS companies" -> {"title": {"include": ["Chief Technology Officer"]}, "level": ["Chief X Officer (CxO)"], "industry": {"include": ["Software & Internet"]}, "employee_count": ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"]}
+"""
+
+# What the copy calls summarize about the sender's website, cached for regenerate_email_variant
+WEBSITE_SUMMARY_SPEC = (
+    "under 150 words of plain text on what the product/service does, who it is for, the problems it solves, "
+    "and concrete features, proof points, customers or numbers worth citing"
+)
+
+# The angle of each of the three variants generate_email_copy writes (same wording as its prompt)
+EMAIL_VARIANT_ANGLES = [
+    "Pain point → Solution (focus on a specific problem {target_audience} faces)",
+    "Benefit/outcome-focused (focus on results {target_audience} wants to achieve)",
+    "Question/curiosity approach (ask a thought-provoking question relevant to {target_audience})",
+]
+
+
+def icp_email_context(icp: Dict) -> str:
+    """
+    Target audience text for generate_email_copy from a suggested ICP (audience plus pain points)
+    """
+    target_audience = icp.get("target_audience", "")
+    pain_points = icp.get("pain_points", [])
+    return f"{target_audience}. Key pain points: {', '.join(pain_points)}"
+
 
 class AICopyService:
     """
     Service for generating email copy using OpenAI with web search
     """
 
-    def __init__(self, api_key: str, model: str = "gpt-4o"):
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o",
+        openai: Optional[OpenAIClient] = None,
+        state: Optional[StateBackend] = None
+    ):
         self.api_key = api_key
         self.model = model
         self.base_url = "https://api.openai.com/v1"
+        # Pooled, rate-limited HTTP client (the service container passes one built on the shared state)
+        self.openai = openai or OpenAIClient(api_key)
+        # Generated email copy per (url, ICP), shared by every worker; one generation per key at a time
+        self.state = state or MemoryStateBackend()
+        self.copy_cache_ttl = float(os.getenv("EMAIL_COPY_CACHE_TTL", "3600"))
+        # What the sender's website offers, summarized by the web-search call that writes the copy; reused by regenerate_email_variant
+        self.website_analysis_ttl = float(os.getenv("WEBSITE_ANALYSIS_TTL", str(24 * 3600)))
+        # Common ICP phrasings compile to filters locally; only low-confidence ones reach the model
+        self.filter_compiler = ICPFilterCompiler(
+            min_confidence=float(os.getenv("ICP_COMPILER_MIN_CONFIDENCE", "0.85"))
+        )
+        # Model-generated filters, reused for near-identical ICPs ("SaaS founders US" ~ "US SaaS founders")
+        self.filter_cache = SemanticCache(
+            threshold=float(os.getenv("SUPERSEARCH_CACHE_THRESHOLD", "0.8")),
+            ttl=float(os.getenv("SUPERSEARCH_CACHE_TTL", str(7 * 24 * 3600)))
+        )
+        # generate_supersearch_filters_batch: ICPs per model request, and requests in flight
+        self.batch_pack_size = int(os.getenv("SUPERSEARCH_BATCH_PACK_SIZE", "5"))
+        self.batch_concurrency = int(os.getenv("SUPERSEARCH_BATCH_CONCURRENCY", "8"))
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled OpenAI client (on shutdown)
+        """
+        await self.openai.aclose()
+
+    def copy_cache_key(self, url: str, target_audience: str) -> str:
+        """
+        State backend key holding the email variants for url + ICP
+        """
+        audience = " ".join((target_audience or "").lower().split())
+        digest = hashlib.sha256(f"{self.model}|{url.strip().lower()}|{audience}".encode("utf-8")).hexdigest()
+        return f"ai:email_copy:{digest[:32]}"
 
-    async def generate_email_copy(self, url: str, target_audience: str) -> List[Dict]:
+    async def generate_email_copy(self, url: str, target_audience: str, priority: str = "interactive") -> List[Dict]:
         """
         Generate multiple email variants for A/B testing using web search to analyze the URL
         Returns: [{"subject": "...", "body": "..."}, ...]
-        """
 
+        Variants are cached per url + ICP (EMAIL_COPY_CACHE_TTL). If another request
+        (or a speculative pre-generation) is already generating them, this waits for
+        its result instead of paying for a second call. Fallback copy is never cached.
+        The same call summarizes the website for regenerate_email_variant.
+
+        priority is the OpenAI scheduler class ("interactive", "batch" or "speculative").
+        """
+        variants = await self.state.cached_call(
+            self.copy_cache_key(url, target_audience),
+            lambda: self._model_email_copy(url, target_audience, priority=priority),
+            ttl=self.copy_cache_ttl,
+            lock_ttl=180.0
+        )
+        if variants is None:
+            return self._get_fallback_variants(url, target_audience)
+        return variants
+
+    async def _model_email_copy(self, url: str, target_audience: str, priority: Union[str, Priority] = "interactive") -> Optional[List[Dict]]:
+        """
+        Ask the model for three email variants and a website summary (None if the call or its JSON fails)
+        """
         prompt = f"""Visit {url} using web search to analyze what this product/service does.
 
 IMPORTANT: You are writing cold emails FROM the company at {url} TO their ideal customer profile (ICP): {target_audience}
@@ -40,98 +169,244 @@ Variant 1: Pain point → Solution (focus on a specific problem {target_audience
 Variant 2: Benefit/outcome-focused (focus on results {target_audience} wants to achieve)
 Variant 3: Question/curiosity approach (ask a thought-provoking question relevant to {target_audience})
 
-CRITICAL: Return ONLY the JSON array below. NO explanations, NO markdown, NO extra text. Start your response with [ and end with ]:
+Also write "website_summary": {WEBSITE_SUMMARY_SPEC}
 
-[
-  {{
-    "subject": "subject line here",
-    "body": "email body with {{{{firstName}}}} and {{{{company}}}}"
-  }},
-  {{
-    "subject": "second subject",
-    "body": "second email body"
-  }},
-  {{
-    "subject": "third subject",
-    "body": "third email body"
-  }}
-]"""
+CRITICAL: Return ONLY the JSON object below. NO explanations, NO markdown, NO extra text. Start your response with {{ and end with }}:
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            # Use Responses API for web search
-            response = await client.post(
-                f"{self.base_url}/responses",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "tools": [{"type": "web_search"}],
-                    "input": prompt
-                }
-            )
+{{
+  "website_summary": "what {url} offers, in plain text",
+  "variants": [
+    {{
+      "subject": "subject line here",
+      "body": "email body with {{{{firstName}}}} and {{{{company}}}}"
+    }},
+    {{
+      "subject": "second subject",
+      "body": "second email body"
+    }},
+    {{
+      "subject": "third subject",
+      "body": "third email body"
+    }}
+  ]
+}}"""
+
+        output_text = await self._web_search(prompt, priority)
+        if not output_text:
+            return None
+
+        try:
+            # Extract the JSON object (might be wrapped in markdown or text)
+            try:
+                reply = extract_json(output_text, expect=dict)
+            except ValueError:
+                reply = {}
+            if not isinstance(reply.get("variants"), list):
+                # A bare array of variants, without the summary
+                reply = {"variants": extract_json(output_text, expect=list)}
+            variants = reply["variants"]
+            if isinstance(variants, list) and len(variants) > 0:
+                # Validate that variants have required fields
+                valid_variants = []
+                for v in variants:
+                    if isinstance(v, dict) and "subject" in v and "body" in v:
+                        valid_variants.append(v)
+
+                if valid_variants:
+                    print(f"✅ Successfully parsed {len(valid_variants)} AI-generated email variants")
+                    await self._remember_website_analysis(url, reply.get("website_summary"))
+                    return valid_variants[:3]  # Return max 3 variants
+
+            print(f"Response not a valid list: {output_text[:200]}")
+            return None
+        except (json.JSONDecodeError, ValueError) as e:
+            print(f"Failed to parse AI response as JSON: {output_text[:500]}")
+            print(f"Error: {str(e)}")
+            return None
+
+    async def _web_search(self, prompt: str, priority: Union[str, Priority]) -> Optional[str]:
+        """
+        Run prompt through the Responses API with web search (None if the call fails)
+
+        Also None if the scheduler couldn't admit it in time or the request failed
+        in transit, so callers fall back instead of raising.
+        """
+        async with self.openai.session(timeout=120.0, priority=priority) as client:
+            try:
+                response = await client.post(
+                    f"{self.base_url}/responses",
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "model": self.model,
+                        "tools": [{"type": "web_search"}],
+                        "input": prompt
+                    }
+                )
+            except (QueueTimeout, httpx.HTTPError) as e:
+                print(f"⚠️ OpenAI web search request failed: {str(e) or type(e).__name__}")
+                return None
 
             if response.status_code != 200:
-                # Return fallback variants if API fails
                 print(f"OpenAI API error: {response.text}")
-                return self._get_fallback_variants(url, target_audience)
+                return None
 
-            result = response.json()
-
-            # Extract text from Responses API format
             # The response has: output[...] with type "message" containing content[0].text
-            output_text = None
-            for item in result.get("output", []):
-                if item.get("type") == "message":
-                    content = item.get("content", [])
-                    if content and content[0].get("type") == "output_text":
-                        output_text = content[0].get("text")
-                        break
-
+            output_text = response_output_text(response.json())
             if not output_text:
                 print("No text output from Responses API")
-                return self._get_fallback_variants(url, target_audience)
+                return None
+            return output_text
 
-            try:
-                # Extract JSON from the response (might be wrapped in markdown or text)
-                cleaned_text = output_text.strip()
-
-                # Remove markdown code blocks if present
-                if "```json" in cleaned_text:
-                    start = cleaned_text.find("```json") + 7
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-                elif "```" in cleaned_text:
-                    start = cleaned_text.find("```") + 3
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-
-                # Find JSON array in the text - be aggressive about extracting it
-                if "[" in cleaned_text and "]" in cleaned_text:
-                    json_start = cleaned_text.find("[")
-                    json_end = cleaned_text.rfind("]") + 1
-                    cleaned_text = cleaned_text[json_start:json_end]
-
-                # Parse JSON response
-                variants = json.loads(cleaned_text)
-                if isinstance(variants, list) and len(variants) > 0:
-                    # Validate that variants have required fields
-                    valid_variants = []
-                    for v in variants:
-                        if isinstance(v, dict) and "subject" in v and "body" in v:
-                            valid_variants.append(v)
-
-                    if valid_variants:
-                        print(f"✅ Successfully parsed {len(valid_variants)} AI-generated email variants")
-                        return valid_variants[:3]  # Return max 3 variants
+    def _website_analysis_key(self, url: str) -> str:
+        digest = hashlib.sha256(url.strip().lower().encode("utf-8")).hexdigest()
+        return f"ai:website_analysis:{digest[:32]}"
 
-                print(f"Response not a valid list: {output_text[:200]}")
-                return self._get_fallback_variants(url, target_audience)
-            except (json.JSONDecodeError, ValueError) as e:
-                print(f"Failed to parse AI response as JSON: {output_text[:500]}")
-                print(f"Error: {str(e)}")
-                return self._get_fallback_variants(url, target_audience)
+    async def website_analysis(self, url: str) -> Optional[str]:
+        """
+        Cached summary of what the sender at url sells (WEBSITE_ANALYSIS_TTL)
+
+        Written as a by-product of the web-search calls that generate copy, so
+        reading it never costs a model call.
+
+        Returns:
+            The summary, or None if no copy has been generated for url yet
+        """
+        return await self.state.get(self._website_analysis_key(url))
+
+    async def _remember_website_analysis(self, url: str, summary) -> None:
+        if isinstance(summary, str) and summary.strip():
+            await self.state.set(self._website_analysis_key(url), summary.strip(), ttl=self.website_analysis_ttl)
+
+    async def regenerate_email_variant(
+        self,
+        url: str,
+        target_audience: str,
+        variant_index: int,
+        current_variants: Optional[List[Dict]] = None,
+        priority: Union[str, Priority] = "interactive"
+    ) -> Dict:
+        """
+        Write one new email variant in place of current_variants[variant_index]
+
+        The new email keeps that slot's angle (pain point / outcome / question), is
+        told not to repeat the other two variants or the one it replaces, and is
+        grounded in the website summary generate_email_copy cached, so it is one
+        short chat call rather than a web search for three emails. Without a
+        summary it is one web-search call, which caches one for next time.
+        Results are cached per url + ICP + slot + current variants.
+
+        Args:
+            url: Sender's website
+            target_audience: ICP context (see icp_email_context)
+            variant_index: Slot to regenerate (0, 1 or 2)
+            current_variants: The variants the user currently has (optional)
+            priority: OpenAI scheduler class
+
+        Returns: {"subject": "...", "body": "..."}
+
+        Raises:
+            ValueError: variant_index isn't a slot
+        """
+        if not 0 <= variant_index < len(EMAIL_VARIANT_ANGLES):
+            raise ValueError(f"variant_index must be 0-{len(EMAIL_VARIANT_ANGLES) - 1}, got {variant_index}")
+        current_variants = [
+            {"subject": v.get("subject", ""), "body": v.get("body", "")}
+            for v in (current_variants or []) if isinstance(v, dict)
+        ]
+        audience = " ".join((target_audience or "").lower().split())
+        digest = hashlib.sha256(
+            f"{self.model}|{url.strip().lower()}|{audience}|{variant_index}|{json.dumps(current_variants, sort_keys=True)}".encode("utf-8")
+        ).hexdigest()
+        key = f"ai:email_variant:{digest[:32]}"
+
+        variant = await self.state.cached_call(
+            key,
+            lambda: self._model_email_variant(url, target_audience, variant_index, current_variants, priority),
+            ttl=self.copy_cache_ttl,
+            lock_ttl=120.0
+        )
+        if variant is None:
+            return self._get_fallback_variants(url, target_audience)[variant_index]
+        return variant
+
+    async def _model_email_variant(
+        self,
+        url: str,
+        target_audience: str,
+        variant_index: int,
+        current_variants: List[Dict],
+        priority: Union[str, Priority]
+    ) -> Optional[Dict]:
+        analysis = await self.website_analysis(url)
+        if analysis:
+            about = f"What {url} offers (from its website):\n{analysis}"
+            reply_format = '{"subject": "...", "body": "..."}'
+        else:
+            # No copy generated for this site yet: one web-search call writes the email and the summary
+            about = f"Visit {url} using web search to analyze what this product/service does."
+            reply_format = '{"website_summary": "...", "subject": "...", "body": "..."}'
+            about += f"\nAlso write \"website_summary\": {WEBSITE_SUMMARY_SPEC}"
+
+        replaced = current_variants[variant_index] if variant_index < len(current_variants) else None
+        others = [v for i, v in enumerate(current_variants) if i != variant_index]
+        avoid = ""
+        if others:
+            avoid += "\nThe other emails in this sequence (write something clearly DIFFERENT: new subject, opening hook, pain point and CTA wording):\n"
+            avoid += "\n".join(f"- Subject: {v['subject']}\n  Body: {v['body']}" for v in others)
+        if replaced:
+            avoid += f"\n\nThe email being replaced (the user wants a fresh take, don't reuse its subject or hook):\n- Subject: {replaced['subject']}\n  Body: {replaced['body']}"
+
+        angle = EMAIL_VARIANT_ANGLES[variant_index].format(target_audience=target_audience)
+        prompt = f"""You are writing a cold email FROM the company at {url} TO their ideal customer profile (ICP): {target_audience}
+
+{about}
+{avoid}
+
+Write ONE new cold email. Angle: {angle}
+
+The email must:
+- Have a subject line under 50 characters
+- Be 150-200 words
+- Open with {{{{firstName}}}} and {{{{company}}}}
+- Identify a SPECIFIC pain point that {target_audience} faces in their role/industry
+- Explain how the product/service from {url} solves this pain point
+- Include a clear CTA
+- Be conversational and personalized to {target_audience} (NO generic phrases like "streamline workflows")
+
+CRITICAL: Return ONLY a JSON object: {reply_format}"""
+
+        try:
+            if analysis:
+                content = await self.openai.chat(
+                    [
+                        {"role": "system", "content": "You are an expert B2B cold email copywriter. Return ONLY raw JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    model=self.model,
+                    timeout=60.0,
+                    priority=priority,
+                    temperature=0.9,  # A fresh take, not a paraphrase
+                    max_tokens=600
+                )
+            else:
+                content = await self._web_search(prompt, priority)
+                if not content:
+                    return None
+            variant = extract_json(content, expect=dict)
+        except Exception as e:
+            print(f"Failed to regenerate email variant: {str(e)}")
+            return None
+
+        if not isinstance(variant.get("subject"), str) or not isinstance(variant.get("body"), str):
+            print(f"Regenerated variant is missing subject/body: {content[:200]}")
+            return None
+        if not analysis:
+            await self._remember_website_analysis(url, variant.get("website_summary"))
+        print(f"✅ Regenerated email variant {variant_index + 1}")
+        return {"subject": variant["subject"], "body": variant["body"]}
 
     def _get_fallback_variants(self, url: str, target_audience: str) -> List[Dict]:
         """
@@ -203,7 +478,7 @@ The follow-up should:
 Return only the email body, no subject line.
 """
 
-        async with httpx.AsyncClient(timeout=90.0) as client:
+        async with self.openai.session(timeout=90.0) as client:
             response = await client.post(
                 f"{self.base_url}/chat/completions",
                 headers={
@@ -242,7 +517,7 @@ Based on the URL and what you can infer about the product, suggest:
 Keep the response concise (under 150 words).
 """
 
-        async with httpx.AsyncClient(timeout=90.0) as client:
+        async with self.openai.session(timeout=90.0) as client:
             response = await client.post(
                 f"{self.base_url}/chat/completions",
                 headers={
@@ -283,8 +558,121 @@ Keep the response concise (under 150 words).
             "funding_type": ["seed", "series_a"],
             "news": ["launches", "receives_financing"]
         }
+
+        Descriptions the local compiler fully understands skip the model call, and so
+        do ones close enough to an ICP the model already answered.
+        """
+        filters, _ = self._local_supersearch_filters(target_audience)
+        if filters is not None:
+            return filters
+
+        filters = await self._model_supersearch_filters(target_audience, url)
+        if filters is None:
+            return self._get_default_filters(target_audience)
+        return filters
+
+    async def generate_supersearch_filters_batch(
+        self,
+        target_audiences: List[str],
+        url: str,
+        pack_size: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
         """
+        Convert many ICP descriptions into SuperSearch filters, yielding each result as it completes
 
+        ICPs the compiler or the similarity cache can answer come back first. The
+        rest are packed `pack_size` to a model request, with up to `concurrency`
+        requests in flight. A pack whose reply doesn't line up one-to-one with its
+        ICPs is retried as single requests, so a bad reply never mixes ICPs up.
+
+        Args:
+            target_audiences: ICP descriptions
+            url: Sender's product URL
+            pack_size: ICPs per model request (default SUPERSEARCH_BATCH_PACK_SIZE or 5; 1 disables packing)
+            concurrency: Model requests in flight (default SUPERSEARCH_BATCH_CONCURRENCY or 8)
+
+        Yields:
+            {"index": i, "target_audience": "...", "filters": {...}, "source": "compiled" | "cache" | "model" | "default"}
+        """
+        pack_size = max(1, pack_size or self.batch_pack_size)
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.batch_concurrency))
+        queue: asyncio.Queue = asyncio.Queue()
+
+        # Identical ICPs (after normalizing case and spacing) share one answer
+        pending: Dict[str, List[int]] = {}
+        for index, target_audience in enumerate(target_audiences):
+            filters, source = self._local_supersearch_filters(target_audience)
+            if filters is not None:
+                queue.put_nowait({"index": index, "target_audience": target_audience, "filters": filters, "source": source})
+            else:
+                pending.setdefault(" ".join(target_audience.lower().split()), []).append(index)
+
+        def finish(key: str, filters: Optional[Dict]) -> None:
+            for index in pending[key]:
+                target_audience = target_audiences[index]
+                queue.put_nowait({
+                    "index": index,
+                    "target_audience": target_audience,
+                    "filters": copy.deepcopy(filters) if filters is not None else self._get_default_filters(target_audience),
+                    "source": "model" if filters is not None else "default"
+                })
+
+        async def run_single(key: str) -> None:
+            filters = None
+            try:
+                async with semaphore:
+                    filters = await self._model_supersearch_filters(target_audiences[pending[key][0]], url, priority="batch")
+            except Exception as e:
+                print(f"⚠️ Filter request for '{target_audiences[pending[key][0]]}' failed: {str(e)}")
+            finish(key, filters)
+
+        async def run_pack(keys: List[str]) -> None:
+            answers = {}
+            if len(keys) > 1:
+                async with semaphore:
+                    answers = await self._model_supersearch_filters_packed([target_audiences[pending[key][0]] for key in keys], url, priority="batch")
+            for position, key in enumerate(keys):
+                if position in answers:
+                    finish(key, answers[position])
+            await asyncio.gather(*(run_single(key) for position, key in enumerate(keys) if position not in answers))
+
+        keys = list(pending)
+        tasks = [asyncio.create_task(run_pack(keys[i:i + pack_size])) for i in range(0, len(keys), pack_size)]
+        print(f"📦 Batch of {len(target_audiences)} ICPs: {len(target_audiences) - sum(map(len, pending.values()))} answered locally, "
+              f"{len(keys)} for the model in {len(tasks)} request(s)")
+        try:
+            for _ in range(len(target_audiences)):
+                yield await queue.get()
+        finally:
+            # The caller stopped early (or we're done): don't leave model calls running
+            for task in tasks:
+                task.cancel()
+
+    def _local_supersearch_filters(self, target_audience: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Filters the compiler or the similarity cache can give without a model call
+
+        Returns:
+            (filters, "compiled" | "cache"), or (None, None) if the model is needed
+        """
+        compiled = self.filter_compiler.compile(target_audience)
+        if self.filter_compiler.is_confident(compiled):
+            print(f"⚡ Compiled filters locally for '{target_audience}' (confidence {compiled.confidence})")
+            return self._clean_supersearch_filters(compiled.filters), "compiled"
+
+        cached, similarity = self.filter_cache.get(target_audience)
+        if cached is not None:
+            print(f"♻️ Reusing filters for '{target_audience}' (similarity {similarity})")
+            return copy.deepcopy(cached), "cache"
+        print(f"🤖 Local compiler unsure about '{target_audience}' (confidence {compiled.confidence}, "
+              f"unknown: {compiled.unmatched}) - asking the model")
+        return None, None
+
+    async def _model_supersearch_filters(self, target_audience: str, url: str, priority: str = "interactive") -> Optional[Dict]:
+        """
+        Ask the model for one ICP's filters (None if the call, its admission or its JSON fails)
+        """
         prompt = f"""Convert this target audience description into SuperSearch API filters.
 
 Target Audience: "{target_audience}"
@@ -292,93 +680,46 @@ Product URL: {url} (this is the SENDER's product, NOT a company to search for)
 
 Return ONLY a JSON object with these possible filters (omit any that don't apply):
 
-{{
-  "locations": [],  // Array of location objects. Format: [{{"city": "San Francisco", "state": "California", "country": "United States"}}, {{"city": "London", "state": "", "country": "United Kingdom"}}]. Use empty string "" for state if not applicable (e.g., UK cities). ALWAYS include city, state, and country fields.
-  "level": [],  // Options: "Entry level", "Mid-Senior level", "Director", "Associate", "Owner", "Executive", "Manager", "Senior", "Chief X Officer (CxO)", "Internship", "Vice President (VP)", "Unpaid / Internship", "Partner"
-  "department": [],  // Options: "Engineering", "Finance & Administration", "Human Resources", "IT & IS", "Marketing", "Operations", "Sales", "Support", "Other"
-  "employee_count": [],  // Options: "0 - 25", "25 - 100", "100 - 250", "250 - 1000", "1K - 10K", "10K - 50K", "50K - 100K", "> 100K"
-  "revenue": [],  // Options: "$0 - 1M", "$1 - 10M", "$10 - 50M", "$50 - 100M", "$100 - 250M", "$250 - 500M", "$500M - 1B", "> $1B"
-  "title": {{"include": [], "exclude": []}},  // Job titles as PARTIAL MATCH strings (e.g., ["CEO", "Founder", "Marketing Director"]). Use specific titles when mentioned.
-  "keyword_filter": {{"include": [], "exclude": ""}},  // Keywords for company descriptions. include is array, exclude is empty string. Use SPARINGLY - prefer industry/title filters.
-  "industry": {{"include": [], "exclude": []}},  // MUST use EXACT industry names from this list: "Agriculture & Mining", "Business Services", "Computers & Electronics", "Consumer Services", "Education", "Energy & Utilities", "Financial Services", "Government", "Healthcare, Pharmaceuticals, & Biotech", "Manufacturing", "Media & Entertainment", "Non-Profit", "Other", "Real Estate & Construction", "Retail", "Software & Internet", "Telecommunications", "Transportation & Storage", "Travel, Recreation, and Leisure", "Wholesale & Distribution"
-  "funding_type": [],  // Options: "angel", "seed", "pre_seed", "series_a", "series_b", "series_c", "series_d", "series_e", "debt_financing", "convertible_note", "equity_crowdfunding", "grant", "corporate_round", "private_equity", "post_ipo_equity"
-  "news": []  // Options: "launches", "expands_offices_to", "hires", "partners_with", "receives_financing", "recognized_as", "closes_offices_in", "acquires", "is_acquired_by", "goes_public", "reports_earnings", "announces_layoffs", "announces_new_product"
-}}
+{SUPERSEARCH_FILTER_GUIDE}"""
 
-CRITICAL RULES:
-1. Return ONLY the JSON object, no explanations
-2. Use EXACT values from the options provided
-3. Omit filters that don't apply (don't include empty arrays/objects)
-4. For "locations", ALWAYS include all 3 fields (city, state, country). Use empty string "" for missing values
-5. For "title", extract job titles and use them in include array. These are PARTIAL MATCH. Multiple titles: ["CEO", "Founder"]
-6. For "level", use ALONGSIDE title when applicable: "founder" -> "Owner", "executive" -> "Executive", "VP" -> "Vice President (VP)", "CxO/C-suite" -> "Chief X Officer (CxO)", "senior" -> "Senior", "manager" -> "Manager", "director" -> "Director"
-7. For "industry", map tech/software/SaaS -> "Software & Internet", cybersecurity -> "Software & Internet", construction -> "Real Estate & Construction", healthcare -> "Healthcare, Pharmaceuticals, & Biotech"
-8. For "employee_count", be generous with ranges. "startup" -> ["0 - 25", "25 - 100"], "10-50" -> ["25 - 100"], "100-500" -> ["100 - 250", "250 - 1000"], "enterprise" -> ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"]
-9. For "revenue", "Series A" startups typically -> ["$10 - 50M"], well-funded -> ["$50 - 100M", "$100 - 250M"]
-10. For "keyword_filter", use VERY SPARINGLY - only for specific tech/products that don't fit elsewhere. Most things should go to industry/title
-11. AVOID using keyword_filter for industries - use the industry filter instead
-
-Examples (based on Instantly AI behavior):
-- "CEOs at tech companies" -> {{"title": {{"include": ["CEO"]}}, "industry": {{"include": ["Computers & Electronics", "Software & Internet", "Telecommunications"]}}}}
-- "Marketing directors in San Francisco" -> {{"title": {{"include": ["Marketing Director"]}}, "locations": [{{"city": "San Francisco", "state": "California", "country": "United States"}}]}}
-- "CTOs at Series A startups in New York with 10-50 employees" -> {{"title": {{"include": ["CTO"]}}, "locations": [{{"city": "New York", "state": "New York", "country": "United States"}}], "employee_count": ["25 - 100"], "revenue": ["$10 - 50M"]}}
-- "Founders at cybersecurity companies" -> {{"title": {{"include": ["Founder"]}}, "industry": {{"include": ["Software & Internet"]}}}}
-- "CEOs and founders at SaaS companies" -> {{"title": {{"include": ["CEO", "Founder"]}}, "industry": {{"include": ["Software & Internet"]}}}}
-- "Senior HR managers at construction companies" -> {{"title": {{"include": ["HR Manager"]}}, "level": ["Senior"], "department": ["Human Resources"], "industry": {{"include": ["Real Estate & Construction"]}}}}
-- "VP of Sales at B2B software companies in London with 100-500 employees" -> {{"title": {{"include": ["VP of Sales"]}}, "locations": [{{"city": "London", "state": "", "country": "United Kingdom"}}], "industry": {{"include": ["Software & Internet"]}}, "employee_count": ["100 - 250", "250 - 1000"]}}
-- "Chief Technology Officers at enterprise SaaS companies" -> {{"title": {{"include": ["Chief Technology Officer"]}}, "level": ["Chief X Officer (CxO)"], "industry": {{"include": ["Software & Internet"]}}, "employee_count": ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"]}}
-"""
-
-        async with httpx.AsyncClient(timeout=90.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a B2B lead generation expert. You MUST return ONLY raw JSON with no markdown formatting, no code blocks, no explanations. Just the JSON object starting with { and ending with }."
-                        },
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": 0.3,  # Lower temperature for more consistent output
-                    "max_tokens": 800
-                }
-            )
+        async with self.openai.session(timeout=90.0, priority=priority) as client:
+            try:
+                response = await client.post(
+                    f"{self.base_url}/chat/completions",
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "Content-Type": "application/json"
+                    },
+                    json={
+                        "model": self.model,
+                        "messages": [
+                            {
+                                "role": "system",
+                                "content": "You are a B2B lead generation expert. You MUST return ONLY raw JSON with no markdown formatting, no code blocks, no explanations. Just the JSON object starting with { and ending with }."
+                            },
+                            {
+                                "role": "user",
+                                "content": prompt
+                            }
+                        ],
+                        "temperature": 0.3,  # Lower temperature for more consistent output
+                        "max_tokens": 800
+                    }
+                )
+            except (QueueTimeout, httpx.HTTPError) as e:
+                print(f"⚠️ OpenAI filter request failed: {str(e) or type(e).__name__}")
+                return None
 
             if response.status_code != 200:
                 print(f"OpenAI API error: {response.text}")
-                return self._get_default_filters(target_audience)
+                return None
 
             result = response.json()
             content = result["choices"][0]["message"]["content"]
 
             try:
-                # Strip markdown code blocks if present
-                cleaned_content = content.strip()
-                if cleaned_content.startswith("```json"):
-                    cleaned_content = cleaned_content[7:]  # Remove ```json
-                if cleaned_content.startswith("```"):
-                    cleaned_content = cleaned_content[3:]  # Remove ```
-                if cleaned_content.endswith("```"):
-                    cleaned_content = cleaned_content[:-3]  # Remove ```
-                cleaned_content = cleaned_content.strip()
-
-                # Find JSON object in text
-                start_idx = cleaned_content.find('{')
-                end_idx = cleaned_content.rfind('}')
-                if start_idx != -1 and end_idx != -1:
-                    cleaned_content = cleaned_content[start_idx:end_idx + 1]
-
-                # Parse JSON response
-                filters = json.loads(cleaned_content)
+                # Extract the JSON object (might be wrapped in markdown or text)
+                filters = extract_json(content, expect=dict)
 
                 # Remove empty arrays and objects to keep the API call clean
                 filters = self._clean_supersearch_filters(filters)
@@ -386,40 +727,75 @@ Examples (based on Instantly AI behavior):
                 print(f"✅ AI parsed filters from '{target_audience}':")
                 print(json.dumps(filters, indent=2))
 
+                # Only real model answers are cached, never the defaults
+                self.filter_cache.set(target_audience, copy.deepcopy(filters))
                 return filters
 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 print(f"Failed to parse AI response as JSON: {content}")
                 print(f"Parse error: {str(e)}")
-                return self._get_default_filters(target_audience)
+                return None
+
+    async def _model_supersearch_filters_packed(self, target_audiences: List[str], url: str, priority: str = "batch") -> Dict[int, Dict]:
+        """
+        Ask the model for several ICPs' filters in one request
+
+        Returns:
+            {position in target_audiences: filters}; empty if the reply can't be
+            matched one-to-one with the ICPs (the caller retries them singly)
+        """
+        numbered = "\n".join(f'{i}. "{target_audience}"' for i, target_audience in enumerate(target_audiences, 1))
+        prompt = f"""Convert each of these target audience descriptions into SuperSearch API filters.
+
+Target Audiences:
+{numbered}
+Product URL: {url} (this is the SENDER's product, NOT a company to search for)
+
+Return ONLY a JSON array with exactly one element per target audience, in the same order:
+[{{"id": 1, "filters": {{...}}}}, {{"id": 2, "filters": {{...}}}}]
+
+Build each "filters" object from its own description only, using the format and rules below
+(where they say "the JSON object", that means the "filters" object):
+
+{SUPERSEARCH_FILTER_GUIDE}"""
+
+        try:
+            content = await self.openai.chat(
+                [
+                    {
+                        "role": "system",
+                        "content": "You are a B2B lead generation expert. You MUST return ONLY raw JSON with no markdown formatting, no code blocks, no explanations. Just the JSON array starting with [ and ending with ]."
+                    },
+                    {"role": "user", "content": prompt}
+                ],
+                model=self.model,
+                timeout=120.0,
+                priority=priority,
+                temperature=0.3,
+                max_tokens=min(4000, 600 * len(target_audiences))
+            )
+            items = extract_json(content, expect=list)
+        except Exception as e:
+            print(f"⚠️ Packed filter request for {len(target_audiences)} ICPs failed: {str(e)}")
+            return {}
+
+        ids = [item.get("id") if isinstance(item, dict) else None for item in items]
+        if not all(type(id_) is int for id_ in ids) or sorted(ids) != list(range(1, len(target_audiences) + 1)) or \
+                not all(isinstance(item.get("filters"), dict) for item in items):
+            print(f"⚠️ Packed reply doesn't match its {len(target_audiences)} ICPs (ids {ids}) - retrying them one by one")
+            return {}
+
+        answers = {}
+        for item in items:
+            position = item["id"] - 1
+            answers[position] = self._clean_supersearch_filters(item["filters"])
+            self.filter_cache.set(target_audiences[position], copy.deepcopy(answers[position]))
+        print(f"✅ AI parsed filters for {len(answers)} ICPs in one request")
+        return answers
 
     def _clean_supersearch_filters(self, filters: Dict) -> Dict:
         """Remove empty arrays and objects from filters"""
 
-        # Valid industry categories from Instantly API (verified via testing)
-        VALID_INDUSTRIES = {
-            'Agriculture & Mining',
-            'Business Services',
-            'Computers & Electronics',
-            'Consumer Services',
-            'Education',
-            'Energy & Utilities',
-            'Financial Services',
-            'Government',
-            'Healthcare, Pharmaceuticals, & Biotech',
-            'Manufacturing',
-            'Media & Entertainment',
-            'Non-Profit',
-            'Other',
-            'Real Estate & Construction',
-            'Retail',
-            'Software & Internet',
-            'Telecommunications',
-            'Transportation & Storage',
-            'Travel, Recreation, and Leisure',
-            'Wholesale & Distribution'
-        }
-
         cleaned = {}
 
         for key, value in filters.items():
@@ -574,7 +950,7 @@ Return ONLY a JSON array with 10 ICPs. NO explanations, NO markdown, NO extra te
 
         # Use gpt-5 for web search with low reasoning effort (per OpenAI docs)
         # Note: gpt-5 reasoning models can take 30-60+ seconds even with low effort
-        async with httpx.AsyncClient(timeout=300.0) as client:
+        async with self.openai.session(timeout=300.0) as client:
             print(f"🔍 Analyzing {url} with gpt-5 web search (low reasoning)...")
             print(f"⏱️  Note: This may take 30-60 seconds...")
             response = await client.post(
@@ -604,13 +980,7 @@ Return ONLY a JSON array with 10 ICPs. NO explanations, NO markdown, NO extra te
             print(f"Response keys: {list(result.keys())}")
 
             # Extract text from Responses API format
-            output_text = None
-            for item in result.get("output", []):
-                if item.get("type") == "message":
-                    content = item.get("content", [])
-                    if content and content[0].get("type") == "output_text":
-                        output_text = content[0].get("text")
-                        break
+            output_text = response_output_text(result)
 
             if not output_text:
                 print("❌ No text output from Responses API")
@@ -618,27 +988,8 @@ Return ONLY a JSON array with 10 ICPs. NO explanations, NO markdown, NO extra te
                 return self._get_fallback_icps(url)
 
             try:
-                # Extract JSON from the response
-                cleaned_text = output_text.strip()
-
-                # Remove markdown code blocks if present
-                if "```json" in cleaned_text:
-                    start = cleaned_text.find("```json") + 7
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-                elif "```" in cleaned_text:
-                    start = cleaned_text.find("```") + 3
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-
-                # Find JSON array in the text
-                if "[" in cleaned_text and "]" in cleaned_text:
-                    json_start = cleaned_text.find("[")
-                    json_end = cleaned_text.rfind("]") + 1
-                    cleaned_text = cleaned_text[json_start:json_end]
-
-                # Parse JSON response
-                icps = json.loads(cleaned_text)
+                # Extract the JSON array (might be wrapped in markdown or text)
+                icps = extract_json(output_text, expect=list)
                 if isinstance(icps, list) and len(icps) > 0:
                     print(f"✅ Successfully parsed {len(icps)} ICP suggestions from {url}")
                     print(f"   ICPs: {', '.join([icp.get('name', '') for icp in icps])}")
@@ -737,7 +1088,7 @@ Return ONLY a JSON array of the top 5 domains with scores and reasoning:
 
 NO explanations, NO markdown, NO extra text. Just the JSON array."""
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with self.openai.session(timeout=120.0) as client:
             response = await client.post(
                 f"{self.base_url}/responses",
                 headers={
@@ -767,13 +1118,7 @@ NO explanations, NO markdown, NO extra text. Just the JSON array."""
             result = response.json()
 
             # Extract text from Responses API format
-            output_text = None
-            for item in result.get("output", []):
-                if item.get("type") == "message":
-                    content = item.get("content", [])
-                    if content and content[0].get("type") == "output_text":
-                        output_text = content[0].get("text")
-                        break
+            output_text = response_output_text(result)
 
             if not output_text:
                 print("No text output from Responses API")
@@ -788,27 +1133,8 @@ NO explanations, NO markdown, NO extra text. Just the JSON array."""
                 ]
 
             try:
-                # Extract JSON from the response
-                cleaned_text = output_text.strip()
-
-                # Remove markdown code blocks if present
-                if "```json" in cleaned_text:
-                    start = cleaned_text.find("```json") + 7
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-                elif "```" in cleaned_text:
-                    start = cleaned_text.find("```") + 3
-                    end = cleaned_text.find("```", start)
-                    cleaned_text = cleaned_text[start:end].strip()
-
-                # Find JSON array in the text
-                if "[" in cleaned_text and "]" in cleaned_text:
-                    json_start = cleaned_text.find("[")
-                    json_end = cleaned_text.rfind("]") + 1
-                    cleaned_text = cleaned_text[json_start:json_end]
-
-                # Parse JSON response
-                ranked_domains = json.loads(cleaned_text)
+                # Extract the JSON array (might be wrapped in markdown or text)
+                ranked_domains = extract_json(output_text, expect=list)
                 if isinstance(ranked_domains, list) and len(ranked_domains) > 0:
                     print(f"✅ Successfully ranked {len(ranked_domains)} DFY domains")
                     return ranked_domains[:5]  # Return top 5
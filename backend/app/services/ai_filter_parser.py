@@ -1,28 +1,98 @@
 """
 AI-powered service to parse target audience descriptions into SuperSearch filters
+
+Model calls go through the shared async OpenAIClient (pooled, rate-limited,
+with a timeout) and parsed filters are cached by normalized audience text.
 """
+import hashlib
 import json
+import os
+import re
 from typing import Dict, Any, List, Optional
-from openai import OpenAI
+
+from .openai_client import OpenAIClient, extract_json
+from .state_backend import MemoryStateBackend, StateBackend
+
+
+def normalize_audience(target_audience: str) -> str:
+    """
+    Cache key form of an audience description: lowercased, single-spaced, no outer punctuation
+    """
+    return re.sub(r"\s+", " ", (target_audience or "").lower()).strip(" .,;:!?\"'")
 
 
 class AIFilterParser:
     """Parse natural language target audience descriptions into structured SuperSearch filters"""
 
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        openai: Optional[OpenAIClient] = None,
+        state: Optional[StateBackend] = None,
+        model: str = "gpt-4o",
+        timeout: float = 30.0,
+        cache_ttl: Optional[float] = None
+    ):
+        """
+        Args:
+            api_key: OpenAI API key (ignored when openai is given)
+            openai: Shared OpenAIClient (default: a new one for api_key)
+            state: State backend holding the parse cache (default: in-process)
+            model: Chat model
+            timeout: Seconds before a parse call is abandoned (default filters are returned)
+            cache_ttl: Seconds a parsed audience is reused (default AI_FILTER_CACHE_TTL or 1 day)
+        """
+        self.openai = openai or OpenAIClient(api_key)
+        self.state = state or MemoryStateBackend()
+        self.model = model
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl if cache_ttl is not None else float(os.getenv("AI_FILTER_CACHE_TTL", str(24 * 3600)))
+
+        self.cache_hits = 0
+        self.model_calls = 0
+
+    def _cache_key(self, target_audience: str) -> str:
+        digest = hashlib.sha256(f"{self.model}|{normalize_audience(target_audience)}".encode("utf-8")).hexdigest()
+        return f"ai:audience_filters:{digest[:32]}"
 
     async def parse_audience_to_filters(self, target_audience: str) -> Dict[str, Any]:
         """
         Convert a natural language target audience description into SuperSearch API filters
 
+        Identical audiences (after normalization) are served from the cache, and
+        concurrent parses of the same audience share one model call.
+
         Args:
             target_audience: Natural language description (e.g., "SaaS founders in US, 1-10 employees")
 
         Returns:
             Dictionary of SuperSearch filters
         """
+        computed = []
+
+        async def compute():
+            computed.append(True)
+            return await self._parse_with_model(target_audience)
+
+        filters = await self.state.cached_call(
+            self._cache_key(target_audience),
+            compute,
+            ttl=self.cache_ttl,
+            lock_ttl=self.timeout + 5
+        )
+        if not computed and filters is not None:
+            self.cache_hits += 1
+
+        if filters is None:
+            print(f"Falling back to default filters")
+            return self._get_default_filters()
+        return filters
 
+    async def _parse_with_model(self, target_audience: str) -> Optional[Dict[str, Any]]:
+        """
+        One model call. Returns None on failure, so defaults are never cached.
+        """
+        self.model_calls += 1
         prompt = f"""Convert this target audience description into SuperSearch API filters.
 
 Target Audience: "{target_audience}"
@@ -57,32 +127,18 @@ Examples:
 """
 
         try:
-            # Call OpenAI to parse the audience
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
+            content = await self.openai.chat(
+                [
                     {"role": "system", "content": "You are a precise API filter generator. Return only valid JSON."},
                     {"role": "user", "content": prompt}
                 ],
-                temperature=0.3,  # Lower temperature for more consistent output
+                model=self.model,
+                timeout=self.timeout,
+                temperature=0.3  # Lower temperature for more consistent output
             )
 
-            content = response.choices[0].message.content.strip()
-
-            # Extract JSON from response
-            # Find the first { and last }
-            start_idx = content.find('{')
-            end_idx = content.rfind('}')
-
-            if start_idx == -1 or end_idx == -1:
-                print(f"⚠️ No JSON found in AI response, using default filters")
-                return self._get_default_filters()
-
-            json_str = content[start_idx:end_idx + 1]
-            filters = json.loads(json_str)
-
             # Remove empty arrays/objects to keep the API call clean
-            filters = self._clean_filters(filters)
+            filters = self._clean_filters(extract_json(content, expect=dict))
 
             print(f"✅ AI parsed filters from '{target_audience}':")
             print(json.dumps(filters, indent=2))
@@ -91,8 +147,10 @@ Examples:
 
         except Exception as e:
             print(f"❌ Error parsing audience with AI: {str(e)}")
-            print(f"Falling back to default filters")
-            return self._get_default_filters()
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"cache_hits": self.cache_hits, "model_calls": self.model_calls}
 
     def _clean_filters(self, filters: Dict[str, Any]) -> Dict[str, Any]:
         """Remove empty arrays and objects from filters"""
@@ -0,0 +1,413 @@
+"""
+Concurrency-capped, priority-ordered scheduling of OpenAI requests
+
+Every OpenAI call made through OpenAIClient takes a slot from one
+AIRequestScheduler first. A waiter is admitted when both a concurrency slot
+and its model's budget are free, in priority order ("interactive" before
+"batch" before "speculative", FIFO within a class):
+
+- at most `max_concurrency` requests are in flight
+- each model has a requests-per-minute and a tokens-per-minute budget. Tokens
+  are estimated from the request body (prompt characters / 4 + max output)
+  and corrected from the `usage` OpenAI returns. Budget is only taken at
+  admission, so queued batch work never holds tokens an interactive request
+  needs; batch and speculative requests also leave a share of the budget
+  (BUDGET_RESERVE) for interactive ones, which covers other workers too.
+- a request that can't be admitted within its class's max queue wait fails
+  with QueueTimeout, so callers fall back quickly instead of hanging.
+- a request queued with a Priority object moves up the queue when it is
+  raised, e.g. a speculative generation the user has just started waiting for.
+
+A burst of sessions therefore queues for a moment instead of tripping the
+account's RPM/TPM limits and falling back to canned copy. Queue times are
+recorded per priority class (see stats()).
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Set, Tuple, Union
+
+from .rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from .state_backend import StateBackend
+
+# Lower runs first
+PRIORITIES = {"interactive": 0, "batch": 1, "speculative": 2}
+
+# Share of each model's RPM/TPM budget a class must leave unused
+BUDGET_RESERVE = {"interactive": 0.0, "batch": 0.1, "speculative": 0.25}
+
+# Longest a request waits to be admitted, per class (seconds)
+MAX_QUEUE_WAIT = {"interactive": 20.0, "batch": 300.0, "speculative": 60.0}
+
+# Output tokens assumed when a request sets no max_tokens / max_output_tokens
+DEFAULT_OUTPUT_TOKENS = 1024
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(payload: Dict) -> int:
+    """
+    Rough TPM cost of a chat/responses request: prompt size plus the output allowance
+    """
+    prompt = payload.get("messages", payload.get("input", ""))
+    prompt_chars = len(prompt if isinstance(prompt, str) else json.dumps(prompt))
+    output = payload.get("max_tokens") or payload.get("max_output_tokens") or payload.get("max_completion_tokens")
+    return prompt_chars // CHARS_PER_TOKEN + int(output or DEFAULT_OUTPUT_TOKENS)
+
+
+class Priority:
+    """
+    A priority class that can be raised while its requests are queued
+    """
+
+    def __init__(self, name: str = "interactive"):
+        if name not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {name!r} (expected one of {', '.join(PRIORITIES)})")
+        self.name = name
+        self._listeners: Set[Callable[[], None]] = set()
+
+    def raise_to(self, name: str) -> None:
+        """
+        Move queued (and later) requests up to `name`; never lowers the priority
+        """
+        if PRIORITIES[name] < PRIORITIES[self.name]:
+            self.name = name
+            for listener in list(self._listeners):
+                listener()
+
+    def __repr__(self) -> str:
+        return f"Priority({self.name!r})"
+
+
+class QueueTimeout(Exception):
+    """A request wasn't admitted within its priority class's max queue wait"""
+
+
+def parse_queue_waits(spec: str) -> Dict[str, float]:
+    """
+    Parse OPENAI_MAX_QUEUE_WAIT, e.g. "interactive=10,batch=600" (priority=seconds)
+    """
+    waits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        priority, _, seconds = item.partition("=")
+        waits[priority.strip()] = float(seconds)
+    return waits
+
+
+def parse_model_limits(spec: str) -> Dict[str, Tuple[float, float]]:
+    """
+    Parse OPENAI_MODEL_LIMITS, e.g. "gpt-4o=5000:800000,gpt-5=500:30000" (model=RPM:TPM)
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = (float(rpm), float(tpm))
+    return limits
+
+
+class _ModelBudget:
+    """
+    RPM and TPM buckets for one model, plus what its requests actually cost
+    """
+
+    def __init__(self, model: str, rpm: float, tpm: float, state: Optional["StateBackend"], clock: Callable[[], float]):
+        # Per-second buckets holding one minute's worth: a full minute of budget may be spent at once
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests = TokenBucket(rate=rpm / 60, burst=max(int(rpm), 1), clock=clock,
+                                    state=state, key=f"openai:rpm:{model}" if state else None)
+        self.tokens = TokenBucket(rate=tpm / 60, burst=max(int(tpm), 1), clock=clock,
+                                  state=state, key=f"openai:tpm:{model}" if state else None)
+        self.request_count = 0
+        self.estimated_tokens = 0
+        self.reported_tokens = 0
+        self.reported_requests = 0
+        self.throttled = 0
+
+    async def try_take(self, tokens: int, reserve: float) -> float:
+        """
+        Take one request and `tokens` if both fit, leaving `reserve` of each budget
+
+        Returns:
+            0 if taken, else seconds until they might fit (nothing is taken)
+        """
+        wait = await self.requests.try_acquire(1, keep=reserve * self.requests.burst)
+        if wait > 0:
+            self.throttled += 1
+            return wait
+        wait = await self.tokens.try_acquire(tokens, keep=reserve * self.tokens.burst)
+        if wait > 0:
+            await self.requests.debit(-1)
+            self.throttled += 1
+            return wait
+        return 0.0
+
+    async def refund(self, tokens: int) -> None:
+        await self.requests.debit(-1)
+        await self.tokens.debit(-tokens)
+
+    def stats(self) -> Dict:
+        return {
+            "rpm": self.rpm,
+            "tpm": self.tpm,
+            "requests": self.request_count,
+            "estimated_tokens": self.estimated_tokens,
+            "reported_tokens": self.reported_tokens,
+            # > 1 means the estimates run low
+            "reported_vs_estimated": round(self.reported_tokens / self.estimated_tokens, 3)
+            if self.estimated_tokens and self.reported_requests == self.request_count else None,
+            # Times the most urgent waiter for this model had to wait for budget
+            "throttled": self.throttled
+        }
+
+
+class _QueueStats:
+    def __init__(self, window: int = 500):
+        self.waits = deque(maxlen=window)
+        self.admitted = 0
+        self.queued = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.admitted += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        self.waits.append(wait)
+
+    def stats(self) -> Dict:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> Optional[float]:
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))], 3) if waits else None
+
+        return {
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "timeouts": self.timeouts,
+            "avg_wait": round(self.total_wait / self.admitted, 3) if self.admitted else None,
+            "p50_wait": percentile(0.5),
+            "p95_wait": percentile(0.95),
+            "max_wait": round(self.max_wait, 3)
+        }
+
+
+class AIRequestScheduler:
+    """
+    Admit OpenAI requests by priority under a concurrency cap and per-model RPM/TPM budgets
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        rpm: float = 500,
+        tpm: float = 150_000,
+        model_limits: Optional[Dict[str, Tuple[float, float]]] = None,
+        max_queue_wait: Optional[Dict[str, float]] = None,
+        state: Optional["StateBackend"] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            max_concurrency: Requests in flight at once (this process)
+            rpm: Default requests per minute per model (<= 0 disables)
+            tpm: Default tokens per minute per model (<= 0 disables)
+            model_limits: {model: (rpm, tpm)} overriding the defaults
+            max_queue_wait: {priority: seconds} overriding MAX_QUEUE_WAIT
+            state: Shared state backend, so every worker draws from the same RPM/TPM budgets
+            clock: Monotonic time source (overridable for tests)
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self.max_concurrency = max_concurrency
+        self.rpm = rpm
+        self.tpm = tpm
+        self.model_limits = model_limits or {}
+        self.max_queue_wait = {**MAX_QUEUE_WAIT, **(max_queue_wait or {})}
+        self.state = state
+        self._clock = clock
+        self._budgets: Dict[str, _ModelBudget] = {}
+
+        self._active = 0
+        # [Priority, sequence, future, budget, tokens]; ordered when admitting, since priorities can change
+        self._waiters: list = []
+        self._sequence = itertools.count()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._pump_again = False
+        self._retry_timer: Optional[asyncio.TimerHandle] = None
+        self._queues = {priority: _QueueStats() for priority in PRIORITIES}
+        self.rate_limited_retries = 0
+
+    @classmethod
+    def from_env(cls, state: Optional["StateBackend"] = None) -> "AIRequestScheduler":
+        """
+        OPENAI_MAX_CONCURRENCY, OPENAI_RPM, OPENAI_TPM, OPENAI_MODEL_LIMITS ("model=RPM:TPM,...")
+        and OPENAI_MAX_QUEUE_WAIT ("priority=seconds,...")
+        """
+        return cls(
+            max_concurrency=int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+            rpm=float(os.getenv("OPENAI_RPM", "500")),
+            tpm=float(os.getenv("OPENAI_TPM", "150000")),
+            model_limits=parse_model_limits(os.getenv("OPENAI_MODEL_LIMITS", "")),
+            max_queue_wait=parse_queue_waits(os.getenv("OPENAI_MAX_QUEUE_WAIT", "")),
+            state=state
+        )
+
+    def budget(self, model: str) -> _ModelBudget:
+        if model not in self._budgets:
+            rpm, tpm = self.model_limits.get(model, (self.rpm, self.tpm))
+            self._budgets[model] = _ModelBudget(model, rpm, tpm, self.state, self._clock)
+        return self._budgets[model]
+
+    @asynccontextmanager
+    async def slot(self, model: str, estimated_tokens: int, priority: Union[str, Priority] = "interactive"):
+        """
+        Wait until a concurrency slot and the model's budget are both free, then hold the slot for the block
+
+        Args:
+            model: Model the request is for
+            estimated_tokens: Expected prompt + output tokens
+            priority: "interactive", "batch" or "speculative", or a Priority that may be raised while queued
+
+        Raises:
+            QueueTimeout: If not admitted within max_queue_wait (of the class it was queued in)
+        """
+        if not isinstance(priority, Priority):
+            priority = Priority(priority)
+
+        queue = self._queues[priority.name]
+        budget = self.budget(model)
+        started = self._clock()
+        queue.queued += 1
+        priority._listeners.add(self._kick)
+        try:
+            # A single request can't need more than a full minute's budget
+            await self._admit(priority, budget, min(estimated_tokens, budget.tokens.burst))
+        except QueueTimeout:
+            queue.timeouts += 1
+            raise
+        finally:
+            queue.queued -= 1
+            priority._listeners.discard(self._kick)
+
+        try:
+            budget.request_count += 1
+            budget.estimated_tokens += estimated_tokens
+            queue.record(self._clock() - started)
+            yield budget
+        finally:
+            self._release()
+
+    async def record_usage(self, model: str, estimated_tokens: int, usage: Optional[Dict]) -> None:
+        """
+        Correct the model's TPM bucket with the tokens OpenAI reports having used
+        """
+        if not usage:
+            return
+        reported = usage.get("total_tokens") or (
+            (usage.get("prompt_tokens") or usage.get("input_tokens") or 0) +
+            (usage.get("completion_tokens") or usage.get("output_tokens") or 0)
+        )
+        if not reported:
+            return
+        budget = self.budget(model)
+        budget.reported_tokens += reported
+        budget.reported_requests += 1
+        # OpenAI counts the output allowance until the reply is done; afterwards only what was used
+        await budget.tokens.debit(reported - estimated_tokens)
+
+    async def _admit(self, priority: Priority, budget: _ModelBudget, tokens: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append([priority, next(self._sequence), future, budget, tokens])
+        self._kick()
+        timeout = self.max_queue_wait.get(priority.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return  # admitted just as the wait ran out
+            future.cancel()
+            raise QueueTimeout(f"OpenAI request not admitted within {timeout:g}s ({priority.name})")
+        except asyncio.CancelledError:
+            # Cancelled after the slot was handed over: give it (and the budget) back
+            if future.done() and not future.cancelled():
+                await budget.refund(tokens)
+                self._release()
+            else:
+                future.cancel()
+            raise
+
+    def _release(self) -> None:
+        self._active -= 1
+        self._kick()
+
+    def _kick(self) -> None:
+        # One admission pass at a time; a kick during a pass makes it run again
+        if self._pump_task and not self._pump_task.done():
+            self._pump_again = True
+            return
+        self._pump_task = asyncio.get_running_loop().create_task(self._pump())
+
+    async def _pump(self) -> None:
+        """
+        Admit waiters in priority order while slots are free and their model's budget allows
+        """
+        while True:
+            self._pump_again = False
+            retry_in = None
+            blocked = set()  # models whose most urgent waiter is short of budget
+
+            for entry in sorted(self._waiters, key=lambda item: (PRIORITIES[item[0].name], item[1])):
+                priority, _, future, budget, tokens = entry
+                reserve = BUDGET_RESERVE[priority.name]
+                if self._active >= self.max_concurrency:
+                    break
+                if future.done() or id(budget) in blocked:
+                    continue
+                try:
+                    wait = await budget.try_take(tokens, reserve)
+                except Exception as e:
+                    # Budget store unreachable: fail this request rather than stall the queue
+                    if not future.done():
+                        future.set_exception(e)
+                    continue
+                if future.done():  # cancelled or timed out meanwhile
+                    if wait <= 0:
+                        await budget.refund(tokens)
+                    continue
+                if wait > 0:
+                    # Lower-priority waiters for this model don't get to spend what it's waiting for
+                    blocked.add(id(budget))
+                    retry_in = wait if retry_in is None else min(retry_in, wait)
+                    continue
+                self._active += 1
+                future.set_result(None)
+
+            self._waiters = [entry for entry in self._waiters if not entry[2].done()]
+            if self._pump_again:
+                continue
+
+            if self._retry_timer:
+                self._retry_timer.cancel()
+                self._retry_timer = None
+            if retry_in is not None and self._waiters:
+                self._retry_timer = asyncio.get_running_loop().call_later(retry_in, self._kick)
+            return
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "waiting": sum(1 for entry in self._waiters if not entry[2].done()),
+            "rate_limited_retries": self.rate_limited_retries,
+            "queues": {priority: queue.stats() for priority, queue in self._queues.items()},
+            "models": {model: budget.stats() for model, budget in self._budgets.items()}
+        }
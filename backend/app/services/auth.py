@@ -0,0 +1,59 @@
+"""
+Who is calling: the Firebase user behind an `Authorization: Bearer <ID token>` header
+
+The frontend signs users in with Firebase Auth. Endpoints that don't require
+sign-in use the verified uid to charge per-user budgets to the user rather
+than to a client address (shared behind a NAT). The Admin SDK is imported on
+first use, like the Firebase storage backend.
+"""
+import asyncio
+import os
+from typing import Optional
+
+
+class FirebaseAuth:
+    """
+    Verifies Firebase ID tokens
+    """
+
+    def __init__(self, project_id: Optional[str] = None):
+        """
+        Args:
+            project_id: Firebase project the tokens are issued for (default FIREBASE_PROJECT_ID;
+                        without one, the Admin SDK's default credentials decide)
+        """
+        self.project_id = project_id or os.getenv("FIREBASE_PROJECT_ID")
+
+    async def verify(self, id_token: Optional[str]) -> Optional[str]:
+        """
+        The uid of a valid ID token (None if it's missing, invalid or can't be checked)
+        """
+        if not id_token:
+            return None
+        try:
+            # Fetches Google's signing keys on first use: keep it off the event loop
+            return await asyncio.to_thread(self._verify, id_token)
+        except Exception as e:
+            print(f"⚠️ Ignoring unverified ID token: {str(e)}")
+            return None
+
+    def _verify(self, id_token: str) -> str:
+        if self.project_id:
+            # Only the project id is needed to check a token: no service account credentials
+            from google.auth.transport.requests import Request
+            from google.oauth2 import id_token as google_id_token
+
+            claims = google_id_token.verify_firebase_token(id_token, Request(), audience=self.project_id)
+            if not claims or not claims.get("sub"):
+                raise ValueError("ID token has no subject")
+            return claims["sub"]
+
+        import firebase_admin
+        from firebase_admin import auth
+
+        if not firebase_admin._apps:
+            try:
+                firebase_admin.initialize_app()
+            except ValueError:
+                pass  # initialized by the storage backend meanwhile
+        return auth.verify_id_token(id_token)["uid"]
@@ -0,0 +1,217 @@
+"""
+In-process caching helpers shared by the service layer
+"""
+import asyncio
+import functools
+import inspect
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache whose entries expire after a fixed time-to-live.
+
+    Hit/miss/eviction counters are kept so the TTL and size can be tuned
+    from real traffic (see stats()).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            maxsize: Maximum number of entries before the least recently used one is evicted
+            ttl: Seconds an entry stays valid after it was written
+            clock: Monotonic time source (overridable for tests)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the cached value for key, or default if it is missing or expired
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        # Mark as most recently used
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store value under key, evicting the least recently used entry if full
+        """
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        self._entries[key] = (expires_at, value)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Drop a single entry. Returns True if something was removed.
+        """
+        return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Drop every entry (counters are kept)"""
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key, _MISSING)
+        return entry is not _MISSING and entry[0] > self._clock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """
+        Counters for tuning the cache size and TTL
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits / lookups) * 100, 2) if lookups else 0
+        }
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight coroutine.
+
+    The shared call runs as its own task and is shielded, so one caller
+    being cancelled (e.g. a client disconnect) doesn't cancel it for the rest.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._finish(key, f))
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        # Mark the exception retrieved even if every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+
+class ReadCoalescer:
+    """
+    Single-flight plus a micro-TTL result cache for idempotent upstream reads
+
+    Callers polling the same resource within the TTL get the cached result;
+    callers arriving while it's being fetched join the in-flight request.
+    Results are shared between callers and must be treated as read-only.
+
+    clear() starts a new generation: fetches that started before it don't
+    cache their (possibly pre-write) result, and later callers don't join them.
+    """
+
+    def __init__(self, ttl: float = 2.0, maxsize: int = 512, clock: Callable[[], float] = time.monotonic):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, clock=clock)
+        self.flight = SingleFlight()
+        self.upstream_calls = 0
+        self.generation = 0
+
+    async def call(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        cached = self.cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        generation = self.generation
+
+        async def fetch():
+            self.upstream_calls += 1
+            result = await fn()
+            if self.generation == generation:
+                self.cache.set(key, result)
+            return result
+
+        return await self.flight.do((generation, key), fetch)
+
+    def clear(self) -> None:
+        """Drop cached results and detach in-flight reads (after a write that changes what reads return)"""
+        self.generation += 1
+        self.cache.clear()
+
+    def stats(self) -> Dict:
+        return {
+            **self.cache.stats(),
+            "inflight": len(self.flight),
+            "coalesced": self.flight.shared,
+            "upstream_calls": self.upstream_calls
+        }
+
+
+def coalesced_read(method):
+    """
+    Route an async service method through the instance's ReadCoalescer (self.reads)
+
+    The key is the method name plus its bound arguments with defaults applied,
+    so get(x) and get(x, limit=100) coalesce when 100 is the default.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = (method.__name__,) + tuple(
+            (name, value) for name, value in bound.arguments.items() if name != "self"
+        )
+        return await self.reads.call(key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
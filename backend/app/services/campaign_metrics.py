@@ -0,0 +1,302 @@
+"""
+Incremental per-campaign analytics counters fed by webhook and pulled events
+
+Send/open/click/reply/bounce events update counters as they arrive, and the
+rates are recomputed on write. Every event has an idempotency key that is the
+same whether it came from a webhook or a pull, so webhook redeliveries and
+overlapping pulls can be replayed safely.
+
+Counters are only the whole history for campaigns tracked since launch while
+webhooks were on (track()); those are served without an upstream round trip.
+For any other campaign the counters are a lower bound (events seen since
+webhooks or the first pull), so they are reconciled with Instantly's totals.
+A pull can't make them complete: /api/v2/emails has sends and replies, not
+opens, clicks or bounces.
+
+The idempotency keys and per-lead sets are bounded per campaign (max_keys,
+key_ttl): a replay older than that would be counted again.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterable, Dict, Iterable, Optional
+
+from .cache import TTLCache
+
+
+# Event type (canonical or raw Instantly name) -> counter
+EVENT_COUNTERS = {
+    "email_sent": "sent",
+    "email_opened": "opened",
+    "email_link_clicked": "clicked",
+    "link_clicked": "clicked",
+    "reply_received": "replied",
+    "email_bounced": "bounced",
+}
+
+# Counters that count each lead once (matches Instantly's analytics totals)
+UNIQUE_PER_LEAD = ("opened", "clicked", "replied")
+
+# Marker record: the campaign was tracked from launch
+TRACKING_STARTED = "tracking_started"
+
+# Unibox email types from GET /api/v2/emails
+_UE_TYPE_EVENTS = {1: "email_sent", 2: "reply_received"}
+
+
+def campaign_rates(sent: int, opened: int, clicked: int, replied: int) -> Dict:
+    """
+    open/click/reply rates in percent, same definitions as the Instantly analytics pull
+    """
+    return {
+        "open_rate": round((opened / max(sent, 1)) * 100, 2),
+        "click_rate": round((clicked / max(opened, 1)) * 100, 2),
+        "reply_rate": round((replied / max(sent, 1)) * 100, 2),
+    }
+
+
+def event_key(event: Dict) -> str:
+    """
+    Idempotency key, the same for a webhook event and the pulled email it describes
+
+    Webhook deliveries and /api/v2/emails items have different ids and timestamps,
+    so the key is the campaign, lead and event type, plus the sequence step for
+    sends and bounces (opens, clicks and replies are counted once per lead anyway).
+    An event without a lead falls back to its own id, so such events don't
+    collapse into one.
+    """
+    counter = EVENT_COUNTERS.get(event.get("event_type"), event.get("event_type"))
+    lead = (event.get("lead_email") or "").strip().lower()
+    if not lead:
+        return hashlib.sha256(f"{counter}|{event.get('campaign_id', '')}|id:{event.get('event_id') or ''}".encode("utf-8")).hexdigest()
+    step = event.get("step")
+    parts = [
+        counter,
+        event.get("campaign_id", ""),
+        lead,
+        "" if counter in UNIQUE_PER_LEAD or step in (None, "") else str(step).strip(),
+    ]
+    return hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+class _CampaignCounters:
+    def __init__(self, max_keys: int, key_ttl: float):
+        self.counts = {"sent": 0, "opened": 0, "clicked": 0, "replied": 0, "bounced": 0}
+        self.unique_leads = {name: TTLCache(maxsize=max_keys, ttl=key_ttl) for name in UNIQUE_PER_LEAD}
+        self.event_keys = TTLCache(maxsize=max_keys, ttl=key_ttl)
+        self.events = 0
+        self.pull_cursor: Optional[str] = None
+        self.complete = False  # tracked since launch: counters are the whole history
+        self.snapshot: Dict = {}
+        self.updated_at: Optional[str] = None
+
+    def refresh_snapshot(self) -> None:
+        counts = self.counts
+        self.updated_at = datetime.now(timezone.utc).isoformat()
+        self.snapshot = {
+            **counts,
+            **campaign_rates(counts["sent"], counts["opened"], counts["clicked"], counts["replied"]),
+            "events": self.events,
+            "updated_at": self.updated_at,
+        }
+
+
+class CampaignMetrics:
+    """
+    Campaign counters updated incrementally from events
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        live: bool = False,
+        max_keys: int = 100_000,
+        key_ttl: float = 30 * 24 * 3600
+    ):
+        """
+        Args:
+            path: Optional JSON-lines file; accepted events are appended and replayed on start
+            live: Events arrive by webhook as they happen, so campaigns can be tracked from launch
+            max_keys: Idempotency keys (and leads per unique counter) remembered per campaign
+            key_ttl: Seconds an idempotency key is remembered
+        """
+        self.path = path
+        self.live = live
+        self.max_keys = max_keys
+        self.key_ttl = key_ttl
+        self._campaigns: Dict[str, _CampaignCounters] = {}
+        self.accepted = 0
+        self.replayed = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(event)
+
+    def _campaign(self, campaign_id: str) -> _CampaignCounters:
+        campaign = self._campaigns.get(campaign_id)
+        if campaign is None:
+            campaign = self._campaigns[campaign_id] = _CampaignCounters(self.max_keys, self.key_ttl)
+        return campaign
+
+    def _apply(self, event: Dict) -> bool:
+        campaign_id = event.get("campaign_id")
+        if event.get("event_type") == TRACKING_STARTED and campaign_id:
+            campaign = self._campaign(campaign_id)
+            campaign.complete = True
+            campaign.refresh_snapshot()
+            return True
+
+        counter = EVENT_COUNTERS.get(event.get("event_type"))
+        if not counter or not campaign_id:
+            return False
+
+        campaign = self._campaign(campaign_id)
+        key = event_key(event)
+        if key in campaign.event_keys:
+            self.replayed += 1
+            return False
+        campaign.event_keys.set(key, True)
+        campaign.events += 1
+
+        lead_email = (event.get("lead_email") or "").lower()
+        if counter in UNIQUE_PER_LEAD and lead_email:
+            if lead_email in campaign.unique_leads[counter]:
+                campaign.refresh_snapshot()
+                return True
+            campaign.unique_leads[counter].set(lead_email, True)
+
+        campaign.counts[counter] += 1
+        campaign.refresh_snapshot()
+        return True
+
+    def ingest(self, event: Dict) -> bool:
+        """
+        Apply one event (a normalized webhook event or a pulled one)
+
+        Returns True if it was new, False if it was a replay or not a metrics event.
+        """
+        record = {
+            "event_type": event.get("event_type"),
+            "campaign_id": event.get("campaign_id"),
+            "lead_email": event.get("lead_email"),
+            "timestamp": event.get("timestamp"),
+            "step": event.get("step"),
+            "event_id": event.get("event_id"),
+        }
+        if not self._apply(record):
+            return False
+
+        self.accepted += 1
+        self._append(record)
+        return True
+
+    def track(self, campaign_id: str) -> bool:
+        """
+        Start counting a campaign that was just launched, so its counters are complete
+
+        Only when webhooks are on (live); otherwise events before the first
+        webhook or pull would be missing. Returns True if the campaign is tracked.
+        """
+        if not self.live or not campaign_id:
+            return False
+        record = {"event_type": TRACKING_STARTED, "campaign_id": campaign_id}
+        self._apply(record)
+        self._append(record)
+        return True
+
+    def _append(self, record: Dict) -> None:
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def ingest_many(self, events: Iterable[Dict]) -> int:
+        return sum(1 for event in events if self.ingest(event))
+
+    def is_complete(self, campaign_id: str) -> bool:
+        """
+        True if the counters hold the campaign's whole history (tracked since launch)
+        """
+        campaign = self._campaigns.get(campaign_id)
+        return bool(campaign and campaign.complete)
+
+    def get(self, campaign_id: str) -> Optional[Dict]:
+        """
+        Current analytics for a campaign (same shape as InstantlyService.get_campaign_analytics)
+        """
+        campaign = self._campaigns.get(campaign_id)
+        return dict(campaign.snapshot) if campaign else None
+
+    def reconcile(self, campaign_id: str, upstream: Dict) -> Dict:
+        """
+        Merge Instantly's analytics with the local counters
+
+        Both are lower bounds (Instantly's totals lag webhooks; local counters
+        miss events from before the first webhook or pull), so each counter is
+        the larger of the two and the rates are recomputed.
+        """
+        local = self._campaigns.get(campaign_id)
+        if local is None:
+            return upstream
+        counts = {
+            name: max(int(upstream.get(name) or 0), value)
+            for name, value in local.counts.items()
+        }
+        return {
+            **counts,
+            **campaign_rates(counts["sent"], counts["opened"], counts["clicked"], counts["replied"]),
+        }
+
+    async def pull(self, emails: AsyncIterable[Dict], campaign_id: str) -> int:
+        """
+        Ingest a paged pull of campaign emails (InstantlyService.iter_campaign_emails)
+
+        Sent emails and received replies become events; the id of the newest email
+        (by timestamp_created, whatever order the pages come in) is kept as the
+        cursor for the next incremental pull. Returns new events.
+        """
+        added = 0
+        newest = None
+        async for email in emails:
+            event_type = _UE_TYPE_EVENTS.get(email.get("ue_type"))
+            if event_type:
+                if self.ingest({
+                    "event_type": event_type,
+                    "campaign_id": campaign_id,
+                    "lead_email": email.get("lead"),
+                    "timestamp": email.get("timestamp_created"),
+                    "step": email.get("step"),
+                    "event_id": email.get("id"),
+                }):
+                    added += 1
+            if email.get("id") and (newest is None or (email.get("timestamp_created") or "") >= (newest.get("timestamp_created") or "")):
+                newest = email
+        if newest is not None:
+            # An empty pull leaves no entry behind
+            campaign = self._campaign(campaign_id)
+            campaign.pull_cursor = newest["id"]
+            if not campaign.snapshot:
+                campaign.refresh_snapshot()
+        return added
+
+    def pull_cursor(self, campaign_id: str) -> Optional[str]:
+        campaign = self._campaigns.get(campaign_id)
+        return campaign.pull_cursor if campaign else None
+
+    def stats(self) -> Dict:
+        return {
+            "campaigns": len(self._campaigns),
+            "accepted": self.accepted,
+            "replayed": self.replayed
+        }
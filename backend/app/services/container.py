@@ -0,0 +1,262 @@
+"""
+Application-scoped services, built once at startup and closed on shutdown
+
+The FastAPI lifespan in main.py creates one ServiceContainer and endpoints
+get services from it through the dependencies in app/dependencies.py, so
+pooled HTTP clients, caches and rate limiters live as long as the process.
+
+State that every worker must agree on (upload progress, the Instantly rate
+limit, webhook de-duplication) goes through the shared StateBackend, so the
+API can run with several workers (see serve.py). Webhook events are fanned
+out to every worker through it. The JSON-lines registries of CampaignMetrics
+and ListReaper are single-worker only: with WEB_CONCURRENCY > 1 their paths
+are ignored and each worker keeps them in memory.
+
+Building the container is cheap. The storage backend (Firebase SDK import and
+app initialization) is created by warm_up() in a thread after the server is
+accepting traffic; requests that need it sooner await that same
+initialization (get_db) instead of blocking the event loop.
+"""
+import asyncio
+import os
+import time
+from typing import Callable, Dict, Optional
+
+from .ai_copy import AICopyService
+from .auth import FirebaseAuth
+from .campaign_metrics import CampaignMetrics, EVENT_COUNTERS
+from .csv_ingest import UploadProgress
+from .domain_inventory import DomainInventory
+from .domain_service import DomainService
+from .enrichment_watcher import EnrichmentWatcher
+from .instantly import InstantlyService, instantly_rate_limiter
+from .lead_snapshots import LeadSnapshotStore
+from .openai_client import OpenAIClient
+from .list_reaper import ListReaper
+from .speculative_copy import SpeculativeCopy
+from .state_backend import MemoryStateBackend, StateBackend, create_state_backend
+from .storage_backend import StorageBackend, create_storage_backend
+from .unipile_service import UnipileService
+from .webhook_events import WebhookDispatcher
+
+
+class StorageUnavailable(Exception):
+    """The storage backend failed to initialize (answered with 503)"""
+
+
+class ServiceContainer:
+    """
+    Every long-lived service the API uses
+    """
+
+    def __init__(
+        self,
+        db: Optional[StorageBackend],
+        webhooks: WebhookDispatcher,
+        instantly: InstantlyService,
+        enrichment_watcher: EnrichmentWatcher,
+        lead_snapshots: LeadSnapshotStore,
+        campaign_metrics: CampaignMetrics,
+        list_reaper: ListReaper,
+        ai: AICopyService,
+        unipile: UnipileService,
+        domains: DomainService,
+        domain_inventory: DomainInventory,
+        upload_progress: UploadProgress,
+        state: Optional[StateBackend] = None,
+        speculative_copy: Optional[SpeculativeCopy] = None,
+        auth: Optional[FirebaseAuth] = None,
+        db_factory: Callable[[], StorageBackend] = create_storage_backend,
+        db_retry_interval: float = 30.0
+    ):
+        self._db = db
+        self._db_factory = db_factory
+        self._db_init: Optional[asyncio.Task] = None
+        self._db_failed_at: Optional[float] = None
+        self.db_retry_interval = db_retry_interval
+        self.db_error: Optional[str] = None
+        self.warmup_seconds: Optional[float] = None
+        self.state = state or MemoryStateBackend()
+        self.state_error: Optional[str] = None
+        self.webhooks = webhooks
+        self.instantly = instantly
+        self.enrichment_watcher = enrichment_watcher
+        self.lead_snapshots = lead_snapshots
+        self.campaign_metrics = campaign_metrics
+        self.list_reaper = list_reaper
+        self.ai = ai
+        self.unipile = unipile
+        self.domains = domains
+        self.domain_inventory = domain_inventory
+        self.upload_progress = upload_progress
+        self.speculative_copy = speculative_copy or SpeculativeCopy(ai, self.state)
+        self.auth = auth or FirebaseAuth()
+
+        # New leads landed in a list: drop cached reads and re-poll watchers now
+        webhooks.subscribe(("lead_added", "enrichment_completed"), self._on_list_leads_changed)
+        # Send/open/click/reply/bounce counters, fed by webhooks and /api/analytics/{id}/sync
+        webhooks.subscribe(tuple(EVENT_COUNTERS), campaign_metrics.ingest)
+
+    async def get_db(self) -> StorageBackend:
+        """
+        Storage backend, waiting for its initialization if it's still running
+
+        Initialization runs once, in a thread; concurrent callers share it.
+        After a failure, callers get StorageUnavailable until db_retry_interval
+        has passed, then the next one starts a new attempt.
+
+        Raises:
+            StorageUnavailable: If the storage backend failed to initialize
+        """
+        if self._db is not None:
+            return self._db
+        if self._db_init is None:
+            if self._db_failed_at is not None and time.monotonic() - self._db_failed_at < self.db_retry_interval:
+                raise StorageUnavailable(f"Storage backend unavailable: {self.db_error}")
+            self._db_init = asyncio.create_task(self._init_db())
+        # shield: a cancelled request mustn't cancel the shared initialization
+        await asyncio.shield(self._db_init)
+        if self._db is None:
+            raise StorageUnavailable(f"Storage backend unavailable: {self.db_error}")
+        return self._db
+
+    async def _init_db(self) -> None:
+        try:
+            self._db = await asyncio.to_thread(self._db_factory)
+            self.db_error = None
+            self._db_failed_at = None
+        except Exception as e:
+            self.db_error = str(e)
+            self._db_failed_at = time.monotonic()
+            print(f"⚠️ Storage backend failed to initialize: {str(e)}")
+        finally:
+            self._db_init = None
+
+    async def warm_up(self) -> None:
+        """
+        Initialize the slow services off the event loop (run in the background after startup)
+        """
+        started = time.perf_counter()
+        try:
+            await self.get_db()
+        except StorageUnavailable:
+            pass
+        try:
+            await self.state.ping()
+            self.state_error = None
+        except Exception as e:
+            self.state_error = str(e)
+            print(f"⚠️ State backend ({self.state.name}) is unreachable: {str(e)}")
+        self.warmup_seconds = round(time.perf_counter() - started, 3)
+        print(f"✅ Services warmed up in {self.warmup_seconds}s")
+
+    def readiness(self) -> Dict:
+        """
+        Which services are ready to serve traffic
+        """
+        if self.db_error:
+            storage = f"error: {self.db_error}"
+        else:
+            storage = "ready" if self._db is not None else "starting"
+        state = f"error: {self.state_error}" if self.state_error else self.state.name
+        return {
+            "ready": storage == "ready" and not self.state_error,
+            "checks": {
+                "storage": storage,
+                "state": state,
+                "webhooks": "enabled" if self.webhooks.enabled else "disabled"
+            },
+            "warmup_seconds": self.warmup_seconds
+        }
+
+    def _on_list_leads_changed(self, event: dict) -> None:
+        self.instantly.reads.clear()
+        self.enrichment_watcher.nudge(event.get("resource_id"))
+
+    @classmethod
+    def from_env(
+        cls,
+        db: Optional[StorageBackend] = None,
+        state: Optional[StateBackend] = None
+    ) -> "ServiceContainer":
+        """
+        Build every service from environment configuration
+
+        Args:
+            db: Optional storage backend (default: create_storage_backend() on warm-up)
+            state: Optional shared state backend (default: create_state_backend())
+        """
+        # STATE_BACKEND=memory (one worker) or redis (REDIS_URL, any number of workers)
+        state = state or create_state_backend()
+        instantly_key = os.getenv("INSTANTLY_API_KEY")
+        # Instantly webhook events (INSTANTLY_WEBHOOK_SECRET) - polling remains the fallback.
+        # With Redis every worker gets every event, whichever worker Instantly posted it to.
+        webhooks = WebhookDispatcher(secret=os.getenv("INSTANTLY_WEBHOOK_SECRET"), state=state)
+        campaign_events_path, list_reaper_path = os.getenv("CAMPAIGN_EVENTS_PATH"), os.getenv("LIST_REAPER_PATH")
+        # Set by serve.py (uvicorn reads it too); those files would be loaded and appended by every worker
+        workers = int(os.getenv("WEB_CONCURRENCY") or 1)
+        if workers > 1 and (campaign_events_path or list_reaper_path):
+            print(f"⚠️ CAMPAIGN_EVENTS_PATH/LIST_REAPER_PATH are single-worker only; ignored with {workers} workers")
+            campaign_events_path = list_reaper_path = None
+        # One INSTANTLY_MAX_RPS budget for every service and worker using the API key
+        rate_limiter = instantly_rate_limiter(state)
+        instantly = InstantlyService(instantly_key, webhooks=webhooks, rate_limiter=rate_limiter)
+        domains = DomainService(instantly_key, rate_limiter=rate_limiter)
+        openai_key = os.getenv("OPENAI_API_KEY")
+        ai = AICopyService(openai_key, openai=OpenAIClient(openai_key, state=state), state=state)
+
+        return cls(
+            # Storage backend chosen by STORAGE_BACKEND (firebase, supabase or memory)
+            db=db,
+            webhooks=webhooks,
+            instantly=instantly,
+            # One shared upstream poll loop per enrichment_id for long-polling clients
+            enrichment_watcher=EnrichmentWatcher(
+                instantly,
+                state=state,
+                poll_interval=float(os.getenv("ENRICHMENT_POLL_INTERVAL", "3.0"))
+            ),
+            # Last lead page per list, so previews can return only what changed since a cursor
+            lead_snapshots=LeadSnapshotStore(),
+            # Campaigns launched while this worker gets every webhook event are counted from their first one
+            campaign_metrics=CampaignMetrics(
+                path=campaign_events_path,
+                live=webhooks.enabled and (workers == 1 or webhooks.fan_out)
+            ),
+            # Lists created per launch (by this worker); temp/failed-launch lists are deleted once it ends
+            list_reaper=ListReaper(instantly, path=list_reaper_path),
+            ai=ai,
+            unipile=UnipileService(os.getenv("UNIPILE_API_KEY")),
+            domains=domains,
+            domain_inventory=DomainInventory(domains, ttl=float(os.getenv("DOMAIN_INVENTORY_TTL", "300"))),
+            # Progress of streaming CSV uploads, watched over SSE
+            upload_progress=UploadProgress(state=state),
+            state=state,
+            # Email copy pre-generated for suggested ICPs (SPECULATIVE_EMAIL_COPY), within a per-user budget
+            speculative_copy=SpeculativeCopy.from_env(ai, state)
+        )
+
+    async def start(self) -> None:
+        """
+        Start background work (on startup)
+        """
+        self.webhooks.start()
+        self.speculative_copy.start_listener()
+        self.list_reaper.start()
+
+    async def aclose(self) -> None:
+        """
+        Stop background tasks, then close pooled clients (on shutdown)
+        """
+        await self.webhooks.aclose()
+        await self.enrichment_watcher.aclose()
+        await self.list_reaper.aclose()
+        await self.speculative_copy.aclose()
+
+        closers = [self.instantly.aclose(), self.domains.aclose(), self.unipile.aclose()]
+        for service in (self.ai, self._db, self.state):
+            if hasattr(service, "aclose"):
+                closers.append(service.aclose())
+        for result in await asyncio.gather(*closers, return_exceptions=True):
+            if isinstance(result, Exception):
+                print(f"⚠️ Error closing service: {str(result)}")
@@ -0,0 +1,260 @@
+"""
+Incremental CSV lead ingestion
+
+CSV bodies are parsed chunk by chunk as they arrive, so a 100k-row upload
+never has to sit in memory as one string. Rows are column-mapped, emails are
+validated and de-duplicated on the fly, and clean leads come out in batches
+ready for InstantlyService.add_leads_to_list.
+"""
+import codecs
+import csv
+import io
+import re
+import time
+from typing import AsyncIterable, AsyncIterator, Dict, List, Optional
+
+from .lead_normalizer import normalize_email
+from .state_backend import MemoryStateBackend, StateBackend
+
+
+# Normalized header -> lead field. Anything else goes into custom_variables.
+COLUMN_ALIASES = {
+    "email": "email",
+    "email address": "email",
+    "e mail": "email",
+    "work email": "email",
+    "first name": "first_name",
+    "firstname": "first_name",
+    "given name": "first_name",
+    "last name": "last_name",
+    "lastname": "last_name",
+    "surname": "last_name",
+    "company": "company",
+    "company name": "company",
+    "organization": "company",
+    "phone": "phone",
+    "phone number": "phone",
+    "website": "website",
+    "company website": "website",
+    "url": "website",
+    "domain": "website",
+    "title": "title",
+    "job title": "title",
+    "position": "title",
+    "linkedin": "linkedin",
+    "linkedin url": "linkedin",
+    "personalization": "personalization",
+}
+
+_HEADER_SEPARATORS = re.compile(r"[\s_\-]+")
+
+# A single record longer than this is almost certainly an unterminated quote
+MAX_RECORD_CHARS = 1_000_000
+
+
+def _normalize_header(name: str) -> str:
+    return _HEADER_SEPARATORS.sub(" ", name.strip().lower()).strip()
+
+
+class CSVLeadParser:
+    """
+    Push parser: feed() raw byte chunks, get back the complete leads they finish
+
+    Chunk boundaries may fall anywhere - inside a multi-byte character, a
+    quoted field or a quoted newline. Only text up to the last record
+    boundary is parsed; the rest waits for the next chunk.
+    """
+
+    def __init__(self, encoding: str = "utf-8-sig"):
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self._pending = ""
+        self._columns: Optional[List[Optional[str]]] = None
+        self._extra_columns: List[str] = []
+        self._seen_emails = set()
+
+        self.rows = 0
+        self.valid = 0
+        self.invalid = 0
+        self.duplicates = 0
+
+    def feed(self, chunk: bytes) -> List[Dict]:
+        """
+        Parse every record completed by this chunk
+        """
+        self._pending += self._decoder.decode(chunk)
+        cut = self._record_boundary(self._pending)
+        if cut <= 0:
+            if len(self._pending) > MAX_RECORD_CHARS:
+                raise ValueError("CSV record too long - check for an unterminated quoted field")
+            return []
+
+        complete, self._pending = self._pending[:cut], self._pending[cut:]
+        return self._parse(complete)
+
+    def close(self) -> List[Dict]:
+        """
+        Flush the final record (files often don't end with a newline)
+        """
+        self._pending += self._decoder.decode(b"", final=True)
+        remaining, self._pending = self._pending, ""
+        return self._parse(remaining) if remaining.strip() else []
+
+    @staticmethod
+    def _record_boundary(text: str) -> int:
+        # Position just past the last newline that isn't inside a quoted field.
+        # _pending always starts at a record boundary, so parity starts even.
+        in_quotes = False
+        boundary = -1
+        position = 0
+        for line in text.split("\n")[:-1]:
+            position += len(line) + 1
+            if line.count('"') & 1:
+                in_quotes = not in_quotes
+            if not in_quotes:
+                boundary = position
+        return boundary
+
+    def _parse(self, text: str) -> List[Dict]:
+        leads = []
+        for row in csv.reader(io.StringIO(text)):
+            if self._columns is None:
+                self._set_header(row)
+                continue
+            if not any(cell.strip() for cell in row):
+                continue
+
+            self.rows += 1
+            lead = self._map_row(row)
+            email = normalize_email(lead.get("email"))
+            if not email:
+                self.invalid += 1
+                continue
+            if email in self._seen_emails:
+                self.duplicates += 1
+                continue
+
+            self._seen_emails.add(email)
+            lead["email"] = email
+            self.valid += 1
+            leads.append(lead)
+        return leads
+
+    def _set_header(self, header: List[str]) -> None:
+        self._columns = [COLUMN_ALIASES.get(_normalize_header(name)) for name in header]
+        self._extra_columns = [name.strip() for name in header]
+        if "email" not in self._columns:
+            raise ValueError(f"CSV has no email column (headers: {', '.join(header)})")
+
+    def _map_row(self, row: List[str]) -> Dict:
+        lead = {}
+        custom_variables = {}
+        for index, value in enumerate(row[:len(self._columns)]):
+            value = value.strip()
+            if not value:
+                continue
+            field = self._columns[index]
+            if field:
+                lead[field] = value
+            else:
+                custom_variables[self._extra_columns[index]] = value
+        if custom_variables:
+            lead["custom_variables"] = custom_variables
+        return lead
+
+    def stats(self) -> Dict:
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates
+        }
+
+
+async def iter_csv_lead_batches(
+    chunks: AsyncIterable[bytes],
+    parser: Optional[CSVLeadParser] = None,
+    batch_size: int = 500
+) -> AsyncIterator[List[Dict]]:
+    """
+    Turn a stream of CSV byte chunks into batches of clean leads
+
+    Args:
+        chunks: Raw body chunks (e.g. Request.stream())
+        parser: Parser to use, so the caller can read its stats() as batches arrive
+        batch_size: Leads per yielded batch (last batch may be smaller)
+    """
+    parser = parser or CSVLeadParser()
+    batch: List[Dict] = []
+
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        batch.extend(parser.feed(chunk))
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            batch = batch[batch_size:]
+
+    batch.extend(parser.close())
+    while batch:
+        yield batch[:batch_size]
+        batch = batch[batch_size:]
+
+
+class UploadProgress:
+    """
+    Latest progress snapshot per upload_id, with async watchers for SSE
+
+    Snapshots live in a StateBackend, so the SSE stream can be served by a
+    different worker than the one receiving the upload.
+    """
+
+    TERMINAL_STATUSES = ("completed", "failed")
+
+    def __init__(self, ttl: float = 3600.0, maxsize: int = 1024, state: Optional[StateBackend] = None):
+        # Finished uploads stay visible for an hour, then age out
+        self.ttl = ttl
+        self.state = state or MemoryStateBackend(maxsize=maxsize)
+
+    @staticmethod
+    def _key(upload_id: str) -> str:
+        return f"upload:{upload_id}"
+
+    async def get(self, upload_id: str) -> Optional[Dict]:
+        return await self.state.get(self._key(upload_id))
+
+    async def update(self, upload_id: str, **fields) -> Dict:
+        """
+        Merge fields into the upload's snapshot and wake its watchers
+
+        Only the worker receiving the upload writes its snapshot, so the
+        read-modify-write needs no lock.
+        """
+        state = await self.get(upload_id) or {"upload_id": upload_id, "status": "pending", "version": 0}
+        state.update(fields)
+        state["version"] += 1
+        await self.state.set(self._key(upload_id), state, ttl=self.ttl)
+        return state
+
+    async def watch(self, upload_id: str, heartbeat: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """
+        Yield each new snapshot until the upload finishes (None = heartbeat)
+
+        Watching may start before the upload does; it waits for the first update.
+        """
+        version = 0
+        last_sent = time.monotonic()
+        while True:
+            state = await self.get(upload_id)
+            if state and state["version"] != version:
+                version = state["version"]
+                last_sent = time.monotonic()
+                yield state
+                if state["status"] in self.TERMINAL_STATUSES:
+                    return
+
+            remaining = heartbeat - (time.monotonic() - last_sent)
+            if remaining <= 0:
+                last_sent = time.monotonic()
+                yield None
+                continue
+            await self.state.wait_for_change(self._key(upload_id), timeout=remaining)
@@ -0,0 +1,147 @@
+"""
+In-memory index of the workspace's DFY domains
+
+Pages through every ordered DFY account once, indexes the domains by TLD and
+pre-warmed flag, and serves queries from the index. After the TTL the index
+is rebuilt in the background while queries keep using the previous copy.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from .cache import SingleFlight
+from .domain_service import DomainService
+
+
+def _tld(domain: str) -> str:
+    return domain.rsplit(".", 1)[-1]
+
+
+class DomainInventory:
+    """
+    TTL-refreshed index of DFY domains (domain -> TLD, pre-warmed, account count)
+    """
+
+    def __init__(
+        self,
+        domain_service: DomainService,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            domain_service: DomainService used to page through DFY accounts
+            ttl: Seconds before the index is rebuilt in the background
+            clock: Monotonic time source (overridable for tests)
+        """
+        self.domain_service = domain_service
+        self.ttl = ttl
+        self._clock = clock
+        self._flight = SingleFlight()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self._domains: Dict[str, Dict] = {}
+        self._by_tld: Dict[str, Set[str]] = {}
+        self._prewarmed: Set[str] = set()
+        self.loaded_at: Optional[float] = None
+        self.accounts = 0
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+
+    async def refresh(self) -> int:
+        """
+        Rebuild the index now (concurrent callers share one rebuild). Returns domain count.
+        """
+        return await self._flight.do("refresh", self._load)
+
+    async def _load(self) -> int:
+        domains: Dict[str, Dict] = {}
+        accounts = 0
+        async for account in self.domain_service.iter_ordered_accounts():
+            accounts += 1
+            domain = (account.get("domain") or "").strip().lower()
+            if not domain:
+                continue
+            entry = domains.setdefault(domain, {"domain": domain, "tld": _tld(domain), "accounts": 0, "prewarmed": False})
+            entry["accounts"] += 1
+            entry["prewarmed"] = entry["prewarmed"] or bool(account.get("is_pre_warmed_up"))
+
+        by_tld: Dict[str, Set[str]] = {}
+        for domain, entry in domains.items():
+            by_tld.setdefault(entry["tld"], set()).add(domain)
+
+        # Swap in the new index in one step so queries never see a partial one
+        self._domains = domains
+        self._by_tld = by_tld
+        self._prewarmed = {domain for domain, entry in domains.items() if entry["prewarmed"]}
+        self.accounts = accounts
+        self.loaded_at = self._clock()
+        self.refreshes += 1
+        self.last_error = None
+        print(f"✅ DFY domain inventory: {len(domains)} domains from {accounts} accounts")
+        return len(domains)
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"⚠️ DFY domain inventory refresh failed, serving previous index: {str(e)}")
+
+    async def ensure_loaded(self) -> None:
+        """
+        Load the index on first use; once loaded, a stale index triggers a background refresh
+        """
+        if self.loaded_at is None:
+            await self.refresh()
+        elif self._clock() - self.loaded_at >= self.ttl:
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def query(
+        self,
+        extensions: Optional[Iterable[str]] = None,
+        search: Optional[str] = None,
+        prewarmed_only: bool = True
+    ) -> List[str]:
+        """
+        Domains matching the filters, sorted
+
+        Args:
+            extensions: TLDs to include (e.g. ["com", "org"]); None = all
+            search: Case-insensitive substring the domain must contain
+            prewarmed_only: Only domains with a pre-warmed account
+
+        Returns:
+            Sorted list of domain names
+        """
+        await self.ensure_loaded()
+
+        if extensions:
+            candidates: Set[str] = set()
+            for ext in extensions:
+                candidates |= self._by_tld.get(ext.strip().lstrip(".").lower(), set())
+        else:
+            candidates = set(self._domains)
+
+        if prewarmed_only:
+            candidates &= self._prewarmed
+        if search:
+            needle = search.lower()
+            candidates = {domain for domain in candidates if needle in domain}
+        return sorted(candidates)
+
+    def get(self, domain: str) -> Optional[Dict]:
+        entry = self._domains.get(domain.strip().lower())
+        return dict(entry) if entry else None
+
+    def stats(self) -> Dict:
+        return {
+            "domains": len(self._domains),
+            "prewarmed": len(self._prewarmed),
+            "accounts": self.accounts,
+            "tlds": {tld: len(domains) for tld, domains in self._by_tld.items()},
+            "age_seconds": round(self._clock() - self.loaded_at, 1) if self.loaded_at is not None else None,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error
+        }
@@ -1,18 +1,32 @@
 """
 Service for managing DFY email accounts and pre-warmed domains via Instantly.ai
 """
+import asyncio
+import os
 import httpx
 from typing import List, Dict, Optional
 
+from .cache import TTLCache
+from .http_pool import PooledHTTPClient
+from .rate_limit import TokenBucket
 
-class DomainService:
+# Upstream limit per availability check request
+CHECK_CHUNK_SIZE = 50
+
+
+class DomainService(PooledHTTPClient):
     """
     Service for purchasing and managing pre-warmed domains and email accounts
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, check_concurrency: int = 4, rate_limiter: Optional[TokenBucket] = None):
         self.api_key = api_key
         self.base_url = "https://api.instantly.ai/api/v2"
+        # Availability results are reused for a few minutes (suggestions get re-checked a lot)
+        self.availability_cache = TTLCache(maxsize=10_000, ttl=float(os.getenv("DOMAIN_CHECK_TTL", "300")))
+        self.check_concurrency = check_concurrency
+        max_rps = float(os.getenv("INSTANTLY_MAX_RPS", "5"))
+        self.rate_limiter = rate_limiter or TokenBucket(rate=max_rps, burst=max(int(max_rps), 1))
 
     async def get_ordered_dfy_accounts(
         self,
@@ -29,7 +43,7 @@ class DomainService:
         Returns:
             List of ordered DFY account dictionaries with domain, email, etc.
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             print(f"🔍 Fetching ordered DFY accounts...")
             print(f"   Endpoint: {self.base_url}/dfy-email-account-orders/accounts")
 
@@ -64,6 +78,27 @@ class DomainService:
 
             return accounts
 
+    async def iter_ordered_accounts(self, page_size: int = 100):
+        """
+        Page through every ordered DFY account (cursor: next_starting_after)
+
+        Args:
+            page_size: Accounts per request (1-100)
+
+        Yields:
+            Raw DFY account dictionaries
+        """
+        starting_after = None
+        while True:
+            page = await self.list_ordered_accounts(limit=page_size, starting_after=starting_after)
+            items = page.get("items", [])
+            for account in items:
+                yield account
+
+            starting_after = page.get("next_starting_after")
+            if not starting_after or not items:
+                return
+
     async def get_prewarmed_domains(
         self,
         extensions: Optional[List[str]] = None,
@@ -72,6 +107,8 @@ class DomainService:
         """
         Get list of YOUR ordered pre-warmed domains (extracted from DFY accounts)
 
+        Reads every page on each call; DomainInventory serves the same query from an index.
+
         Args:
             extensions: List of domain extensions to filter by (e.g., ["com", "org"])
             search: Search string to filter domains
@@ -79,11 +116,12 @@ class DomainService:
         Returns:
             List of unique domain names from your pre-warmed DFY accounts
         """
-        # Get all ordered accounts
-        accounts = await self.get_ordered_dfy_accounts(limit=100, only_prewarmed=True)
-
-        # Extract unique domains
-        domains = list(set(acc.get("domain") for acc in accounts if acc.get("domain")))
+        # Unique domains of pre-warmed accounts, across all pages
+        domains = set()
+        async for acc in self.iter_ordered_accounts():
+            if acc.get("is_pre_warmed_up") and acc.get("domain"):
+                domains.add(acc["domain"])
+        domains = list(domains)
 
         # Filter by extensions if provided
         if extensions:
@@ -108,34 +146,62 @@ class DomainService:
         """
         Check if domains are available for purchase
 
+        Any number of domains: cached results are reused, the rest are checked
+        in chunks of 50 concurrently (bounded by check_concurrency and the rate limiter).
+
         Args:
-            domains: List of domain names to check (max 50)
+            domains: List of domain names to check
 
         Returns:
-            Dict mapping domain name to availability status
+            Dict mapping domain name (lowercased) to availability status, in input order
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/dfy-email-account-orders/domains/check",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "domains": domains[:50]  # Max 50 domains
-                }
-            )
-
-            if response.status_code != 200:
-                raise Exception(f"Failed to check domain availability: {response.text}")
+        wanted = list(dict.fromkeys(d.strip().lower() for d in domains if d and d.strip()))
+        missing = [d for d in wanted if d not in self.availability_cache]
+
+        if missing:
+            chunks = [missing[i:i + CHECK_CHUNK_SIZE] for i in range(0, len(missing), CHECK_CHUNK_SIZE)]
+            slots = asyncio.Semaphore(self.check_concurrency)
+
+            async with self._client(timeout=30.0) as client:
+                async def check_chunk(chunk: List[str]) -> None:
+                    async with slots:
+                        await self.rate_limiter.acquire()
+                        checked = await self._post_domain_check(client, chunk)
+                    for result in checked:
+                        self.availability_cache.set(result["domain"].lower(), result["is_available"])
+
+                results = await asyncio.gather(*(check_chunk(c) for c in chunks), return_exceptions=True)
+
+            # Chunks that succeeded stay cached; surface the first failure
+            errors = [r for r in results if isinstance(r, Exception)]
+            if errors:
+                raise errors[0]
+
+        availability = {}
+        for domain in wanted:
+            available = self.availability_cache.get(domain)
+            if available is not None:
+                availability[domain] = available
+        return availability
+
+    async def _post_domain_check(self, client: httpx.AsyncClient, domains: List[str]) -> List[Dict]:
+        """
+        One upstream availability request (at most 50 domains)
+        POST /api/v2/dfy-email-account-orders/domains/check
+        """
+        response = await client.post(
+            f"{self.base_url}/dfy-email-account-orders/domains/check",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            },
+            json={"domains": domains}
+        )
 
-            data = response.json()
-            # Convert results array to dict
-            availability = {}
-            for result in data.get("results", []):
-                availability[result["domain"]] = result["is_available"]
+        if response.status_code != 200:
+            raise Exception(f"Failed to check domain availability: {response.text}")
 
-            return availability
+        return response.json().get("results", [])
 
     async def generate_similar_domains(
         self,
@@ -152,7 +218,7 @@ class DomainService:
         Returns:
             List of similar available domain names (max 66 per TLD)
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/dfy-email-account-orders/domains/similar",
                 headers={
@@ -205,7 +271,7 @@ class DomainService:
             "simulation": simulation
         }
 
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/dfy-email-account-orders",
                 headers={
@@ -256,7 +322,7 @@ class DomainService:
             "simulation": simulation
         }
 
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/dfy-email-account-orders",
                 headers={
@@ -294,7 +360,7 @@ class DomainService:
         if with_passwords:
             params["with_passwords"] = "true"
 
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/dfy-email-account-orders/accounts",
                 headers={
@@ -327,7 +393,7 @@ class DomainService:
         if starting_after:
             params["starting_after"] = starting_after
 
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/dfy-email-account-orders",
                 headers={
@@ -351,7 +417,7 @@ class DomainService:
         Returns:
             Dict with 'items' containing the cancelled accounts
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/dfy-email-account-orders/accounts/cancel",
                 headers={
@@ -0,0 +1,256 @@
+"""
+Shared server-side watchers for SuperSearch enrichment progress
+
+Instead of every browser tab polling /api/icp/leads/{enrichment_id} (one
+upstream POST /leads/list each), clients long-poll the watcher. There is a
+single poll loop per enrichment_id no matter how many clients are waiting,
+and each response only carries the leads enriched since the client's cursor.
+
+The cursor counts leads in the order they were first seen enriched. With a
+shared state backend that order is kept in it, so a follow-up poll answered by
+another worker (whose own poll loop saw the leads in a different order)
+neither skips nor repeats leads.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+from .lead_normalizer import LeadRecord
+from .state_backend import StateBackend
+
+
+class _EnrichmentWatch:
+    def __init__(self, enrichment_id: str, limit: int, now: float):
+        self.enrichment_id = enrichment_id
+        self.limit = limit
+        # Enriched leads (valid email) by key, and the keys in the order they were first seen
+        self.leads: Dict[str, LeadRecord] = {}
+        self.order: List[str] = []
+        # Leading part of order this worker has the leads for (what it can serve)
+        self.available = 0
+        self.total_count = 0
+        self.polls = 0
+        self.error: Optional[str] = None
+        self.waiters = 0
+        self.last_active = now
+        self.changed = asyncio.Event()
+        self.wake = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        # Wake everyone waiting on the current event, then start a fresh one
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class EnrichmentWatcher:
+    """
+    One upstream poll loop per enrichment_id, shared by every waiting client
+    """
+
+    def __init__(
+        self,
+        instantly_service,
+        state: Optional[StateBackend] = None,
+        poll_interval: float = 3.0,
+        idle_timeout: float = 60.0,
+        order_ttl: float = 86400.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            instantly_service: InstantlyService used to read the list
+            state: State backend; if shared, the lead order behind cursors is kept in it
+            poll_interval: Seconds between upstream reads while anyone is watching
+            idle_timeout: Stop polling this long after the last client left
+            order_ttl: Seconds a shared lead order is kept after its last new lead
+            clock: Monotonic time source (overridable for tests)
+        """
+        self.instantly = instantly_service
+        self.state = state
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self.order_ttl = order_ttl
+        self._clock = clock
+        self._watches: Dict[str, _EnrichmentWatch] = {}
+
+    def _ensure_watch(self, enrichment_id: str, limit: int) -> _EnrichmentWatch:
+        watch = self._watches.get(enrichment_id)
+        if watch is None:
+            watch = _EnrichmentWatch(enrichment_id, limit, self._clock())
+            self._watches[enrichment_id] = watch
+            watch.task = asyncio.create_task(self._poll_loop(watch))
+        else:
+            watch.limit = max(watch.limit, limit)
+        return watch
+
+    async def _poll_loop(self, watch: _EnrichmentWatch) -> None:
+        try:
+            while True:
+                await self._poll_once(watch)
+
+                idle_for = self._clock() - watch.last_active
+                if watch.waiters == 0 and idle_for >= self.idle_timeout:
+                    break
+                try:
+                    await asyncio.wait_for(watch.wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                watch.wake.clear()
+        finally:
+            self._watches.pop(watch.enrichment_id, None)
+
+    async def _poll_once(self, watch: _EnrichmentWatch) -> None:
+        try:
+            records = await self.instantly.get_lead_records_from_list(watch.enrichment_id, limit=watch.limit)
+        except Exception as e:
+            print(f"⚠️ Enrichment watcher poll failed for {watch.enrichment_id}: {str(e)}")
+            watch.error = str(e)
+            return
+
+        watch.polls += 1
+        watch.error = None
+        changed = len(records) != watch.total_count
+        watch.total_count = len(records)
+
+        new_keys = []
+        for record in records:
+            if not record.email:
+                continue  # still enriching
+            key = record.id or record.email
+            if key not in watch.leads:
+                watch.leads[key] = record
+                new_keys.append(key)
+
+        if self.state is not None and self.state.shared:
+            try:
+                await self._sync_order(watch)
+            except Exception as e:
+                print(f"⚠️ Enrichment watcher could not sync lead order for {watch.enrichment_id}: {str(e)}")
+        else:
+            watch.order.extend(new_keys)
+
+        available = watch.available
+        while available < len(watch.order) and watch.order[available] in watch.leads:
+            available += 1
+        if available != watch.available:
+            watch.available = available
+            changed = True
+
+        if changed:
+            watch.notify()
+
+    async def _sync_order(self, watch: _EnrichmentWatch) -> None:
+        """
+        Append this worker's newly enriched leads to the shared order and adopt it
+        """
+        order_key = f"enrichment_watch:{watch.enrichment_id}"
+        shared = await self.state.get(order_key) or {"keys": [], "limit": 0}
+        known = set(shared["keys"])
+        missing = [key for key in watch.leads if key not in known]
+
+        if missing or shared["limit"] < watch.limit:
+            async with self.state.lock(f"lock:{order_key}", ttl=10.0, wait=10.0):
+                shared = await self.state.get(order_key) or {"keys": [], "limit": 0}
+                known = set(shared["keys"])
+                shared["keys"].extend(key for key in watch.leads if key not in known)
+                shared["limit"] = max(shared["limit"], watch.limit)
+                await self.state.set(order_key, shared, ttl=self.order_ttl)
+
+        # Another worker may watch more of the list: a lead it numbered must be reachable here too
+        watch.limit = max(watch.limit, shared["limit"])
+        watch.order = shared["keys"]
+
+    def nudge(self, enrichment_id: Optional[str]) -> bool:
+        """
+        Poll this enrichment now instead of at the next interval (e.g. on a lead_added webhook)
+        """
+        watch = self._watches.get(enrichment_id) if enrichment_id else None
+        if watch is None:
+            return False
+        watch.wake.set()
+        return True
+
+    async def wait(
+        self,
+        enrichment_id: str,
+        since: int = 0,
+        target: Optional[int] = None,
+        timeout: float = 25.0,
+        limit: int = 100
+    ) -> Dict:
+        """
+        Hold until more than `since` leads are enriched (or, if given, `target` is reached)
+
+        Args:
+            enrichment_id: SuperSearch list/resource id
+            since: Cursor from the previous response (number of enriched leads already seen)
+            target: Instead of returning on any change, hold until this many leads are enriched
+            timeout: Maximum seconds to hold the request
+            limit: How many leads of the list to watch
+
+        Returns:
+            Snapshot with only the leads enriched after `since` and the next cursor
+        """
+        watch = self._ensure_watch(enrichment_id, limit)
+        watch.waiters += 1
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+
+        try:
+            while not self._ready(watch, since, target):
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(watch.changed.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            watch.waiters -= 1
+            watch.last_active = self._clock()
+
+        return self._snapshot(watch, since, target)
+
+    @staticmethod
+    def _ready(watch: _EnrichmentWatch, since: int, target: Optional[int]) -> bool:
+        if target is not None:
+            return watch.available >= target
+        return watch.available > since
+
+    @staticmethod
+    def _snapshot(watch: _EnrichmentWatch, since: int, target: Optional[int]) -> Dict:
+        enriched = watch.available
+        new_leads = [watch.leads[key] for key in watch.order[since:enriched]]
+        snapshot = {
+            "enrichment_id": watch.enrichment_id,
+            "changed": bool(new_leads),
+            "new_leads": [lead.to_dict() for lead in new_leads],
+            "enriched_count": enriched,
+            "enriching_count": max(watch.total_count - enriched, 0),
+            "target_reached": target is not None and enriched >= target,
+            # A cursor from a worker that is further along is kept, not moved back
+            "cursor": max(enriched, since)
+        }
+        if watch.error:
+            snapshot["error"] = watch.error
+        return snapshot
+
+    def stats(self) -> Dict:
+        return {
+            enrichment_id: {
+                "waiters": watch.waiters,
+                "polls": watch.polls,
+                "enriched_count": watch.available
+            }
+            for enrichment_id, watch in self._watches.items()
+        }
+
+    async def aclose(self) -> None:
+        """
+        Cancel every poll loop (on shutdown)
+        """
+        tasks = [watch.task for watch in self._watches.values() if watch.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
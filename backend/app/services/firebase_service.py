@@ -2,22 +2,39 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 from typing import List, Dict, Optional
 from datetime import datetime
+import asyncio
+import copy
 import os
 
+from .cache import TTLCache
+from .storage_backend import StorageBackend, summarize_campaign_stats
 
-class FirebaseService:
+
+class FirebaseService(StorageBackend):
     """
     Service for interacting with Firebase Firestore database
     """
 
-    def __init__(self, credentials_path: Optional[str] = None):
+    def __init__(
+        self,
+        credentials_path: Optional[str] = None,
+        campaign_cache_ttl: float = 30.0,
+        campaign_cache_size: int = 512
+    ):
         """
         Initialize Firebase Admin SDK
 
         Args:
             credentials_path: Path to Firebase service account JSON file
                              If None, will look for GOOGLE_APPLICATION_CREDENTIALS env var
+            campaign_cache_ttl: Seconds a campaign document stays in the read-through cache
+            campaign_cache_size: Maximum number of campaign documents kept in the cache
         """
+        # Read-through cache for get_campaign - writes below invalidate entries
+        self.campaign_cache = TTLCache(maxsize=campaign_cache_size, ttl=campaign_cache_ttl)
+        # Bumped by every write, so a read that raced one doesn't cache the old document
+        self.campaign_versions: Dict[str, int] = {}
+
         # Initialize Firebase app if not already initialized
         if not firebase_admin._apps:
             if credentials_path and os.path.exists(credentials_path):
@@ -80,6 +97,7 @@ class FirebaseService:
         # Save to Firestore using campaign_id as document ID
         doc_ref = self.db.collection("campaigns").document(campaign_id)
         doc_ref.set(data)
+        self._invalidate_campaign(campaign_id)
 
         # Return data with Firestore ID
         data["id"] = campaign_id
@@ -88,9 +106,14 @@ class FirebaseService:
 
         return data
 
-    async def get_user_campaigns(self, user_id: str) -> List[Dict]:
+    async def get_user_campaigns(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
         """
-        Get all campaigns for a user
+        Get all campaigns for a user (optionally one page of them)
         """
         if not self.db:
             return []
@@ -114,17 +137,27 @@ class FirebaseService:
         # Sort in Python instead of Firestore (no index needed)
         campaigns.sort(key=lambda x: x.get("created_at", ""), reverse=True)
 
-        return campaigns
+        if limit is not None:
+            return campaigns[offset:offset + limit]
+        return campaigns[offset:]
 
     async def get_campaign(self, user_id: str, campaign_id: str) -> Optional[Dict]:
         """
         Get a specific campaign
+
+        Served from the in-process read-through cache when possible; only
+        misses hit Firestore (off the event loop). Callers get their own copy.
         """
         if not self.db:
             return None
 
+        cached = self.campaign_cache.get(campaign_id)
+        if cached is not None:
+            return copy.deepcopy(cached)
+
+        version = self.campaign_versions.get(campaign_id, 0)
         doc_ref = self.db.collection("campaigns").document(campaign_id)
-        doc = doc_ref.get()
+        doc = await asyncio.to_thread(doc_ref.get)
 
         if doc.exists:
             campaign_data = doc.to_dict()
@@ -136,10 +169,22 @@ class FirebaseService:
             if isinstance(campaign_data.get("updated_at"), datetime):
                 campaign_data["updated_at"] = campaign_data["updated_at"].isoformat()
 
+            if self.campaign_versions.get(campaign_id, 0) == version:
+                self.campaign_cache.set(campaign_id, copy.deepcopy(campaign_data))
             return campaign_data
 
         return None
 
+    def _invalidate_campaign(self, campaign_id: str) -> None:
+        self.campaign_versions[campaign_id] = self.campaign_versions.get(campaign_id, 0) + 1
+        self.campaign_cache.invalidate(campaign_id)
+
+    def cache_stats(self) -> Dict:
+        """
+        Hit/miss counters for the campaign cache
+        """
+        return {"campaigns": self.campaign_cache.stats()}
+
     async def update_campaign_stats(self, campaign_id: str, analytics: Dict) -> Dict:
         """
         Update campaign statistics
@@ -159,9 +204,10 @@ class FirebaseService:
         }
 
         doc_ref.update(update_data)
+        self._invalidate_campaign(campaign_id)
 
         # Return updated campaign
-        return await self.get_campaign(campaign_id)
+        return await self.get_campaign(None, campaign_id)
 
     async def update_campaign_status(self, campaign_id: str, status: str) -> Dict:
         """
@@ -175,9 +221,10 @@ class FirebaseService:
         }
 
         doc_ref.update(update_data)
+        self._invalidate_campaign(campaign_id)
 
         # Return updated campaign
-        return await self.get_campaign(campaign_id)
+        return await self.get_campaign(None, campaign_id)
 
     async def delete_campaign(self, campaign_id: str) -> bool:
         """
@@ -186,6 +233,7 @@ class FirebaseService:
         try:
             doc_ref = self.db.collection("campaigns").document(campaign_id)
             doc_ref.delete()
+            self._invalidate_campaign(campaign_id)
             return True
         except Exception:
             return False
@@ -260,22 +308,7 @@ class FirebaseService:
         Get aggregate stats for a user across all campaigns
         """
         campaigns = await self.get_user_campaigns(user_id)
-
-        total_sent = sum(c.get("sent", 0) for c in campaigns)
-        total_opened = sum(c.get("opened", 0) for c in campaigns)
-        total_clicked = sum(c.get("clicked", 0) for c in campaigns)
-        total_replied = sum(c.get("replied", 0) for c in campaigns)
-
-        return {
-            "total_campaigns": len(campaigns),
-            "active_campaigns": len([c for c in campaigns if c.get("status") == "active"]),
-            "total_sent": total_sent,
-            "total_opened": total_opened,
-            "total_clicked": total_clicked,
-            "total_replied": total_replied,
-            "avg_open_rate": round((total_opened / max(total_sent, 1)) * 100, 2),
-            "avg_reply_rate": round((total_replied / max(total_sent, 1)) * 100, 2)
-        }
+        return summarize_campaign_stats(campaigns)
 
     async def create_user_profile(self, user_id: str, email: str, name: str = "") -> Dict:
         """
@@ -0,0 +1,58 @@
+"""
+Pooled httpx client shared by every call a service makes
+"""
+import functools
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+
+
+class _TimeoutClient:
+    """Passes a per-call timeout to every request made through the shared client"""
+
+    _REQUEST_METHODS = ("request", "get", "post", "put", "patch", "delete", "stream")
+
+    def __init__(self, client: httpx.AsyncClient, timeout: float):
+        self._client = client
+        self._timeout = timeout
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name in self._REQUEST_METHODS:
+            return functools.partial(attr, timeout=self._timeout)
+        return attr
+
+
+class PooledHTTPClient:
+    """
+    Mixin: one keep-alive httpx.AsyncClient per service instance
+
+    Methods use `async with self._client(timeout=...) as client:` where they
+    used to open a fresh client, so connections (and TLS sessions) are reused
+    across calls. The client is created on first use and closed by aclose().
+    """
+
+    http_timeout: float = 30.0
+    http_max_connections: int = 20
+    _http: Optional[httpx.AsyncClient] = None
+
+    @asynccontextmanager
+    async def _client(self, timeout: Optional[float] = None):
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(
+                timeout=self.http_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.http_max_connections,
+                    max_keepalive_connections=self.http_max_connections
+                )
+            )
+        yield self._http if timeout is None else _TimeoutClient(self._http, timeout)
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP client (on shutdown)
+        """
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
@@ -0,0 +1,776 @@
+"""
+Deterministic ICP description -> SuperSearch filter compiler
+
+Most ICPs are built from a small vocabulary: a role ("CTOs", "Heads of HR"),
+an industry ("SaaS", "construction"), a size ("startups", "100-500
+employees"), a funding stage and a place. The compiler matches the
+description against an index of that vocabulary (roles, levels,
+departments, employee-count and revenue buckets, funding types,
+VALID_INDUSTRIES and a city/state/country gazetteer) and returns filters in
+the same shape generate_supersearch_filters returns, plus a confidence
+score: the share of meaningful words it understood. Callers only need the
+model when confidence is low.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+# Valid industry categories from Instantly API (verified via testing)
+VALID_INDUSTRIES = {
+    'Agriculture & Mining',
+    'Business Services',
+    'Computers & Electronics',
+    'Consumer Services',
+    'Education',
+    'Energy & Utilities',
+    'Financial Services',
+    'Government',
+    'Healthcare, Pharmaceuticals, & Biotech',
+    'Manufacturing',
+    'Media & Entertainment',
+    'Non-Profit',
+    'Other',
+    'Real Estate & Construction',
+    'Retail',
+    'Software & Internet',
+    'Telecommunications',
+    'Transportation & Storage',
+    'Travel, Recreation, and Leisure',
+    'Wholesale & Distribution'
+}
+
+EMPLOYEE_BUCKETS = [
+    ("0 - 25", 0, 25), ("25 - 100", 25, 100), ("100 - 250", 100, 250), ("250 - 1000", 250, 1000),
+    ("1K - 10K", 1_000, 10_000), ("10K - 50K", 10_000, 50_000), ("50K - 100K", 50_000, 100_000),
+    ("> 100K", 100_000, float("inf")),
+]
+
+REVENUE_BUCKETS = [
+    ("$0 - 1M", 0, 1e6), ("$1 - 10M", 1e6, 1e7), ("$10 - 50M", 1e7, 5e7), ("$50 - 100M", 5e7, 1e8),
+    ("$100 - 250M", 1e8, 2.5e8), ("$250 - 500M", 2.5e8, 5e8), ("$500M - 1B", 5e8, 1e9),
+    ("> $1B", 1e9, float("inf")),
+]
+
+SMALL_COMPANY = ["0 - 25", "25 - 100"]
+MID_MARKET = ["100 - 250", "250 - 1000"]
+ENTERPRISE = ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"]
+
+FUNDING_ORDER = ["angel", "pre_seed", "seed", "series_a", "series_b", "series_c", "series_d", "series_e"]
+
+TECH = ["Computers & Electronics", "Software & Internet", "Telecommunications"]
+SOFTWARE = ["Software & Internet"]
+
+# Industry phrase -> Instantly industries (every value is in VALID_INDUSTRIES)
+INDUSTRY_TERMS = {
+    **{term: SOFTWARE for term in (
+        "saas", "software", "b2b software", "b2b saas", "cybersecurity", "cyber security", "security software",
+        "ai", "artificial intelligence", "machine learning", "ml", "internet", "cloud", "devtools", "dev tools",
+        "developer tools", "data", "analytics", "martech", "adtech", "hr tech", "hrtech", "proptech",
+        "edtech software", "web3", "crypto", "blockchain", "app", "mobile app", "platform",
+    )},
+    **{term: TECH for term in ("tech", "technology", "high tech", "it services", "information technology company")},
+    "fintech": ["Financial Services", "Software & Internet"],
+    "insurtech": ["Financial Services", "Software & Internet"],
+    "healthtech": ["Healthcare, Pharmaceuticals, & Biotech", "Software & Internet"],
+    "medtech": ["Healthcare, Pharmaceuticals, & Biotech"],
+    "edtech": ["Education", "Software & Internet"],
+    **{term: ["Financial Services"] for term in (
+        "financial services", "finance", "financial", "bank", "banking", "insurance", "wealth management",
+        "asset management", "investment", "investment firm", "private equity firm", "venture capital firm",
+        "credit union", "lending", "payments",
+    )},
+    **{term: ["Healthcare, Pharmaceuticals, & Biotech"] for term in (
+        "healthcare", "health care", "health", "medical", "pharma", "pharmaceutical", "biotech", "biotechnology",
+        "life sciences", "hospital", "clinic", "dental", "dental practice",
+    )},
+    **{term: ["Real Estate & Construction"] for term in (
+        "construction", "real estate", "property", "property management", "architecture", "architecture firm",
+        "contractor", "general contractor", "homebuilder",
+    )},
+    **{term: ["Manufacturing"] for term in (
+        "manufacturing", "manufacturer", "industrial", "food manufacturer", "factory", "automotive",
+    )},
+    **{term: ["Retail"] for term in (
+        "retail", "retailer", "ecommerce", "e-commerce", "online store", "dtc", "d2c", "consumer brand", "shopify store",
+    )},
+    **{term: ["Business Services"] for term in (
+        "agency", "marketing agency", "digital agency", "creative agency", "advertising agency", "consulting",
+        "consultancy", "consulting firm", "law firm", "legal", "staffing", "staffing agency", "recruiting agency",
+        "recruitment agency", "accounting", "accounting firm", "professional services", "business services",
+        "outsourcing", "bpo",
+    )},
+    **{term: ["Education"] for term in ("education", "school", "university", "college", "training provider")},
+    **{term: ["Media & Entertainment"] for term in (
+        "media", "entertainment", "publishing", "publisher", "gaming", "game studio", "film", "music",
+    )},
+    **{term: ["Non-Profit"] for term in ("non-profit", "nonprofit", "non profit", "charity", "ngo")},
+    **{term: ["Government"] for term in ("government", "public sector", "municipality", "government agency")},
+    **{term: ["Transportation & Storage"] for term in (
+        "logistics", "transportation", "shipping", "freight", "trucking", "supply chain", "warehousing", "3pl",
+    )},
+    **{term: ["Travel, Recreation, and Leisure"] for term in (
+        "travel", "hospitality", "hotel", "restaurant", "leisure", "tourism", "fitness", "gym",
+    )},
+    **{term: ["Energy & Utilities"] for term in (
+        "energy", "utilities", "utility", "oil and gas", "oil & gas", "solar", "renewable energy", "renewables",
+        "cleantech", "climate tech",
+    )},
+    **{term: ["Telecommunications"] for term in ("telecom", "telecommunications", "telco")},
+    **{term: ["Agriculture & Mining"] for term in ("agriculture", "farming", "agtech", "mining")},
+    **{term: ["Wholesale & Distribution"] for term in ("wholesale", "distribution", "distributor", "wholesaler")},
+    **{term: ["Computers & Electronics"] for term in ("hardware", "electronics", "semiconductor", "iot")},
+    **{term: ["Consumer Services"] for term in ("consumer services", "home services", "local services")},
+}
+
+# Business functions: alias -> (title word, department or None)
+FUNCTIONS = {
+    "marketing": ("Marketing", "Marketing"),
+    "growth": ("Growth", "Marketing"),
+    "demand generation": ("Demand Generation", "Marketing"),
+    "brand": ("Brand", "Marketing"),
+    "content": ("Content", "Marketing"),
+    "sales": ("Sales", "Sales"),
+    "business development": ("Business Development", "Sales"),
+    "revenue": ("Revenue", "Sales"),
+    "partnerships": ("Partnerships", "Sales"),
+    "hr": ("HR", "Human Resources"),
+    "human resources": ("HR", "Human Resources"),
+    "people": ("People", "Human Resources"),
+    "talent": ("Talent", "Human Resources"),
+    "talent acquisition": ("Talent Acquisition", "Human Resources"),
+    "recruiting": ("Recruiting", "Human Resources"),
+    "engineering": ("Engineering", "Engineering"),
+    "software engineering": ("Engineering", "Engineering"),
+    "information technology": ("IT", "IT & IS"),
+    "security": ("Security", "IT & IS"),
+    "data": ("Data", "Engineering"),
+    "product": ("Product", None),
+    "design": ("Design", None),
+    "finance": ("Finance", "Finance & Administration"),
+    "accounting": ("Accounting", "Finance & Administration"),
+    "operations": ("Operations", "Operations"),
+    "ops": ("Operations", "Operations"),
+    "procurement": ("Procurement", "Operations"),
+    "purchasing": ("Purchasing", "Operations"),
+    "supply chain": ("Supply Chain", "Operations"),
+    "logistics": ("Logistics", "Operations"),
+    "facilities": ("Facilities", "Operations"),
+    "project": ("Project", None),
+    "customer success": ("Customer Success", "Support"),
+    "customer support": ("Customer Support", "Support"),
+    "support": ("Support", "Support"),
+    "customer experience": ("Customer Experience", "Support"),
+    "legal": ("Legal", None),
+    "compliance": ("Compliance", None),
+    "it": ("IT", "IT & IS"),
+}
+
+# Role alias -> title template ({f} = function title word)
+ROLES = {
+    "director": "{f} Director",
+    "manager": "{f} Manager",
+    "head": "Head of {f}",
+    "vp": "VP of {f}",
+    "vice president": "VP of {f}",
+    "svp": "SVP of {f}",
+    "lead": "{f} Lead",
+    "leader": None,        # vague: department only
+    "leadership": None,
+    "team": None,
+    "professional": None,
+    "decision maker": None,
+    "specialist": "{f} Specialist",
+    "coordinator": "{f} Coordinator",
+    "analyst": "{f} Analyst",
+    "officer": "{f} Officer",
+    "executive": "{f} Executive",
+}
+
+# Standalone role phrase -> (titles, levels, department)
+STANDALONE_ROLES = {
+    "founder": (["Founder"], [], None),
+    "co-founder": (["Co-Founder"], [], None),
+    "cofounder": (["Co-Founder"], [], None),
+    "ceo": (["CEO"], [], None),
+    "cto": (["CTO"], [], None),
+    "cmo": (["CMO"], [], None),
+    "cfo": (["CFO"], [], None),
+    "coo": (["COO"], [], None),
+    "cro": (["CRO"], [], None),
+    "cio": (["CIO"], [], None),
+    "ciso": (["CISO"], [], None),
+    "cpo": (["CPO"], [], None),
+    "chro": (["CHRO"], [], None),
+    "chief executive officer": (["Chief Executive Officer"], ["Chief X Officer (CxO)"], None),
+    "chief technology officer": (["Chief Technology Officer"], ["Chief X Officer (CxO)"], None),
+    "chief marketing officer": (["Chief Marketing Officer"], ["Chief X Officer (CxO)"], None),
+    "chief financial officer": (["Chief Financial Officer"], ["Chief X Officer (CxO)"], None),
+    "chief operating officer": (["Chief Operating Officer"], ["Chief X Officer (CxO)"], None),
+    "chief revenue officer": (["Chief Revenue Officer"], ["Chief X Officer (CxO)"], None),
+    "chief information officer": (["Chief Information Officer"], ["Chief X Officer (CxO)"], None),
+    "chief information security officer": (["Chief Information Security Officer"], ["Chief X Officer (CxO)"], None),
+    "chief product officer": (["Chief Product Officer"], ["Chief X Officer (CxO)"], None),
+    "chief people officer": (["Chief People Officer"], ["Chief X Officer (CxO)"], None),
+    "president": (["President"], [], None),
+    "managing director": (["Managing Director"], [], None),
+    "general manager": (["General Manager"], [], None),
+    "owner": (["Owner"], ["Owner"], None),
+    "business owner": (["Owner"], ["Owner"], None),
+    "small business owner": (["Owner"], ["Owner"], None),
+    "partner": ([], ["Partner"], None),
+    "managing partner": (["Managing Partner"], ["Partner"], None),
+    "principal": (["Principal"], [], None),
+    "entrepreneur": (["Founder", "Owner"], [], None),
+    "solopreneur": (["Founder", "Owner"], [], None),
+    "executive": ([], ["Executive"], None),
+    "exec": ([], ["Executive"], None),
+    "c-suite": ([], ["Chief X Officer (CxO)"], None),
+    "c-level": ([], ["Chief X Officer (CxO)"], None),
+    "c-suite executive": ([], ["Chief X Officer (CxO)"], None),
+    "c-level executive": ([], ["Chief X Officer (CxO)"], None),
+    "decision maker": ([], ["Executive", "Vice President (VP)", "Director"], None),
+    "leader": ([], ["Executive", "Vice President (VP)", "Director"], None),
+    "leadership": ([], ["Executive", "Vice President (VP)", "Director"], None),
+    "vp": ([], ["Vice President (VP)"], None),
+    "vice president": ([], ["Vice President (VP)"], None),
+    "director": ([], ["Director"], None),
+    "manager": ([], ["Manager"], None),
+    "head": ([], ["Director"], None),
+    "senior": ([], ["Senior"], None),
+    "engineer": (["Engineer"], [], "Engineering"),
+    "software engineer": (["Software Engineer"], [], "Engineering"),
+    "developer": (["Developer"], [], "Engineering"),
+    "engineering leader": (["VP of Engineering", "Head of Engineering"], [], "Engineering"),
+    "recruiter": (["Recruiter"], [], "Human Resources"),
+    "marketer": (["Marketing"], [], "Marketing"),
+    "salespeople": (["Sales"], [], "Sales"),
+    "sales rep": (["Sales Representative"], [], "Sales"),
+    "account executive": (["Account Executive"], [], "Sales"),
+    "sdr": (["Sales Development Representative"], [], "Sales"),
+    "bdr": (["Business Development Representative"], [], "Sales"),
+    "product manager": (["Product Manager"], [], None),
+    "project manager": (["Project Manager"], [], None),
+    "office manager": (["Office Manager"], [], None),
+    "operations manager": (["Operations Manager"], [], "Operations"),
+    "practice manager": (["Practice Manager"], [], None),
+    "buyer": (["Buyer"], [], "Operations"),
+    "consultant": (["Consultant"], [], None),
+    "realtor": (["Realtor"], [], None),
+    "real estate agent": (["Real Estate Agent"], [], None),
+    "broker": (["Broker"], [], None),
+    "accountant": (["Accountant"], [], "Finance & Administration"),
+    "attorney": (["Attorney"], [], None),
+    "lawyer": (["Lawyer"], [], None),
+    "physician": (["Physician"], [], None),
+    "doctor": (["Doctor"], [], None),
+    "dentist": (["Dentist"], [], None),
+    "teacher": (["Teacher"], [], None),
+    "principal investigator": (["Principal Investigator"], [], None),
+}
+
+# Company size words -> employee-count buckets (explicit numbers win)
+SIZE_TERMS = {
+    **{term: SMALL_COMPANY for term in (
+        "startup", "start-up", "early-stage", "early stage", "small", "small business", "smb", "smbs", "small company",
+        "small and medium", "seed-stage", "young",
+    )},
+    **{term: MID_MARKET for term in ("mid-market", "mid market", "midmarket", "mid-size", "mid-sized", "midsize", "medium-sized", "medium")},
+    **{term: ENTERPRISE for term in ("enterprise", "large", "large enterprise", "fortune 500", "fortune 1000", "global")},
+}
+
+FUNDING_TERMS = {
+    "angel": ["angel"], "angel-backed": ["angel"],
+    "pre-seed": ["pre_seed"], "pre seed": ["pre_seed"],
+    "seed": ["seed"], "seed-stage": ["seed"],
+    "series a": ["series_a"], "series b": ["series_b"], "series c": ["series_c"],
+    "series d": ["series_d"], "series e": ["series_e"],
+    "vc-backed": ["seed", "series_a", "series_b", "series_c"],
+    "vc backed": ["seed", "series_a", "series_b", "series_c"],
+    "venture-backed": ["seed", "series_a", "series_b", "series_c"],
+    "venture backed": ["seed", "series_a", "series_b", "series_c"],
+    "pe-backed": ["private_equity"], "pe backed": ["private_equity"],
+    "private equity": ["private_equity"], "private equity backed": ["private_equity"],
+    "publicly traded": ["post_ipo_equity"], "public": ["post_ipo_equity"],
+    "grant-funded": ["grant"],
+}
+
+NEWS_TERMS = {
+    "recently raised": ["receives_financing"], "just raised": ["receives_financing"],
+    "raised": ["receives_financing"], "recently funded": ["receives_financing"],
+    "newly funded": ["receives_financing"], "funded": ["receives_financing"],
+    "hiring": ["hires"], "actively hiring": ["hires"],
+    "expanding": ["expands_offices_to"],
+    "launching": ["launches"], "launched": ["launches"],
+}
+
+# Words that carry no filter but mean the description was understood
+NEUTRAL_TERMS = {
+    "b2b", "b2c", "company", "firm", "business", "organization", "org", "brand", "provider", "vendor",
+    "funding", "round", "stage", "growing", "fast-growing", "fast growing", "high-growth", "high growth",
+    "scaling", "scale-up", "scaleup", "established", "modern", "innovative", "leading", "top", "emerging",
+    "based", "located", "headquartered", "operating", "focused", "specializing", "size", "sized",
+    "employee", "people", "staff", "revenue", "annual", "arr", "team", "their", "own", "new", "recently",
+}
+
+STOPWORDS = {
+    "a", "an", "the", "at", "in", "of", "for", "from", "with", "and", "or", "to", "on", "who", "that", "which",
+    "are", "is", "be", "by", "as", "across", "within", "into", "&", "/", "their", "them", "they", "it", "its",
+    "any", "all", "some", "like", "such", "eg", "e.g", "i.e", "etc", "either", "both", "through", "around", "near",
+}
+
+US_STATES = {
+    "alabama": "AL", "alaska": "AK", "arizona": "AZ", "arkansas": "AR", "california": "CA", "colorado": "CO",
+    "connecticut": "CT", "delaware": "DE", "florida": "FL", "georgia": "GA", "hawaii": "HI", "idaho": "ID",
+    "illinois": "IL", "indiana": "IN", "iowa": "IA", "kansas": "KS", "kentucky": "KY", "louisiana": "LA",
+    "maine": "ME", "maryland": "MD", "massachusetts": "MA", "michigan": "MI", "minnesota": "MN",
+    "mississippi": "MS", "missouri": "MO", "montana": "MT", "nebraska": "NE", "nevada": "NV",
+    "new hampshire": "NH", "new jersey": "NJ", "new mexico": "NM", "new york": "NY", "north carolina": "NC",
+    "north dakota": "ND", "ohio": "OH", "oklahoma": "OK", "oregon": "OR", "pennsylvania": "PA",
+    "rhode island": "RI", "south carolina": "SC", "south dakota": "SD", "tennessee": "TN", "texas": "TX",
+    "utah": "UT", "vermont": "VT", "virginia": "VA", "washington": "WA", "west virginia": "WV",
+    "wisconsin": "WI", "wyoming": "WY",
+}
+
+# City -> (city, state, country). State is "" outside the US (as the model prompt requires).
+CITIES = {
+    "new york": ("New York", "New York", "United States"),
+    "new york city": ("New York", "New York", "United States"),
+    "nyc": ("New York", "New York", "United States"),
+    "san francisco": ("San Francisco", "California", "United States"),
+    "sf": ("San Francisco", "California", "United States"),
+    "bay area": ("San Francisco", "California", "United States"),
+    "los angeles": ("Los Angeles", "California", "United States"),
+    "la": ("Los Angeles", "California", "United States"),
+    "san diego": ("San Diego", "California", "United States"),
+    "san jose": ("San Jose", "California", "United States"),
+    "palo alto": ("Palo Alto", "California", "United States"),
+    "seattle": ("Seattle", "Washington", "United States"),
+    "portland": ("Portland", "Oregon", "United States"),
+    "boston": ("Boston", "Massachusetts", "United States"),
+    "chicago": ("Chicago", "Illinois", "United States"),
+    "austin": ("Austin", "Texas", "United States"),
+    "dallas": ("Dallas", "Texas", "United States"),
+    "houston": ("Houston", "Texas", "United States"),
+    "denver": ("Denver", "Colorado", "United States"),
+    "boulder": ("Boulder", "Colorado", "United States"),
+    "miami": ("Miami", "Florida", "United States"),
+    "atlanta": ("Atlanta", "Georgia", "United States"),
+    "washington dc": ("Washington", "District of Columbia", "United States"),
+    "washington d.c": ("Washington", "District of Columbia", "United States"),
+    "philadelphia": ("Philadelphia", "Pennsylvania", "United States"),
+    "pittsburgh": ("Pittsburgh", "Pennsylvania", "United States"),
+    "phoenix": ("Phoenix", "Arizona", "United States"),
+    "salt lake city": ("Salt Lake City", "Utah", "United States"),
+    "minneapolis": ("Minneapolis", "Minnesota", "United States"),
+    "detroit": ("Detroit", "Michigan", "United States"),
+    "nashville": ("Nashville", "Tennessee", "United States"),
+    "raleigh": ("Raleigh", "North Carolina", "United States"),
+    "charlotte": ("Charlotte", "North Carolina", "United States"),
+    "las vegas": ("Las Vegas", "Nevada", "United States"),
+    "london": ("London", "", "United Kingdom"),
+    "manchester": ("Manchester", "", "United Kingdom"),
+    "birmingham": ("Birmingham", "", "United Kingdom"),
+    "edinburgh": ("Edinburgh", "", "United Kingdom"),
+    "glasgow": ("Glasgow", "", "United Kingdom"),
+    "bristol": ("Bristol", "", "United Kingdom"),
+    "leeds": ("Leeds", "", "United Kingdom"),
+    "dublin": ("Dublin", "", "Ireland"),
+    "paris": ("Paris", "", "France"),
+    "berlin": ("Berlin", "", "Germany"),
+    "munich": ("Munich", "", "Germany"),
+    "hamburg": ("Hamburg", "", "Germany"),
+    "frankfurt": ("Frankfurt", "", "Germany"),
+    "amsterdam": ("Amsterdam", "", "Netherlands"),
+    "rotterdam": ("Rotterdam", "", "Netherlands"),
+    "brussels": ("Brussels", "", "Belgium"),
+    "madrid": ("Madrid", "", "Spain"),
+    "barcelona": ("Barcelona", "", "Spain"),
+    "lisbon": ("Lisbon", "", "Portugal"),
+    "milan": ("Milan", "", "Italy"),
+    "rome": ("Rome", "", "Italy"),
+    "zurich": ("Zurich", "", "Switzerland"),
+    "geneva": ("Geneva", "", "Switzerland"),
+    "vienna": ("Vienna", "", "Austria"),
+    "stockholm": ("Stockholm", "", "Sweden"),
+    "copenhagen": ("Copenhagen", "", "Denmark"),
+    "oslo": ("Oslo", "", "Norway"),
+    "helsinki": ("Helsinki", "", "Finland"),
+    "warsaw": ("Warsaw", "", "Poland"),
+    "prague": ("Prague", "", "Czech Republic"),
+    "tel aviv": ("Tel Aviv", "", "Israel"),
+    "dubai": ("Dubai", "", "United Arab Emirates"),
+    "singapore": ("Singapore", "", "Singapore"),
+    "hong kong": ("Hong Kong", "", "Hong Kong"),
+    "tokyo": ("Tokyo", "", "Japan"),
+    "sydney": ("Sydney", "", "Australia"),
+    "melbourne": ("Melbourne", "", "Australia"),
+    "auckland": ("Auckland", "", "New Zealand"),
+    "toronto": ("Toronto", "", "Canada"),
+    "vancouver": ("Vancouver", "", "Canada"),
+    "montreal": ("Montreal", "", "Canada"),
+    "bangalore": ("Bangalore", "", "India"),
+    "bengaluru": ("Bangalore", "", "India"),
+    "mumbai": ("Mumbai", "", "India"),
+    "sao paulo": ("Sao Paulo", "", "Brazil"),
+    "mexico city": ("Mexico City", "", "Mexico"),
+}
+
+COUNTRIES = {
+    "united states": "United States", "usa": "United States", "america": "United States",
+    "united states of america": "United States",
+    "united kingdom": "United Kingdom", "uk": "United Kingdom", "britain": "United Kingdom",
+    "great britain": "United Kingdom", "england": "United Kingdom", "scotland": "United Kingdom",
+    "ireland": "Ireland", "canada": "Canada", "australia": "Australia", "new zealand": "New Zealand",
+    "germany": "Germany", "france": "France", "spain": "Spain", "italy": "Italy", "portugal": "Portugal",
+    "netherlands": "Netherlands", "the netherlands": "Netherlands", "holland": "Netherlands",
+    "belgium": "Belgium", "switzerland": "Switzerland", "austria": "Austria", "sweden": "Sweden",
+    "norway": "Norway", "denmark": "Denmark", "finland": "Finland", "poland": "Poland",
+    "israel": "Israel", "uae": "United Arab Emirates", "united arab emirates": "United Arab Emirates",
+    "singapore": "Singapore", "japan": "Japan", "india": "India", "brazil": "Brazil", "mexico": "Mexico",
+    "south africa": "South Africa", "nigeria": "Nigeria", "kenya": "Kenya",
+}
+
+# Regions expand to their countries
+REGIONS = {
+    "north america": ["United States", "Canada"],
+    "dach": ["Germany", "Austria", "Switzerland"],
+    "nordics": ["Sweden", "Norway", "Denmark", "Finland"],
+    "benelux": ["Belgium", "Netherlands"],
+    "anz": ["Australia", "New Zealand"],
+}
+
+_EMPLOYEE_WORDS = r"(?:employees?|people|staff|persons?|headcount|ftes?|team members)"
+_NUMBER = r"(\d[\d,]*(?:\.\d+)?\s*k?)"
+_EMPLOYEE_PATTERNS = [
+    (re.compile(rf"{_NUMBER}\s*(?:-|to)\s*{_NUMBER}\s*\+?\s*{_EMPLOYEE_WORDS}"), "range"),
+    (re.compile(rf"(?:over|more than|at least|above)\s+{_NUMBER}\s*\+?\s*{_EMPLOYEE_WORDS}"), "min"),
+    (re.compile(rf"{_NUMBER}\s*\+\s*{_EMPLOYEE_WORDS}"), "min"),
+    (re.compile(rf"(?:under|less than|fewer than|below|up to)\s+{_NUMBER}\s*{_EMPLOYEE_WORDS}"), "max"),
+    (re.compile(rf"{_NUMBER}\s*{_EMPLOYEE_WORDS}"), "exact"),
+]
+
+_MONEY = r"\$\s*(\d+(?:\.\d+)?)\s*(k|m|mm|b|bn|million|billion)?"
+_REVENUE_WORDS = r"(?:\s*(?:in\s+)?(?:annual\s+)?(?:revenue|arr|sales|turnover))?"
+_REVENUE_PATTERNS = [
+    (re.compile(rf"{_MONEY}\s*(?:-|to)\s*\$?\s*(\d+(?:\.\d+)?)\s*(k|m|mm|b|bn|million|billion)?{_REVENUE_WORDS}"), "range"),
+    (re.compile(rf"(?:over|more than|at least|above)\s+{_MONEY}\+?{_REVENUE_WORDS}"), "min"),
+    (re.compile(rf"{_MONEY}\s*\+{_REVENUE_WORDS}"), "min"),
+    (re.compile(rf"(?:under|less than|below|up to)\s+{_MONEY}{_REVENUE_WORDS}"), "max"),
+]
+_MONEY_UNITS = {None: 1, "k": 1e3, "m": 1e6, "mm": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+
+
+def _singular(token: str) -> str:
+    if len(token) < 3 or token.endswith("ss"):
+        return token
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def _canonical(phrase: str) -> str:
+    return " ".join(_singular(token) for token in _tokenize(phrase))
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9$]+(?:[-.'][a-z0-9]+)*|&", text)
+
+
+def _count(value: str) -> float:
+    value = value.replace(",", "").replace(" ", "")
+    if value.endswith("k"):
+        return float(value[:-1]) * 1000
+    return float(value)
+
+
+def _overlapping(buckets, low: float, high: float) -> List[str]:
+    if low == high:
+        return [name for name, lo, hi in buckets if lo <= low < hi]
+    return [name for name, lo, hi in buckets if low < hi and high > lo]
+
+
+@dataclass
+class CompiledFilters:
+    """Result of compiling one ICP description"""
+
+    filters: Dict
+    confidence: float
+    matched: List[str] = field(default_factory=list)
+    unmatched: List[str] = field(default_factory=list)
+
+
+class ICPFilterCompiler:
+    """
+    Compiles ICP descriptions to SuperSearch filters from a vocabulary index
+    """
+
+    MAX_PHRASE_TOKENS = 5
+
+    def __init__(self, min_confidence: float = 0.85):
+        """
+        Args:
+            min_confidence: Share of meaningful words that must be understood for
+                            callers to trust the compiled filters (see is_confident)
+        """
+        self.min_confidence = min_confidence
+        self.index: Dict[str, List[Tuple[str, object]]] = {}
+        self._build_index()
+
+        self.compiled = 0
+        self.confident = 0
+
+    def _add(self, phrase: str, kind: str, value) -> None:
+        key = _canonical(phrase)
+        entries = self.index.setdefault(key, [])
+        if (kind, value) not in entries:
+            entries.append((kind, value))
+
+    def _build_index(self) -> None:
+        for function, (word, department) in FUNCTIONS.items():
+            for role, template in ROLES.items():
+                title = template.format(f=word) if template else None
+                value = ([title] if title else [], department)
+                for phrase in (f"{function} {role}", f"{role} of {function}", f"{role} {function}", f"{role}, {function}"):
+                    self._add(phrase, "function_role", value)
+            self._add(f"{function} department", "function_role", ([], department))
+
+        for phrase, value in STANDALONE_ROLES.items():
+            self._add(phrase, "role", value)
+        for phrase, industries in INDUSTRY_TERMS.items():
+            self._add(phrase, "industry", industries)
+        for phrase, buckets in SIZE_TERMS.items():
+            self._add(phrase, "size", buckets)
+        for phrase, funding in FUNDING_TERMS.items():
+            self._add(phrase, "funding", funding)
+        for phrase, news in NEWS_TERMS.items():
+            self._add(phrase, "news", news)
+        for phrase in NEUTRAL_TERMS:
+            self._add(phrase, "neutral", None)
+        for phrase, location in CITIES.items():
+            self._add(phrase, "city", location)
+        for state in US_STATES:
+            self._add(state, "state", state.title())
+        for phrase, country in COUNTRIES.items():
+            self._add(phrase, "country", country)
+        for phrase, countries in REGIONS.items():
+            self._add(phrase, "region", countries)
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        # Case matters for a few short tokens: "US" (country) vs "us", "IT" (department) vs "it"
+        text = re.sub(r"\bU\.?S\.?A?\b\.?", " usa ", text)
+        text = re.sub(r"\bIT\b", " information technology ", text)
+        text = re.sub(r"\bU\.K\.?", " uk ", text)
+        text = text.lower().replace("–", "-").replace("—", "-")
+        return text
+
+    def _extract_numbers(self, text: str) -> Tuple[str, List[str], List[str], List[str]]:
+        """
+        Pull employee-count and revenue ranges out of the text (replaced by spaces)
+        """
+        employee_count: List[str] = []
+        revenue: List[str] = []
+        matched: List[str] = []
+
+        for pattern, kind in _REVENUE_PATTERNS:
+            for match in pattern.finditer(text):
+                groups = match.groups()
+                amounts = [float(groups[i]) * _MONEY_UNITS[groups[i + 1]] for i in range(0, len(groups), 2)]
+                if kind == "range":
+                    low, high = amounts
+                    # "$1-10M": the unit on the upper bound applies to both
+                    if groups[1] is None:
+                        low = float(groups[0]) * _MONEY_UNITS[groups[3]]
+                elif kind == "min":
+                    low, high = amounts[0], float("inf")
+                else:
+                    low, high = 0, amounts[0]
+                revenue += _overlapping(REVENUE_BUCKETS, low, high)
+                matched.append(match.group(0).strip())
+            text = pattern.sub(" ", text)
+
+        for pattern, kind in _EMPLOYEE_PATTERNS:
+            for match in pattern.finditer(text):
+                numbers = [_count(group) for group in match.groups()]
+                if kind == "range":
+                    low, high = numbers
+                elif kind == "min":
+                    low, high = numbers[0], float("inf")
+                elif kind == "max":
+                    low, high = 0, numbers[0]
+                else:
+                    low = high = numbers[0]
+                employee_count += _overlapping(EMPLOYEE_BUCKETS, low, high)
+                matched.append(match.group(0).strip())
+            text = pattern.sub(" ", text)
+
+        return text, employee_count, revenue, matched
+
+    def compile(self, target_audience: str) -> CompiledFilters:
+        """
+        Compile an ICP description
+
+        Args:
+            target_audience: e.g. "CTOs at Series A SaaS startups in San Francisco"
+
+        Returns:
+            CompiledFilters with SuperSearch filters, a 0-1 confidence and what was (not) understood
+        """
+        self.compiled += 1
+        text = self._normalize(target_audience or "")
+        text, employee_count, revenue, matched = self._extract_numbers(text)
+
+        tokens = [_singular(token) for token in _tokenize(text)]
+        titles: List[str] = []
+        levels: List[str] = []
+        # Levels implied by a title ("Chief Revenue Officer" -> CxO) only apply if every title has one,
+        # otherwise "VPs of Sales and Chief Revenue Officers" would exclude the VPs
+        title_levels: List[str] = []
+        plain_titles = 0
+        departments: List[str] = []
+        industries: List[str] = []
+        sizes: List[str] = []
+        funding: List[Tuple[int, List[str]]] = []
+        news: List[str] = []
+        cities: List[tuple] = []
+        states: List[str] = []
+        countries: List[str] = []
+        unmatched: List[str] = []
+        content_tokens = len(matched)
+        understood = len(matched)
+
+        i = 0
+        while i < len(tokens):
+            for n in range(min(self.MAX_PHRASE_TOKENS, len(tokens) - i), 0, -1):
+                entries = self.index.get(" ".join(tokens[i:i + n]))
+                if entries:
+                    break
+            else:
+                entries, n = None, 1
+
+            if not entries:
+                if tokens[i] not in STOPWORDS:
+                    content_tokens += 1
+                    unmatched.append(tokens[i])
+                i += 1
+                continue
+
+            content_tokens += 1
+            understood += 1
+            matched.append(" ".join(tokens[i:i + n]))
+            # A phrase can mean several things (e.g. "new york" city and state): prefer in order
+            kind, value = min(entries, key=lambda entry: ("city", "function_role", "role").index(entry[0])
+                              if entry[0] in ("city", "function_role", "role") else 3)
+            if kind == "function_role":
+                titles += value[0]
+                plain_titles += len(value[0])
+                if value[1] and not value[0]:
+                    departments.append(value[1])
+            elif kind == "role":
+                titles += value[0]
+                if value[0] and value[1]:
+                    title_levels += value[1]
+                else:
+                    levels += value[1]
+                    plain_titles += len(value[0])
+                if value[2]:
+                    departments.append(value[2])
+            elif kind == "industry":
+                industries += value
+            elif kind == "size":
+                sizes += value
+            elif kind == "funding":
+                funding.append((i, value))
+            elif kind == "news":
+                news += value
+            elif kind == "city":
+                cities.append(value)
+                # "New York, NY" / "Austin, TX": the state abbreviation belongs to the city
+                if i + n < len(tokens) and tokens[i + n] == US_STATES.get(value[1].lower(), "").lower():
+                    n += 1
+            elif kind == "state":
+                states.append(value)
+            elif kind == "country":
+                countries.append(value)
+            elif kind == "region":
+                countries += value
+            i += n
+
+        filters: Dict = {}
+
+        locations = [{"city": city, "state": state, "country": country} for city, state, country in _unique(cities)]
+        located_states = {location["state"] for location in locations}
+        located_countries = {location["country"] for location in locations}
+        locations += [{"city": "", "state": state, "country": "United States"}
+                      for state in _unique(states) if state not in located_states]
+        located_countries |= {"United States"} if states else set()
+        locations += [{"city": "", "state": "", "country": country}
+                      for country in _unique(countries) if country not in located_countries]
+        if locations:
+            filters["locations"] = locations
+
+        if not plain_titles:
+            levels += title_levels
+        if levels:
+            filters["level"] = _unique(levels)
+        if departments:
+            filters["department"] = _unique(departments)
+        if employee_count or sizes:
+            # Explicit numbers win over words like "startup"
+            filters["employee_count"] = _unique(employee_count or sizes)
+        if revenue:
+            filters["revenue"] = _unique(revenue)
+        if titles:
+            filters["title"] = {"include": _unique(titles)}
+        if industries:
+            filters["industry"] = {"include": _unique(industries)}
+        if funding:
+            filters["funding_type"] = _funding_types(funding, tokens)
+        if news:
+            filters["news"] = _unique(news)
+
+        confidence = understood / content_tokens if content_tokens else 0.0
+        # Without a who (role/level/department) or what (industry) there is nothing to search on
+        if not (titles or levels or departments or industries):
+            confidence = 0.0
+
+        result = CompiledFilters(filters=filters, confidence=round(confidence, 3), matched=matched, unmatched=unmatched)
+        if self.is_confident(result):
+            self.confident += 1
+        return result
+
+    def is_confident(self, result: CompiledFilters) -> bool:
+        return result.confidence >= self.min_confidence
+
+    def stats(self) -> Dict:
+        return {
+            "compiled": self.compiled,
+            "confident": self.confident,
+            "hit_rate": round(self.confident / self.compiled * 100, 2) if self.compiled else 0,
+            "min_confidence": self.min_confidence,
+            "vocabulary": len(self.index)
+        }
+
+
+def _unique(values: List) -> List:
+    return list(dict.fromkeys(values))
+
+
+def _funding_types(matches: List[Tuple[int, List[str]]], tokens: List[str]) -> List[str]:
+    """
+    Funding types in mention order; "seed to Series B" covers every stage in between
+    """
+    types: List[str] = []
+    for (position, value), following in zip(matches, matches[1:] + [None]):
+        types += value
+        if following and len(value) == 1 and len(following[1]) == 1:
+            between = tokens[position + 1:following[0]]
+            start, end = value[0], following[1][0]
+            if between and between[-1] in ("to", "through", "-") and start in FUNDING_ORDER and end in FUNDING_ORDER:
+                types += FUNDING_ORDER[FUNDING_ORDER.index(start) + 1:FUNDING_ORDER.index(end)]
+    return _unique(types)
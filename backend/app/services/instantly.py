@@ -2,21 +2,58 @@ import httpx
 from typing import List, Dict, Optional
 import json
 import asyncio
+import os
+import time
 
+from .cache import ReadCoalescer, coalesced_read
+from .campaign_metrics import campaign_rates
+from .csv_ingest import CSVLeadParser
+from .http_pool import PooledHTTPClient
+from .lead_dedup import LeadDedupIndex
+from .lead_normalizer import LeadRecord, normalize_leads
+from .rate_limit import TokenBucket
+from .webhook_events import WebhookDispatcher, get_webhook_dispatcher
 
-class InstantlyService:
+
+def instantly_rate_limiter(state=None) -> TokenBucket:
+    """
+    Token bucket for the workspace's Instantly API budget (INSTANTLY_MAX_RPS)
+
+    Args:
+        state: Shared StateBackend, so every worker draws from one bucket
+    """
+    max_rps = float(os.getenv("INSTANTLY_MAX_RPS", "5"))
+    return TokenBucket(rate=max_rps, burst=max(int(max_rps), 1), state=state, key="instantly")
+
+
+class InstantlyService(PooledHTTPClient):
     """
     Service for interacting with Instantly.ai API v2
     Documentation: https://developer.instantly.ai/
     """
 
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        lead_index: Optional[LeadDedupIndex] = None,
+        webhooks: Optional[WebhookDispatcher] = None,
+        rate_limiter: Optional[TokenBucket] = None
+    ):
         self.api_key = api_key
         self.base_url = "https://api.instantly.ai/api/v2"
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}",
         }
+        # Emails already pushed to this workspace / each campaign (see lead_dedup.py)
+        self.lead_index = lead_index or LeadDedupIndex(path=os.getenv("LEAD_DEDUP_PATH"))
+        # Polled reads (lead previews, enrichment status) share in-flight calls + a short cache
+        self.reads = ReadCoalescer(ttl=float(os.getenv("INSTANTLY_READ_CACHE_TTL", "2.0")))
+        # Job/enrichment completion arrives by webhook when configured; polling is the fallback
+        self.webhooks = webhooks or get_webhook_dispatcher()
+        self.job_poll_interval = float(os.getenv("INSTANTLY_JOB_POLL_INTERVAL", "3"))
+        # Shared request budget for bulk operations (listing, pause/delete sweeps)
+        self.rate_limiter = rate_limiter or instantly_rate_limiter()
 
     async def create_lead_list(
         self, name: str, leads_data: Optional[str] = None
@@ -24,8 +61,10 @@ class InstantlyService:
         """
         Create a new lead list in Instantly using API v2
         POST /api/v2/lead-lists
+
+        leads_data: Optional CSV text; its rows are parsed and added in batches
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/lead-lists",
                 headers=self.headers,
@@ -36,49 +75,83 @@ class InstantlyService:
                 raise Exception(f"Failed to create lead list: {response.text}")
 
             result = response.json()
-            return result.get("id", name)
+            lead_list_id = result.get("id", name)
+
+        if leads_data:
+            parser = CSVLeadParser()
+            leads = parser.feed(leads_data.encode("utf-8")) + parser.close()
+            print(f"📄 Parsed leads CSV: {parser.stats()}")
+            await self.upload_leads(None, lead_list_id, leads)
+
+        return lead_list_id
+
+    @staticmethod
+    def _format_list_lead(lead: Dict) -> Dict:
+        return {
+            "email": lead.get("email"),
+            "first_name": lead.get("first_name", ""),
+            "last_name": lead.get("last_name", ""),
+            "company_name": lead.get("company", ""),
+            "personalization": lead.get("personalization", ""),
+            "phone": lead.get("phone", ""),
+            "website": lead.get("website", ""),
+            "custom_variables": lead.get("custom_variables", {}),
+        }
 
-    async def upload_leads(
-        self, campaign_id: str, lead_list_id: str, leads: List[Dict]
-    ) -> str:
+    async def add_leads_to_list(self, lead_list_id: str, leads: List[Dict]) -> int:
         """
-        Upload leads to Instantly using API v2
-        POST /api/v2/leads/list
+        Bulk-add one batch of leads to a lead list
+        POST /api/v2/leads/add
 
-        leads format: [{"email": "x@y.com", "first_name": "John", "company_name": "ABC"}]
+        leads format: [{"email": "x@y.com", "first_name": "John", "company": "ABC"}]
+        Leads this list already got (a retried or resumed upload) and leads
+        without an email are left out. Returns the number of leads sent.
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Prepare leads in Instantly v2 format
-            formatted_leads = []
-            for lead in leads:
-                formatted_leads.append(
-                    {
-                        "email": lead.get("email"),
-                        "first_name": lead.get("first_name", ""),
-                        "last_name": lead.get("last_name", ""),
-                        "company_name": lead.get("company", ""),
-                        "personalization": lead.get("personalization", ""),
-                        "phone": lead.get("phone", ""),
-                        "website": lead.get("website", ""),
-                        "custom_variables": lead.get("custom_variables", {}),
-                    }
-                )
-
+        fresh_leads, already_sent, invalid = self.lead_index.partition(leads, lead_list_id=lead_list_id)
+        if already_sent or invalid:
+            print(f"   {len(fresh_leads)} new, {len(already_sent)} already in list {lead_list_id}, {len(invalid)} without an email (skipped)")
+        if not fresh_leads:
+            return 0
+        formatted_leads = [self._format_list_lead(lead) for lead in fresh_leads]
+
+        async with self._client(timeout=120.0) as client:
             response = await client.post(
-                f"{self.base_url}/leads/list",
+                f"{self.base_url}/leads/add",
                 headers=self.headers,
                 json={
-                    "api_key": self.api_key,
-                    "lead_list_id": lead_list_id,
+                    "list_id": lead_list_id,
                     "leads": formatted_leads,
                     "skip_if_in_workspace": False,
                 },
             )
 
-            if response.status_code not in [200, 201]:
-                print(f"Warning: Failed to upload leads: {response.text}")
+        if response.status_code not in [200, 201]:
+            raise Exception(f"Failed to add leads to list: {response.text}")
+
+        self.lead_index.record((lead["email"] for lead in formatted_leads), lead_list_id=lead_list_id)
+        self.reads.clear()
+        return len(formatted_leads)
+
+    async def upload_leads(
+        self,
+        campaign_id: Optional[str],
+        lead_list_id: str,
+        leads: List[Dict],
+        batch_size: int = 500
+    ) -> str:
+        """
+        Upload leads to a lead list in batches (see add_leads_to_list)
 
-            return lead_list_id
+        leads format: [{"email": "x@y.com", "first_name": "John", "company": "ABC"}]
+        """
+        for start in range(0, len(leads), batch_size):
+            batch = leads[start:start + batch_size]
+            try:
+                await self.add_leads_to_list(lead_list_id, batch)
+            except Exception as e:
+                print(f"Warning: Failed to upload leads {start}-{start + len(batch)}: {str(e)}")
+
+        return lead_list_id
 
     async def move_leads_to_campaign(
         self, campaign_id: str, lead_list_id: str, limit: int = 10
@@ -101,7 +174,7 @@ class InstantlyService:
         print(f"   Requesting {limit} leads (to avoid getting all workspace leads)")
 
         # Get enriched leads from the SuperSearch list - use the limit parameter
-        supersearch_leads = await self.get_leads_from_list(lead_list_id, limit=limit)
+        supersearch_leads = await self.get_lead_records_from_list(lead_list_id, limit=limit)
 
         if not supersearch_leads:
             print(f"⚠️ No enriched leads found in list {lead_list_id}")
@@ -109,48 +182,28 @@ class InstantlyService:
 
         print(f"   Found {len(supersearch_leads)} enriched leads from SuperSearch")
 
-        print(f"📋 Step 2: Preparing leads for bulk creation")
-        print(f"   These should be NEW enriched leads from SuperSearch")
+        print(f"📋 Step 2: Filtering out leads already pushed to this campaign")
 
-        # We'll let the API handle deduplication with skip_if_in_workspace flag
-        fresh_leads = supersearch_leads
+        # Local dedup index: re-launches and overlapping ICP searches don't re-upload
+        fresh_leads, already_pushed, invalid = self.lead_index.partition(
+            supersearch_leads, campaign_id=campaign_id, email_of=lambda lead: lead.email
+        )
+        print(f"   {len(fresh_leads)} new, {len(already_pushed)} already in campaign, {len(invalid)} without an email (skipped)")
+
+        if not fresh_leads:
+            print(f"✅ No new leads for campaign {campaign_id} among {len(supersearch_leads)}")
+            return True
 
         print(f"📤 Step 3: Creating {len(fresh_leads)} leads with campaign_id={campaign_id}")
 
         # Prepare leads array for bulk creation
         # IMPORTANT: Include campaign_id in BOTH wrapper AND each lead for compatibility
-        leads_array = []
-        for lead in fresh_leads:
-            lead_data = {
-                "email": lead.get("email"),
-                "campaign_id": campaign_id,  # Per-lead campaign_id for compatibility
-            }
-
-            # Add optional fields if available
-            if lead.get("first_name"):
-                lead_data["first_name"] = lead.get("first_name")
-            if lead.get("last_name"):
-                lead_data["last_name"] = lead.get("last_name")
-            if lead.get("company_name"):
-                lead_data["company"] = lead.get("company_name")  # Note: "company" not "company_name"
-            if lead.get("title"):
-                lead_data["title"] = lead.get("title")
-            if lead.get("website"):
-                lead_data["website"] = lead.get("website")
-            if lead.get("linkedin_url"):
-                lead_data["linkedin"] = lead.get("linkedin_url")
-
-            # Add custom variables to track source
-            lead_data["custom_variables"] = {
-                "source": "supersearch",
-                "source_list_id": lead_list_id
-            }
-
-            leads_array.append(lead_data)
+        leads_array = [lead.to_campaign_lead(campaign_id, source_list_id=lead_list_id) for lead in fresh_leads]
 
         # Use the correct POST /api/v2/leads/list format with wrapper object
         # campaign_id in BOTH wrapper and per-lead for maximum compatibility
-        # CRITICAL: Using skip_if_in_workspace: False because these are NEW enriched leads
+        # CRITICAL: Using skip_if_in_workspace: False - leads already in this campaign were
+        # filtered locally above, the rest must be added even if they exist elsewhere in the workspace
         payload = {
             "campaign_id": campaign_id,  # Wrapper-level campaign_id
             "skip_if_in_workspace": False,  # Don't skip - these are NEW leads from SuperSearch!
@@ -159,7 +212,7 @@ class InstantlyService:
 
         print(f"   Using skip_if_in_workspace: FALSE (new enriched leads)")
 
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with self._client(timeout=120.0) as client:
             # Use the correct endpoint: /leads/add (not /leads/list)
             create_response = await client.post(
                 f"{self.base_url}/leads/add",
@@ -177,37 +230,12 @@ class InstantlyService:
 
                 if job_id:
                     print(f"   Background job detected: {job_id}")
-                    print(f"   Polling job status...")
-
-                    # Poll the background job
-                    max_polls = 40
-                    poll_interval = 3
-
-                    for i in range(max_polls):
-                        await asyncio.sleep(poll_interval)
-
-                        job_response = await client.get(
-                            f"{self.base_url}/background-jobs/{job_id}",
-                            headers=headers
-                        )
+                    status = await self._wait_for_background_job(client, headers, job_id)
+                    if status == "failed":
+                        print(f"❌ Background job failed")
+                        return False
 
-                        if job_response.status_code == 200:
-                            job_data = job_response.json()
-                            status = job_data.get("status")
-
-                            print(f"   Poll {i+1}/{max_polls}: status={status}")
-
-                            if status in ["completed", "success"]:
-                                print(f"✅ Background job completed successfully!")
-                                break
-                            elif status == "failed":
-                                print(f"❌ Background job failed")
-                                return False
-                        else:
-                            print(f"   Warning: Failed to poll job (status {job_response.status_code})")
-
-                    if status not in ["completed", "success"]:
-                        print(f"⏳ Job still running after {max_polls * poll_interval}s, continuing anyway")
+                self.lead_index.record((lead["email"] for lead in leads_array), campaign_id=campaign_id)
 
                 # Verify assignment using search-by-contact for first lead
                 if leads_array:
@@ -245,6 +273,55 @@ class InstantlyService:
                 print(f"❌ Failed to create leads: {create_response.status_code} - {create_response.text}")
                 return False
 
+    async def _wait_for_background_job(
+        self, client: httpx.AsyncClient, headers: Dict, job_id: str
+    ) -> Optional[str]:
+        """
+        Wait for a background job by polling /background-jobs every few seconds
+
+        With webhooks enabled, each interval between polls waits on the
+        job_completed webhook instead of sleeping, so the event ends the wait
+        early but a missing one costs nothing over plain polling.
+
+        Returns the final status ("completed", "success", "failed") or the last seen status.
+        """
+        max_polls = 40
+        poll_interval = self.job_poll_interval
+        status = None
+
+        print(f"   Polling job status{' (or job_completed webhook)' if self.webhooks.enabled else ''}...")
+
+        for i in range(max_polls):
+            if self.webhooks.enabled:
+                event = await self.webhooks.wait_for("job_completed", {"job_id": job_id}, timeout=poll_interval)
+                if event:
+                    print(f"✅ Background job {event.get('status')} (webhook)")
+                    return event.get("status")
+            else:
+                await asyncio.sleep(poll_interval)
+
+            job_response = await client.get(
+                f"{self.base_url}/background-jobs/{job_id}",
+                headers=headers
+            )
+
+            if job_response.status_code == 200:
+                job_data = job_response.json()
+                status = job_data.get("status")
+
+                print(f"   Poll {i+1}/{max_polls}: status={status}")
+
+                if status in ["completed", "success"]:
+                    print(f"✅ Background job completed successfully!")
+                    return status
+                elif status == "failed":
+                    return status
+            else:
+                print(f"   Warning: Failed to poll job (status {job_response.status_code})")
+
+        print(f"⏳ Job still running after {max_polls * poll_interval:.0f}s, continuing anyway")
+        return status
+
     async def create_campaign(
         self, name: str, lead_list_id: str = None, variants: List[Dict] = None, email_accounts: List[str] = None
     ) -> Dict:
@@ -258,7 +335,7 @@ class InstantlyService:
             variants: List of email variants [{"subject": "...", "body": "..."}]
             email_accounts: List of email addresses to use for sending
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             # Use the first variant as the primary, or default
             if not variants:
                 variants = [
@@ -361,7 +438,7 @@ class InstantlyService:
             print(f"⚠️ No email accounts provided to add to campaign")
             return True
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             print(f"📧 Adding {len(email_accounts)} email accounts to campaign {campaign_id}")
             print(f"   Accounts: {email_accounts}")
 
@@ -418,7 +495,7 @@ class InstantlyService:
         Activate a campaign to start sending
         POST /api/v2/campaigns/{id}/activate
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/campaigns/{campaign_id}/activate",
                 headers=self.headers,
@@ -432,7 +509,7 @@ class InstantlyService:
         Get analytics for a campaign using API v2
         GET /api/v2/campaigns/analytics?campaign_id={id}
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/campaigns/analytics",
                 headers=self.headers,
@@ -466,11 +543,48 @@ class InstantlyService:
                 "clicked": clicked,
                 "replied": replied,
                 "bounced": data.get("bounced", 0),
-                "open_rate": round((opened / max(sent, 1)) * 100, 2),
-                "click_rate": round((clicked / max(opened, 1)) * 100, 2),
-                "reply_rate": round((replied / max(sent, 1)) * 100, 2),
+                **campaign_rates(sent, opened, clicked, replied),
             }
 
+    async def iter_campaign_emails(
+        self,
+        campaign_id: str,
+        starting_after: Optional[str] = None,
+        page_size: int = 100,
+        max_pages: int = 50
+    ):
+        """
+        Page through a campaign's sent emails and replies, oldest first
+        GET /api/v2/emails?campaign_id={id}&sort_order=asc (cursor: next_starting_after)
+
+        The endpoint sorts newest-first by default, which would make starting_after
+        page into older mail; ascending order makes it return only newer mail.
+
+        Yields raw email items; stops when the API returns no cursor or after max_pages.
+        """
+        async with self._client(timeout=60.0) as client:
+            for _ in range(max_pages):
+                params = {"campaign_id": campaign_id, "limit": page_size, "sort_order": "asc"}
+                if starting_after:
+                    params["starting_after"] = starting_after
+
+                response = await client.get(
+                    f"{self.base_url}/emails",
+                    headers=self.headers,
+                    params=params,
+                )
+
+                if response.status_code != 200:
+                    raise Exception(f"Failed to list campaign emails: {response.text}")
+
+                data = response.json()
+                for item in data.get("items", []):
+                    yield item
+
+                starting_after = data.get("next_starting_after")
+                if not starting_after:
+                    return
+
     async def get_campaign_analytics_overview(
         self, campaign_ids: List[str] = None
     ) -> Dict:
@@ -478,7 +592,7 @@ class InstantlyService:
         Get overview analytics for multiple campaigns
         GET /api/v2/campaigns/analytics/overview
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             params = {"api_key": self.api_key}
             if campaign_ids:
                 params["campaign_ids"] = ",".join(campaign_ids)
@@ -499,7 +613,7 @@ class InstantlyService:
         Create a new email account in Instantly using API v2
         POST /api/v2/accounts
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/accounts",
                 headers=self.headers,
@@ -524,7 +638,7 @@ class InstantlyService:
         Get all email accounts
         GET /api/v2/accounts
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/accounts",
                 headers=self.headers,
@@ -541,7 +655,7 @@ class InstantlyService:
         Get all campaigns
         GET /api/v2/campaigns
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/campaigns",
                 headers=self.headers,
@@ -558,7 +672,7 @@ class InstantlyService:
         Get a specific campaign
         GET /api/v2/campaigns/{id}
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/campaigns/{campaign_id}",
                 headers=self.headers,
@@ -570,12 +684,71 @@ class InstantlyService:
 
             return response.json()
 
+    async def _iter_pages(self, path: str, params: Dict, page_size: int, max_pages: Optional[int]):
+        """
+        Yield items from a v2 list endpoint, following next_starting_after
+        """
+        starting_after = None
+        pages = 0
+        async with self._client(timeout=60.0) as client:
+            while max_pages is None or pages < max_pages:
+                page_params = {**params, "limit": page_size}
+                if starting_after:
+                    page_params["starting_after"] = starting_after
+
+                await self.rate_limiter.acquire()
+                response = await client.get(
+                    f"{self.base_url}{path}",
+                    headers=self.headers,
+                    params=page_params,
+                )
+
+                if response.status_code != 200:
+                    raise Exception(f"Failed to list {path.strip('/')}: {response.text}")
+
+                data = response.json()
+                items = data.get("items", []) if isinstance(data, dict) else data
+                for item in items:
+                    yield item
+
+                pages += 1
+                starting_after = data.get("next_starting_after") if isinstance(data, dict) else None
+                if not starting_after or not items:
+                    return
+
+    def iter_campaigns(
+        self,
+        search: Optional[str] = None,
+        page_size: int = 100,
+        max_pages: Optional[int] = None
+    ):
+        """
+        Page through all campaigns
+        GET /api/v2/campaigns (cursor: next_starting_after)
+        """
+        params = {"search": search} if search else {}
+        return self._iter_pages("/campaigns", params, page_size, max_pages)
+
+    def iter_lead_lists(
+        self,
+        search: Optional[str] = None,
+        page_size: int = 100,
+        max_pages: Optional[int] = None
+    ):
+        """
+        Page through all lead lists
+        GET /api/v2/lead-lists (cursor: next_starting_after)
+        """
+        params = {"search": search} if search else {}
+        return self._iter_pages("/lead-lists", params, page_size, max_pages)
+
     async def pause_campaign(self, campaign_id: str) -> bool:
         """
         Pause a campaign
         POST /api/v2/campaigns/{id}/pause
         """
-        async with httpx.AsyncClient() as client:
+        await self.rate_limiter.acquire()
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/campaigns/{campaign_id}/pause",
                 headers=self.headers,
@@ -589,11 +762,26 @@ class InstantlyService:
         Delete a campaign
         DELETE /api/v2/campaigns/{id}
         """
-        async with httpx.AsyncClient() as client:
+        await self.rate_limiter.acquire()
+        async with self._client() as client:
+            # v2 rejects a JSON content type with an empty body, so send auth only
             response = await client.delete(
                 f"{self.base_url}/campaigns/{campaign_id}",
-                headers=self.headers,
-                params={"api_key": self.api_key},
+                headers={"Authorization": self.headers["Authorization"]},
+            )
+
+            return response.status_code in [200, 204]
+
+    async def delete_lead_list(self, list_id: str) -> bool:
+        """
+        Delete a lead list
+        DELETE /api/v2/lead-lists/{id}
+        """
+        await self.rate_limiter.acquire()
+        async with self._client() as client:
+            response = await client.delete(
+                f"{self.base_url}/lead-lists/{list_id}",
+                headers={"Authorization": self.headers["Authorization"]},
             )
 
             return response.status_code in [200, 204]
@@ -611,7 +799,7 @@ class InstantlyService:
         Add a single lead to a campaign
         POST /api/v2/leads
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.post(
                 f"{self.base_url}/leads",
                 headers=self.headers,
@@ -636,7 +824,7 @@ class InstantlyService:
         Get a specific lead
         GET /api/v2/leads/{id}
         """
-        async with httpx.AsyncClient() as client:
+        async with self._client() as client:
             response = await client.get(
                 f"{self.base_url}/leads/{lead_id}",
                 headers=self.headers,
@@ -666,7 +854,7 @@ class InstantlyService:
 
         Returns the enrichment job info.
         """
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with self._client(timeout=120.0) as client:
             # Step 1: Create SuperSearch enrichment targeting the campaign
             print(f"DEBUG: Creating SuperSearch enrichment for campaign {campaign_id}")
 
@@ -744,7 +932,7 @@ class InstantlyService:
             "industry": {"include": ["Software"], "exclude": []}
         }
         """
-        async with httpx.AsyncClient(timeout=120.0) as client:
+        async with self._client(timeout=120.0) as client:
             payload = {
                 "api_key": self.api_key,  # REQUIRED: API key must be in payload too!
                 "search_filters": search_filters,
@@ -814,13 +1002,23 @@ class InstantlyService:
     async def get_leads_from_list(
         self, lead_list_id: str, limit: int = 100, offset: int = 0
     ) -> List[Dict]:
+        """
+        Get all leads from a specific lead list as dicts (see get_lead_records_from_list)
+        """
+        records = await self.get_lead_records_from_list(lead_list_id, limit=limit, offset=offset)
+        return [record.to_dict() for record in records]
+
+    @coalesced_read
+    async def get_lead_records_from_list(
+        self, lead_list_id: str, limit: int = 100, offset: int = 0
+    ) -> List[LeadRecord]:
         """
         Get all leads from a specific lead list using POST /api/v2/leads/list
 
         This endpoint requires Bearer token authentication and filters by list_id.
-        Returns a dict with 'items' (the leads array) and 'next_starting_after' for pagination.
+        The raw page is normalized once into LeadRecords (see lead_normalizer.py).
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._client(timeout=60.0) as client:
             # Use the correct endpoint with Bearer token
             headers = {
                 "Content-Type": "application/json",
@@ -854,39 +1052,14 @@ class InstantlyService:
                     raw_leads = data["items"]
                     print(f"✅ get_leads_from_list returned {len(raw_leads)} leads for list {lead_list_id}")
 
-                    # Extract enrichment data from payload and merge with top-level fields
-                    enriched_leads = []
-                    for lead in raw_leads:
-                        # Start with the base lead data
-                        enriched_lead = {
-                            'id': lead.get('id'),
-                            'email': lead.get('email'),
-                            'first_name': lead.get('first_name'),
-                            'last_name': lead.get('last_name'),
-                            'company_name': lead.get('company_name'),
-                            'company_domain': lead.get('company_domain'),
-                            'phone': lead.get('phone'),
-                        }
+                    # Email validation, LinkedIn canonicalization and payload field mapping in one pass
+                    records = normalize_leads(raw_leads)
 
-                        # Extract enrichment data from payload if available
-                        payload = lead.get('payload', {})
-                        if payload:
-                            enriched_lead.update({
-                                'title': payload.get('jobTitle'),
-                                'location': payload.get('location'),
-                                'linkedin': payload.get('linkedIn'),
-                                'city': payload.get('city'),
-                                'state': payload.get('state'),
-                                'country': payload.get('country'),
-                            })
-
-                        enriched_leads.append(enriched_lead)
-
-                    if enriched_leads:
-                        print(f"   Sample lead: {enriched_leads[0].get('email', 'N/A')} - {enriched_leads[0].get('title', 'N/A')}")
-                        print(f"   Location: {enriched_leads[0].get('location', 'N/A')}")
-
-                    return enriched_leads
+                    if records:
+                        print(f"   Sample lead: {records[0].email or 'N/A'} - {records[0].title or 'N/A'}")
+                        print(f"   Location: {records[0].location or 'N/A'}")
+
+                    return records
                 print(f"⚠️ No 'items' field in response for list {lead_list_id}")
                 print(f"   Response keys: {list(data.keys())}")
                 print(f"   Full response: {json.dumps(data, indent=2)[:500]}")
@@ -927,8 +1100,18 @@ class InstantlyService:
 
         print(f"   Initial count: {initial_count} leads")
 
+        last_check = time.monotonic()
         while elapsed < max_wait_seconds:
-            await asyncio.sleep(poll_interval)
+            # A lead_added/enrichment_completed webhook for this list ends the wait early
+            if self.webhooks.enabled:
+                await self.webhooks.wait_for(
+                    ("lead_added", "enrichment_completed"), {"resource_id": resource_id},
+                    timeout=poll_interval, since=last_check
+                )
+                last_check = time.monotonic()
+                self.reads.clear()
+            else:
+                await asyncio.sleep(poll_interval)
             elapsed += poll_interval
 
             try:
@@ -950,6 +1133,7 @@ class InstantlyService:
         print(f"⏰ Enrichment timeout after {max_wait_seconds}s")
         return False
 
+    @coalesced_read
     async def get_supersearch_enrichment_status(self, resource_id: str) -> Dict:
         """
         Get the status of a SuperSearch enrichment job
@@ -960,7 +1144,7 @@ class InstantlyService:
         - exists: bool - whether the list exists
         - resource_id: str - the lead list ID
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._client(timeout=60.0) as client:
             response = await client.get(
                 f"{self.base_url}/supersearch-enrichment/{resource_id}",
                 headers=self.headers,
@@ -971,6 +1155,7 @@ class InstantlyService:
 
             return {}
 
+    @coalesced_read
     async def get_supersearch_enrichment_history(self, resource_id: str) -> List[Dict]:
         """
         Get enrichment history/results for a SuperSearch job
@@ -978,7 +1163,7 @@ class InstantlyService:
 
         This should return the actual enriched leads from SuperSearch
         """
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._client(timeout=60.0) as client:
             print(f"🔍 Calling SuperSearch history endpoint for resource_id: {resource_id}")
             response = await client.get(
                 f"{self.base_url}/supersearch-enrichment/history/{resource_id}",
@@ -1019,7 +1204,7 @@ class InstantlyService:
         Returns:
             List of account dictionaries with email, first_name, last_name, etc.
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             params = {"limit": min(limit, 100)}
             if status is not None:
                 params["status"] = status
@@ -0,0 +1,212 @@
+"""
+Local index of lead emails already pushed to Instantly (per lead list and per campaign)
+"""
+import hashlib
+import json
+import math
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: no false negatives, tunable false-positive rate
+    """
+
+    def __init__(self, capacity: int = 10_000, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+
+        # Standard sizing: m = -n ln(p) / ln(2)^2, k = m/n ln(2)
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        # Double hashing (Kirsch-Mitzenmacher) from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class LeadDedupIndex:
+    """
+    Emails already imported into each lead list and each campaign.
+
+    There is deliberately no workspace-wide scope: Instantly keeps a lead per
+    list/campaign, so a lead already in the workspace still has to be sent to
+    a new list or campaign (skip_if_in_workspace is off for the same reason).
+
+    Each scope keeps a Bloom filter in front of an exact set: the common
+    "never seen" case is answered by the filter alone, and filter hits are
+    confirmed against the exact store so nothing is dropped by a false
+    positive. Records are optionally appended to a JSON-lines file so the
+    index survives restarts.
+    """
+
+    # Written by earlier versions; never consulted, so not loaded
+    _LEGACY_SCOPES = ("workspace",)
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = 10_000,
+        error_rate: float = 0.01
+    ):
+        """
+        Args:
+            path: Optional JSON-lines file used to persist the index
+            capacity: Initial Bloom filter capacity per scope (grows as needed)
+            error_rate: Target Bloom filter false-positive rate
+        """
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._exact: Dict[str, Set[str]] = {}
+        self._blooms: Dict[str, BloomFilter] = {}
+
+        self.bloom_negatives = 0
+        self.false_positives = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    @staticmethod
+    def normalize_email(email: Optional[str]) -> str:
+        return (email or "").strip().lower()
+
+    @classmethod
+    def campaign_scope(cls, campaign_id: str) -> str:
+        return f"campaign:{campaign_id}"
+
+    @classmethod
+    def list_scope(cls, lead_list_id: str) -> str:
+        return f"list:{lead_list_id}"
+
+    def _scope(self, campaign_id: Optional[str], lead_list_id: Optional[str]) -> str:
+        if bool(campaign_id) == bool(lead_list_id):
+            raise ValueError("Pass exactly one of campaign_id and lead_list_id")
+        return self.campaign_scope(campaign_id) if campaign_id else self.list_scope(lead_list_id)
+
+    def _add(self, scope: str, email: str) -> bool:
+        exact = self._exact.setdefault(scope, set())
+        if email in exact:
+            return False
+        exact.add(email)
+
+        bloom = self._blooms.get(scope)
+        if bloom is None or bloom.count >= bloom.capacity:
+            # Resize by rebuilding from the exact store at double the size
+            bloom = BloomFilter(max(self.capacity, len(exact) * 2), self.error_rate)
+            for existing in exact:
+                bloom.add(existing)
+            self._blooms[scope] = bloom
+        else:
+            bloom.add(email)
+        return True
+
+    def _load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record["scope"] not in self._LEGACY_SCOPES:
+                    self._add(record["scope"], record["email"])
+
+    def contains(self, email: str, campaign_id: Optional[str] = None, lead_list_id: Optional[str] = None) -> bool:
+        """
+        True if email was already imported into the campaign (or the lead list)
+        """
+        email = self.normalize_email(email)
+        scope = self._scope(campaign_id, lead_list_id)
+        bloom = self._blooms.get(scope)
+
+        if bloom is None or email not in bloom:
+            self.bloom_negatives += 1
+            return False
+
+        if email in self._exact.get(scope, ()):
+            return True
+
+        self.false_positives += 1
+        return False
+
+    def partition(
+        self,
+        leads: List[Any],
+        campaign_id: Optional[str] = None,
+        email_of: Optional[Callable[[Any], Optional[str]]] = None,
+        lead_list_id: Optional[str] = None
+    ) -> Tuple[List[Any], List[Any], List[Any]]:
+        """
+        Split a batch for a campaign or a lead list into (new_leads, already_imported, invalid)
+
+        Leads repeating an email earlier in the batch count as already imported;
+        leads without a usable email are invalid. Leads are dicts unless email_of
+        is given (e.g. lambda lead: lead.email for LeadRecords).
+        """
+        email_of = email_of or (lambda lead: lead.get("email"))
+        new_leads, duplicates, invalid = [], [], []
+        seen_in_batch = set()
+
+        for lead in leads:
+            email = self.normalize_email(email_of(lead))
+            if "@" not in email:
+                invalid.append(lead)
+            elif email in seen_in_batch or self.contains(email, campaign_id, lead_list_id):
+                duplicates.append(lead)
+            else:
+                seen_in_batch.add(email)
+                new_leads.append(lead)
+
+        return new_leads, duplicates, invalid
+
+    def record(self, emails: Iterable[str], campaign_id: Optional[str] = None, lead_list_id: Optional[str] = None) -> int:
+        """
+        Mark emails as imported into the campaign (or the lead list)
+
+        Returns the number of emails newly added.
+        """
+        scope = self._scope(campaign_id, lead_list_id)
+
+        new_records = []
+        for email in emails:
+            email = self.normalize_email(email)
+            if email and self._add(scope, email):
+                new_records.append({"scope": scope, "email": email})
+
+        if self.path and new_records:
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in new_records:
+                    f.write(json.dumps(record) + "\n")
+
+        return len(new_records)
+
+    def stats(self) -> Dict:
+        """
+        Index size and Bloom filter effectiveness counters
+        """
+        return {
+            "lists": sum(1 for scope in self._exact if scope.startswith("list:")),
+            "campaigns": sum(1 for scope in self._exact if scope.startswith("campaign:")),
+            "emails": sum(len(emails) for emails in self._exact.values()),
+            "bloom_negatives": self.bloom_negatives,
+            "false_positives": self.false_positives,
+            "bloom_bytes": sum(len(b.bits) for b in self._blooms.values())
+        }
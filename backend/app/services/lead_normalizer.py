@@ -0,0 +1,198 @@
+"""
+Single normalization stage for raw Instantly leads
+
+Pages returned by POST /api/v2/leads/list are converted once, in batch, into
+compact LeadRecord objects. Email validation, LinkedIn URL canonicalization
+and field mapping happen here; everything downstream (lead previews, bulk
+creation, LinkedIn outreach) reads the records instead of re-parsing dicts.
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s.]+$")
+LINKEDIN_RE = re.compile(
+    r"^(?:https?://)?(?:[a-z]{2,3}\.|www\.)?linkedin\.com/(in|pub|company|school)/([^/?#\s]+)",
+    re.IGNORECASE
+)
+
+_CANONICAL_PROFILE_PREFIX = "https://www.linkedin.com/in/"
+
+# Raw keys that may carry a LinkedIn URL, in priority order
+_PAYLOAD_LINKEDIN_KEYS = ("linkedIn", "linkedin", "linkedin_url", "linkedinUrl")
+_LEAD_LINKEDIN_KEYS = ("linkedin_url", "linkedin")
+
+
+@dataclass(slots=True)
+class LeadRecord:
+    """
+    Normalized lead (email is lower-cased and None unless valid)
+    """
+    id: Optional[str]
+    email: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    company_name: Optional[str]
+    company_domain: Optional[str]
+    phone: Optional[str]
+    title: Optional[str] = None
+    location: Optional[str] = None
+    linkedin: Optional[str] = None
+    city: Optional[str] = None
+    state: Optional[str] = None
+    country: Optional[str] = None
+    website: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        """
+        API shape returned by get_leads_from_list and the lead preview endpoints
+        """
+        return {
+            "id": self.id,
+            "email": self.email,
+            "first_name": self.first_name,
+            "last_name": self.last_name,
+            "company_name": self.company_name,
+            "company_domain": self.company_domain,
+            "phone": self.phone,
+            "title": self.title,
+            "location": self.location,
+            "linkedin": self.linkedin,
+            "city": self.city,
+            "state": self.state,
+            "country": self.country,
+        }
+
+    def to_campaign_lead(self, campaign_id: str, source_list_id: Optional[str] = None) -> Dict:
+        """
+        Lead entry for POST /api/v2/leads/add (note: "company" not "company_name")
+        """
+        lead = {"email": self.email, "campaign_id": campaign_id}
+        if self.first_name:
+            lead["first_name"] = self.first_name
+        if self.last_name:
+            lead["last_name"] = self.last_name
+        if self.company_name:
+            lead["company"] = self.company_name
+        if self.title:
+            lead["title"] = self.title
+        if self.website:
+            lead["website"] = self.website
+        if self.linkedin:
+            lead["linkedin"] = self.linkedin
+
+        custom_variables = {"source": "supersearch"}
+        if source_list_id:
+            custom_variables["source_list_id"] = source_list_id
+        lead["custom_variables"] = custom_variables
+        return lead
+
+    def to_linkedin_preview(self) -> Dict:
+        """
+        Row for the LinkedIn campaign lead preview
+        """
+        return {
+            "first_name": self.first_name or "",
+            "last_name": self.last_name or "",
+            "email": self.email or "",
+            "company": self.company_name or "",
+            "title": self.title or "",
+            "linkedin_url": self.linkedin or ""
+        }
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """
+    Lower-case and validate an email address (None if missing or invalid)
+    """
+    if not email or not isinstance(email, str):
+        return None
+    email = email.strip().lower()
+    return email if EMAIL_RE.match(email) else None
+
+
+def canonicalize_linkedin_url(url: Optional[str]) -> Optional[str]:
+    """
+    Canonical https://www.linkedin.com/<kind>/<slug> form of a LinkedIn URL
+
+    Handles missing scheme, country subdomains (uk.linkedin.com), tracking
+    query strings and trailing slashes. Non-LinkedIn values return None.
+    """
+    if not url or not isinstance(url, str):
+        return None
+    # Fast path: most SuperSearch leads already carry the canonical profile form
+    if (
+        url.startswith(_CANONICAL_PROFILE_PREFIX)
+        and "/" not in url[len(_CANONICAL_PROFILE_PREFIX):]
+        and "?" not in url
+        and "#" not in url
+        and " " not in url
+    ):
+        return url
+    match = LINKEDIN_RE.match(url.strip())
+    if not match:
+        return None
+    kind, slug = match.groups()
+    return f"https://www.linkedin.com/{kind.lower()}/{slug}"
+
+
+def linkedin_profile_id(url: Optional[str]) -> Optional[str]:
+    """
+    Profile slug from a LinkedIn URL ("https://www.linkedin.com/in/jane-doe" -> "jane-doe")
+    """
+    canonical = canonicalize_linkedin_url(url)
+    if not canonical or "/in/" not in canonical:
+        return None
+    return canonical.rsplit("/", 1)[1]
+
+
+def normalize_leads(raw_leads: Iterable[Dict]) -> List[LeadRecord]:
+    """
+    Convert a page of raw Instantly leads into LeadRecords in one pass
+    """
+    # Bind hot callables locally - this runs for every lead of every page
+    record = LeadRecord
+    norm_email = normalize_email
+    canon = canonicalize_linkedin_url
+    payload_keys = _PAYLOAD_LINKEDIN_KEYS
+    lead_keys = _LEAD_LINKEDIN_KEYS
+
+    records = []
+    append = records.append
+    for lead in raw_leads:
+        get = lead.get
+        payload = get("payload") or {}
+        pget = payload.get
+
+        linkedin = None
+        for key in payload_keys:
+            value = pget(key)
+            if value:
+                linkedin = value
+                break
+        if not linkedin:
+            for key in lead_keys:
+                value = get(key)
+                if value:
+                    linkedin = value
+                    break
+
+        append(record(
+            get("id"),
+            norm_email(get("email")),
+            get("first_name"),
+            get("last_name"),
+            get("company_name"),
+            get("company_domain"),
+            get("phone"),
+            pget("jobTitle") or get("title"),
+            pget("location"),
+            canon(linkedin) if linkedin else None,
+            pget("city"),
+            pget("state"),
+            pget("country"),
+            get("website") or pget("website"),
+        ))
+
+    return records
@@ -0,0 +1,92 @@
+"""
+Per-list lead snapshots for incremental ("since") lead preview responses
+"""
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from .cache import TTLCache
+from .lead_normalizer import LeadRecord
+
+
+class _ListSnapshot:
+    def __init__(self):
+        # Epoch changes whenever the snapshot is rebuilt, invalidating old cursors
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        # lead key -> (fingerprint, version the lead last changed in)
+        self.entries: Dict[str, Tuple[tuple, int]] = {}
+
+
+def _lead_key(record: LeadRecord) -> Optional[str]:
+    return record.id or record.email
+
+
+def _fingerprint(record: LeadRecord) -> tuple:
+    return tuple(getattr(record, field) for field in LeadRecord.__slots__)
+
+
+class LeadSnapshotStore:
+    """
+    Remembers the last page seen for each lead list and versions every change
+
+    Cursors look like "<epoch>:<version>". A cursor from a different epoch
+    (server restart, snapshot evicted) is treated as no cursor, so the
+    client simply gets the full list again.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0):
+        self._snapshots = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def diff(
+        self,
+        list_id: str,
+        records: List[LeadRecord],
+        since: Optional[str] = None
+    ) -> Tuple[List[LeadRecord], str, bool]:
+        """
+        Apply the latest page for list_id and return what changed since the cursor
+
+        Returns:
+            (records new or changed since the cursor, next cursor, whether this is a delta)
+        """
+        snapshot = self._snapshots.get(list_id)
+        if snapshot is None:
+            snapshot = _ListSnapshot()
+        self._snapshots.set(list_id, snapshot)
+
+        next_version = snapshot.version + 1
+        changed = False
+        for record in records:
+            key = _lead_key(record)
+            if key is None:
+                continue
+            fingerprint = _fingerprint(record)
+            entry = snapshot.entries.get(key)
+            if entry is None or entry[0] != fingerprint:
+                snapshot.entries[key] = (fingerprint, next_version)
+                changed = True
+        if changed:
+            snapshot.version = next_version
+
+        cursor = f"{snapshot.epoch}:{snapshot.version}"
+        since_version = self._parse_cursor(snapshot, since)
+        if since_version is None:
+            return list(records), cursor, False
+
+        delta = [
+            record for record in records
+            if _lead_key(record) is not None and snapshot.entries[_lead_key(record)][1] > since_version
+        ]
+        return delta, cursor, True
+
+    @staticmethod
+    def _parse_cursor(snapshot: _ListSnapshot, since: Optional[str]) -> Optional[int]:
+        if not since:
+            return None
+        epoch, _, version = since.partition(":")
+        if epoch != snapshot.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def invalidate(self, list_id: str) -> None:
+        self._snapshots.invalidate(list_id)
@@ -0,0 +1,234 @@
+"""
+Garbage collection of lead lists created by campaign launches
+
+Every list a workflow run creates is registered with the run that owns it.
+When the run ends, its disposable lists become reapable and a background
+task deletes them in rate-limited batches:
+
+- temp lists (the placeholder passed to create_campaign) go whatever the outcome
+- SuperSearch lists only go if the run failed; on success they are the
+  campaign's lead source (supersearch_list_id, read by the LinkedIn endpoints)
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, List, Optional
+
+
+TEMP = "temp"
+SUPERSEARCH = "supersearch"
+
+
+class ListReaper:
+    """
+    Registry of app-created lists plus a background deleter for orphaned ones
+    """
+
+    def __init__(
+        self,
+        instantly_service,
+        path: Optional[str] = None,
+        grace_seconds: float = 60.0,
+        abandon_after: float = 6 * 3600.0,
+        batch_size: int = 20,
+        interval: float = 30.0,
+        max_attempts: int = 5,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Args:
+            instantly_service: InstantlyService (delete_lead_list goes through its rate limiter)
+            path: Optional JSON-lines file; registry changes are appended and replayed on start
+            grace_seconds: Keep a list this long after its run ends
+            abandon_after: Treat a run that never reported an end as failed after this long
+            batch_size: Deletions per batch
+            interval: Seconds between batches while lists are pending
+            max_attempts: Give up on a list after this many failed deletes
+            clock: Wall-clock time source (overridable for tests)
+        """
+        self.instantly = instantly_service
+        self.path = path
+        self.grace_seconds = grace_seconds
+        self.abandon_after = abandon_after
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_attempts = max_attempts
+        self._clock = clock
+
+        self._runs: Dict[str, Dict] = {}
+        self._lists: Dict[str, Dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.deleted = 0
+        self.failed = 0
+
+        if path and os.path.exists(path):
+            self._load(path)
+
+    def _load(self, path: str) -> None:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    continue
+        self._prune()
+
+    def _prune(self) -> None:
+        # Ended runs with nothing left to reap are no longer needed
+        owners = {entry["run_id"] for entry in self._lists.values()}
+        for run_id, run in list(self._runs.items()):
+            if run["status"] is not None and run_id not in owners:
+                del self._runs[run_id]
+
+    def _apply(self, entry: Dict) -> None:
+        op = entry["op"]
+        if op == "start":
+            self._runs[entry["run_id"]] = {"kind": entry.get("kind"), "started_at": entry["at"], "status": None, "ended_at": None}
+        elif op == "track":
+            self._lists[entry["list_id"]] = {"run_id": entry["run_id"], "role": entry["role"], "attempts": 0}
+        elif op == "finish":
+            run = self._runs.get(entry["run_id"])
+            if run is not None:
+                run["status"] = entry["status"]
+                run["ended_at"] = entry["at"]
+        elif op in ("deleted", "kept", "abandoned"):
+            self._lists.pop(entry["list_id"], None)
+
+    def _record(self, entry: Dict) -> None:
+        self._apply(entry)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def start_run(self, kind: str) -> str:
+        """
+        Register a workflow run; returns its id
+        """
+        run_id = uuid.uuid4().hex
+        self._record({"op": "start", "run_id": run_id, "kind": kind, "at": self._clock()})
+        return run_id
+
+    def track(self, run_id: str, list_id: Optional[str], role: str = TEMP) -> None:
+        """
+        Record a list created by a run (role: TEMP or SUPERSEARCH)
+        """
+        if list_id and list_id not in self._lists:
+            self._record({"op": "track", "run_id": run_id, "list_id": list_id, "role": role})
+
+    def finish_run(self, run_id: str, status: str) -> None:
+        """
+        Mark a run completed or failed. Only the first call counts.
+        """
+        run = self._runs.get(run_id)
+        if run is None or run["status"] is not None:
+            return
+        self._record({"op": "finish", "run_id": run_id, "status": status, "at": self._clock()})
+
+        # Its SuperSearch lists stay with the campaign from here on
+        if status == "completed":
+            for list_id, entry in list(self._lists.items()):
+                if entry["run_id"] == run_id and entry["role"] == SUPERSEARCH:
+                    self._record({"op": "kept", "list_id": list_id})
+
+        if any(entry["run_id"] == run_id for entry in self._lists.values()):
+            self._ensure_loop()
+        else:
+            self._prune()
+
+    def reapable(self) -> List[str]:
+        """
+        Ids of lists whose run ended (or was abandoned) more than grace_seconds ago
+        """
+        now = self._clock()
+        ready = []
+        for list_id, entry in self._lists.items():
+            run = self._runs.get(entry["run_id"])
+            if run is None:
+                ready.append(list_id)
+            elif run["status"] is not None:
+                if now - run["ended_at"] >= self.grace_seconds:
+                    ready.append(list_id)
+            elif now - run["started_at"] >= self.abandon_after:
+                ready.append(list_id)
+        return ready
+
+    async def reap_once(self) -> Dict:
+        """
+        Delete one batch of reapable lists
+
+        Returns:
+            Counts for this batch: deleted, failed, pending (still tracked afterwards)
+        """
+        batch = self.reapable()[:self.batch_size]
+
+        async def delete(list_id: str) -> bool:
+            try:
+                return await self.instantly.delete_lead_list(list_id)
+            except Exception as e:
+                print(f"⚠️ Could not delete lead list {list_id}: {str(e)}")
+                return False
+
+        results = await asyncio.gather(*(delete(list_id) for list_id in batch))
+
+        deleted = failed = 0
+        for list_id, ok in zip(batch, results):
+            if ok:
+                deleted += 1
+                self._record({"op": "deleted", "list_id": list_id})
+                continue
+            failed += 1
+            entry = self._lists[list_id]
+            entry["attempts"] += 1
+            if entry["attempts"] >= self.max_attempts:
+                print(f"⚠️ Giving up on lead list {list_id} after {entry['attempts']} attempts")
+                self._record({"op": "abandoned", "list_id": list_id})
+
+        self.deleted += deleted
+        self.failed += failed
+        self._prune()
+        if deleted:
+            print(f"🧹 Reaped {deleted} orphaned lead lists")
+        return {"deleted": deleted, "failed": failed, "pending": len(self._lists)}
+
+    def _ensure_loop(self) -> None:
+        if self._task and not self._task.done():
+            return
+        try:
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+        except RuntimeError:
+            pass  # no event loop (scripts/tests); call reap_once() directly
+
+    async def _loop(self) -> None:
+        # Runs while lists are tracked; finish_run() restarts it
+        while self._lists:
+            await asyncio.sleep(self.grace_seconds if not self.reapable() else 0)
+            if self.reapable():
+                await self.reap_once()
+                await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Resume reaping lists left over from a previous process
+        """
+        if self._lists:
+            self._ensure_loop()
+
+    def stats(self) -> Dict:
+        return {
+            "tracked": len(self._lists),
+            "reapable": len(self.reapable()),
+            "active_runs": sum(1 for run in self._runs.values() if run["status"] is None),
+            "deleted": self.deleted,
+            "failed": self.failed
+        }
+
+    async def aclose(self) -> None:
+        """
+        Stop the background loop (on shutdown)
+        """
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
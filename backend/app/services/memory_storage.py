@@ -0,0 +1,201 @@
+"""
+In-memory storage backend for local development and tests (no cloud database)
+"""
+import copy
+import uuid
+from datetime import datetime
+from typing import List, Dict, Optional
+
+from .storage_backend import StorageBackend, summarize_campaign_stats
+
+
+class InMemoryStorageService(StorageBackend):
+    """
+    Process-local implementation of the storage backend interface
+
+    Records live in plain dicts and are deep-copied on the way in and out,
+    so callers can't mutate stored state by accident.
+    """
+
+    def __init__(self):
+        self.campaigns: Dict[str, Dict] = {}
+        self.email_accounts: Dict[str, Dict] = {}
+        self.lead_lists: Dict[str, Dict] = {}
+        self.users: Dict[str, Dict] = {}
+
+    async def save_campaign(
+        self,
+        user_id: str,
+        campaign_id: str,
+        url: str,
+        target_audience: str,
+        copy_variants: List[Dict],
+        supersearch_list_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Save a new campaign
+        """
+        now = datetime.utcnow().isoformat()
+        data = {
+            "id": campaign_id,
+            "user_id": user_id,
+            "campaign_id": campaign_id,
+            "url": url,
+            "target_audience": target_audience,
+            "copy_variants": copy.deepcopy(copy_variants),
+            "status": "active",
+            "created_at": now,
+            "updated_at": now,
+            "sent": 0,
+            "opened": 0,
+            "clicked": 0,
+            "replied": 0,
+            "bounced": 0,
+            "open_rate": 0,
+            "click_rate": 0,
+            "reply_rate": 0
+        }
+
+        if supersearch_list_id:
+            data["supersearch_list_id"] = supersearch_list_id
+
+        self.campaigns[campaign_id] = data
+        return copy.deepcopy(data)
+
+    async def get_user_campaigns(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Get all campaigns for a user (optionally one page of them)
+        """
+        campaigns = [
+            copy.deepcopy(c) for c in self.campaigns.values()
+            if c.get("user_id") == user_id
+        ]
+        campaigns.sort(key=lambda x: x.get("created_at", ""), reverse=True)
+
+        if limit is not None:
+            return campaigns[offset:offset + limit]
+        return campaigns[offset:]
+
+    async def get_campaign(self, user_id: str, campaign_id: str) -> Optional[Dict]:
+        """
+        Get a specific campaign
+        """
+        campaign = self.campaigns.get(campaign_id)
+        return copy.deepcopy(campaign) if campaign else None
+
+    async def update_campaign_stats(self, campaign_id: str, analytics: Dict) -> Dict:
+        """
+        Update campaign statistics
+        """
+        campaign = self.campaigns.get(campaign_id)
+        if not campaign:
+            return {}
+
+        campaign.update({
+            "sent": analytics.get("sent", 0),
+            "opened": analytics.get("opened", 0),
+            "clicked": analytics.get("clicked", 0),
+            "replied": analytics.get("replied", 0),
+            "bounced": analytics.get("bounced", 0),
+            "open_rate": analytics.get("open_rate", 0),
+            "click_rate": analytics.get("click_rate", 0),
+            "reply_rate": analytics.get("reply_rate", 0),
+            "updated_at": datetime.utcnow().isoformat()
+        })
+        return copy.deepcopy(campaign)
+
+    async def update_campaign_status(self, campaign_id: str, status: str) -> Dict:
+        """
+        Update campaign status (active, paused, completed)
+        """
+        campaign = self.campaigns.get(campaign_id)
+        if not campaign:
+            return {}
+
+        campaign["status"] = status
+        campaign["updated_at"] = datetime.utcnow().isoformat()
+        return copy.deepcopy(campaign)
+
+    async def delete_campaign(self, campaign_id: str) -> bool:
+        """
+        Delete a campaign
+        """
+        return self.campaigns.pop(campaign_id, None) is not None
+
+    async def save_email_account(self, user_id: str, account_data: Dict) -> Dict:
+        """
+        Save email account information
+        """
+        data = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "email": account_data.get("email"),
+            "status": account_data.get("status", "active"),
+            "warmup_enabled": account_data.get("warmup_enabled", True),
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self.email_accounts[data["id"]] = data
+        return copy.deepcopy(data)
+
+    async def get_user_email_accounts(self, user_id: str) -> List[Dict]:
+        """
+        Get all email accounts for a user
+        """
+        return [
+            copy.deepcopy(a) for a in self.email_accounts.values()
+            if a.get("user_id") == user_id
+        ]
+
+    async def save_lead_list(
+        self,
+        user_id: str,
+        campaign_id: str,
+        leads: List[Dict]
+    ) -> Dict:
+        """
+        Save a lead list
+        """
+        data = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "campaign_id": campaign_id,
+            "leads": copy.deepcopy(leads),
+            "total_leads": len(leads),
+            "created_at": datetime.utcnow().isoformat()
+        }
+        self.lead_lists[data["id"]] = data
+        return copy.deepcopy(data)
+
+    async def get_user_stats(self, user_id: str) -> Dict:
+        """
+        Get aggregate stats for a user across all campaigns
+        """
+        campaigns = await self.get_user_campaigns(user_id)
+        return summarize_campaign_stats(campaigns)
+
+    async def create_user_profile(self, user_id: str, email: str, name: str = "") -> Dict:
+        """
+        Create a user profile
+        """
+        data = {
+            "id": user_id,
+            "user_id": user_id,
+            "email": email,
+            "name": name,
+            "created_at": datetime.utcnow().isoformat(),
+            "plan": "free"
+        }
+        self.users[user_id] = data
+        return copy.deepcopy(data)
+
+    async def get_user_profile(self, user_id: str) -> Optional[Dict]:
+        """
+        Get user profile
+        """
+        user = self.users.get(user_id)
+        return copy.deepcopy(user) if user else None
@@ -0,0 +1,213 @@
+"""
+Shared async OpenAI HTTP client and JSON helpers for the AI services
+
+AICopyService (and AIFilterParser, when given one) call OpenAI through an
+OpenAIClient: a pooled keep-alive httpx client whose requests are admitted by an
+AIRequestScheduler (concurrency cap, priority classes, per-model RPM/TPM) and
+a token bucket (OPENAI_MAX_RPS), so model calls never block the event loop and
+bursts queue briefly instead of tripping the account's rate limits.
+"""
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Union
+
+from .ai_scheduler import AIRequestScheduler, Priority, estimate_tokens
+from .http_pool import PooledHTTPClient
+from .rate_limit import TokenBucket
+
+# 429 retries per request, and the longest Retry-After honoured
+MAX_RATE_LIMIT_RETRIES = 3
+MAX_RETRY_WAIT = 20.0
+
+
+class OpenAIClient(PooledHTTPClient):
+    """
+    Pooled, rate-limited access to the OpenAI REST API
+    """
+
+    http_timeout = 120.0
+
+    def __init__(self, api_key: str, state=None, scheduler: Optional[AIRequestScheduler] = None):
+        """
+        Args:
+            api_key: OpenAI API key
+            state: Shared StateBackend, so every worker draws from one request budget
+            scheduler: Request scheduler (default: AIRequestScheduler.from_env(state))
+        """
+        self.api_key = api_key
+        self.base_url = "https://api.openai.com/v1"
+        self.headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+        max_rps = float(os.getenv("OPENAI_MAX_RPS", "8"))
+        self.rate_limiter = TokenBucket(rate=max_rps, burst=max(int(max_rps), 1), state=state, key="openai")
+        self.scheduler = scheduler or AIRequestScheduler.from_env(state)
+
+    @asynccontextmanager
+    async def session(self, timeout: Optional[float] = None, priority: Union[str, Priority] = "interactive"):
+        """
+        Yield the pooled client; each post() through it waits for a scheduler slot first
+
+        Args:
+            timeout: httpx timeout for the session's requests
+            priority: "interactive" (a user is waiting), "batch" or "speculative", or a Priority to raise later
+        """
+        async with self._client(timeout=timeout) as client:
+            yield ScheduledClient(client, self, priority)
+
+    async def chat(
+        self,
+        messages: List[Dict],
+        model: str = "gpt-4o",
+        timeout: float = 90.0,
+        priority: str = "interactive",
+        **params
+    ) -> str:
+        """
+        Run a chat completion and return the message text
+
+        Args:
+            messages: Chat messages
+            model: Model name
+            timeout: Seconds before the call is abandoned (time queued in the scheduler not included)
+            priority: Scheduler priority class
+            **params: Extra request fields (temperature, max_tokens...)
+
+        Raises:
+            Exception: If OpenAI returns an error
+        """
+        async with self.session(timeout=timeout, priority=priority) as client:
+            try:
+                response = await client.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=self.headers,
+                    json={"model": model, "messages": messages, **params},
+                    call_timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                raise Exception(f"Failed to run chat completion: no response after {timeout}s")
+
+        if response.status_code != 200:
+            raise Exception(f"Failed to run chat completion: {response.text}")
+
+        return response.json()["choices"][0]["message"]["content"].strip()
+
+    def stats(self) -> Dict:
+        return {"scheduler": self.scheduler.stats(), "rate_limiter": self.rate_limiter.stats()}
+
+
+class ScheduledClient:
+    """
+    The pooled httpx client as seen inside OpenAIClient.session()
+
+    post() waits for a scheduler slot (priority, concurrency, the model's RPM/TPM),
+    retries 429s after Retry-After, and reports the usage OpenAI returns.
+    """
+
+    def __init__(self, client, openai: OpenAIClient, priority: Union[str, Priority]):
+        self._client = client
+        self._openai = openai
+        self.priority = priority
+
+    async def post(self, url: str, json: Optional[Dict] = None, call_timeout: Optional[float] = None, **kwargs):
+        """
+        Args:
+            url: Request URL
+            json: Request body (its model and size drive the scheduling)
+            call_timeout: Seconds before one HTTP attempt is abandoned (asyncio.TimeoutError);
+                          httpx timeouts are per read, this bounds the whole attempt
+            **kwargs: Passed to httpx
+        """
+        payload = json or {}
+        model = payload.get("model", "unknown")
+        estimated = estimate_tokens(payload)
+        scheduler = self._openai.scheduler
+
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            async with scheduler.slot(model, estimated, self.priority):
+                await self._openai.rate_limiter.acquire()
+                request = self._client.post(url, json=json, **kwargs)
+                response = await (asyncio.wait_for(request, timeout=call_timeout) if call_timeout else request)
+
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                break
+            # Rate limited anyway (other clients of the key, or budgets set too high): wait, then queue again
+            scheduler.rate_limited_retries += 1
+            wait = _retry_after(response, default=2.0 ** attempt)
+            print(f"⏳ OpenAI rate limited {model} request; retrying in {wait:.1f}s")
+            await asyncio.sleep(wait)
+
+        if response.status_code == 200:
+            try:
+                await scheduler.record_usage(model, estimated, response.json().get("usage"))
+            except ValueError:
+                pass
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def _retry_after(response, default: float) -> float:
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return min(MAX_RETRY_WAIT, float(headers["retry-after-ms"]) / 1000)
+        if headers.get("retry-after"):
+            return min(MAX_RETRY_WAIT, float(headers["retry-after"]))
+    except ValueError:
+        pass
+    return min(MAX_RETRY_WAIT, default)
+
+
+def response_output_text(result: Dict) -> Optional[str]:
+    """
+    Text of the first message in a Responses API result (output[...].content[0].text)
+    """
+    for item in result.get("output", []):
+        if item.get("type") == "message":
+            content = item.get("content", [])
+            if content and content[0].get("type") == "output_text":
+                return content[0].get("text")
+    return None
+
+
+def extract_json(text: str, expect: type = dict) -> Any:
+    """
+    Parse the JSON object (or array) in a model reply
+
+    Handles replies wrapped in ```json fences or surrounded by prose by taking
+    the outermost {...} (or [...]).
+
+    Args:
+        text: Model output
+        expect: dict or list
+
+    Raises:
+        ValueError: If no JSON of the expected type is found (json.JSONDecodeError is a ValueError)
+    """
+    cleaned = (text or "").strip()
+
+    # Remove markdown code blocks if present
+    if "```json" in cleaned:
+        start = cleaned.find("```json") + 7
+        end = cleaned.find("```", start)
+        cleaned = cleaned[start:end if end != -1 else None].strip()
+    elif "```" in cleaned:
+        start = cleaned.find("```") + 3
+        end = cleaned.find("```", start)
+        cleaned = cleaned[start:end if end != -1 else None].strip()
+
+    opening, closing = ("[", "]") if expect is list else ("{", "}")
+    start_idx = cleaned.find(opening)
+    end_idx = cleaned.rfind(closing)
+    if start_idx == -1 or end_idx < start_idx:
+        raise ValueError(f"No JSON {expect.__name__} in model output")
+
+    parsed = json.loads(cleaned[start_idx:end_idx + 1])
+    if not isinstance(parsed, expect):
+        raise ValueError(f"Model output is not a JSON {expect.__name__}")
+    return parsed
@@ -0,0 +1,134 @@
+"""
+Async token-bucket rate limiting for upstream APIs
+"""
+import asyncio
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    from .state_backend import StateBackend
+
+
+class TokenBucket:
+    """
+    Allows `rate` requests per second on average, with bursts of up to `burst`
+
+    acquire() waits until a token is available, so callers sharing one bucket
+    stay under the upstream limit however many of them run concurrently.
+    With a shared StateBackend the bucket is shared by every worker process.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        state: Optional["StateBackend"] = None,
+        key: Optional[str] = None
+    ):
+        """
+        Args:
+            rate: Tokens added per second (<= 0 disables limiting)
+            burst: Bucket capacity
+            clock: Monotonic time source (overridable for tests)
+            state: Shared state backend holding the bucket (None = this process only)
+            key: Bucket name in the state backend (required with state)
+        """
+        if state is not None and not key:
+            raise ValueError("A shared token bucket needs a key")
+
+        self.rate = rate
+        self.state = state
+        self.key = key
+        self.burst = max(burst, 1)
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+        self.acquired = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: int = 1) -> None:
+        """
+        Wait until `tokens` are available and take them
+        """
+        if self.rate <= 0:
+            self.acquired += tokens
+            return
+
+        if self.state is not None:
+            # Reserve in the shared bucket, then wait out our place in line
+            wait = await self.state.take_tokens(f"bucket:{self.key}", self.rate, self.burst, tokens)
+            if wait > 0:
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+            self.acquired += tokens
+            return
+
+        # The lock keeps waiters in FIFO order
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                wait = (tokens - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self._tokens -= tokens
+            self.acquired += tokens
+
+    async def try_acquire(self, tokens: int = 1, keep: float = 0.0) -> float:
+        """
+        Take `tokens` now if at least `keep` would be left, without waiting
+
+        Keeping a reserve lets lower-priority callers leave headroom for urgent ones.
+
+        Returns:
+            0 if the tokens were taken, else seconds until they would be available (nothing is taken)
+        """
+        if self.rate <= 0:
+            self.acquired += tokens
+            return 0.0
+        # A request as large as the bucket can still go once it's full
+        keep = max(0.0, min(keep, self.burst - tokens))
+        if self.state is not None:
+            wait = await self.state.try_take_tokens(f"bucket:{self.key}", self.rate, self.burst, tokens, keep)
+        else:
+            self._refill()
+            if self._tokens - tokens >= keep:
+                self._tokens -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens + keep - self._tokens) / self.rate
+        if wait <= 0:
+            self.acquired += tokens
+        return wait
+
+    async def debit(self, tokens: float) -> None:
+        """
+        Take tokens without waiting (a negative count gives them back)
+
+        For corrections after the fact, e.g. when an upstream reports the real
+        cost of a request that reserved an estimate.
+        """
+        if self.rate <= 0 or not tokens:
+            return
+        if self.state is not None:
+            await self.state.take_tokens(f"bucket:{self.key}", self.rate, self.burst, tokens)
+            return
+        self._refill()
+        self._tokens = min(self.burst, self._tokens - tokens)
+
+    def stats(self) -> Dict:
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "shared": self.state is not None,
+            "acquired": self.acquired,
+            "waited_seconds": round(self.waited_seconds, 3)
+        }
@@ -0,0 +1,245 @@
+"""
+Similarity cache for ICP descriptions ("SaaS founders US" ~ "founders of US SaaS startups")
+
+Descriptions are indexed as character n-gram TF-IDF vectors (pure Python,
+sparse dicts plus an inverted index), so a lookup scores only the entries
+that share n-grams with the query. A hit needs both:
+
+- cosine similarity >= threshold, and
+- the same content words on both sides, up to plurals, word order, filler
+  words and small typos ("fintec" ~ "fintech"), and the same numbers.
+
+The second check keeps "CTOs at SaaS companies" from matching "CEOs at SaaS
+companies", which differ by one character. The index is per process and
+bounded (LRU + TTL); it runs fully locally.
+"""
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .icp_filter_compiler import STOPWORDS
+
+# Words that don't change who the ICP is
+FILLER_WORDS = STOPWORDS | {
+    "company", "startup", "business", "firm", "organization", "org", "people", "team", "professional",
+    "targeting", "target", "working", "work", "based", "located", "who", "run", "running",
+}
+
+NGRAM_SIZES = (3, 4)
+
+# Most similar entries checked word by word per lookup
+MAX_CANDIDATES = 5
+
+
+def _tokenize(text: str) -> List[str]:
+    return re.findall(r"[a-z0-9$]+(?:[-.'][a-z0-9]+)*", (text or "").lower())
+
+
+def _singular(token: str) -> str:
+    if len(token) < 4 or token.endswith("ss") or token.isdigit():
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def _ngrams(token: str) -> List[str]:
+    padded = f"<{token}>"
+    grams = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    return grams or [padded]
+
+
+def _token_similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    grams_a, grams_b = set(_ngrams(a)), set(_ngrams(b))
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class _Entry:
+    __slots__ = ("text", "words", "numbers", "counts", "value", "expires_at", "hits")
+
+    def __init__(self, text: str, words: Set[str], numbers: Set[str], counts: Dict[str, int], value: Any, expires_at: float):
+        self.text = text
+        self.words = words
+        self.numbers = numbers
+        self.counts = counts
+        self.value = value
+        self.expires_at = expires_at
+        self.hits = 0
+
+
+class SemanticCache:
+    """
+    Reuse a value computed for a sufficiently similar earlier description
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        word_threshold: float = 0.7,
+        maxsize: int = 2000,
+        ttl: float = 7 * 24 * 3600,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            threshold: Minimum TF-IDF cosine similarity for a hit (0-1)
+            word_threshold: Minimum n-gram overlap for two words to count as the same word (typos)
+            maxsize: Maximum number of entries before the least recently used one is evicted
+            ttl: Seconds an entry stays valid after it was written
+            clock: Monotonic time source (overridable for tests)
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+
+        self.threshold = threshold
+        self.word_threshold = word_threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # n-gram -> {key: weight in that entry's vector}; its size is the document frequency.
+        # Entry weights use the IDF at insert time, so a lookup is one pass over the postings.
+        self._postings: Dict[str, Dict[str, float]] = {}
+
+        self.lookups = 0
+        self.hits = 0
+        self.exact_hits = 0
+        self.rejected = 0  # similar enough by score, but different words or numbers
+        self.evictions = 0
+        self._hit_score_total = 0.0
+
+    def _features(self, text: str) -> Tuple[str, Set[str], Set[str], Dict[str, int]]:
+        tokens = [_singular(token) for token in _tokenize(text)]
+        words = {token for token in tokens if token not in FILLER_WORDS and not token[0].isdigit()}
+        numbers = {token for token in tokens if token[0].isdigit()}
+        counts: Dict[str, int] = {}
+        # Sorted, so word order doesn't matter
+        for token in sorted(words | numbers):
+            for gram in _ngrams(token):
+                counts[gram] = counts.get(gram, 0) + 1
+        return " ".join(tokens), words, numbers, counts
+
+    def _vector(self, counts: Dict[str, int]) -> Dict[str, float]:
+        total = len(self._entries) + 1
+        vector = {
+            gram: count * (math.log(total / (1 + len(self._postings.get(gram, ())))) + 1)
+            for gram, count in counts.items()
+        }
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {gram: weight / norm for gram, weight in vector.items()}
+
+    def _same_words(self, a: Set[str], b: Set[str]) -> bool:
+        for words, others in ((a, b), (b, a)):
+            for word in words:
+                if word not in others and not any(_token_similarity(word, other) >= self.word_threshold for other in others):
+                    return False
+        return True
+
+    def get(self, text: str) -> Tuple[Optional[Any], float]:
+        """
+        Value stored for the most similar description
+
+        Returns:
+            (value, similarity), or (None, best similarity seen) on a miss
+        """
+        self.lookups += 1
+        key, words, numbers, counts = self._features(text)
+        if not counts:
+            return None, 0.0
+
+        now = self._clock()
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= now:
+            self._remove(key)
+            entry = None
+        if entry is not None:
+            self._hit(key, entry, 1.0)
+            self.exact_hits += 1
+            return entry.value, 1.0
+
+        scores: Dict[str, float] = {}
+        for gram, weight in self._vector(counts).items():
+            for candidate, entry_weight in self._postings.get(gram, {}).items():
+                scores[candidate] = scores.get(candidate, 0.0) + weight * entry_weight
+
+        best_score = 0.0
+        rejected = False
+        for candidate, score in sorted(scores.items(), key=lambda item: item[1], reverse=True)[:MAX_CANDIDATES]:
+            score = round(min(score, 1.0), 4)
+            best_score = max(best_score, score)
+            if score < self.threshold:
+                break
+            entry = self._entries[candidate]
+            if entry.expires_at <= now:
+                self._remove(candidate)
+                continue
+            # Close by score, but a different title, place or size is a different ICP
+            if entry.numbers != numbers or not self._same_words(words, entry.words):
+                rejected = True
+                continue
+            self._hit(candidate, entry, score)
+            return entry.value, score
+
+        if rejected:
+            self.rejected += 1
+        return None, best_score
+
+    def _hit(self, key: str, entry: _Entry, score: float) -> None:
+        self._entries.move_to_end(key)
+        entry.hits += 1
+        self.hits += 1
+        self._hit_score_total += score
+
+    def set(self, text: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Index value under text
+        """
+        key, words, numbers, counts = self._features(text)
+        if not counts:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _Entry(text, words, numbers, counts, value, self._clock() + (self.ttl if ttl is None else ttl))
+        for gram, weight in self._vector(counts).items():
+            self._postings.setdefault(gram, {})[key] = weight
+
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for gram in entry.counts:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del self._postings[gram]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._postings.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.hits - self.exact_hits,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / self.lookups * 100, 2) if self.lookups else 0,
+            "avg_hit_similarity": round(self._hit_score_total / self.hits, 4) if self.hits else None
+        }
@@ -0,0 +1,282 @@
+"""
+Speculative email-copy generation for the ICPs a user was just shown
+
+After /api/icp/analyze suggests three ICPs, the user picks one and only then
+asks for email copy (a 20-40 s model call). With speculation on, copy for all
+three starts in the background as soon as they are suggested, at the
+scheduler's lowest priority, and lands in the email copy cache, so the pick is
+instant or already part-way done.
+
+- Each speculative generation holds the copy cache's generation lock, so a
+  /api/icp/generate-emails request for the same ICP (in any worker) waits for
+  it rather than paying twice.
+  The lock is refreshed while the generation runs (however long it queues),
+  so it never expires under it and lets a duplicate generation start.
+- Once the user picks an ICP, its generation is raised to interactive
+  priority (if it's still queued, it moves ahead of batch and speculative
+  work) and the generations still running for the ones they didn't pick are
+  cancelled. The pick is published through the state backend, so this works
+  whichever worker started the generation. Finished, unused copy expires
+  after SPECULATIVE_COPY_TTL.
+- A per-user budget (SPECULATIVE_COPY_BUDGET generations, refilling over
+  SPECULATIVE_COPY_WINDOW seconds) caps the extra spend. It is a token bucket
+  in the shared state backend, so concurrent analyses can't overspend it.
+"""
+import asyncio
+import os
+import uuid
+from typing import Dict, List, Optional
+
+from .ai_copy import AICopyService, icp_email_context
+from .ai_scheduler import Priority
+from .state_backend import StateBackend
+
+# Picks published to every worker, for generations another worker started
+CLAIM_CHANNEL = "speculative_copy:claims"
+
+
+class SpeculativeCopy:
+    """
+    Pre-generate email copy for suggested ICPs, within a per-user budget
+    """
+
+    def __init__(
+        self,
+        ai: AICopyService,
+        state: StateBackend,
+        enabled: bool = False,
+        budget: int = 6,
+        window: float = 3600.0,
+        ttl: float = 900.0,
+        lock_ttl: float = 60.0
+    ):
+        """
+        Args:
+            ai: AICopyService whose copy cache the results go into
+            state: Shared state backend (copy cache, locks and budgets)
+            enabled: Speculate at all (requests can only opt out)
+            budget: Speculative generations a user can start at once
+            window: Seconds for a used-up budget to refill
+            ttl: Seconds unused speculative copy is kept
+            lock_ttl: Expiry of a generation's lock, refreshed every lock_ttl / 3 while it runs
+        """
+        self.ai = ai
+        self.state = state
+        self.enabled = enabled
+        self.budget = budget
+        self.window = window
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self._listener: Optional[asyncio.Task] = None
+        self._publishing: set = set()
+
+        # Running generations: copy cache key -> (group, task, priority). A group is one analysis.
+        self._tasks: Dict[str, tuple] = {}
+        self._groups: Dict[str, str] = {}  # signed-in user -> their latest group
+
+        self.started = 0
+        self.completed = 0
+        self.failed = 0
+        self.claimed = 0
+        self.cancelled = 0
+        self.skipped_budget = 0
+        self.skipped_cached = 0
+
+    @classmethod
+    def from_env(cls, ai: AICopyService, state: StateBackend) -> "SpeculativeCopy":
+        return cls(
+            ai,
+            state,
+            enabled=os.getenv("SPECULATIVE_EMAIL_COPY", "false").lower() in ("1", "true", "yes"),
+            budget=int(os.getenv("SPECULATIVE_COPY_BUDGET", "6")),
+            window=float(os.getenv("SPECULATIVE_COPY_WINDOW", "3600")),
+            ttl=float(os.getenv("SPECULATIVE_COPY_TTL", "900"))
+        )
+
+    async def start(self, user: str, url: str, icps: List[Dict], replace_previous: bool = True) -> int:
+        """
+        Start generating copy for each suggested ICP in the background
+
+        Args:
+            user: Who the budget is charged to ("user:<uid>", or "ip:<address>" for anonymous requests)
+            url: Sender's website
+            icps: ICPs from suggest_three_icps
+            replace_previous: Cancel the generations of this user's previous analysis
+                              (only when user is one person, not a shared address)
+
+        Returns:
+            Number of generations started
+        """
+        group = uuid.uuid4().hex
+        if replace_previous:
+            previous = self._groups.get(user)
+            if previous:
+                self._cancel_group(previous)
+            self._groups[user] = group
+
+        started = 0
+        for icp in icps:
+            context = icp_email_context(icp)
+            key = self.ai.copy_cache_key(url, context)
+            if key in self._tasks or await self.state.get(key) is not None:
+                self.skipped_cached += 1
+                continue
+            if not await self._charge(user):
+                self.skipped_budget += 1
+                print(f"💸 Speculative copy budget used up for {user}; skipping the rest")
+                break
+
+            priority = Priority("speculative")
+            task = asyncio.create_task(self._generate(key, url, context, priority))
+            self._tasks[key] = (group, task, priority)
+            task.add_done_callback(lambda _, key=key, task=task: self._finished(key, task))
+            started += 1
+
+        self.started += started
+        if started:
+            print(f"🔮 Speculatively generating copy for {started} ICP(s) of {url}")
+        return started
+
+    def claim(self, url: str, target_audience: str) -> bool:
+        """
+        The user picked this ICP: raise its generation to interactive priority and cancel its siblings
+
+        Call before generate_email_copy; the picked ICP's own generation keeps
+        running (ahead of batch and speculative work if it's still queued) and
+        generate_email_copy waits for it. With a shared state backend the pick
+        is also published, for a generation another worker started.
+
+        Returns:
+            True if the pick had been speculated by this worker
+        """
+        key = self.ai.copy_cache_key(url, target_audience)
+        if self.state.shared:
+            task = asyncio.create_task(self._publish_claim(key))
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+        if not self._promote(key):
+            return False
+        self.claimed += 1
+        return True
+
+    def _promote(self, key: str) -> bool:
+        entry = self._tasks.get(key)
+        if entry is None:
+            return False
+        group, _, priority = entry
+        # It holds the copy cache lock, so generate_email_copy waits for it: it can't stay at the back of the queue
+        priority.raise_to("interactive")
+        for other, (other_group, task, _) in list(self._tasks.items()):
+            if other_group == group and other != key:
+                task.cancel()
+        return True
+
+    async def _publish_claim(self, key: str) -> None:
+        try:
+            await self.state.publish(CLAIM_CHANNEL, {"key": key})
+        except Exception as e:
+            print(f"⚠️ Could not publish speculative copy pick: {str(e)}")
+
+    def start_listener(self) -> None:
+        """
+        Receive picks made on other workers (no-op without a shared state backend)
+        """
+        if self.state.shared and self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for message in self.state.subscribe(CLAIM_CHANNEL):
+                    self._promote(message.get("key"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Speculative copy pick listener failed, resubscribing: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    async def _generate(self, key: str, url: str, target_audience: str, priority: Priority) -> None:
+        # Hold the same lock cached_call uses, so interactive requests wait for this result
+        lock_key = f"lock:{key}"
+        token = await self.state.acquire_lock(lock_key, ttl=self.lock_ttl)
+        if token is None:
+            return  # already being generated
+        heartbeat = asyncio.create_task(self._keep_lock(lock_key, token))
+        try:
+            if await self.state.get(key) is not None:
+                return
+            variants = await self.ai._model_email_copy(url, target_audience, priority=priority)
+            if variants:
+                await self.state.set(key, variants, ttl=self.ttl)
+                self.completed += 1
+            else:
+                self.failed += 1
+        finally:
+            heartbeat.cancel()
+            await self.state.release_lock(lock_key, token)
+
+    async def _keep_lock(self, lock_key: str, token: str) -> None:
+        # Queueing plus a web search (plus 429 retries) can outlast any fixed TTL
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                if not await self.state.extend_lock(lock_key, token, self.lock_ttl):
+                    print(f"⚠️ Lost speculative copy lock {lock_key}")
+                    return
+            except Exception as e:
+                print(f"⚠️ Could not refresh speculative copy lock: {str(e)}")
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        if self._tasks.get(key, (None, None, None))[1] is task:
+            del self._tasks[key]
+        if task.cancelled():
+            self.cancelled += 1
+        elif task.exception() is not None:
+            self.failed += 1
+            print(f"⚠️ Speculative copy generation failed: {str(task.exception())}")
+
+    def _cancel_group(self, group: str) -> None:
+        for other_group, task, _ in list(self._tasks.values()):
+            if other_group == group:
+                task.cancel()
+
+    async def _charge(self, user: str) -> bool:
+        """
+        Take one generation from the user's budget (False if it's used up)
+        """
+        if self.budget <= 0:
+            return False
+        wait = await self.state.try_take_tokens(
+            f"speculative_copy:budget:{user}",
+            rate=self.budget / self.window,
+            burst=self.budget
+        )
+        return wait == 0
+
+    async def aclose(self) -> None:
+        """
+        Stop the pick listener and cancel running generations (on shutdown)
+        """
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        tasks = [task for _, task, _ in self._tasks.values()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "budget": self.budget,
+            "window": self.window,
+            "running": len(self._tasks),
+            "started": self.started,
+            "completed": self.completed,
+            "failed": self.failed,
+            "claimed": self.claimed,
+            "cancelled": self.cancelled,
+            "skipped_budget": self.skipped_budget,
+            "skipped_cached": self.skipped_cached
+        }
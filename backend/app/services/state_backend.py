@@ -0,0 +1,449 @@
+"""
+Shared state backends for running the API with more than one worker
+
+Everything a worker keeps in process memory is invisible to its siblings, so
+state that must agree across workers goes through a StateBackend instead:
+upload/workflow progress, rate-limit buckets, single-flight locks and AI
+result caches. Values are JSON-serializable. publish()/subscribe() fan
+messages out to every worker (webhook events, see webhook_events.py).
+
+- MemoryStateBackend: in-process (single worker, local dev and tests)
+- RedisStateBackend: any Redis-compatible server (Redis, Valkey, KeyDB...)
+
+create_state_backend() picks one from STATE_BACKEND / REDIS_URL.
+"""
+import asyncio
+import json
+import math
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from .cache import SingleFlight, TTLCache
+
+
+class StateBackend(ABC):
+    """
+    Interface shared by the state backends
+
+    Keys are plain strings; callers namespace them ("upload:<id>", "bucket:instantly").
+    """
+
+    name = "base"
+    # True if other worker processes see the same state (and get published messages)
+    shared = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Value stored under key, or None if missing or expired"""
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a JSON-serializable value, optionally expiring after `ttl` seconds"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove key if present"""
+
+    @abstractmethod
+    async def take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1) -> float:
+        """
+        Reserve tokens from a shared token bucket
+
+        The tokens are always taken (the bucket may go negative), so callers
+        queue up fairly without retry loops.
+
+        Returns:
+            Seconds the caller must wait before using the tokens
+        """
+
+    @abstractmethod
+    async def try_take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1, keep: float = 0.0) -> float:
+        """
+        Take tokens from a shared token bucket only if `keep` tokens would remain
+
+        Unlike take_tokens nothing is reserved on failure, so a caller that
+        can't go yet doesn't hold up callers the bucket can serve.
+
+        Returns:
+            0 if the tokens were taken, else seconds until they would be available
+        """
+
+    @abstractmethod
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """
+        Try to take a lock that expires after `ttl` seconds
+
+        Returns:
+            Token to release the lock with, or None if someone else holds it
+        """
+
+    @abstractmethod
+    async def release_lock(self, key: str, token: str) -> None:
+        """Release a lock taken with acquire_lock (no-op if the token no longer holds it)"""
+
+    @abstractmethod
+    async def extend_lock(self, key: str, token: str, ttl: float) -> bool:
+        """Make a held lock expire `ttl` seconds from now (False if the token no longer holds it)"""
+
+    @abstractmethod
+    async def wait_for_change(self, key: str, timeout: float) -> None:
+        """
+        Return when `key` may have changed, or after `timeout` seconds
+        """
+
+    @abstractmethod
+    async def publish(self, channel: str, message: Any) -> None:
+        """Send a JSON-serializable message to every current subscriber of channel"""
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[Any]:
+        """
+        Messages published to channel from now on, in every worker (async iterator)
+        """
+
+    @asynccontextmanager
+    async def lock(self, key: str, ttl: float = 30.0, wait: float = 30.0, poll_interval: float = 0.05):
+        """
+        Hold a lock for the duration of the block (waits up to `wait` seconds)
+        """
+        deadline = time.monotonic() + wait
+        token = await self.acquire_lock(key, ttl)
+        while token is None:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock {key!r}")
+            await asyncio.sleep(poll_interval)
+            token = await self.acquire_lock(key, ttl)
+        try:
+            yield token
+        finally:
+            await self.release_lock(key, token)
+
+    async def cached_call(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[Any]],
+        ttl: float,
+        lock_ttl: float = 60.0
+    ) -> Any:
+        """
+        Return the cached value for key, computing it at most once across workers
+
+        The worker holding the lock calls fn() and caches the result; the others
+        wait for the value to appear. If the holder dies, the lock expires after
+        `lock_ttl` and the next caller computes it.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        lock_key = f"lock:{key}"
+        while True:
+            token = await self.acquire_lock(lock_key, lock_ttl)
+            if token is not None:
+                try:
+                    value = await self.get(key)
+                    if value is None:
+                        value = await fn()
+                        if value is not None:
+                            await self.set(key, value, ttl=ttl)
+                    return value
+                finally:
+                    await self.release_lock(lock_key, token)
+
+            await self.wait_for_change(key, timeout=0.1)
+            value = await self.get(key)
+            if value is not None:
+                return value
+
+    async def ping(self) -> bool:
+        return True
+
+    def stats(self) -> Dict:
+        return {"backend": self.name}
+
+    async def aclose(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+    """
+    In-process state (one worker only)
+
+    Local calls with the same key also share one in-flight computation in
+    cached_call, so it behaves like the Redis backend within a process.
+    """
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 10_000, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._values = TTLCache(maxsize=maxsize, ttl=math.inf, clock=clock)
+        self._buckets: Dict[str, tuple] = {}
+        self._locks: Dict[str, tuple] = {}
+        self._next_lock_prune = 1024
+        self._events: Dict[str, asyncio.Event] = {}
+        self._channels: Dict[str, List[asyncio.Queue]] = {}
+        self._flight = SingleFlight()
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._values.get(key)
+        # Copy so callers can't mutate the stored value (as with a real serialization round-trip)
+        return json.loads(json.dumps(value)) if value is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self._values.set(key, json.loads(json.dumps(value)), ttl=math.inf if ttl is None else ttl)
+        self._notify(key)
+
+    async def delete(self, key: str) -> None:
+        self._values.invalidate(key)
+        self._notify(key)
+
+    def _notify(self, key: str) -> None:
+        event = self._events.pop(key, None)
+        if event:
+            event.set()
+
+    async def take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1) -> float:
+        now = self._clock()
+        available, updated = self._buckets.get(key, (float(burst), now))
+        available = min(burst, available + (now - updated) * rate)
+        wait = max(0.0, (tokens - available) / rate)
+        self._buckets[key] = (available - tokens, now)
+        return wait
+
+    async def try_take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1, keep: float = 0.0) -> float:
+        now = self._clock()
+        available, updated = self._buckets.get(key, (float(burst), now))
+        available = min(burst, available + (now - updated) * rate)
+        if available - tokens >= keep:
+            self._buckets[key] = (available - tokens, now)
+            return 0.0
+        self._buckets[key] = (available, now)
+        return (tokens + keep - available) / rate
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        now = self._clock()
+        held = self._locks.get(key)
+        if held and held[1] > now:
+            return None
+        if len(self._locks) >= self._next_lock_prune:
+            # Locks that expire instead of being released would otherwise stay forever
+            self._locks = {k: v for k, v in self._locks.items() if v[1] > now}
+            self._next_lock_prune = max(1024, 2 * len(self._locks))
+        token = uuid.uuid4().hex
+        self._locks[key] = (token, now + ttl)
+        return token
+
+    async def release_lock(self, key: str, token: str) -> None:
+        held = self._locks.get(key)
+        if held and held[0] == token:
+            del self._locks[key]
+
+    async def extend_lock(self, key: str, token: str, ttl: float) -> bool:
+        held = self._locks.get(key)
+        if not held or held[0] != token or held[1] <= self._clock():
+            return False
+        self._locks[key] = (token, self._clock() + ttl)
+        return True
+
+    async def wait_for_change(self, key: str, timeout: float) -> None:
+        event = self._events.setdefault(key, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def publish(self, channel: str, message: Any) -> None:
+        for queue in self._channels.get(channel, []):
+            queue.put_nowait(json.loads(json.dumps(message)))
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Any]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._channels.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._channels[channel].remove(queue)
+
+    async def cached_call(self, key: str, fn: Callable[[], Awaitable[Any]], ttl: float, lock_ttl: float = 60.0) -> Any:
+        value = await self._flight.do(key, lambda: super(MemoryStateBackend, self).cached_call(key, fn, ttl, lock_ttl))
+        # Joined callers get their own copy, as they would from Redis
+        return json.loads(json.dumps(value)) if value is not None else None
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.name,
+            "keys": len(self._values),
+            "buckets": len(self._buckets),
+            "locks": len(self._locks)
+        }
+
+
+# Token bucket refilled with the server clock, so every worker sees the same time.
+# Tokens are reserved even when it goes negative; the reply is how long to wait.
+_TAKE_TOKENS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens < wanted then wait = (wanted - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - wanted), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate + wait) + 60)
+return tostring(wait)
+"""
+
+# Same bucket, but tokens are only taken if `keep` would remain; else the reply is how long until they would
+_TRY_TAKE_TOKENS_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local wanted = tonumber(ARGV[3])
+local keep = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens - wanted >= keep then tokens = tokens - wanted else wait = (wanted + keep - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+return tostring(wait)
+"""
+
+# Only the holder's token may release a lock
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+# ...or extend it
+_EXTEND_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('PEXPIRE', KEYS[1], ARGV[2]) end
+return 0
+"""
+
+
+class RedisStateBackend(StateBackend):
+    """
+    State shared by every worker through a Redis-compatible server
+    """
+
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str = "vibe:", poll_interval: float = 0.25):
+        """
+        Args:
+            url: Server URL, e.g. redis://localhost:6379/0
+            prefix: Prepended to every key so several apps can share a server
+            poll_interval: How often wait_for_change re-checks a key
+        """
+        # Deferred so single-worker installs never need the redis package
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise Exception("STATE_BACKEND=redis needs the redis package: pip install redis")
+
+        self.url = url
+        self.prefix = prefix
+        self.poll_interval = poll_interval
+        self.redis = redis.from_url(url, decode_responses=True)
+        self._take_tokens = self.redis.register_script(_TAKE_TOKENS_SCRIPT)
+        self._try_take_tokens = self.redis.register_script(_TRY_TAKE_TOKENS_SCRIPT)
+        self._release_lock = self.redis.register_script(_RELEASE_LOCK_SCRIPT)
+        self._extend_lock = self.redis.register_script(_EXTEND_LOCK_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.redis.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        px = max(1, int(ttl * 1000)) if ttl is not None else None
+        await self.redis.set(self._key(key), json.dumps(value), px=px)
+
+    async def delete(self, key: str) -> None:
+        await self.redis.delete(self._key(key))
+
+    async def take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1) -> float:
+        wait = await self._take_tokens(keys=[self._key(key)], args=[rate, burst, tokens])
+        return float(wait)
+
+    async def try_take_tokens(self, key: str, rate: float, burst: int, tokens: int = 1, keep: float = 0.0) -> float:
+        wait = await self._try_take_tokens(keys=[self._key(key)], args=[rate, burst, tokens, keep])
+        return float(wait)
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        acquired = await self.redis.set(self._key(key), token, nx=True, px=max(1, int(ttl * 1000)))
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> None:
+        await self._release_lock(keys=[self._key(key)], args=[token])
+
+    async def extend_lock(self, key: str, token: str, ttl: float) -> bool:
+        extended = await self._extend_lock(keys=[self._key(key)], args=[token, max(1, int(ttl * 1000))])
+        return bool(extended)
+
+    async def wait_for_change(self, key: str, timeout: float) -> None:
+        # Polling keeps this to plain GET/SET, which every Redis-compatible server supports
+        await asyncio.sleep(min(timeout, self.poll_interval))
+
+    async def publish(self, channel: str, message: Any) -> None:
+        await self.redis.publish(self._key(channel), json.dumps(message))
+
+    async def subscribe(self, channel: str) -> AsyncIterator[Any]:
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._key(channel))
+        try:
+            async for item in pubsub.listen():
+                if item.get("type") == "message":
+                    yield json.loads(item["data"])
+        finally:
+            await pubsub.unsubscribe(self._key(channel))
+            await pubsub.aclose()
+
+    async def ping(self) -> bool:
+        return bool(await self.redis.ping())
+
+    def stats(self) -> Dict:
+        return {"backend": self.name, "url": self.url.rsplit("@", 1)[-1], "prefix": self.prefix}
+
+    async def aclose(self) -> None:
+        await self.redis.aclose()
+
+
+def create_state_backend(backend: Optional[str] = None) -> StateBackend:
+    """
+    Build the shared state backend selected by configuration
+
+    Args:
+        backend: "memory" or "redis". Defaults to the STATE_BACKEND env var,
+                 then "redis" if REDIS_URL is set, else "memory".
+    """
+    backend = (backend or os.getenv("STATE_BACKEND") or ("redis" if os.getenv("REDIS_URL") else "memory")).strip().lower()
+
+    if backend in ("memory", "in-memory", "inmemory"):
+        return MemoryStateBackend()
+
+    if backend in ("redis", "valkey"):
+        return RedisStateBackend(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            prefix=os.getenv("REDIS_PREFIX", "vibe:")
+        )
+
+    raise ValueError(f"Unknown state backend: {backend!r} (expected memory or redis)")
@@ -0,0 +1,134 @@
+"""
+Storage backend interface shared by the Firebase, Supabase and in-memory services
+"""
+import os
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional
+
+
+class StorageBackend(ABC):
+    """
+    Repository interface for campaign, account, lead list and user records.
+
+    Every backend returns plain dicts with ISO-8601 timestamps and the
+    campaign's Instantly ID under both "id" and "campaign_id".
+    """
+
+    @abstractmethod
+    async def save_campaign(
+        self,
+        user_id: str,
+        campaign_id: str,
+        url: str,
+        target_audience: str,
+        copy_variants: List[Dict],
+        supersearch_list_id: Optional[str] = None
+    ) -> Dict:
+        """Save a new campaign"""
+
+    @abstractmethod
+    async def get_user_campaigns(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Get a user's campaigns, newest first (all of them when limit is None)"""
+
+    @abstractmethod
+    async def get_campaign(self, user_id: str, campaign_id: str) -> Optional[Dict]:
+        """Get a specific campaign"""
+
+    @abstractmethod
+    async def update_campaign_stats(self, campaign_id: str, analytics: Dict) -> Dict:
+        """Update campaign statistics"""
+
+    @abstractmethod
+    async def update_campaign_status(self, campaign_id: str, status: str) -> Dict:
+        """Update campaign status (active, paused, completed)"""
+
+    @abstractmethod
+    async def delete_campaign(self, campaign_id: str) -> bool:
+        """Delete a campaign"""
+
+    @abstractmethod
+    async def save_email_account(self, user_id: str, account_data: Dict) -> Dict:
+        """Save email account information"""
+
+    @abstractmethod
+    async def get_user_email_accounts(self, user_id: str) -> List[Dict]:
+        """Get all email accounts for a user"""
+
+    @abstractmethod
+    async def save_lead_list(self, user_id: str, campaign_id: str, leads: List[Dict]) -> Dict:
+        """Save a lead list"""
+
+    @abstractmethod
+    async def get_user_stats(self, user_id: str) -> Dict:
+        """Get aggregate stats for a user across all campaigns"""
+
+    @abstractmethod
+    async def create_user_profile(self, user_id: str, email: str, name: str = "") -> Dict:
+        """Create a user profile"""
+
+    @abstractmethod
+    async def get_user_profile(self, user_id: str) -> Optional[Dict]:
+        """Get user profile"""
+
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters for any caches the backend keeps"""
+        return {}
+
+    async def aclose(self) -> None:
+        """Release pooled connections (no-op by default)"""
+
+
+def summarize_campaign_stats(campaigns: List[Dict]) -> Dict:
+    """
+    Aggregate per-campaign counters into the dashboard stats shape
+    """
+    total_sent = sum(c.get("sent", 0) for c in campaigns)
+    total_opened = sum(c.get("opened", 0) for c in campaigns)
+    total_clicked = sum(c.get("clicked", 0) for c in campaigns)
+    total_replied = sum(c.get("replied", 0) for c in campaigns)
+
+    return {
+        "total_campaigns": len(campaigns),
+        "active_campaigns": len([c for c in campaigns if c.get("status") == "active"]),
+        "total_sent": total_sent,
+        "total_opened": total_opened,
+        "total_clicked": total_clicked,
+        "total_replied": total_replied,
+        "avg_open_rate": round((total_opened / max(total_sent, 1)) * 100, 2),
+        "avg_reply_rate": round((total_replied / max(total_sent, 1)) * 100, 2)
+    }
+
+
+def create_storage_backend(backend: Optional[str] = None) -> StorageBackend:
+    """
+    Build the storage backend selected by configuration
+
+    Args:
+        backend: "firebase", "supabase" or "memory".
+                 Defaults to the STORAGE_BACKEND env var, then "firebase".
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND") or "firebase").strip().lower()
+
+    # Imports are deferred so that e.g. the in-memory backend never needs firebase_admin
+    if backend == "firebase":
+        from .firebase_service import FirebaseService
+        return FirebaseService(
+            os.getenv("GOOGLE_APPLICATION_CREDENTIALS"),
+            campaign_cache_ttl=float(os.getenv("CAMPAIGN_CACHE_TTL", "30")),
+            campaign_cache_size=int(os.getenv("CAMPAIGN_CACHE_SIZE", "512"))
+        )
+
+    if backend == "supabase":
+        from .supabase_service import SupabaseService
+        return SupabaseService(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+
+    if backend in ("memory", "in-memory", "inmemory"):
+        from .memory_storage import InMemoryStorageService
+        return InMemoryStorageService()
+
+    raise ValueError(f"Unknown storage backend: {backend!r} (expected firebase, supabase or memory)")
@@ -1,15 +1,89 @@
-from supabase import create_client, Client
+import httpx
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from .storage_backend import StorageBackend
 
-class SupabaseService:
+
+class SupabaseService(StorageBackend):
     """
     Service for interacting with Supabase database
+
+    Talks to PostgREST (/rest/v1) with a pooled async httpx client, so queries
+    never block the event loop. Schema lives in backend/supabase/migrations.
     """
 
-    def __init__(self, supabase_url: str, supabase_key: str):
-        self.client: Client = create_client(supabase_url, supabase_key)
+    def __init__(
+        self,
+        supabase_url: str,
+        supabase_key: str,
+        client: Optional[httpx.AsyncClient] = None,
+        max_connections: int = 20
+    ):
+        """
+        Args:
+            supabase_url: Project URL, e.g. https://xyz.supabase.co
+            supabase_key: Service role (or anon) key
+            client: Optional preconfigured client (tests, shared pools)
+            max_connections: Connection pool size for the default client
+        """
+        if not supabase_url or not supabase_key:
+            raise ValueError("SUPABASE_URL and SUPABASE_KEY are required for the Supabase backend")
+
+        self.rest_url = f"{supabase_url.rstrip('/')}/rest/v1"
+        self.client = client or httpx.AsyncClient(
+            base_url=self.rest_url,
+            headers={
+                "apikey": supabase_key,
+                "Authorization": f"Bearer {supabase_key}",
+                "Content-Type": "application/json"
+            },
+            timeout=30.0,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            )
+        )
+
+    async def aclose(self) -> None:
+        """
+        Close the pooled HTTP client
+        """
+        await self.client.aclose()
+
+    async def _request(
+        self,
+        method: str,
+        table: str,
+        params: Optional[Dict] = None,
+        json: Optional[Dict] = None,
+        returning: bool = False
+    ) -> List[Dict]:
+        """
+        Run a PostgREST request and return the affected/selected rows
+        """
+        headers = {"Prefer": "return=representation"} if returning else None
+        response = await self.client.request(
+            method,
+            f"/{table}",
+            params=params,
+            json=json,
+            headers=headers
+        )
+
+        if response.status_code not in [200, 201, 204]:
+            raise Exception(f"Supabase {method} {table} failed: {response.text}")
+
+        if response.status_code == 204 or not response.content:
+            return []
+
+        return response.json()
+
+    @staticmethod
+    def _campaign_row(row: Dict) -> Dict:
+        """Expose the Instantly campaign ID as "id", like the Firebase backend"""
+        row["id"] = row.get("campaign_id", row.get("id"))
+        return row
 
     async def save_campaign(
         self,
@@ -17,11 +91,13 @@ class SupabaseService:
         campaign_id: str,
         url: str,
         target_audience: str,
-        copy_variants: List[Dict]
+        copy_variants: List[Dict],
+        supersearch_list_id: Optional[str] = None
     ) -> Dict:
         """
         Save a new campaign to the database
         """
+        now = datetime.utcnow().isoformat()
         data = {
             "user_id": user_id,
             "campaign_id": campaign_id,
@@ -29,42 +105,61 @@ class SupabaseService:
             "target_audience": target_audience,
             "copy_variants": copy_variants,
             "status": "active",
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": now,
+            "updated_at": now,
             "sent": 0,
             "opened": 0,
             "clicked": 0,
             "replied": 0,
+            "bounced": 0,
             "open_rate": 0,
             "click_rate": 0,
             "reply_rate": 0
         }
 
-        result = self.client.table("campaigns").insert(data).execute()
+        if supersearch_list_id:
+            data["supersearch_list_id"] = supersearch_list_id
+
+        rows = await self._request("POST", "campaigns", json=data, returning=True)
 
-        return result.data[0] if result.data else {}
+        return self._campaign_row(rows[0]) if rows else {}
 
-    async def get_user_campaigns(self, user_id: str) -> List[Dict]:
+    async def get_user_campaigns(
+        self,
+        user_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
         """
-        Get all campaigns for a user
+        Get all campaigns for a user (optionally one page of them)
+
+        Paging is done by Postgres using campaigns_user_id_created_at_idx.
         """
-        result = self.client.table("campaigns")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .order("created_at", desc=True)\
-            .execute()
+        params = {
+            "select": "*",
+            "user_id": f"eq.{user_id}",
+            "order": "created_at.desc"
+        }
+        if limit is not None:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+
+        rows = await self._request("GET", "campaigns", params=params)
 
-        return result.data if result.data else []
+        return [self._campaign_row(row) for row in rows]
 
-    async def get_campaign(self, campaign_id: str) -> Optional[Dict]:
+    async def get_campaign(self, user_id: str, campaign_id: str) -> Optional[Dict]:
         """
         Get a specific campaign
         """
-        result = self.client.table("campaigns")\
-            .select("*")\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        rows = await self._request("GET", "campaigns", params={
+            "select": "*",
+            "campaign_id": f"eq.{campaign_id}",
+            "limit": 1
+        })
 
-        return result.data[0] if result.data else None
+        return self._campaign_row(rows[0]) if rows else None
 
     async def update_campaign_stats(self, campaign_id: str, analytics: Dict) -> Dict:
         """
@@ -82,12 +177,14 @@ class SupabaseService:
             "updated_at": datetime.utcnow().isoformat()
         }
 
-        result = self.client.table("campaigns")\
-            .update(data)\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        rows = await self._request(
+            "PATCH", "campaigns",
+            params={"campaign_id": f"eq.{campaign_id}"},
+            json=data,
+            returning=True
+        )
 
-        return result.data[0] if result.data else {}
+        return self._campaign_row(rows[0]) if rows else {}
 
     async def update_campaign_status(self, campaign_id: str, status: str) -> Dict:
         """
@@ -98,23 +195,28 @@ class SupabaseService:
             "updated_at": datetime.utcnow().isoformat()
         }
 
-        result = self.client.table("campaigns")\
-            .update(data)\
-            .eq("campaign_id", campaign_id)\
-            .execute()
+        rows = await self._request(
+            "PATCH", "campaigns",
+            params={"campaign_id": f"eq.{campaign_id}"},
+            json=data,
+            returning=True
+        )
 
-        return result.data[0] if result.data else {}
+        return self._campaign_row(rows[0]) if rows else {}
 
     async def delete_campaign(self, campaign_id: str) -> bool:
         """
         Delete a campaign
         """
-        result = self.client.table("campaigns")\
-            .delete()\
-            .eq("campaign_id", campaign_id)\
-            .execute()
-
-        return len(result.data) > 0 if result.data else False
+        try:
+            rows = await self._request(
+                "DELETE", "campaigns",
+                params={"campaign_id": f"eq.{campaign_id}"},
+                returning=True
+            )
+            return len(rows) > 0
+        except Exception:
+            return False
 
     async def save_email_account(self, user_id: str, account_data: Dict) -> Dict:
         """
@@ -128,20 +230,18 @@ class SupabaseService:
             "created_at": datetime.utcnow().isoformat()
         }
 
-        result = self.client.table("email_accounts").insert(data).execute()
+        rows = await self._request("POST", "email_accounts", json=data, returning=True)
 
-        return result.data[0] if result.data else {}
+        return rows[0] if rows else {}
 
     async def get_user_email_accounts(self, user_id: str) -> List[Dict]:
         """
         Get all email accounts for a user
         """
-        result = self.client.table("email_accounts")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .execute()
-
-        return result.data if result.data else []
+        return await self._request("GET", "email_accounts", params={
+            "select": "*",
+            "user_id": f"eq.{user_id}"
+        })
 
     async def save_lead_list(
         self,
@@ -160,30 +260,37 @@ class SupabaseService:
             "created_at": datetime.utcnow().isoformat()
         }
 
-        result = self.client.table("lead_lists").insert(data).execute()
+        rows = await self._request("POST", "lead_lists", json=data, returning=True)
 
-        return result.data[0] if result.data else {}
+        return rows[0] if rows else {}
 
     async def get_user_stats(self, user_id: str) -> Dict:
         """
         Get aggregate stats for a user across all campaigns
+
+        Aggregated in Postgres by the campaign_user_stats() RPC, so only one
+        row crosses the wire regardless of how many campaigns the user has.
         """
-        campaigns = await self.get_user_campaigns(user_id)
+        response = await self.client.post(
+            "/rpc/campaign_user_stats",
+            json={"p_user_id": user_id}
+        )
+
+        if response.status_code != 200:
+            raise Exception(f"Supabase campaign_user_stats failed: {response.text}")
 
-        total_sent = sum(c.get("sent", 0) for c in campaigns)
-        total_opened = sum(c.get("opened", 0) for c in campaigns)
-        total_clicked = sum(c.get("clicked", 0) for c in campaigns)
-        total_replied = sum(c.get("replied", 0) for c in campaigns)
+        rows = response.json()
+        row = rows[0] if isinstance(rows, list) and rows else rows or {}
 
         return {
-            "total_campaigns": len(campaigns),
-            "active_campaigns": len([c for c in campaigns if c.get("status") == "active"]),
-            "total_sent": total_sent,
-            "total_opened": total_opened,
-            "total_clicked": total_clicked,
-            "total_replied": total_replied,
-            "avg_open_rate": round((total_opened / max(total_sent, 1)) * 100, 2),
-            "avg_reply_rate": round((total_replied / max(total_sent, 1)) * 100, 2)
+            "total_campaigns": int(row.get("total_campaigns") or 0),
+            "active_campaigns": int(row.get("active_campaigns") or 0),
+            "total_sent": int(row.get("total_sent") or 0),
+            "total_opened": int(row.get("total_opened") or 0),
+            "total_clicked": int(row.get("total_clicked") or 0),
+            "total_replied": int(row.get("total_replied") or 0),
+            "avg_open_rate": float(row.get("avg_open_rate") or 0),
+            "avg_reply_rate": float(row.get("avg_reply_rate") or 0)
         }
 
     async def create_user_profile(self, user_id: str, email: str, name: str = "") -> Dict:
@@ -198,17 +305,18 @@ class SupabaseService:
             "plan": "free"
         }
 
-        result = self.client.table("users").insert(data).execute()
+        rows = await self._request("POST", "users", json=data, returning=True)
 
-        return result.data[0] if result.data else {}
+        return rows[0] if rows else {}
 
     async def get_user_profile(self, user_id: str) -> Optional[Dict]:
         """
         Get user profile
         """
-        result = self.client.table("users")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .execute()
+        rows = await self._request("GET", "users", params={
+            "select": "*",
+            "user_id": f"eq.{user_id}",
+            "limit": 1
+        })
 
-        return result.data[0] if result.data else None
+        return rows[0] if rows else None
@@ -1,12 +1,13 @@
 """
 Unipile service for LinkedIn integration
 """
-import httpx
 import json
 from typing import List, Dict, Optional
 
+from .http_pool import PooledHTTPClient
 
-class UnipileService:
+
+class UnipileService(PooledHTTPClient):
     def __init__(self, api_key: str, subdomain: str = "api15", port: int = 14509):
         self.api_key = api_key
         self.base_url = f"https://{subdomain}.unipile.com:{port}/api/v1"
@@ -18,7 +19,7 @@ class UnipileService:
 
     async def list_accounts(self) -> List[Dict]:
         """List all connected accounts"""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             response = await client.get(
                 f"{self.base_url}/accounts",
                 headers=self.headers
@@ -54,7 +55,7 @@ class UnipileService:
         """
         from datetime import datetime, timedelta
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             # Calculate expiration time (24 hours from now)
             expires_on = (datetime.utcnow() + timedelta(hours=24)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
 
@@ -99,7 +100,7 @@ class UnipileService:
             attendees: List of LinkedIn profile URLs or internal IDs
             text: Message text
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             # For new chats, use POST /chats endpoint
             payload = {
                 "account_id": account_id,
@@ -133,7 +134,7 @@ class UnipileService:
         Returns:
             User profile with provider_id
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             response = await client.get(
                 f"{self.base_url}/users/{identifier}",
                 headers=self.headers,
@@ -159,7 +160,7 @@ class UnipileService:
             profile_identifier: LinkedIn profile URL, slug, or provider ID
             message: Optional connection request message/note (max 300 characters)
         """
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self._client(timeout=30.0) as client:
             # First, get the user's provider_id
             print(f"[DEBUG Unipile] Fetching profile for identifier: {profile_identifier}")
             profile = await self.get_linkedin_profile(account_id, profile_identifier)
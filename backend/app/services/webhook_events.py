@@ -0,0 +1,291 @@
+"""
+Instantly webhook ingestion: validation, de-duplication and in-process dispatch
+
+Events posted to /api/webhooks/instantly are normalized, de-duplicated
+(Instantly retries deliveries) and handed to subscribers and to anyone
+waiting on a matching event - e.g. move_leads_to_campaign waiting for its
+background job. Polling stays in place as the fallback when no webhook arrives.
+
+A delivery reaches one worker. With a shared state backend (Redis) that
+worker publishes the event and every worker, itself included, hands it to
+its own subscribers and waiters (start() runs the listener).
+"""
+import asyncio
+import hashlib
+import hmac
+import inspect
+import json
+import os
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from .cache import TTLCache
+
+if TYPE_CHECKING:
+    from .state_backend import StateBackend
+
+
+# Raw event type -> canonical type
+EVENT_TYPE_ALIASES = {
+    "background_job_completed": "job_completed",
+    "job_completed": "job_completed",
+    "job.completed": "job_completed",
+    "background_job_failed": "job_completed",
+    "job_failed": "job_completed",
+    "lead_added": "lead_added",
+    "lead_created": "lead_added",
+    "leads_added": "lead_added",
+    "supersearch_enrichment_completed": "enrichment_completed",
+    "enrichment_completed": "enrichment_completed",
+    "reply_received": "reply_received",
+    "email_replied": "reply_received",
+    "lead_replied": "reply_received",
+}
+
+_FAILED_JOB_TYPES = ("background_job_failed", "job_failed")
+
+# State backend channel events are published on for the other workers
+FAN_OUT_CHANNEL = "webhooks:events"
+
+# Normalized field -> raw keys it may arrive under, in priority order
+_FIELD_ALIASES = {
+    "campaign_id": ("campaign_id", "campaign"),
+    "lead_email": ("lead_email", "email", "lead"),
+    "job_id": ("background_job_id", "job_id"),
+    "resource_id": ("resource_id", "list_id", "lead_list_id"),
+    "status": ("status", "job_status"),
+    "step": ("step", "sequence_step"),
+    "timestamp": ("timestamp", "created_at", "event_timestamp"),
+}
+
+
+def normalize_event(payload: Dict) -> Dict:
+    """
+    Canonical event dict from a raw Instantly webhook payload
+
+    Raises:
+        ValueError: If the payload has no event type
+    """
+    raw_type = payload.get("event_type") or payload.get("type") or payload.get("event")
+    if not raw_type or not isinstance(raw_type, str):
+        raise ValueError("Webhook event has no event_type")
+
+    raw_type = raw_type.strip().lower()
+    event = {"event_type": EVENT_TYPE_ALIASES.get(raw_type, raw_type), "raw_event_type": raw_type}
+
+    for field, keys in _FIELD_ALIASES.items():
+        for key in keys:
+            value = payload.get(key)
+            if value not in (None, "") and not isinstance(value, (dict, list)):
+                event[field] = str(value).strip()
+                break
+
+    if "lead_email" in event:
+        event["lead_email"] = event["lead_email"].lower()
+    if event["event_type"] == "job_completed":
+        event.setdefault("job_id", str(payload.get("id", "")) or None)
+        event["status"] = "failed" if raw_type in _FAILED_JOB_TYPES else event.get("status", "completed")
+
+    event["event_id"] = str(payload.get("event_id") or payload.get("id") or _payload_hash(payload))
+    event["payload"] = payload
+    return event
+
+
+def _payload_hash(payload: Dict) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _matches(event: Dict, event_types: Tuple[str, ...], match: Dict[str, str]) -> bool:
+    return event["event_type"] in event_types and all(event.get(k) == v for k, v in match.items())
+
+
+class WebhookDispatcher:
+    """
+    De-duplicates webhook events and fans them out to subscribers and waiters
+    """
+
+    def __init__(
+        self,
+        secret: Optional[str] = None,
+        dedup_ttl: float = 24 * 3600.0,
+        recent_size: int = 1000,
+        state: Optional["StateBackend"] = None,
+        fan_out: Optional[bool] = None
+    ):
+        """
+        Args:
+            secret: Shared secret Instantly sends with each delivery (None = receiver disabled)
+            dedup_ttl: How long delivered event ids are remembered
+            recent_size: Recent events kept so a waiter that registers late still sees its event
+            state: Shared StateBackend, so a retry landing on another worker is still a duplicate
+            fan_out: Deliver events to every worker through state's pub/sub (default: state.shared)
+        """
+        self.secret = secret
+        self.dedup_ttl = dedup_ttl
+        self.state = state
+        self.fan_out = bool(state is not None and state.shared) if fan_out is None else fan_out
+        self._listener: Optional[asyncio.Task] = None
+        self._seen = TTLCache(maxsize=100_000, ttl=dedup_ttl)
+        self._recent: Deque[Dict] = deque(maxlen=recent_size)
+        self._subscribers: Dict[str, List[Callable]] = {}
+        self._waiters: List[Tuple[Tuple[str, ...], Dict[str, str], asyncio.Future]] = []
+
+        self.received = 0
+        self.duplicates = 0
+        self.last_event_at: Optional[float] = None
+        self.by_type: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """True if the receiver is configured, i.e. events are expected to arrive"""
+        return bool(self.secret)
+
+    def verify(self, provided: Optional[str]) -> bool:
+        if not self.secret or not provided:
+            return False
+        return hmac.compare_digest(provided.encode("utf-8"), self.secret.encode("utf-8"))
+
+    def subscribe(self, event_types: Union[str, Iterable[str]], handler: Callable) -> None:
+        """
+        Call handler(event) for every new event of these types (sync or async handler)
+        """
+        if isinstance(event_types, str):
+            event_types = (event_types,)
+        for event_type in event_types:
+            self._subscribers.setdefault(event_type, []).append(handler)
+
+    async def dispatch(self, payload: Dict) -> Optional[Dict]:
+        """
+        Ingest one raw event. Returns the normalized event, or None if it's a duplicate.
+
+        Raises:
+            ValueError: If the payload isn't a valid event
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("Webhook event must be a JSON object")
+        event = normalize_event(payload)
+
+        dedup_key = (event["event_type"], event["event_id"])
+        if dedup_key in self._seen:
+            self.duplicates += 1
+            return None
+        if self.state is not None and self.state.shared:
+            # SET NX with a TTL: only the first worker to see the event id gets the marker.
+            # If this raises, the event isn't marked seen, so Instantly's retry is still delivered.
+            marker = await self.state.acquire_lock(f"webhook:{event['event_type']}:{event['event_id']}", self.dedup_ttl)
+            if marker is None:
+                self._seen.set(dedup_key, True)
+                self.duplicates += 1
+                return None
+        self._seen.set(dedup_key, True)
+
+        if self.fan_out:
+            await self.state.publish(FAN_OUT_CHANNEL, event)
+        else:
+            await self._deliver(event)
+        return event
+
+    async def _deliver(self, event: Dict) -> None:
+        self.received += 1
+        event["received_at"] = time.monotonic()
+        self.last_event_at = time.time()
+        self.by_type[event["event_type"]] = self.by_type.get(event["event_type"], 0) + 1
+        self._recent.append(event)
+
+        for waiter in list(self._waiters):
+            event_types, match, future = waiter
+            if not future.done() and _matches(event, event_types, match):
+                future.set_result(event)
+
+        for handler in self._subscribers.get(event["event_type"], []):
+            try:
+                result = handler(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                print(f"⚠️ Webhook handler failed for {event['event_type']}: {str(e)}")
+
+    def start(self) -> None:
+        """
+        Receive events published by other workers (no-op without fan-out)
+        """
+        if self.fan_out and self._listener is None:
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            try:
+                async for event in self.state.subscribe(FAN_OUT_CHANNEL):
+                    await self._deliver(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Webhook fan-out listener failed, resubscribing: {str(e)}")
+                await asyncio.sleep(1.0)
+
+    async def aclose(self) -> None:
+        """
+        Stop the fan-out listener (on shutdown)
+        """
+        if self._listener:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+    async def wait_for(
+        self,
+        event_types: Union[str, Iterable[str]],
+        match: Dict[str, str],
+        timeout: float,
+        since: Optional[float] = None
+    ) -> Optional[Dict]:
+        """
+        Wait for an event of the given type(s) whose fields equal match
+
+        Events that arrived shortly before the call count too (only those
+        received after `since`, a time.monotonic() value, when given).
+        Returns None on timeout.
+        """
+        event_types = (event_types,) if isinstance(event_types, str) else tuple(event_types)
+
+        for event in reversed(self._recent):
+            if since is not None and event["received_at"] < since:
+                break
+            if _matches(event, event_types, match):
+                return event
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (event_types, match, future)
+        self._waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self._waiters.remove(waiter)
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "fan_out": self.fan_out,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "by_type": dict(self.by_type),
+            "waiters": len(self._waiters),
+            "last_event_at": self.last_event_at
+        }
+
+
+_default_dispatcher: Optional[WebhookDispatcher] = None
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    """
+    Process-wide dispatcher (secret from INSTANTLY_WEBHOOK_SECRET)
+    """
+    global _default_dispatcher
+    if _default_dispatcher is None:
+        _default_dispatcher = WebhookDispatcher(secret=os.getenv("INSTANTLY_WEBHOOK_SECRET"))
+    return _default_dispatcher
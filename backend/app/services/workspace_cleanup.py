@@ -0,0 +1,218 @@
+"""
+Bulk pause/delete of Instantly campaigns and lead lists
+
+Pages through the whole workspace, filters by age / name / status and
+deletes matches with bounded concurrency. All calls go through
+InstantlyService, so they share its rate limiter. Finished ids are appended
+to a checkpoint file, so an interrupted sweep resumes where it stopped.
+"""
+import asyncio
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, Iterable, Optional, Set, Tuple
+
+
+# Instantly v2 campaign status codes
+CAMPAIGN_STATUSES = {
+    "draft": 0,
+    "active": 1,
+    "paused": 2,
+    "completed": 3,
+    "running_subsequences": 4,
+    "unhealthy": -1,
+    "bounce_protect": -2,
+    "suspended": -99,
+}
+
+# Statuses that are sending and must be paused before deletion
+_SENDING_STATUSES = (1, 4)
+
+
+def parse_status(value: str) -> int:
+    """
+    Campaign status code from a name ("paused") or number ("2")
+
+    Raises:
+        ValueError: If the status is unknown
+    """
+    value = value.strip().lower().replace(" ", "_")
+    if value in CAMPAIGN_STATUSES:
+        return CAMPAIGN_STATUSES[value]
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Unknown campaign status: {value}")
+
+
+def _created_at(item: Dict) -> Optional[datetime]:
+    raw = item.get("timestamp_created") or item.get("created_at")
+    if not raw:
+        return None
+    try:
+        created = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class CleanupFilters:
+    """
+    Which campaigns/lists to delete (no filters = everything)
+    """
+    older_than_days: Optional[float] = None
+    name_pattern: Optional[str] = None
+    statuses: Set[int] = field(default_factory=set)
+
+    def __post_init__(self):
+        self._name_re = re.compile(self.name_pattern) if self.name_pattern else None
+
+    def matches(self, item: Dict, kind: str, now: Optional[datetime] = None) -> bool:
+        if self._name_re and not self._name_re.search(item.get("name") or ""):
+            return False
+
+        # Status only exists on campaigns
+        if self.statuses and kind == "campaign" and item.get("status") not in self.statuses:
+            return False
+
+        if self.older_than_days is not None:
+            created = _created_at(item)
+            cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=self.older_than_days)
+            # Unknown age never counts as old enough
+            if created is None or created > cutoff:
+                return False
+
+        return True
+
+
+class CleanupCheckpoint:
+    """
+    Append-only record of deleted ids (JSON lines of {"kind", "id"})
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._done: Set[Tuple[str, str]] = set()
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line from an interrupted run
+                    self._done.add((entry.get("kind"), entry.get("id")))
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, kind: str, item_id: str) -> bool:
+        return (kind, item_id) in self._done
+
+    def mark(self, kind: str, item_id: str) -> None:
+        self._done.add((kind, item_id))
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"kind": kind, "id": item_id}) + "\n")
+
+
+class WorkspaceCleanup:
+    """
+    Concurrent, resumable pause/delete sweep over an Instantly workspace
+    """
+
+    def __init__(
+        self,
+        instantly,
+        filters: Optional[CleanupFilters] = None,
+        concurrency: int = 5,
+        dry_run: bool = False,
+        checkpoint: Optional[CleanupCheckpoint] = None
+    ):
+        """
+        Args:
+            instantly: InstantlyService (iter_campaigns, iter_lead_lists, pause/delete methods)
+            filters: Which items to delete
+            concurrency: Max deletions in flight
+            dry_run: Report matches without deleting anything
+            checkpoint: Ids already deleted by an earlier run
+        """
+        self.instantly = instantly
+        self.filters = filters or CleanupFilters()
+        self.concurrency = max(concurrency, 1)
+        self.dry_run = dry_run
+        self.checkpoint = checkpoint if checkpoint is not None else CleanupCheckpoint()
+
+    async def run(self, kinds: Iterable[str] = ("campaign", "list")) -> Dict:
+        """
+        Sweep campaigns first (they reference lists), then lead lists
+
+        Returns:
+            Per-kind counts: scanned, matched, deleted, failed, resumed
+        """
+        summary = {}
+        if "campaign" in kinds:
+            summary["campaigns"] = await self._sweep(
+                "campaign", self.instantly.iter_campaigns(), self._delete_campaign
+            )
+        if "list" in kinds:
+            summary["lists"] = await self._sweep(
+                "list", self.instantly.iter_lead_lists(), self.instantly.delete_lead_list
+            )
+        return summary
+
+    async def _delete_campaign(self, campaign: Dict) -> bool:
+        if campaign.get("status") in _SENDING_STATUSES:
+            if not await self.instantly.pause_campaign(campaign["id"]):
+                print(f"   ⚠️ Pause failed for {campaign['id']}, deleting anyway")
+        return await self.instantly.delete_campaign(campaign["id"])
+
+    async def _sweep(self, kind: str, items: AsyncIterator[Dict], delete) -> Dict:
+        counts = {"scanned": 0, "matched": 0, "deleted": 0, "failed": 0, "resumed": 0}
+        now = datetime.now(timezone.utc)
+        slots = asyncio.Semaphore(self.concurrency)
+        in_flight: Set[asyncio.Task] = set()
+
+        async def delete_one(item: Dict):
+            try:
+                target = item if kind == "campaign" else item["id"]
+                if await delete(target):
+                    counts["deleted"] += 1
+                    self.checkpoint.mark(kind, item["id"])
+                    print(f"   ✅ Deleted {kind}: {item.get('name', 'Unnamed')} ({item['id']})")
+                else:
+                    counts["failed"] += 1
+                    print(f"   ❌ Delete failed for {kind} {item['id']}")
+            except Exception as e:
+                counts["failed"] += 1
+                print(f"   ❌ Delete failed for {kind} {item['id']}: {str(e)}")
+            finally:
+                slots.release()
+
+        async for item in items:
+            if isinstance(item, str):
+                item = {"id": item}
+            counts["scanned"] += 1
+            if not item.get("id") or not self.filters.matches(item, kind, now):
+                continue
+            counts["matched"] += 1
+
+            if self.checkpoint.is_done(kind, item["id"]):
+                counts["resumed"] += 1
+                continue
+            if self.dry_run:
+                print(f"   🔍 Would delete {kind}: {item.get('name', 'Unnamed')} ({item['id']})")
+                continue
+
+            # Waiting for a slot here also stops pagination running far ahead of deletes
+            await slots.acquire()
+            task = asyncio.create_task(delete_one(item))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        return counts
@@ -0,0 +1,77 @@
+"""
+ICP filter compiler benchmark - hit rate and latency on a corpus of real ICP strings
+
+Usage:
+    python benchmark_icp_compiler.py                      # icp_corpus.txt
+    python benchmark_icp_compiler.py --corpus my_icps.txt --show-filters
+    python benchmark_icp_compiler.py --min-hit-rate 80    # exit 1 below 80%
+
+A "hit" is a description compiled with enough confidence that
+generate_supersearch_filters skips the model call (ICP_COMPILER_MIN_CONFIDENCE).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from app.services.icp_filter_compiler import ICPFilterCompiler
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the local ICP filter compiler")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "icp_corpus.txt"))
+    parser.add_argument("--min-confidence", type=float, default=float(os.getenv("ICP_COMPILER_MIN_CONFIDENCE", "0.85")))
+    parser.add_argument("--repeat", type=int, default=200, help="Compiles per description for timing")
+    parser.add_argument("--show-filters", action="store_true")
+    parser.add_argument("--min-hit-rate", type=float, help="Fail below this hit rate (%%)")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    compiler = ICPFilterCompiler(min_confidence=args.min_confidence)
+
+    print("⚡ ICP FILTER COMPILER BENCHMARK")
+    print("=" * 80)
+    print(f"Corpus: {len(corpus)} descriptions   vocabulary: {len(compiler.index)} phrases   "
+          f"min confidence: {args.min_confidence}\n")
+
+    hits, misses, timings = [], [], []
+    for text in corpus:
+        result = compiler.compile(text)
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            compiler.compile(text)
+        timings.append((time.perf_counter() - started) / args.repeat * 1e6)
+
+        (hits if compiler.is_confident(result) else misses).append((text, result))
+        if args.show_filters:
+            mark = "✅" if compiler.is_confident(result) else "🤖"
+            print(f"{mark} {result.confidence:4.2f}  {text}")
+            print(f"          {json.dumps(result.filters)}")
+
+    hit_rate = len(hits) / len(corpus) * 100
+    timings.sort()
+    print(f"\nHit rate: {hit_rate:.1f}% ({len(hits)}/{len(corpus)} compiled locally, {len(misses)} need the model)")
+    print(f"Latency:  p50 {statistics.median(timings):.0f} µs   p99 {timings[int(len(timings) * 0.99) - 1]:.0f} µs   "
+          f"max {timings[-1]:.0f} µs per description")
+
+    if misses:
+        print("\nSent to the model (unknown words):")
+        for text, result in misses:
+            print(f"   {result.confidence:4.2f}  {text}  {result.unmatched}")
+
+    if args.min_hit_rate is not None and hit_rate < args.min_hit_rate:
+        print(f"\n❌ Hit rate below {args.min_hit_rate:.0f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Load test - requests/second of the API with 1..N worker processes
+
+Starts serve.py once per worker count and hammers POST /api/webhooks/instantly
+with batches of unique events (JSON parsing, normalization, de-duplication and
+metric fan-out: CPU-bound work with no upstream calls), then reports throughput
+and scaling efficiency relative to one worker.
+
+Usage:
+    python benchmark_load.py                          # 1, 2, 4... up to CPU count
+    python benchmark_load.py --workers 1,2,4 --duration 15
+    STATE_BACKEND=redis REDIS_URL=redis://localhost:6379/0 python benchmark_load.py
+
+The load generator runs on the same machine, so leave it some cores: scaling
+is only meaningful while workers + client processes fit on the CPUs.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+import uuid
+
+import httpx
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SECRET = "load-test-secret"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(url)
+
+
+def start_server(workers: int, port: int) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        "STORAGE_BACKEND": os.getenv("STORAGE_BACKEND", "memory"),
+        "INSTANTLY_WEBHOOK_SECRET": SECRET,
+    }
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--allow-memory-state"],
+        cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        _wait_ready(f"http://127.0.0.1:{port}/health/ready")
+    except TimeoutError:
+        server.terminate()
+        raise SystemExit(f"❌ Server with {workers} worker(s) did not become ready")
+    return server
+
+
+def _batch(size: int):
+    return [
+        {
+            "event_type": "email_sent",
+            "event_id": uuid.uuid4().hex,
+            "campaign_id": f"camp_{i % 10}",
+            "lead_email": f"lead{i}@example.com",
+            "timestamp": "2026-01-01T00:00:00Z"
+        }
+        for i in range(size)
+    ]
+
+
+async def _client_loop(url: str, concurrency: int, duration: float, batch_size: int):
+    ok = errors = 0
+    deadline = time.monotonic() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30.0, headers={"X-Webhook-Secret": SECRET}) as client:
+        async def user():
+            nonlocal ok, errors
+            while time.monotonic() < deadline:
+                try:
+                    response = await client.post(url, json=_batch(batch_size))
+                    if response.status_code == 200:
+                        ok += 1
+                    else:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+    return ok, errors
+
+
+def _client_process(args):
+    return asyncio.run(_client_loop(*args))
+
+
+def run_load(port: int, clients: int, concurrency: int, duration: float, batch_size: int):
+    """
+    Returns:
+        (successful requests/second, error count)
+    """
+    url = f"http://127.0.0.1:{port}/api/webhooks/instantly"
+    with multiprocessing.Pool(clients) as pool:
+        started = time.perf_counter()
+        results = pool.map(_client_process, [(url, concurrency, duration, batch_size)] * clients)
+        elapsed = time.perf_counter() - started
+    ok = sum(result[0] for result in results)
+    errors = sum(result[1] for result in results)
+    return ok / elapsed, errors
+
+
+def _default_worker_counts():
+    cpus = os.cpu_count() or 1
+    counts, n = [], 1
+    while n < cpus:
+        counts.append(n)
+        n *= 2
+    return counts + [cpus]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API throughput across worker counts")
+    parser.add_argument("--workers", help="Comma-separated worker counts (default: 1, 2, 4... CPU count)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--clients", type=int, default=max((os.cpu_count() or 2) // 2, 1),
+                        help="Load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent requests per client process")
+    parser.add_argument("--batch-size", type=int, default=20, help="Webhook events per request")
+    args = parser.parse_args()
+
+    counts = [int(n) for n in args.workers.split(",")] if args.workers else _default_worker_counts()
+
+    print("📈 LOAD TEST - POST /api/webhooks/instantly")
+    print("=" * 80)
+    print(f"CPUs: {os.cpu_count()}  clients: {args.clients} x {args.concurrency} concurrent  "
+          f"batch: {args.batch_size} events  duration: {args.duration:.0f}s each")
+    print(f"State backend: {os.getenv('STATE_BACKEND') or ('redis' if os.getenv('REDIS_URL') else 'memory')}\n")
+
+    baseline = None
+    for workers in counts:
+        port = _free_port()
+        server = start_server(workers, port)
+        try:
+            rps, errors = run_load(port, args.clients, args.concurrency, args.duration, args.batch_size)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        baseline = baseline or rps
+        efficiency = rps / (baseline * workers) * 100
+        print(f"   {workers:3d} worker(s): {rps:9.1f} req/s  ({rps * args.batch_size:10.0f} events/s)  "
+              f"speedup {rps / baseline:5.2f}x  efficiency {efficiency:5.1f}%  errors {errors}")
+
+
+if __name__ == "__main__":
+    main()
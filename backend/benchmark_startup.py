@@ -0,0 +1,124 @@
+"""
+Startup benchmark - import time of app.main and time until /health answers
+
+Usage:
+    python benchmark_startup.py                  # -X importtime breakdown
+    python benchmark_startup.py --serve          # also time /health and /health/ready under uvicorn
+    python benchmark_startup.py --budget-ms 800  # exit 1 if importing app.main takes longer
+
+Heavy SDKs (firebase_admin, openai) must not show up in the import breakdown;
+they are loaded by the background warm-up or on first use.
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("firebase_admin", "google.cloud", "openai")
+
+
+def measure_imports(runs: int = 3):
+    """
+    Run `python -X importtime -c "import app.main"` in fresh interpreters
+
+    Returns:
+        (best total ms, {module: cumulative ms} of the best run)
+    """
+    best_total, best_modules = None, {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=HERE, capture_output=True, text=True
+        )
+        modules = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+            modules[name] = int(cumulative) / 1000
+        total = modules.get("app.main")
+        if total is None:
+            raise SystemExit(f"❌ import app.main failed:\n{result.stderr[-2000:]}")
+        if best_total is None or total < best_total:
+            best_total, best_modules = total, modules
+    return best_total, best_modules
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, deadline: float, ok_statuses=(200,)) -> float:
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=0.5) as response:
+                if response.status in ok_statuses:
+                    return time.monotonic()
+        except Exception:
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(url)
+
+
+def measure_serve(timeout: float = 60.0):
+    """
+    Start uvicorn and time until /health (liveness) and /health/ready answer 200
+    """
+    port = _free_port()
+    started = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=HERE, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        live = _wait_for(f"http://127.0.0.1:{port}/health", deadline)
+        ready = _wait_for(f"http://127.0.0.1:{port}/health/ready", deadline)
+        return (live - started) * 1000, (ready - started) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend startup time")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to show")
+    parser.add_argument("--runs", type=int, default=3, help="Import runs (best is reported)")
+    parser.add_argument("--serve", action="store_true", help="Also time /health and /health/ready")
+    parser.add_argument("--budget-ms", type=float, help="Fail if importing app.main takes longer")
+    args = parser.parse_args()
+
+    total, modules = measure_imports(args.runs)
+    print("⏱️  STARTUP BENCHMARK")
+    print("=" * 80)
+    print(f"import app.main: {total:.0f} ms (best of {args.runs})")
+
+    # Top-level packages only, so nested modules don't repeat their parents
+    packages = {name: ms for name, ms in modules.items() if "." not in name and name != "app"}
+    print(f"\nSlowest top-level imports:")
+    for name, ms in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {ms:8.1f} ms  {name}")
+
+    heavy = sorted(name for name in modules if name.startswith(HEAVY_MODULES))
+    if heavy:
+        print(f"\n⚠️  Heavy SDKs imported eagerly: {', '.join(heavy[:5])}")
+    else:
+        print(f"\n✅ No heavy SDKs imported at startup ({', '.join(HEAVY_MODULES)})")
+
+    if args.serve:
+        live_ms, ready_ms = measure_serve()
+        print(f"\n/health answered after {live_ms:.0f} ms, /health/ready after {ready_ms:.0f} ms")
+
+    if args.budget_ms is not None and (total > args.budget_ms or heavy):
+        print(f"\n❌ Over budget ({args.budget_ms:.0f} ms) or heavy SDKs imported")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,139 +1,81 @@
 """
-Clean up Instantly workspace - delete all campaigns and lead lists
+Clean up Instantly workspace - delete campaigns and lead lists
+
+Examples:
+    python cleanup_instantly.py --dry-run
+    python cleanup_instantly.py --only lists --name-pattern "^Temp list for" --older-than 2
+    python cleanup_instantly.py --only campaigns --status draft --status paused --yes
 """
+import argparse
 import asyncio
 import os
-import httpx
 from dotenv import load_dotenv
 
-load_dotenv()
+from app.services.instantly import InstantlyService
+from app.services.workspace_cleanup import (
+    CleanupCheckpoint,
+    CleanupFilters,
+    WorkspaceCleanup,
+    parse_status,
+)
 
+load_dotenv()
 
-async def cleanup_instantly():
-    api_key = os.getenv('INSTANTLY_API_KEY')
-    BASE = 'https://api.instantly.ai/api/v2'
-    HDRS = {'Authorization': f'Bearer {api_key}', 'Content-Type': 'application/json'}
 
-    print("🧹 INSTANTLY WORKSPACE CLEANUP")
+def parse_args():
+    parser = argparse.ArgumentParser(description="Delete Instantly campaigns and lead lists")
+    parser.add_argument("--dry-run", action="store_true", help="List what would be deleted")
+    parser.add_argument("--only", choices=["campaigns", "lists"], help="Only sweep one kind")
+    parser.add_argument("--older-than", type=float, metavar="DAYS", help="Only items created more than DAYS ago")
+    parser.add_argument("--name-pattern", metavar="REGEX", help="Only items whose name matches REGEX")
+    parser.add_argument("--status", action="append", default=[], help="Only campaigns with this status (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=5, help="Deletions in flight (default: 5)")
+    parser.add_argument("--checkpoint", default="cleanup_checkpoint.jsonl", help="Resume file of deleted ids")
+    parser.add_argument("--yes", action="store_true", help="Skip the confirmation prompt")
+    return parser.parse_args()
+
+
+async def cleanup_instantly(args) -> dict:
+    instantly = InstantlyService(os.getenv('INSTANTLY_API_KEY'))
+    filters = CleanupFilters(
+        older_than_days=args.older_than,
+        name_pattern=args.name_pattern,
+        statuses={parse_status(s) for s in args.status},
+    )
+    checkpoint = CleanupCheckpoint(None if args.dry_run else args.checkpoint)
+    kinds = {"campaigns": ("campaign",), "lists": ("list",)}.get(args.only, ("campaign", "list"))
+
+    print("🧹 INSTANTLY WORKSPACE CLEANUP" + (" (dry run)" if args.dry_run else ""))
     print("=" * 80)
-
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        # Delete all campaigns
-        print("\n📋 Step 1: Deleting all campaigns...")
-        campaigns_res = await client.get(
-            f'{BASE}/campaigns',
-            headers=HDRS,
-            params={'api_key': api_key}
-        )
-
-        if campaigns_res.status_code == 200:
-            campaigns_data = campaigns_res.json()
-
-            # Handle both array and object responses
-            if isinstance(campaigns_data, dict):
-                campaigns = campaigns_data.get('items', campaigns_data.get('campaigns', []))
-            elif isinstance(campaigns_data, list):
-                campaigns = campaigns_data
-            else:
-                campaigns = []
-
-            print(f"   Found {len(campaigns)} campaigns")
-
-            for i, campaign in enumerate(campaigns, 1):
-                # Handle if campaign is string ID or object
-                if isinstance(campaign, str):
-                    campaign_id = campaign
-                    campaign_name = campaign_id
-                else:
-                    campaign_id = campaign.get('id')
-                    campaign_name = campaign.get('name', 'Unnamed')
-
-                print(f"   [{i}/{len(campaigns)}] Pausing and deleting: {campaign_name} ({campaign_id})")
-
-                # First pause the campaign
-                pause_res = await client.post(
-                    f'{BASE}/campaigns/{campaign_id}/pause',
-                    headers=HDRS,
-                    json={'api_key': api_key}
-                )
-
-                # Then delete (API v2 requires JSON body)
-                delete_res = await client.delete(
-                    f'{BASE}/campaigns/{campaign_id}',
-                    headers=HDRS,
-                    json={'api_key': api_key}
-                )
-
-                if delete_res.status_code in [200, 204]:
-                    print(f"      ✅ Deleted")
-                else:
-                    print(f"      ❌ Delete failed: {delete_res.status_code} - {delete_res.text[:100]}")
-
-            print(f"\n   ✅ Deleted {len(campaigns)} campaigns")
-        else:
-            print(f"   ❌ Failed to get campaigns: {campaigns_res.status_code}")
-
-        # Delete all lead lists
-        print("\n📋 Step 2: Deleting all lead lists...")
-
-        # Try the lead-lists endpoint
-        lists_res = await client.get(
-            f'{BASE}/lead-lists',
-            headers=HDRS,
-            params={'api_key': api_key}
-        )
-
-        if lists_res.status_code == 200:
-            lists_data = lists_res.json()
-
-            # Handle both array and object responses
-            if isinstance(lists_data, dict):
-                lists = lists_data.get('items', lists_data.get('lists', []))
-            elif isinstance(lists_data, list):
-                lists = lists_data
-            else:
-                lists = []
-
-            print(f"   Found {len(lists)} lead lists")
-
-            for i, lead_list in enumerate(lists, 1):
-                # Handle if list is string ID or object
-                if isinstance(lead_list, str):
-                    list_id = lead_list
-                    list_name = list_id
-                    leads_count = 0
-                else:
-                    list_id = lead_list.get('id')
-                    list_name = lead_list.get('name', 'Unnamed')
-                    leads_count = lead_list.get('leads_count', 0)
-
-                print(f"   [{i}/{len(lists)}] Deleting: {list_name} ({list_id}) - {leads_count} leads")
-
-                delete_res = await client.delete(
-                    f'{BASE}/lead-lists/{list_id}',
-                    headers=HDRS,
-                    json={'api_key': api_key}
-                )
-
-                if delete_res.status_code in [200, 204]:
-                    print(f"      ✅ Deleted")
-                else:
-                    print(f"      ❌ Failed: {delete_res.status_code}")
-
-            print(f"\n   ✅ Deleted {len(lists)} lead lists")
-        else:
-            print(f"   ⚠️ Failed to get lead lists: {lists_res.status_code}")
-            print(f"   Response: {lists_res.text[:200]}")
+    if len(checkpoint):
+        print(f"   Resuming: {len(checkpoint)} items already deleted per {args.checkpoint}")
+
+    cleanup = WorkspaceCleanup(
+        instantly,
+        filters=filters,
+        concurrency=args.concurrency,
+        dry_run=args.dry_run,
+        checkpoint=checkpoint,
+    )
+    summary = await cleanup.run(kinds)
 
     print("\n" + "=" * 80)
+    for kind, counts in summary.items():
+        print(f"   {kind}: {counts}")
+    print(f"   rate limiter: {instantly.rate_limiter.stats()}")
     print("✅ Cleanup complete!")
+    return summary
 
 
 if __name__ == "__main__":
-    print("\n⚠️  WARNING: This will delete ALL campaigns and lead lists!")
-    response = input("Type 'yes' to confirm: ")
+    args = parse_args()
+
+    if not args.dry_run and not args.yes:
+        scope = "matching" if (args.older_than or args.name_pattern or args.status) else "ALL"
+        print(f"\n⚠️  WARNING: This will delete {scope} {args.only or 'campaigns and lead lists'}!")
+        response = input("Type 'yes' to confirm: ")
+        if response.lower() != 'yes':
+            print("Cancelled.")
+            raise SystemExit(0)
 
-    if response.lower() == 'yes':
-        asyncio.run(cleanup_instantly())
-    else:
-        print("Cancelled.")
+    asyncio.run(cleanup_instantly(args))
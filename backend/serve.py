@@ -0,0 +1,73 @@
+"""
+Production server - the API under uvicorn with one worker process per core
+
+Usage:
+    python serve.py                       # WEB_CONCURRENCY workers (default: CPU count)
+    python serve.py --workers 4 --port 8000
+
+Every worker builds its own ServiceContainer. Upload progress, the Instantly
+rate limit and webhook de-duplication must be shared between them, and a
+webhook posted to one worker must reach the others (job waits, enrichment
+watchers, campaign counters), so more than one worker needs
+STATE_BACKEND=redis (REDIS_URL). With the in-memory state backend the runner
+starts a single worker unless --allow-memory-state is passed (benchmarks
+only: SSE progress would miss uploads on other workers).
+
+CAMPAIGN_EVENTS_PATH and LIST_REAPER_PATH are single-worker only; with more
+than one worker they are ignored (see ServiceContainer.from_env).
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def worker_count(requested=None) -> int:
+    """
+    Workers to run: --workers, then WEB_CONCURRENCY, then the number of CPUs
+    """
+    if requested:
+        return max(int(requested), 1)
+    if os.getenv("WEB_CONCURRENCY"):
+        return max(int(os.getenv("WEB_CONCURRENCY")), 1)
+    return os.cpu_count() or 1
+
+
+def state_is_shared() -> bool:
+    backend = (os.getenv("STATE_BACKEND") or ("redis" if os.getenv("REDIS_URL") else "memory")).strip().lower()
+    return backend not in ("memory", "in-memory", "inmemory")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, help="Worker processes (default: WEB_CONCURRENCY or CPU count)")
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--allow-memory-state", action="store_true",
+                        help="Run several workers without a shared state backend (load tests only)")
+    args = parser.parse_args()
+
+    workers = worker_count(args.workers)
+    if workers > 1 and not state_is_shared() and not args.allow_memory_state:
+        print(f"⚠️ {workers} workers need a shared state backend (STATE_BACKEND=redis, REDIS_URL); starting 1 worker")
+        workers = 1
+
+    # Each worker reads it to know it has siblings (ServiceContainer.from_env)
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    print(f"🚀 Starting API on {args.host}:{args.port} with {workers} worker(s)")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        log_level=args.log_level,
+        # X-Forwarded-For sets the client address, so only trust it from the proxy's
+        # own addresses: FORWARDED_ALLOW_IPS, by default local only
+        proxy_headers=True,
+        forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+    )
+
+
+if __name__ == "__main__":
+    main()
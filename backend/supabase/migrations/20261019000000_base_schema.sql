@@ -0,0 +1,49 @@
+-- Base tables (same as SETUP_GUIDE.md section 2.1), idempotent so they can be
+-- replayed by `supabase start` / `supabase db reset` for local harnesses.
+
+CREATE TABLE IF NOT EXISTS users (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT UNIQUE NOT NULL,
+  email TEXT NOT NULL,
+  name TEXT,
+  plan TEXT DEFAULT 'free',
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS campaigns (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT NOT NULL,
+  campaign_id TEXT NOT NULL,
+  url TEXT NOT NULL,
+  target_audience TEXT NOT NULL,
+  copy_variants JSONB,
+  status TEXT DEFAULT 'active',
+  sent INTEGER DEFAULT 0,
+  opened INTEGER DEFAULT 0,
+  clicked INTEGER DEFAULT 0,
+  replied INTEGER DEFAULT 0,
+  bounced INTEGER DEFAULT 0,
+  open_rate FLOAT DEFAULT 0,
+  click_rate FLOAT DEFAULT 0,
+  reply_rate FLOAT DEFAULT 0,
+  created_at TIMESTAMP DEFAULT NOW(),
+  updated_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS email_accounts (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT NOT NULL,
+  email TEXT NOT NULL,
+  status TEXT DEFAULT 'active',
+  warmup_enabled BOOLEAN DEFAULT true,
+  created_at TIMESTAMP DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS lead_lists (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  user_id TEXT NOT NULL,
+  campaign_id TEXT NOT NULL,
+  leads JSONB,
+  total_leads INTEGER DEFAULT 0,
+  created_at TIMESTAMP DEFAULT NOW()
+);
@@ -0,0 +1,15 @@
+-- Storage backend support for SupabaseService
+-- Runs after the base tables (20261019000000_base_schema.sql / SETUP_GUIDE.md section 2.1).
+
+-- Campaigns remember the SuperSearch list their leads came from (LinkedIn endpoints read it)
+ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS supersearch_list_id TEXT;
+
+-- Campaign lookups/updates/deletes all filter on the Instantly campaign_id
+CREATE UNIQUE INDEX IF NOT EXISTS campaigns_campaign_id_key ON campaigns (campaign_id);
+
+CREATE INDEX IF NOT EXISTS email_accounts_user_id_idx ON email_accounts (user_id);
+
+-- Service role key needs DELETE on campaigns (missing from the SETUP_GUIDE policies)
+DROP POLICY IF EXISTS "Users can delete own campaigns" ON campaigns;
+CREATE POLICY "Users can delete own campaigns" ON campaigns
+  FOR DELETE USING (true);
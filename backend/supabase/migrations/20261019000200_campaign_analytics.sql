@@ -0,0 +1,40 @@
+-- Dashboard analytics pushed down to Postgres
+-- SupabaseService.get_user_stats calls campaign_user_stats() over /rest/v1/rpc and
+-- get_user_campaigns pages with ORDER BY created_at DESC LIMIT/OFFSET.
+
+-- Serves both the per-user listing (ordered by created_at) and the aggregate below.
+-- INCLUDE columns let the stats query run as an index-only scan.
+CREATE INDEX IF NOT EXISTS campaigns_user_id_created_at_idx
+  ON campaigns (user_id, created_at DESC)
+  INCLUDE (status, sent, opened, clicked, replied);
+
+-- One small row per user instead of shipping every campaign row to the API.
+-- Same shape and rounding as storage_backend.summarize_campaign_stats.
+CREATE OR REPLACE FUNCTION campaign_user_stats(p_user_id TEXT)
+RETURNS TABLE (
+  total_campaigns BIGINT,
+  active_campaigns BIGINT,
+  total_sent BIGINT,
+  total_opened BIGINT,
+  total_clicked BIGINT,
+  total_replied BIGINT,
+  avg_open_rate NUMERIC,
+  avg_reply_rate NUMERIC
+)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT
+    COUNT(*) AS total_campaigns,
+    COUNT(*) FILTER (WHERE status = 'active') AS active_campaigns,
+    COALESCE(SUM(sent), 0) AS total_sent,
+    COALESCE(SUM(opened), 0) AS total_opened,
+    COALESCE(SUM(clicked), 0) AS total_clicked,
+    COALESCE(SUM(replied), 0) AS total_replied,
+    ROUND(COALESCE(SUM(opened), 0)::NUMERIC / GREATEST(COALESCE(SUM(sent), 0), 1) * 100, 2) AS avg_open_rate,
+    ROUND(COALESCE(SUM(replied), 0)::NUMERIC / GREATEST(COALESCE(SUM(sent), 0), 1) * 100, 2) AS avg_reply_rate
+  FROM campaigns
+  WHERE user_id = p_user_id;
+$$;
+
+GRANT EXECUTE ON FUNCTION campaign_user_stats(TEXT) TO anon, authenticated, service_role;
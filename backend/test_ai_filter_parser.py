@@ -0,0 +1,115 @@
+"""
+Tests for AIFilterParser on the shared async OpenAI client (no network: mocked transport)
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.services.ai_filter_parser import AIFilterParser, normalize_audience
+from app.services.openai_client import OpenAIClient, extract_json
+
+MODEL_LATENCY = 0.5
+
+
+def make_parser(reply: str = None, status: int = 200, latency: float = MODEL_LATENCY, timeout: float = 30.0):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        await asyncio.sleep(latency)  # a slow model call
+        content = reply or '```json\n{"level": ["C-Level"], "title": {"include": ["CTO"], "exclude": []}, "revenue": []}\n```'
+        return httpx.Response(status, json={"choices": [{"message": {"content": content}}]})
+
+    openai = OpenAIClient("test-key")
+    openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AIFilterParser(openai=openai, timeout=timeout), requests
+
+
+def test_event_loop_stays_responsive_during_parse():
+    parser, requests = make_parser()
+
+    async def run():
+        gaps = []
+        done = asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.01)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick_task = asyncio.create_task(ticker())
+        filters = await parser.parse_audience_to_filters("CTOs at Series A SaaS companies")
+        done.set()
+        await tick_task
+        await parser.openai.aclose()
+        return filters, gaps
+
+    filters, gaps = asyncio.run(run())
+    assert filters == {"level": ["C-Level"], "title": {"include": ["CTO"]}}
+    assert len(gaps) >= 20, "event loop did not get to run during the model call"
+    assert max(gaps) < 0.1, f"event loop blocked for {max(gaps) * 1000:.0f} ms"
+    assert requests[0]["model"] == "gpt-4o" and requests[0]["temperature"] == 0.3
+    print(f"✅ {len(gaps)} ticks during a {MODEL_LATENCY}s parse, longest gap {max(gaps) * 1000:.1f} ms")
+
+
+def test_cache_is_keyed_by_normalized_audience():
+    parser, requests = make_parser(latency=0.05)
+
+    async def run():
+        results = await asyncio.gather(
+            parser.parse_audience_to_filters("CTOs at Series A SaaS companies"),
+            parser.parse_audience_to_filters("ctos at series a   SaaS companies."),
+        )
+        results.append(await parser.parse_audience_to_filters("  CTOs at Series A SaaS Companies "))
+        results.append(await parser.parse_audience_to_filters("HR managers at construction firms"))
+        await parser.openai.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert len(requests) == 2
+    assert results[0] == results[1] == results[2]
+    assert parser.stats() == {"cache_hits": 2, "model_calls": 2}
+    assert normalize_audience('"SaaS  Founders, US!"') == "saas founders, us"
+    print("✅ Normalized audiences share one model call and cache entry")
+
+
+def test_failures_fall_back_without_poisoning_the_cache():
+    parser, requests = make_parser(status=500)
+    slow_parser, _ = make_parser(latency=1.0, timeout=0.1)
+
+    async def run():
+        failed = await parser.parse_audience_to_filters("Founders")
+        again = await parser.parse_audience_to_filters("Founders")
+        timed_out = await slow_parser.parse_audience_to_filters("Founders")
+        await parser.openai.aclose()
+        await slow_parser.openai.aclose()
+        return failed, again, timed_out
+
+    failed, again, timed_out = asyncio.run(run())
+    assert failed == again == timed_out == parser._get_default_filters()
+    assert len(requests) == 2, "failed parses must not be cached"
+    print("✅ Errors and timeouts return default filters and are retried next time")
+
+
+def test_extract_json_handles_fences_and_prose():
+    assert extract_json('Sure! ```json\n{"a": 1}\n``` hope that helps') == {"a": 1}
+    assert extract_json('Here you go: [{"subject": "s", "body": "b"}] done', expect=list) == [{"subject": "s", "body": "b"}]
+    for bad, expect in (("no json here", dict), ('{"a": 1}', list), ('{"a": ', dict)):
+        try:
+            extract_json(bad, expect=expect)
+            assert False, f"accepted {bad!r}"
+        except ValueError:
+            pass
+    print("✅ extract_json finds JSON in fenced and chatty replies")
+
+
+if __name__ == "__main__":
+    test_event_loop_stays_responsive_during_parse()
+    test_cache_is_keyed_by_normalized_audience()
+    test_failures_fall_back_without_poisoning_the_cache()
+    test_extract_json_handles_fences_and_prose()
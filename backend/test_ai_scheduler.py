@@ -0,0 +1,275 @@
+"""
+Tests for the OpenAI request scheduler (no network: mocked transport)
+"""
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.services.ai_scheduler import AIRequestScheduler, Priority, QueueTimeout, estimate_tokens, parse_model_limits, parse_queue_waits
+from app.services.openai_client import OpenAIClient
+from app.services.rate_limit import TokenBucket
+
+
+def make_client(scheduler: AIRequestScheduler, handler):
+    openai = OpenAIClient("test-key", scheduler=scheduler)
+    openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    openai.rate_limiter = TokenBucket(rate=0)
+    return openai
+
+
+def reply(content: str = "ok", usage: dict = None, status: int = 200, headers: dict = None) -> httpx.Response:
+    body = {"choices": [{"message": {"content": content}}]}
+    if usage:
+        body["usage"] = usage
+    return httpx.Response(status, json=body, headers=headers)
+
+
+def test_interactive_requests_jump_the_queue():
+    scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0)
+    order = []
+
+    async def request(name: str, priority: str, hold: float = 0.0):
+        async with scheduler.slot("gpt-4o", 100, priority):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def run():
+        first = asyncio.create_task(request("running", "batch", hold=0.05))
+        await asyncio.sleep(0.01)
+        queued = [
+            asyncio.create_task(request("speculative", "speculative")),
+            asyncio.create_task(request("batch", "batch")),
+            asyncio.create_task(request("interactive", "interactive")),
+        ]
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(run())
+    assert order == ["running", "interactive", "batch", "speculative"]
+    stats = scheduler.stats()
+    assert stats["active"] == 0 and stats["queues"]["speculative"]["max_wait"] >= 0.04
+    print("✅ Queued requests run interactive first, then batch, then speculative")
+
+
+def test_raised_priority_moves_a_queued_request_up():
+    scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0)
+    order = []
+    picked = Priority("speculative")
+
+    async def request(name: str, priority, hold: float = 0.0):
+        async with scheduler.slot("gpt-4o", 100, priority):
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def run():
+        first = asyncio.create_task(request("running", "batch", hold=0.05))
+        await asyncio.sleep(0.01)
+        queued = [
+            asyncio.create_task(request("batch", "batch")),
+            asyncio.create_task(request("picked", picked)),
+            asyncio.create_task(request("speculative", "speculative")),
+        ]
+        await asyncio.sleep(0.01)
+        # The user is now waiting for it
+        picked.raise_to("interactive")
+        picked.raise_to("speculative")  # never lowered
+        await asyncio.gather(first, *queued)
+
+    asyncio.run(run())
+    assert order == ["running", "picked", "batch", "speculative"], order
+    assert picked.name == "interactive" and not picked._listeners
+    print("✅ A queued request whose priority is raised goes ahead of batch work")
+
+
+def test_concurrency_cap_and_cancelled_waiters():
+    scheduler = AIRequestScheduler(max_concurrency=4, rpm=0, tpm=0)
+    in_flight, peak = 0, 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return reply()
+
+    openai = make_client(scheduler, handler)
+
+    async def run():
+        results = await asyncio.gather(*(openai.chat([{"role": "user", "content": "hi"}]) for _ in range(20)))
+
+        # A waiter cancelled in the queue must not leak or swallow a slot
+        async with scheduler.slot("gpt-4o", 1):
+            waiter = asyncio.create_task(openai.chat([{"role": "user", "content": "hi"}]))
+            await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await openai.chat([{"role": "user", "content": "after"}])
+        await openai.aclose()
+        return results
+
+    results = asyncio.run(run())
+    assert results == ["ok"] * 20
+    assert peak == 4
+    assert scheduler.stats()["active"] == 0 and scheduler.stats()["waiting"] == 0
+    print(f"✅ 20 concurrent calls never exceeded {peak} in flight")
+
+
+def test_token_budget_waits_and_is_corrected_by_usage():
+    scheduler = AIRequestScheduler(max_concurrency=8, rpm=0, tpm=120)  # 2 tokens/s
+    payload = {"model": "gpt-4o", "messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 20}
+    estimated = estimate_tokens(payload)
+    assert estimated == len(json.dumps(payload["messages"])) // 4 + 20
+
+    async def run():
+        # The whole minute's budget is spent, so the next request waits ~0.5 s for 1 token
+        async with scheduler.slot("gpt-4o", 120):
+            pass
+        started = time.perf_counter()
+        async with scheduler.slot("gpt-4o", 1):
+            pass
+        waited = time.perf_counter() - started
+
+        # OpenAI says the first request only used 20 tokens: 100 go back into the bucket
+        await scheduler.record_usage("gpt-4o", 120, {"prompt_tokens": 15, "completion_tokens": 5, "total_tokens": 20})
+        started = time.perf_counter()
+        async with scheduler.slot("gpt-4o", 90):
+            pass
+        return waited, time.perf_counter() - started
+
+    waited, after_refund = asyncio.run(run())
+    assert 0.3 < waited < 1.5, f"waited {waited:.2f}s"
+    assert after_refund < 0.1, f"waited {after_refund:.2f}s after the refund"
+    model = scheduler.stats()["models"]["gpt-4o"]
+    assert model["requests"] == 3 and model["reported_tokens"] == 20 and model["tpm"] == 120
+    print(f"✅ TPM budget held a request {waited:.2f}s; reported usage refunded the over-estimate")
+
+
+def test_interactive_requests_go_first_under_token_pressure():
+    # Plenty of slots; the token budget (120/min, 2/s) is the bottleneck
+    scheduler = AIRequestScheduler(max_concurrency=8, rpm=0, tpm=120)
+    admitted = []
+
+    async def request(name: str, priority: str, tokens: int):
+        async with scheduler.slot("gpt-4o", tokens, priority):
+            admitted.append(name)
+
+    async def run():
+        async with scheduler.slot("gpt-4o", 120):  # the minute's budget is spent
+            pass
+        batch = [asyncio.create_task(request(f"batch-{i}", "batch", 1)) for i in range(3)]
+        await asyncio.sleep(0.05)
+        started = time.perf_counter()
+        await request("interactive", "interactive", 1)
+        waited = time.perf_counter() - started
+        # Batch is still waiting for its tokens plus the 10% it leaves for interactive work
+        for task in batch:
+            task.cancel()
+        await asyncio.gather(*batch, return_exceptions=True)
+        return waited
+
+    waited = asyncio.run(run())
+    assert admitted == ["interactive"], admitted
+    assert waited < 1.0, f"interactive waited {waited:.2f}s"
+    stats = scheduler.stats()
+    assert stats["models"]["gpt-4o"]["throttled"] >= 1 and stats["waiting"] == 0 and stats["active"] == 0
+    print(f"✅ Under TPM pressure the interactive request went ahead of queued batch work ({waited:.2f}s)")
+
+
+def test_queue_wait_is_bounded():
+    scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0, max_queue_wait={"interactive": 0.05})
+
+    async def run():
+        async with scheduler.slot("gpt-4o", 1, "batch"):
+            started = time.perf_counter()
+            try:
+                async with scheduler.slot("gpt-4o", 1):
+                    pass
+            except QueueTimeout:
+                return time.perf_counter() - started
+
+    waited = asyncio.run(run())
+    assert waited is not None and waited < 0.2
+    stats = scheduler.stats()
+    assert stats["queues"]["interactive"]["timeouts"] == 1 and stats["waiting"] == 0 and stats["active"] == 0
+    print(f"✅ A request that can't be admitted fails after {waited:.2f}s instead of hanging")
+
+
+def test_copy_and_filters_fall_back_when_not_admitted():
+    from app.services.ai_copy import AICopyService
+
+    scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0, max_queue_wait={"interactive": 0.05})
+    service = AICopyService("test-key")
+    service.openai = make_client(scheduler, lambda request: reply())
+    audience = "Zorblax wranglers on Mars"
+
+    async def run():
+        # Batch work holds the only slot for longer than interactive requests may wait
+        async with scheduler.slot("gpt-4o", 1, "batch"):
+            variants = await service.generate_email_copy("https://example.com", audience)
+            filters = await service.generate_supersearch_filters(audience, "https://example.com")
+        await service.aclose()
+        return variants, filters
+
+    variants, filters = asyncio.run(run())
+    assert variants == service._get_fallback_variants("https://example.com", audience)
+    assert filters == service._get_default_filters(audience)
+    assert scheduler.stats()["queues"]["interactive"]["timeouts"] == 2
+    print("✅ Requests the scheduler can't admit in time get fallback copy and default filters")
+
+
+def test_rate_limited_responses_are_retried():
+    scheduler = AIRequestScheduler(max_concurrency=2, rpm=0, tpm=0)
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(time.perf_counter())
+        if len(calls) == 1:
+            return reply(status=429, headers={"retry-after-ms": "100"})
+        return reply("done", usage={"total_tokens": 42})
+
+    openai = make_client(scheduler, handler)
+
+    async def run():
+        content = await openai.chat([{"role": "user", "content": "hi"}], model="gpt-4o-mini", priority="batch")
+        await openai.aclose()
+        return content
+
+    assert asyncio.run(run()) == "done"
+    assert len(calls) == 2 and calls[1] - calls[0] >= 0.09
+    stats = openai.stats()["scheduler"]
+    assert stats["rate_limited_retries"] == 1
+    assert stats["models"]["gpt-4o-mini"]["reported_tokens"] == 42
+    assert stats["queues"]["batch"]["admitted"] == 2
+    print("✅ A 429 waits out Retry-After and queues again instead of failing")
+
+
+def test_model_limits_and_priorities_are_validated():
+    assert parse_model_limits("gpt-4o=5000:800000, gpt-5=500:30000") == {"gpt-4o": (5000.0, 800000.0), "gpt-5": (500.0, 30000.0)}
+    scheduler = AIRequestScheduler(model_limits=parse_model_limits("gpt-5=500:30000"))
+    assert scheduler.budget("gpt-5").tpm == 30000 and scheduler.budget("gpt-4o").tpm == 150_000
+    assert parse_queue_waits("interactive=10, batch=600") == {"interactive": 10.0, "batch": 600.0}
+
+    async def run():
+        async with scheduler.slot("gpt-4o", 1, priority="urgent"):
+            pass
+
+    try:
+        asyncio.run(run())
+        assert False, "accepted an unknown priority"
+    except ValueError:
+        pass
+    print("✅ Per-model limits parse from OPENAI_MODEL_LIMITS; unknown priorities are rejected")
+
+
+if __name__ == "__main__":
+    test_interactive_requests_jump_the_queue()
+    test_raised_priority_moves_a_queued_request_up()
+    test_concurrency_cap_and_cancelled_waiters()
+    test_token_budget_waits_and_is_corrected_by_usage()
+    test_interactive_requests_go_first_under_token_pressure()
+    test_queue_wait_is_bounded()
+    test_copy_and_filters_fall_back_when_not_admitted()
+    test_rate_limited_responses_are_retried()
+    test_model_limits_and_priorities_are_validated()
@@ -0,0 +1,159 @@
+import asyncio
+import copy
+from app.services.cache import TTLCache
+from app.services.firebase_service import FirebaseService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeDoc:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeDocRef:
+    def __init__(self, store, doc_id):
+        self.store = store
+        self.doc_id = doc_id
+
+    def get(self):
+        self.store.reads += 1
+        doc = FakeDoc(self.doc_id, copy.deepcopy(self.store.docs.get(self.doc_id)))
+        if self.store.during_read:
+            self.store.during_read()  # a write landing after Firestore answered
+        return doc
+
+    def update(self, data):
+        self.store.docs[self.doc_id].update(data)
+
+    def delete(self):
+        self.store.docs.pop(self.doc_id, None)
+
+
+class FakeCollection:
+    def __init__(self, store):
+        self.store = store
+
+    def document(self, doc_id):
+        return FakeDocRef(self.store, doc_id)
+
+
+class FakeFirestore:
+    def __init__(self):
+        self.docs = {}
+        self.reads = 0
+        self.during_read = None
+
+    def collection(self, name):
+        return FakeCollection(self)
+
+
+def make_service():
+    service = FirebaseService.__new__(FirebaseService)
+    service.campaign_cache = TTLCache(maxsize=8, ttl=30)
+    service.campaign_versions = {}
+    service.db = FakeFirestore()
+    service.db.docs["camp_1"] = {"user_id": "u1", "url": "https://example.com", "status": "active", "stats": {"sent": 0}}
+    return service
+
+
+def test_ttl_cache_expiry_and_lru():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)  # evicts "b"
+    assert cache.get("b") is None
+    assert cache.evictions == 1
+
+    clock.now = 11
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    print(f"✅ TTLCache stats: {stats}")
+
+
+def test_get_campaign_read_through():
+    service = make_service()
+
+    async def run():
+        first = await service.get_campaign("u1", "camp_1")
+        second = await service.get_campaign("u1", "camp_1")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert service.db.reads == 1, "second read should be served from cache"
+    print(f"✅ Cache stats after two reads: {service.cache_stats()}")
+
+
+def test_writes_invalidate_campaign():
+    service = make_service()
+
+    async def run():
+        await service.get_campaign("u1", "camp_1")
+        updated = await service.update_campaign_status("camp_1", "paused")
+        assert updated["status"] == "paused"
+        await service.delete_campaign("camp_1")
+        return await service.get_campaign("u1", "camp_1")
+
+    assert asyncio.run(run()) is None
+    print("✅ Writes invalidated the cached campaign")
+
+
+def test_callers_cannot_corrupt_the_cached_campaign():
+    service = make_service()
+
+    async def run():
+        first = await service.get_campaign("u1", "camp_1")
+        first["stats"]["sent"] = 99
+        second = await service.get_campaign("u1", "camp_1")
+        second["stats"]["sent"] = 42
+        return await service.get_campaign("u1", "camp_1")
+
+    assert asyncio.run(run())["stats"] == {"sent": 0}
+    print("✅ Nested fields of a returned campaign are the caller's own copy")
+
+
+def test_read_that_raced_a_write_is_not_cached():
+    service = make_service()
+
+    def write():
+        service.db.during_read = None
+        service.db.docs["camp_1"]["status"] = "paused"
+        service._invalidate_campaign("camp_1")
+
+    async def run():
+        service.db.during_read = write
+        raced = await service.get_campaign("u1", "camp_1")
+        return raced, await service.get_campaign("u1", "camp_1")
+
+    raced, after = asyncio.run(run())
+    assert raced["status"] == "active"  # that read did start before the write
+    assert after["status"] == "paused", "the pre-write document must not be cached"
+    assert service.db.reads == 2
+    print("✅ A read that raced a write doesn't repopulate the cache")
+
+
+if __name__ == "__main__":
+    test_ttl_cache_expiry_and_lru()
+    test_get_campaign_read_through()
+    test_writes_invalidate_campaign()
+    test_callers_cannot_corrupt_the_cached_campaign()
+    test_read_that_raced_a_write_is_not_cached()
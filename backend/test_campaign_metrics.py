@@ -0,0 +1,181 @@
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+from app.services.campaign_metrics import CampaignMetrics
+from app.services.instantly import InstantlyService
+from app.services.webhook_events import WebhookDispatcher
+
+
+def webhook(event_type: str, lead: str, ts: str, **extra):
+    return {"event_type": event_type, "campaign_id": "camp_1", "lead_email": lead, "timestamp": ts, **extra}
+
+
+def test_counters_and_rates_update_on_write():
+    metrics = CampaignMetrics()
+    dispatcher = WebhookDispatcher(secret="s")
+    dispatcher.subscribe(("email_sent", "email_opened", "reply_received", "email_bounced"), metrics.ingest)
+
+    events = [webhook("email_sent", f"lead{i}@example.com", f"2026-10-19T10:0{i}:00Z") for i in range(4)]
+    events += [
+        webhook("email_opened", "lead0@example.com", "2026-10-19T11:00:00Z"),
+        webhook("email_opened", "LEAD0@example.com", "2026-10-19T11:05:00Z"),  # same lead opens twice
+        webhook("email_opened", "lead1@example.com", "2026-10-19T11:10:00Z"),
+        webhook("reply_received", "lead1@example.com", "2026-10-19T12:00:00Z"),
+        webhook("email_bounced", "lead3@example.com", "2026-10-19T10:04:00Z"),
+    ]
+
+    async def run():
+        for event in events + events:  # full redelivery
+            await dispatcher.dispatch(event)
+
+    asyncio.run(run())
+    analytics = metrics.get("camp_1")
+
+    assert (analytics["sent"], analytics["opened"], analytics["replied"], analytics["bounced"]) == (4, 2, 1, 1)
+    assert analytics["open_rate"] == 50.0 and analytics["reply_rate"] == 25.0
+    print(f"✅ Counters after replayed webhooks: {analytics}")
+
+
+def test_replays_are_idempotent_across_restarts():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "events.jsonl")
+        metrics = CampaignMetrics(path=path)
+        event = webhook("email_sent", "ada@example.com", "2026-10-19T10:00:00Z")
+        assert metrics.ingest(event) is True
+        assert metrics.ingest(event) is False
+
+        reloaded = CampaignMetrics(path=path)
+        assert reloaded.ingest(event) is False
+        assert reloaded.get("camp_1")["sent"] == 1
+
+
+def test_paged_pull_is_incremental():
+    metrics = CampaignMetrics()
+    pages = [
+        [{"id": "e1", "ue_type": 1, "lead": "a@x.com"}, {"id": "e2", "ue_type": 1, "lead": "b@x.com"}],
+        [{"id": "e3", "ue_type": 2, "lead": "a@x.com"}, {"id": "e4", "ue_type": 3, "lead": "a@x.com"}],
+    ]
+
+    async def emails(items):
+        for item in items:
+            yield item
+
+    async def run():
+        first = await metrics.pull(emails(pages[0] + pages[1]), "camp_2")
+        # Overlapping re-pull of the last page adds nothing
+        again = await metrics.pull(emails(pages[1]), "camp_2")
+        return first, again
+
+    first, again = asyncio.run(run())
+    assert (first, again) == (3, 0)
+    assert metrics.pull_cursor("camp_2") == "e4"
+    assert metrics.get("camp_2")["sent"] == 2 and metrics.get("camp_2")["reply_rate"] == 50.0
+
+
+def test_pull_cursor_is_the_newest_email_and_pages_ascend():
+    metrics = CampaignMetrics()
+    # Newest-first, as /api/v2/emails returns without sort_order
+    descending = [
+        {"id": "e3", "ue_type": 2, "lead": "a@x.com", "timestamp_created": "2026-10-19T12:00:00Z"},
+        {"id": "e2", "ue_type": 1, "lead": "b@x.com", "timestamp_created": "2026-10-19T11:00:00Z"},
+        {"id": "e1", "ue_type": 1, "lead": "a@x.com", "timestamp_created": "2026-10-19T10:00:00Z"},
+    ]
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(dict(request.url.params))
+        return httpx.Response(200, json={"items": [], "next_starting_after": None})
+
+    async def emails(items):
+        for item in items:
+            yield item
+
+    async def run():
+        added = await metrics.pull(emails(descending), "camp_3")
+        instantly = InstantlyService("test-key")
+        instantly._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        async for _ in instantly.iter_campaign_emails("camp_3", starting_after=metrics.pull_cursor("camp_3")):
+            pass
+        await instantly.aclose()
+        return added
+
+    assert asyncio.run(run()) == 3
+    assert metrics.pull_cursor("camp_3") == "e3", "the next pull starts after the newest email"
+    assert requests == [{"campaign_id": "camp_3", "limit": "100", "sort_order": "asc", "starting_after": "e3"}]
+    print("✅ The pull cursor is the newest email and pages are requested oldest-first")
+
+
+def test_events_without_a_lead_and_bounded_keys():
+    metrics = CampaignMetrics(max_keys=3)
+    sends = [{"event_type": "email_sent", "campaign_id": "camp_4", "event_id": f"evt_{i}"} for i in range(5)]
+    assert [metrics.ingest(event) for event in sends] == [True] * 5
+    assert metrics.ingest(sends[-1]) is False, "a redelivery is still a replay"
+    assert metrics.get("camp_4")["sent"] == 5 and metrics.get("camp_4")["events"] == 5
+    assert len(metrics._campaigns["camp_4"].event_keys) == 3
+    assert metrics.get("camp_4")["updated_at"].endswith("+00:00")
+    print("✅ Lead-less events count separately; idempotency keys are capped per campaign")
+
+
+def test_webhook_and_pulled_copies_of_an_event_count_once():
+    metrics = CampaignMetrics()
+    dispatcher = WebhookDispatcher(secret="s")
+    dispatcher.subscribe(("email_sent", "reply_received"), metrics.ingest)
+
+    async def emails(items):
+        for item in items:
+            yield item
+
+    async def run():
+        # Webhook deliveries carry their own id and timestamp...
+        await dispatcher.dispatch(webhook("email_sent", "Ada@x.com", "2026-10-19T10:00:01Z", id="wh_1", step=1))
+        await dispatcher.dispatch(webhook("reply_received", "ada@x.com", "2026-10-19T12:00:03Z", id="wh_2", step=1))
+        # ...the pulled emails have another id and timestamp for the same send and reply
+        return await metrics.pull(emails([
+            {"id": "e1", "ue_type": 1, "lead": "ada@x.com", "step": 1, "timestamp_created": "2026-10-19T10:00:00Z"},
+            {"id": "e2", "ue_type": 2, "lead": "ada@x.com", "step": 1, "timestamp_created": "2026-10-19T12:00:00Z"},
+            {"id": "e3", "ue_type": 1, "lead": "ada@x.com", "step": 2, "timestamp_created": "2026-10-22T10:00:00Z"},
+        ]), "camp_1")
+
+    added = asyncio.run(run())
+    analytics = metrics.get("camp_1")
+    assert added == 1, "only the step 2 send is new"
+    assert (analytics["sent"], analytics["replied"]) == (2, 1)
+
+
+def test_partial_counters_are_reconciled_with_instantly():
+    metrics = CampaignMetrics(live=True)
+
+    async def nothing():
+        return
+        yield
+
+    # An empty pull doesn't create counters that would shadow Instantly's totals
+    assert asyncio.run(metrics.pull(nothing(), "camp_old")) == 0
+    assert metrics.get("camp_old") is None and not metrics.is_complete("camp_old")
+
+    # Webhooks arrived for a campaign launched before they were configured: a lower bound only
+    metrics.ingest(webhook("email_sent", "new@x.com", "2026-10-19T10:00:00Z", campaign_id="camp_old"))
+    metrics.ingest(webhook("reply_received", "new@x.com", "2026-10-19T11:00:00Z", campaign_id="camp_old"))
+    upstream = {"sent": 100, "opened": 40, "clicked": 4, "replied": 0, "bounced": 2}
+    merged = metrics.reconcile("camp_old", upstream)
+    assert not metrics.is_complete("camp_old")
+    assert (merged["sent"], merged["opened"], merged["replied"], merged["reply_rate"]) == (100, 40, 1, 1.0)
+
+    # A campaign tracked from launch is served from its counters
+    assert metrics.track("camp_new") and metrics.is_complete("camp_new")
+    assert metrics.get("camp_new")["sent"] == 0
+    assert CampaignMetrics(live=False).track("camp_new") is False
+    print(f"✅ Partial counters reconciled: {merged}")
+
+
+if __name__ == "__main__":
+    test_counters_and_rates_update_on_write()
+    test_replays_are_idempotent_across_restarts()
+    test_paged_pull_is_incremental()
+    test_pull_cursor_is_the_newest_email_and_pages_ascend()
+    test_events_without_a_lead_and_bounded_keys()
+    test_webhook_and_pulled_copies_of_an_event_count_once()
+    test_partial_counters_are_reconciled_with_instantly()
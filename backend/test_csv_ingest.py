@@ -0,0 +1,108 @@
+import asyncio
+import time
+from app.services.csv_ingest import CSVLeadParser, UploadProgress, iter_csv_lead_batches
+
+
+SAMPLE_CSV = (
+    "\ufeffEmail Address,First Name,Company,Notes\r\n"
+    "ada@example.com,Ada,\"Engines, Ltd\",\"likes\nmulti-line notes\"\r\n"
+    "ADA@example.com ,Ada,Engines,dup\r\n"
+    "not-an-email,Bob,Nope,\r\n"
+    ",,,\r\n"
+    "zoë@example.com,Zoë,Café \"Crème\",\r\n"
+    "grace@example.com,Grace,Navy,last row without newline"
+).encode("utf-8")
+
+
+def parse_in_chunks(data: bytes, size: int):
+    parser = CSVLeadParser()
+    leads = []
+    for i in range(0, len(data), size):
+        leads.extend(parser.feed(data[i:i + size]))
+    leads.extend(parser.close())
+    return parser, leads
+
+
+def test_parser_handles_any_chunk_boundary():
+    _, expected = parse_in_chunks(SAMPLE_CSV, len(SAMPLE_CSV))
+
+    # Every split point, including inside quotes, quoted newlines and multi-byte chars
+    for size in range(1, 40):
+        parser, leads = parse_in_chunks(SAMPLE_CSV, size)
+        assert leads == expected, f"chunk size {size}"
+
+    assert [l["email"] for l in expected] == ["ada@example.com", "zoë@example.com", "grace@example.com"]
+    assert expected[0]["company"] == "Engines, Ltd"
+    assert expected[0]["custom_variables"] == {"Notes": "likes\nmulti-line notes"}
+    assert parser.stats() == {"rows": 5, "valid": 3, "invalid": 1, "duplicates": 1}
+    print(f"✅ CSV parsed identically at every chunk size: {parser.stats()}")
+
+
+def test_missing_email_column_is_rejected():
+    parser = CSVLeadParser()
+    try:
+        parser.feed(b"name,company\nAda,Engines\n")
+    except ValueError as e:
+        assert "no email column" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+async def _stream(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+        await asyncio.sleep(0)
+
+
+def test_100k_rows_stream_in_batches():
+    rows = ["email,first_name,last_name,company,title"]
+    rows += [f"lead{i % 95_000}@example.com,First{i},Last{i},Company {i},CTO" for i in range(100_000)]
+    data = ("\n".join(rows) + "\n").encode("utf-8")
+
+    async def run():
+        parser = CSVLeadParser()
+        sizes = []
+        async for batch in iter_csv_lead_batches(_stream(data, 64 * 1024), parser, batch_size=1000):
+            sizes.append(len(batch))
+        return parser, sizes
+
+    start = time.perf_counter()
+    parser, sizes = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert sum(sizes) == 95_000 and max(sizes) == 1000
+    assert parser.stats()["duplicates"] == 5_000
+    print(f"✅ 100k-row CSV ({len(data) / 1e6:.1f} MB) streamed in {len(sizes)} batches in {elapsed:.2f}s")
+
+
+def test_progress_watchers_see_each_update():
+    progress = UploadProgress()
+
+    async def run():
+        seen = []
+
+        async def watcher():
+            async for state in progress.watch("up_1", heartbeat=0.05):
+                if state:
+                    seen.append((state["status"], state.get("uploaded")))
+
+        task = asyncio.create_task(watcher())
+        await asyncio.sleep(0.01)  # watcher subscribes before the upload starts
+        await progress.update("up_1", status="in_progress", uploaded=0)
+        await asyncio.sleep(0.01)
+        await progress.update("up_1", uploaded=500)
+        await asyncio.sleep(0.01)
+        await progress.update("up_1", status="completed", uploaded=700)
+        await asyncio.wait_for(task, timeout=1)
+        return seen
+
+    seen = asyncio.run(run())
+    assert seen == [("in_progress", 0), ("in_progress", 500), ("completed", 700)]
+    print(f"✅ Progress watcher received {len(seen)} updates")
+
+
+if __name__ == "__main__":
+    test_parser_handles_any_chunk_boundary()
+    test_missing_email_column_is_rejected()
+    test_100k_rows_stream_in_batches()
+    test_progress_watchers_see_each_update()
@@ -0,0 +1,67 @@
+import asyncio
+from app.services.domain_service import DomainService
+
+
+class FakeCheckService(DomainService):
+    """Availability endpoint stub: .com names are taken, everything else is free"""
+
+    def __init__(self, fail_chunk=None):
+        super().__init__("test-key", check_concurrency=3)
+        self.rate_limiter.rate = 0
+        self.chunks = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.fail_chunk = fail_chunk
+
+    async def _post_domain_check(self, client, domains):
+        assert len(domains) <= 50
+        self.chunks.append(list(domains))
+        fail = self.fail_chunk is not None and len(self.chunks) == self.fail_chunk
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if fail:
+            raise Exception("Failed to check domain availability: 429")
+        return [{"domain": d, "is_available": not d.endswith(".com")} for d in domains]
+
+
+def suggestions(n):
+    return [f"brand{i}.{'com' if i % 2 else 'org'}" for i in range(n)]
+
+
+def test_bulk_check_chunks_concurrently_and_caches():
+    service = FakeCheckService()
+    domains = suggestions(132)  # two TLDs' worth of similar-domain suggestions
+
+    result = asyncio.run(service.check_domain_availability(domains + ["Brand0.ORG"]))
+    assert list(result) == domains
+    assert result["brand0.org"] is True and result["brand1.com"] is False
+    assert [len(c) for c in service.chunks] == [50, 50, 32]
+    assert 1 < service.max_in_flight <= 3
+
+    # Re-check within the TTL: only new names go upstream
+    again = asyncio.run(service.check_domain_availability(domains[:10] + ["new.org"]))
+    assert len(again) == 11 and service.chunks[-1] == ["new.org"]
+    print(f"✅ {len(result)} domains in {len(service.chunks) - 1} chunks, cache: {service.availability_cache.stats()}")
+
+
+def test_failed_chunk_keeps_partial_results():
+    service = FakeCheckService(fail_chunk=2)
+    domains = suggestions(120)
+
+    try:
+        asyncio.run(service.check_domain_availability(domains))
+        raise AssertionError("expected the failed chunk to raise")
+    except Exception as e:
+        assert "429" in str(e)
+
+    # Retry only sends the chunk that failed
+    service.fail_chunk = None
+    retried = asyncio.run(service.check_domain_availability(domains))
+    assert len(retried) == 120 and len(service.chunks[-1]) == 50
+
+
+if __name__ == "__main__":
+    test_bulk_check_chunks_concurrently_and_caches()
+    test_failed_chunk_keeps_partial_results()
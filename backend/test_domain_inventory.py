@@ -0,0 +1,86 @@
+import asyncio
+from app.services.domain_inventory import DomainInventory
+from app.services.domain_service import DomainService
+
+
+class PagedDomainService(DomainService):
+    """DomainService whose list endpoint serves a fixed set of accounts in pages"""
+
+    def __init__(self, accounts):
+        super().__init__("test-key")
+        self.accounts = accounts
+        self.requests = 0
+
+    async def list_ordered_accounts(self, limit=10, starting_after=None, with_passwords=False):
+        self.requests += 1
+        await asyncio.sleep(0)
+        start = int(starting_after or 0)
+        items = self.accounts[start:start + limit]
+        more = start + limit < len(self.accounts)
+        return {"items": items, "next_starting_after": str(start + limit) if more else None}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_accounts(n):
+    tlds = ["com", "org", "co", "io"]
+    # Two accounts per domain; every third domain is not pre-warmed
+    return [
+        {"email": f"user{j}@brand{i}.{tlds[i % 4]}", "domain": f"brand{i}.{tlds[i % 4]}", "is_pre_warmed_up": i % 3 != 0}
+        for i in range(n // 2) for j in range(2)
+    ]
+
+
+def test_inventory_reads_every_page():
+    service = PagedDomainService(make_accounts(1000))
+    inventory = DomainInventory(service)
+
+    domains = asyncio.run(inventory.query(extensions=["com", "org", "co"]))
+    expected = sorted(
+        f"brand{i}.{['com', 'org', 'co', 'io'][i % 4]}" for i in range(500) if i % 3 != 0 and i % 4 != 3
+    )
+    assert domains == expected
+    assert service.requests == 10  # 1000 accounts / 100 per page
+    assert inventory.get("brand1.org") == {"domain": "brand1.org", "tld": "org", "accounts": 2, "prewarmed": True}
+
+    # The unindexed path is no longer truncated to the first page either
+    direct = asyncio.run(service.get_prewarmed_domains(extensions=["com", "org", "co"]))
+    assert sorted(direct) == expected
+    print(f"✅ Indexed {inventory.stats()['domains']} domains from {inventory.stats()['accounts']} accounts")
+
+
+def test_queries_served_from_index_until_ttl():
+    service = PagedDomainService(make_accounts(40))
+    clock = FakeClock()
+    inventory = DomainInventory(service, ttl=300, clock=clock)
+
+    async def run():
+        first = await asyncio.gather(*(inventory.query(search="BRAND1") for _ in range(5)))
+        requests_after_load = service.requests
+        await inventory.query(extensions=["io"], prewarmed_only=False)
+        assert service.requests == requests_after_load
+
+        # Stale: the stale index answers and a rebuild runs in the background
+        service.accounts = service.accounts + [{"domain": "fresh.com", "is_pre_warmed_up": True}]
+        clock.now = 301
+        stale = await inventory.query(search="fresh")
+        await inventory._refresh_task
+        fresh = await inventory.query(search="fresh")
+        return first, stale, fresh
+
+    first, stale, fresh = asyncio.run(run())
+    assert all(result == first[0] for result in first)
+    assert first[0] == ["brand1.org", "brand10.co", "brand11.io", "brand13.org", "brand14.co", "brand16.com", "brand17.org", "brand19.io"]
+    assert stale == [] and fresh == ["fresh.com"]
+    assert inventory.refreshes == 2
+
+
+if __name__ == "__main__":
+    test_inventory_reads_every_page()
+    test_queries_served_from_index_until_ttl()
@@ -0,0 +1,100 @@
+import asyncio
+from app.services.enrichment_watcher import EnrichmentWatcher
+from app.services.lead_normalizer import LeadRecord
+from app.services.state_backend import MemoryStateBackend
+
+
+class ScriptedInstantly:
+    """
+    Each upstream read enriches `step` more of the list's ten leads
+    """
+
+    def __init__(self, step: int = 2, reverse: bool = False):
+        self.calls = 0
+        self.step = step
+        self.reverse = reverse  # enrich from the end of the list (another worker seeing them in another order)
+
+    async def get_lead_records_from_list(self, lead_list_id: str, limit: int = 100):
+        self.calls += 1
+        enriched = min(self.step * self.calls, 10)
+        return [
+            LeadRecord(f"lead_{i}", f"lead{i}@example.com" if (9 - i if self.reverse else i) < enriched else None,
+                       "Ada", "Lovelace", "Engines", "example.com", None)
+            for i in range(10)
+        ]
+
+
+def test_waiters_share_one_poll_loop_and_get_deltas():
+    instantly = ScriptedInstantly()
+    watcher = EnrichmentWatcher(instantly, poll_interval=0.02, idle_timeout=0.05)
+
+    async def client(since=0, target=None):
+        return await watcher.wait("list_1", since=since, target=target, timeout=1.0)
+
+    async def run():
+        first = await asyncio.gather(*[client() for _ in range(20)])
+        follow_up = await client(since=first[0]["cursor"])
+        done = await client(since=follow_up["cursor"], target=10)
+        await asyncio.sleep(0.2)  # idle watcher shuts its loop down
+        return first, follow_up, done
+
+    first, follow_up, done = asyncio.run(run())
+
+    assert all(r["cursor"] == 2 for r in first)
+    assert [l["id"] for l in first[0]["new_leads"]] == ["lead_0", "lead_1"]
+    assert [l["id"] for l in follow_up["new_leads"]] == ["lead_2", "lead_3"]
+    assert done["target_reached"] and done["cursor"] == 10
+    assert len(done["new_leads"]) == 10 - follow_up["cursor"]
+    assert watcher.stats() == {}
+
+    # 20 concurrent waiters + follow-ups cost one read per poll interval, not one per client
+    assert instantly.calls <= 8
+    print(f"✅ 22 long-polls served by {instantly.calls} upstream reads")
+
+
+def test_wait_times_out_without_changes():
+    class Idle:
+        async def get_lead_records_from_list(self, lead_list_id, limit=100):
+            return []
+
+    watcher = EnrichmentWatcher(Idle(), poll_interval=0.01, idle_timeout=0)
+
+    async def run():
+        result = await watcher.wait("list_1", timeout=0.05)
+        await asyncio.sleep(0.05)
+        return result
+
+    result = asyncio.run(run())
+    assert result["changed"] is False and result["new_leads"] == [] and result["cursor"] == 0
+
+
+def test_cursor_works_across_workers():
+    state = MemoryStateBackend()
+    state.shared = True  # stands in for Redis: one state backend, several workers
+    workers = [
+        EnrichmentWatcher(ScriptedInstantly(), state=state, poll_interval=0.01, idle_timeout=0.05),
+        EnrichmentWatcher(ScriptedInstantly(step=3, reverse=True), state=state, poll_interval=0.01, idle_timeout=0.05)
+    ]
+
+    async def run():
+        seen, cursor, turn = [], 0, 0
+        while cursor < 10:
+            # Each follow-up lands on the other worker
+            result = await workers[turn % 2].wait("list_1", since=cursor, timeout=1.0)
+            assert result["changed"], f"stalled at cursor {cursor}"
+            seen += [lead["id"] for lead in result["new_leads"]]
+            cursor = result["cursor"]
+            turn += 1
+        for watcher in workers:
+            await watcher.aclose()
+        return seen, turn
+
+    seen, polls = asyncio.run(run())
+    assert sorted(seen) == sorted(f"lead_{i}" for i in range(10)), seen
+    print(f"✅ {polls} long-polls alternating between workers got every lead once")
+
+
+if __name__ == "__main__":
+    test_waiters_share_one_poll_loop_and_get_deltas()
+    test_wait_times_out_without_changes()
+    test_cursor_works_across_workers()
@@ -0,0 +1,118 @@
+"""
+Tests for the local ICP -> SuperSearch filter compiler (no network)
+"""
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from app.services.ai_copy import AICopyService
+from app.services.icp_filter_compiler import VALID_INDUSTRIES, ICPFilterCompiler, INDUSTRY_TERMS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_common_phrasings_compile_to_filters():
+    compiler = ICPFilterCompiler()
+    expected = {
+        "CTOs at Series A SaaS startups in San Francisco": {
+            "locations": [{"city": "San Francisco", "state": "California", "country": "United States"}],
+            "employee_count": ["0 - 25", "25 - 100"],
+            "title": {"include": ["CTO"]},
+            "industry": {"include": ["Software & Internet"]},
+            "funding_type": ["series_a"],
+        },
+        "Heads of HR at construction companies in the UK with 100-500 employees": {
+            "locations": [{"city": "", "state": "", "country": "United Kingdom"}],
+            "employee_count": ["100 - 250", "250 - 1000"],
+            "title": {"include": ["Head of HR"]},
+            "industry": {"include": ["Real Estate & Construction"]},
+        },
+        "VP of Marketing at enterprise software companies with $10M-$50M revenue": {
+            "employee_count": ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"],
+            "revenue": ["$10 - 50M"],
+            "title": {"include": ["VP of Marketing"]},
+            "industry": {"include": ["Software & Internet"]},
+        },
+        "Founders and CEOs at seed to Series B startups with 10-100 employees": {
+            "employee_count": ["0 - 25", "25 - 100"],
+            "title": {"include": ["Founder", "CEO"]},
+            "funding_type": ["seed", "series_a", "series_b"],
+        },
+        "Marketing VPs in New York, NY at enterprise companies": {
+            "locations": [{"city": "New York", "state": "New York", "country": "United States"}],
+            "employee_count": ["1K - 10K", "10K - 50K", "50K - 100K", "> 100K"],
+            "title": {"include": ["VP of Marketing"]},
+        },
+    }
+    for text, filters in expected.items():
+        result = compiler.compile(text)
+        assert result.filters == filters, f"{text}: {json.dumps(result.filters)}"
+        assert compiler.is_confident(result) and not result.unmatched
+
+    # A title-implied level must not exclude the other titles
+    mixed = compiler.compile("VPs of Sales and Chief Revenue Officers at enterprise companies")
+    assert "level" not in mixed.filters
+    assert compiler.compile("Chief Technology Officers at SaaS companies").filters["level"] == ["Chief X Officer (CxO)"]
+    print(f"✅ {len(expected)} common phrasings compile to the expected filters")
+
+
+def test_unknown_descriptions_have_low_confidence():
+    compiler = ICPFilterCompiler()
+    for text in ("Companies that recently adopted Kubernetes", "Teams migrating off legacy ERP systems",
+                 "Compliance officers at community banks in the Southeast"):
+        result = compiler.compile(text)
+        assert not compiler.is_confident(result), f"{text}: {result.confidence}"
+        assert result.unmatched
+    # Place or size alone is nothing to search on
+    assert compiler.compile("Companies in London with 50 employees").confidence == 0.0
+    assert all(industry in VALID_INDUSTRIES for industries in INDUSTRY_TERMS.values() for industry in industries)
+    print("✅ Unknown vocabulary lowers confidence; every industry value is valid")
+
+
+def test_corpus_hit_rate_and_latency():
+    with open(os.path.join(HERE, "icp_corpus.txt"), encoding="utf-8") as f:
+        corpus = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    compiler = ICPFilterCompiler()
+
+    started = time.perf_counter()
+    results = [compiler.compile(text) for text in corpus]
+    per_compile = (time.perf_counter() - started) / len(corpus)
+
+    hit_rate = sum(compiler.is_confident(result) for result in results) / len(corpus)
+    assert hit_rate >= 0.75, f"hit rate {hit_rate:.0%}"
+    assert per_compile < 0.005, f"{per_compile * 1e6:.0f} µs per compile"
+    print(f"✅ Corpus: {hit_rate:.0%} compiled locally, {per_compile * 1e6:.0f} µs each")
+
+
+def test_generate_supersearch_filters_only_calls_model_on_miss():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        content = '{"title": {"include": ["Platform Engineer"]}, "keyword_filter": {"include": ["kubernetes"], "exclude": ""}}'
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    service = AICopyService("test-key")
+    service.openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        local = await service.generate_supersearch_filters("CEOs at cybersecurity companies", "example.com")
+        remote = await service.generate_supersearch_filters("Companies that recently adopted Kubernetes", "example.com")
+        await service.aclose()
+        return local, remote
+
+    local, remote = asyncio.run(run())
+    assert local == {"title": {"include": ["CEO"]}, "industry": {"include": ["Software & Internet"]}}
+    assert remote["keyword_filter"]["include"] == ["kubernetes"]
+    assert len(requests) == 1
+    print("✅ Confident compiles skip the model; low-confidence ones still use it")
+
+
+if __name__ == "__main__":
+    test_common_phrasings_compile_to_filters()
+    test_unknown_descriptions_have_low_confidence()
+    test_corpus_hit_rate_and_latency()
+    test_generate_supersearch_filters_only_calls_model_on_miss()
@@ -0,0 +1,75 @@
+import os
+import tempfile
+from app.services.lead_dedup import BloomFilter, LeadDedupIndex
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=5_000, error_rate=0.01)
+    emails = [f"lead{i}@example.com" for i in range(5_000)]
+    for email in emails:
+        bloom.add(email)
+
+    assert all(email in bloom for email in emails)
+
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(5_000))
+    rate = false_positives / 5_000
+    assert rate < 0.03, f"false-positive rate too high: {rate}"
+    print(f"✅ Bloom filter: {len(bloom.bits)} bytes, false-positive rate {rate:.4f}")
+
+
+def test_partition_filters_per_campaign():
+    index = LeadDedupIndex()
+    index.record(["Ada@Example.com", "grace@example.com"], campaign_id="camp_1")
+
+    batch = [
+        {"email": "ada@example.com"},
+        {"email": "linus@example.com"},
+        {"email": "LINUS@example.com "},  # duplicate within batch
+        {"email": None},
+    ]
+
+    new_for_camp_1, skipped, invalid = index.partition(batch, campaign_id="camp_1")
+    assert [l["email"] for l in new_for_camp_1] == ["linus@example.com"]
+    assert len(skipped) == 2
+    assert invalid == [{"email": None}]
+
+    # Same leads are new for a different campaign and for a lead list
+    new_for_camp_2, _, _ = index.partition(batch, campaign_id="camp_2")
+    assert len(new_for_camp_2) == 2
+    new_for_list, _, _ = index.partition(batch, lead_list_id="list_1")
+    assert len(new_for_list) == 2
+    print(f"✅ Dedup index stats: {index.stats()}")
+
+
+def test_list_uploads_skip_leads_the_list_already_has():
+    index = LeadDedupIndex()
+    assert index.record(["ada@example.com", "grace@example.com"], lead_list_id="list_1") == 2
+
+    batch = [{"email": "Ada@example.com"}, {"email": "linus@example.com"}, {"email": ""}]
+    new, skipped, invalid = index.partition(batch, lead_list_id="list_1")
+    assert [l["email"] for l in new] == ["linus@example.com"]
+    assert len(skipped) == 1 and len(invalid) == 1
+
+    # Other lists and campaigns still get them
+    assert not index.contains("ada@example.com", lead_list_id="list_2")
+    assert not index.contains("ada@example.com", campaign_id="camp_1")
+    print("✅ Lead list uploads are filtered per list")
+
+
+def test_index_persists_and_grows():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "leads.jsonl")
+        index = LeadDedupIndex(path=path, capacity=10)
+        index.record([f"lead{i}@example.com" for i in range(100)], campaign_id="camp_1")
+
+        reloaded = LeadDedupIndex(path=path, capacity=10)
+        assert all(reloaded.contains(f"lead{i}@example.com", "camp_1") for i in range(100))
+        assert not reloaded.contains("lead100@example.com", "camp_1")
+    print("✅ Dedup index reloads from disk and resizes its Bloom filters")
+
+
+if __name__ == "__main__":
+    test_bloom_filter_has_no_false_negatives()
+    test_partition_filters_per_campaign()
+    test_list_uploads_skip_leads_the_list_already_has()
+    test_index_persists_and_grows()
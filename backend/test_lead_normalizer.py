@@ -0,0 +1,137 @@
+import time
+from app.services.lead_normalizer import (
+    LeadRecord,
+    canonicalize_linkedin_url,
+    linkedin_profile_id,
+    normalize_leads,
+)
+
+
+def make_raw_leads(n: int):
+    """
+    Raw /api/v2/leads/list items in the shapes Instantly actually returns
+    """
+    leads = []
+    for i in range(n):
+        payload = {
+            "jobTitle": "VP Engineering",
+            "location": "London, United Kingdom",
+            "city": "London",
+            "country": "United Kingdom",
+        }
+        if i % 3 == 0:
+            payload["linkedIn"] = f"uk.linkedin.com/in/lead-{i}/?trk=public"
+        elif i % 3 == 1:
+            payload["linkedIn"] = f"https://www.linkedin.com/in/lead-{i}"
+        leads.append({
+            "id": f"lead_{i}",
+            "email": f" Lead{i}@Example.com" if i % 50 else "not-an-email",
+            "first_name": "Ada",
+            "last_name": "Lovelace",
+            "company_name": "Analytical Engines",
+            "company_domain": "example.com",
+            "payload": payload,
+        })
+    return leads
+
+
+def legacy_pipeline(raw_leads):
+    """
+    The three separate conversions this stage replaced (list fetch, bulk create, LinkedIn)
+    """
+    enriched = []
+    for lead in raw_leads:
+        item = {
+            'id': lead.get('id'), 'email': lead.get('email'),
+            'first_name': lead.get('first_name'), 'last_name': lead.get('last_name'),
+            'company_name': lead.get('company_name'), 'company_domain': lead.get('company_domain'),
+            'phone': lead.get('phone'),
+        }
+        payload = lead.get('payload', {})
+        if payload:
+            item.update({
+                'title': payload.get('jobTitle'), 'location': payload.get('location'),
+                'linkedin': payload.get('linkedIn'), 'city': payload.get('city'),
+                'state': payload.get('state'), 'country': payload.get('country'),
+            })
+        enriched.append(item)
+
+    campaign_leads = []
+    for lead in enriched:
+        data = {"email": lead.get("email"), "campaign_id": "camp"}
+        for src, dst in (("first_name", "first_name"), ("last_name", "last_name"),
+                         ("company_name", "company"), ("title", "title"), ("linkedin_url", "linkedin")):
+            if lead.get(src):
+                data[dst] = lead.get(src)
+        campaign_leads.append(data)
+
+    linkedin = []
+    for lead in enriched:
+        url = lead.get("linkedin_url") or lead.get("linkedin") or lead.get("personalization", {}).get("linkedin") or ""
+        if url and not url.startswith("http"):
+            url = f"https://www.{url}" if url.startswith("linkedin.com") else f"https://{url}"
+        if url:
+            linkedin.append(url)
+    return campaign_leads, linkedin
+
+
+def test_normalize_leads_maps_fields_once():
+    records = normalize_leads(make_raw_leads(3) + [{"id": "bare", "email": None}])
+
+    assert isinstance(records[0], LeadRecord)
+    assert records[0].email is None  # "not-an-email" fails validation
+    assert records[1].email == "lead1@example.com"
+    assert records[0].title == "VP Engineering"
+    assert records[0].linkedin == "https://www.linkedin.com/in/lead-0"
+    assert records[2].linkedin is None
+    assert records[3].email is None and records[3].title is None
+
+    campaign_lead = records[1].to_campaign_lead("camp_1", source_list_id="list_1")
+    assert campaign_lead["company"] == "Analytical Engines"
+    assert campaign_lead["email"] == "lead1@example.com"
+    assert campaign_lead["linkedin"] == "https://www.linkedin.com/in/lead-1"
+    assert campaign_lead["custom_variables"] == {"source": "supersearch", "source_list_id": "list_1"}
+
+    assert set(records[0].to_dict()) >= {"email", "company_name", "title", "linkedin", "country"}
+    print("✅ Raw leads normalized into LeadRecords")
+
+
+def test_linkedin_canonicalization():
+    canonical = "https://www.linkedin.com/in/jane-doe"
+    for url in ("linkedin.com/in/jane-doe", "www.linkedin.com/in/jane-doe/",
+                "http://uk.linkedin.com/in/jane-doe?trk=abc", canonical):
+        assert canonicalize_linkedin_url(url) == canonical, url
+
+    assert canonicalize_linkedin_url("https://example.com/in/jane") is None
+    assert linkedin_profile_id(canonical) == "jane-doe"
+    assert linkedin_profile_id("https://www.linkedin.com/company/acme") is None
+    print("✅ LinkedIn URLs canonicalized")
+
+
+def benchmark_normalization(n: int = 100_000):
+    raw_leads = make_raw_leads(n)
+
+    start = time.perf_counter()
+    legacy_pipeline(raw_leads)
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    records = normalize_leads(raw_leads)
+    [r.to_campaign_lead("camp") for r in records]
+    [r.linkedin for r in records if r.linkedin]
+    normalized_s = time.perf_counter() - start
+
+    print(f"📊 {n:,} leads: legacy 3-pass {legacy_s:.3f}s, normalized stage {normalized_s:.3f}s")
+    return records
+
+
+def test_benchmark_100k_leads():
+    records = benchmark_normalization(100_000)
+    assert len(records) == 100_000
+    assert sum(r.email is None for r in records) == 2_000
+
+
+if __name__ == "__main__":
+    test_normalize_leads_maps_fields_once()
+    test_linkedin_canonicalization()
+    benchmark_normalization(100_000)
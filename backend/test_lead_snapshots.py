@@ -0,0 +1,53 @@
+from app.services.lead_normalizer import LeadRecord
+from app.services.lead_snapshots import LeadSnapshotStore
+
+
+def make_page(enriched: int, total: int = 500, title: str = "CTO"):
+    return [
+        LeadRecord(f"lead_{i}", f"lead{i}@example.com" if i < enriched else None,
+                   "Ada", "Lovelace", "Engines", "example.com", None, title=title)
+        for i in range(total)
+    ]
+
+
+def test_since_cursor_returns_only_new_or_changed_leads():
+    store = LeadSnapshotStore()
+
+    full, cursor_1, is_delta = store.diff("list_1", make_page(100))
+    assert not is_delta and len(full) == 500
+
+    # 50 more leads get their email
+    delta, cursor_2, is_delta = store.diff("list_1", make_page(150), since=cursor_1)
+    assert is_delta and [r.id for r in delta] == [f"lead_{i}" for i in range(100, 150)]
+
+    # Settled list: nothing to send
+    delta, cursor_3, _ = store.diff("list_1", make_page(150), since=cursor_2)
+    assert delta == [] and cursor_3 == cursor_2
+
+    # A field change on an existing lead counts as changed
+    page = make_page(150)
+    page[3].title = "CEO"
+    delta, _, _ = store.diff("list_1", page, since=cursor_3)
+    assert [r.id for r in delta] == ["lead_3"]
+
+    # An older client cursor still sees everything it missed
+    delta, _, _ = store.diff("list_1", page, since=cursor_1)
+    assert len(delta) == 51
+    print("✅ Lead preview deltas follow the snapshot versions")
+
+
+def test_unknown_or_stale_cursor_falls_back_to_full_list():
+    store = LeadSnapshotStore()
+    _, cursor, _ = store.diff("list_1", make_page(10, total=10))
+
+    other = LeadSnapshotStore()  # e.g. after a restart
+    full, _, is_delta = other.diff("list_1", make_page(10, total=10), since=cursor)
+    assert not is_delta and len(full) == 10
+
+    full, _, is_delta = store.diff("list_1", make_page(10, total=10), since="garbage")
+    assert not is_delta and len(full) == 10
+
+
+if __name__ == "__main__":
+    test_since_cursor_returns_only_new_or_changed_leads()
+    test_unknown_or_stale_cursor_falls_back_to_full_list()
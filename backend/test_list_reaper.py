@@ -0,0 +1,106 @@
+import asyncio
+import os
+import tempfile
+from app.services.list_reaper import ListReaper, SUPERSEARCH, TEMP
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeInstantly:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.deleted = []
+
+    async def delete_lead_list(self, list_id):
+        if list_id in self.failing:
+            return False
+        self.deleted.append(list_id)
+        return True
+
+
+def test_temp_lists_reaped_supersearch_kept_on_success():
+    clock = FakeClock()
+    instantly = FakeInstantly()
+    reaper = ListReaper(instantly, grace_seconds=60, clock=clock)
+
+    ok = reaper.start_run("create_campaign_stream")
+    reaper.track(ok, "temp_ok", TEMP)
+    reaper.track(ok, "ss_ok", SUPERSEARCH)
+    failed = reaper.start_run("create_campaign_stream")
+    reaper.track(failed, "temp_failed", TEMP)
+    reaper.track(failed, "ss_failed", SUPERSEARCH)
+    running = reaper.start_run("create_campaign_stream")
+    reaper.track(running, "temp_running", TEMP)
+
+    reaper.finish_run(ok, "completed")
+    reaper.finish_run(failed, "failed")
+    reaper.finish_run(failed, "completed")  # later calls are ignored
+
+    # Still inside the grace period
+    assert reaper.reapable() == []
+
+    clock.now += 61
+    result = asyncio.run(reaper.reap_once())
+    assert sorted(instantly.deleted) == ["ss_failed", "temp_failed", "temp_ok"]
+    assert result == {"deleted": 3, "failed": 0, "pending": 1}
+
+    # A run that never reports back is eventually treated as failed
+    clock.now += 7 * 3600
+    asyncio.run(reaper.reap_once())
+    assert "temp_running" in instantly.deleted
+    print(f"✅ Reaper stats: {reaper.stats()}")
+
+
+def test_batches_retry_and_survive_restart():
+    clock = FakeClock()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "lists.jsonl")
+        reaper = ListReaper(FakeInstantly(failing={"l0"}), path=path, grace_seconds=0, batch_size=3, max_attempts=2, clock=clock)
+        run_id = reaper.start_run("create_campaign_stream")
+        for i in range(5):
+            reaper.track(run_id, f"l{i}", TEMP)
+        reaper.finish_run(run_id, "failed")
+
+        first = asyncio.run(reaper.reap_once())
+        assert (first["deleted"], first["failed"]) == (2, 1)
+
+        # Restarted process picks up what is left
+        instantly = FakeInstantly(failing={"l0"})
+        reloaded = ListReaper(instantly, path=path, grace_seconds=0, batch_size=3, max_attempts=2, clock=clock)
+        assert reloaded.stats()["tracked"] == 3
+        asyncio.run(reloaded.reap_once())
+        assert sorted(instantly.deleted) == ["l3", "l4"]
+
+        # l0 keeps failing; dropped after max_attempts
+        asyncio.run(reloaded.reap_once())
+        assert reloaded.stats()["tracked"] == 0
+
+
+def test_background_loop_reaps_after_finish():
+    instantly = FakeInstantly()
+    reaper = ListReaper(instantly, grace_seconds=0.01, interval=0.01)
+
+    async def run():
+        run_id = reaper.start_run("create_campaign_stream")
+        reaper.track(run_id, "temp_1", TEMP)
+        reaper.finish_run(run_id, "completed")
+        for _ in range(50):
+            if instantly.deleted:
+                break
+            await asyncio.sleep(0.01)
+        await reaper.aclose()
+
+    asyncio.run(run())
+    assert instantly.deleted == ["temp_1"]
+
+
+if __name__ == "__main__":
+    test_temp_lists_reaped_supersearch_kept_on_success()
+    test_batches_retry_and_survive_restart()
+    test_background_loop_reaps_after_finish()
@@ -0,0 +1,129 @@
+import asyncio
+from app.services.cache import ReadCoalescer, SingleFlight, coalesced_read
+
+
+class FakeInstantly:
+    """
+    Stands in for InstantlyService: counts upstream calls, each taking 50ms
+    """
+
+    def __init__(self, ttl: float = 2.0, clock=None):
+        self.reads = ReadCoalescer(ttl=ttl, clock=clock) if clock else ReadCoalescer(ttl=ttl)
+        self.upstream = 0
+
+    @coalesced_read
+    async def get_lead_records_from_list(self, lead_list_id: str, limit: int = 100, offset: int = 0):
+        self.upstream += 1
+        await asyncio.sleep(0.05)
+        return [f"{lead_list_id}:{i}" for i in range(limit)]
+
+    @coalesced_read
+    async def get_supersearch_enrichment_status(self, resource_id: str):
+        self.upstream += 1
+        raise RuntimeError("upstream down")
+
+
+def test_concurrent_identical_reads_share_one_call():
+    service = FakeInstantly()
+
+    async def run():
+        # 50 tabs polling the same preview, plus one different list
+        return await asyncio.gather(
+            *[service.get_lead_records_from_list("list_1", limit=10) for _ in range(25)],
+            *[service.get_lead_records_from_list("list_1", 10) for _ in range(25)],
+            service.get_lead_records_from_list("list_2", limit=10),
+        )
+
+    results = asyncio.run(run())
+    assert service.upstream == 2
+    assert all(r == results[0] for r in results[:50])
+    assert results[50][0] == "list_2:0"
+    print(f"✅ 51 concurrent reads -> {service.upstream} upstream calls: {service.reads.stats()}")
+
+
+def test_micro_ttl_serves_follow_up_polls():
+    now = [0.0]
+    service = FakeInstantly(ttl=2.0, clock=lambda: now[0])
+
+    async def poll():
+        return await service.get_lead_records_from_list("list_1", limit=5)
+
+    asyncio.run(poll())
+    now[0] = 1.5
+    asyncio.run(poll())
+    assert service.upstream == 1
+
+    now[0] = 2.5
+    asyncio.run(poll())
+    assert service.upstream == 2
+    print("✅ Polls inside the TTL are served from cache")
+
+
+def test_errors_are_shared_but_not_cached():
+    service = FakeInstantly()
+
+    async def run():
+        return await asyncio.gather(
+            *[service.get_supersearch_enrichment_status("list_1") for _ in range(10)],
+            return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert service.upstream == 1
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    asyncio.run(run())
+    assert service.upstream == 2
+
+
+def test_cancelled_caller_does_not_cancel_shared_call():
+    flight = SingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def run():
+        first = asyncio.create_task(flight.do("k", slow))
+        second = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "ok"
+    assert len(calls) == 1
+
+
+def test_clear_detaches_reads_already_in_flight():
+    reads = ReadCoalescer(ttl=60.0)
+    data = {"version": 1}
+    calls = []
+
+    async def fetch():
+        version = data["version"]  # what upstream had when the read started
+        calls.append(version)
+        await asyncio.sleep(0.05)
+        return version
+
+    async def run():
+        stale = asyncio.create_task(reads.call("list_1", fetch))
+        await asyncio.sleep(0.01)
+        data["version"] = 2  # a write lands while the read is in flight
+        reads.clear()
+        fresh = await reads.call("list_1", fetch)  # doesn't join the pre-write read
+        return await stale, fresh, await reads.call("list_1", fetch)
+
+    stale, fresh, cached = asyncio.run(run())
+    assert (stale, fresh, cached) == (1, 2, 2)
+    assert calls == [1, 2], "the pre-write read must not be cached"
+    print("✅ clear() keeps pre-write reads out of the cache and away from new callers")
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_reads_share_one_call()
+    test_micro_ttl_serves_follow_up_polls()
+    test_errors_are_shared_but_not_cached()
+    test_cancelled_caller_does_not_cancel_shared_call()
+    test_clear_detaches_reads_already_in_flight()
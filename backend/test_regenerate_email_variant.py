@@ -0,0 +1,160 @@
+"""
+Tests for single-variant email regeneration (no network: mocked transport)
+"""
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from app.services.ai_copy import AICopyService, icp_email_context
+from app.services.ai_scheduler import AIRequestScheduler
+from app.services.rate_limit import TokenBucket
+
+URL = "https://example.com"
+AUDIENCE = icp_email_context({"target_audience": "HR leaders at construction firms", "pain_points": ["turnover"]})
+SEARCH_LATENCY = 0.6
+CHAT_LATENCY = 0.1
+VARIANTS = [
+    {"subject": "Crew turnover at {{company}}?", "body": "Hi {{firstName}}, pain..."},
+    {"subject": "Keep 20% more hires", "body": "Hi {{firstName}}, outcome..."},
+    {"subject": "What does a no-show cost?", "body": "Hi {{firstName}}, question..."},
+]
+
+
+SUMMARY = "Example sells crew scheduling software that cuts no-shows by 30% for construction firms."
+
+
+def make_service(chat_status: int = 200):
+    calls = {"search": 0, "copy": 0, "chat": []}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.path.endswith("/responses"):
+            await asyncio.sleep(SEARCH_LATENCY)
+            if "ONE new cold email" in body["input"]:
+                # Regenerating before any copy exists: a web search for one email
+                calls["search"] += 1
+                text = json.dumps({"website_summary": SUMMARY, "subject": "Searched take", "body": "Hi {{firstName}}"})
+            else:
+                calls["copy"] += 1
+                text = json.dumps({"website_summary": SUMMARY, "variants": VARIANTS})
+            return httpx.Response(200, json={"output": [{"type": "message", "content": [{"type": "output_text", "text": text}]}]})
+
+        prompt = body["messages"][1]["content"]
+        calls["chat"].append(prompt)
+        await asyncio.sleep(CHAT_LATENCY)
+        if chat_status != 200:
+            return httpx.Response(chat_status, json={"error": {"message": "overloaded"}})
+        content = json.dumps({"subject": f"Fresh take #{len(calls['chat'])}", "body": "Hi {{firstName}} at {{company}}"})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    service = AICopyService("test-key")
+    service.openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    service.openai.rate_limiter = TokenBucket(rate=0)
+    service.openai.scheduler = AIRequestScheduler(rpm=0, tpm=0)
+    return service, calls
+
+
+def test_regenerates_one_variant_conditioned_on_the_others():
+    service, calls = make_service()
+
+    async def run():
+        # The three-variant call also summarizes the website
+        variants = await service.generate_email_copy(URL, AUDIENCE)
+
+        started = time.perf_counter()
+        variant = await service.regenerate_email_variant(URL, AUDIENCE, 1, variants)
+        elapsed = time.perf_counter() - started
+        await service.aclose()
+        return variant, elapsed
+
+    variant, elapsed = asyncio.run(run())
+    assert variant == {"subject": "Fresh take #1", "body": "Hi {{firstName}} at {{company}}"}
+    assert calls["copy"] == 1 and calls["search"] == 0 and len(calls["chat"]) == 1, "no second web search"
+    assert elapsed < SEARCH_LATENCY / 2, f"regenerate took {elapsed:.2f}s"
+
+    prompt = calls["chat"][0]
+    assert "crew scheduling software" in prompt, "grounded in the cached website analysis"
+    assert "Benefit/outcome-focused" in prompt
+    assert VARIANTS[0]["subject"] in prompt and VARIANTS[2]["subject"] in prompt
+    assert "The email being replaced" in prompt and VARIANTS[1]["subject"] in prompt
+    print(f"✅ One variant regenerated in {elapsed:.2f}s (three-variant web search: {SEARCH_LATENCY}s)")
+
+
+def test_regenerations_have_their_own_cache_entries():
+    service, calls = make_service()
+
+    async def run():
+        first = await service.regenerate_email_variant(URL, AUDIENCE, 0, VARIANTS)
+        repeat = await service.regenerate_email_variant(URL, AUDIENCE, 0, VARIANTS)
+        # Clicking again replaces the new variant, so it's a new request
+        again = await service.regenerate_email_variant(URL, AUDIENCE, 0, [first] + VARIANTS[1:])
+        other_slot = await service.regenerate_email_variant(URL, AUDIENCE, 2, VARIANTS)
+        await service.aclose()
+        return first, repeat, again, other_slot
+
+    first, repeat, again, other_slot = asyncio.run(run())
+    assert first == {"subject": "Searched take", "body": "Hi {{firstName}}"}
+    assert first == repeat and first != again != other_slot
+    assert calls["search"] == 1, "a cold regeneration is one web-search call, not a search then a chat call"
+    assert len(calls["chat"]) == 2, "later ones reuse the summary it cached"
+    assert calls["copy"] == 0, "regenerating never asks for all three variants"
+    print("✅ Each regeneration is cached on its own; the website summary is shared")
+
+
+def test_failures_return_the_fallback_variant_without_caching():
+    service, calls = make_service(chat_status=500)
+
+    async def run():
+        await service.generate_email_copy(URL, AUDIENCE)
+        first = await service.regenerate_email_variant(URL, AUDIENCE, 2, VARIANTS)
+        second = await service.regenerate_email_variant(URL, AUDIENCE, 2)
+        await service.aclose()
+        return first, second
+
+    first, second = asyncio.run(run())
+    fallback = service._get_fallback_variants(URL, AUDIENCE)
+    assert first == fallback[2] and second == fallback[2]
+    assert len(calls["chat"]) == 2
+    print("✅ A failed regeneration returns that slot's fallback and is retried next time")
+
+
+def test_out_of_range_slots_are_rejected():
+    service, calls = make_service()
+
+    async def run(index):
+        try:
+            await service.regenerate_email_variant(URL, AUDIENCE, index, VARIANTS)
+        finally:
+            await service.aclose()
+
+    for index in (-1, 3):
+        try:
+            asyncio.run(run(index))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"slot {index} was accepted")
+    assert not calls["chat"]
+
+    os.environ["STORAGE_BACKEND"] = "memory"
+    os.environ.setdefault("INSTANTLY_API_KEY", "test-key")
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    with TestClient(app) as client:
+        for index in (-1, 5):
+            response = client.post("/api/icp/regenerate-email", json={
+                "url": URL, "selected_icp": {"title": "Founders"}, "variant_index": index
+            })
+            assert response.status_code == 422, response.text
+    print("✅ Slots outside 0-2 are rejected, not clamped")
+
+
+if __name__ == "__main__":
+    test_regenerates_one_variant_conditioned_on_the_others()
+    test_regenerations_have_their_own_cache_entries()
+    test_failures_return_the_fallback_variant_without_caching()
+    test_out_of_range_slots_are_rejected()
@@ -0,0 +1,118 @@
+"""
+Tests for the ICP similarity cache in front of SuperSearch filter generation (no network)
+"""
+import asyncio
+import random
+import time
+
+import httpx
+
+from app.services.ai_copy import AICopyService
+from app.services.semantic_cache import SemanticCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_near_identical_icps_hit():
+    cache = SemanticCache()
+    cache.set("SaaS founders US", {"title": {"include": ["Founder"]}})
+    cache.set("Heads of HR at construction companies with 100-500 employees", {"department": ["Human Resources"]})
+
+    for text in ("founders of US SaaS startups", "SaaS Founder in the US", "us saas founders."):
+        value, similarity = cache.get(text)
+        assert value == {"title": {"include": ["Founder"]}}, f"{text}: {similarity}"
+    value, _ = cache.get("HR heads at construction firms with 100-500 employees")
+    assert value == {"department": ["Human Resources"]}
+
+    stats = cache.stats()
+    assert stats["hits"] == 4 and stats["lookups"] == 4 and stats["similar_hits"] == 4
+    print(f"✅ Reworded ICPs reuse cached filters (avg similarity {stats['avg_hit_similarity']})")
+
+
+def test_different_icps_miss():
+    cache = SemanticCache()
+    cache.set("CEOs at SaaS companies", "ceo")
+    cache.set("SaaS founders US", "us")
+    cache.set("Founders at fintech companies with 10-50 employees", "small")
+
+    for text in ("CTOs at SaaS companies", "SaaS founders UK", "Founders at fintech companies with 100-500 employees",
+                 "Founders at healthcare companies", "CEOs at SaaS companies in Germany"):
+        value, similarity = cache.get(text)
+        assert value is None, f"{text} matched at {similarity}"
+    # Typos still match
+    assert cache.get("Founders at fintec companies with 10-50 employees")[0] == "small"
+    assert cache.stats()["hits"] == 1
+    print("✅ Different titles, places and sizes never share filters")
+
+
+def test_threshold_ttl_and_eviction():
+    clock = FakeClock()
+    cache = SemanticCache(threshold=1.0, ttl=60, maxsize=2, clock=clock)
+    cache.set("Founders at fintech companies", 1)
+    assert cache.get("Founders at fintec companies")[0] is None, "threshold 1.0 only allows identical word sets"
+    assert cache.get("fintech founders")[0] == 1
+
+    clock.now = 61
+    assert cache.get("Founders at fintech companies")[0] is None
+    assert len(cache) == 0
+
+    for text in ("CTOs in London", "CFOs in Paris", "COOs in Berlin"):
+        cache.set(text, text)
+    assert len(cache) == 2 and cache.get("CTOs in London")[0] is None
+    assert cache.stats()["evictions"] == 1
+    print("✅ Threshold, TTL and size bound are honoured")
+
+
+def test_lookup_is_fast_with_a_full_index():
+    words = ("founder ceo cto vp marketing sales hr head director saas fintech healthcare construction "
+             "retail logistics london berlin texas agency ecommerce manufacturing insurance legal").split()
+    rng = random.Random(7)
+    cache = SemanticCache(maxsize=2000)
+    for i in range(2000):
+        cache.set(" ".join(rng.sample(words, 4)) + f" segment{i}", i)
+
+    started = time.perf_counter()
+    for _ in range(50):
+        cache.get(" ".join(rng.sample(words, 4)))
+    per_lookup = (time.perf_counter() - started) / 50
+    assert per_lookup < 0.05, f"{per_lookup * 1000:.1f} ms per lookup"
+    print(f"✅ {per_lookup * 1000:.2f} ms per lookup against 2000 cached ICPs")
+
+
+def test_generate_supersearch_filters_reuses_similar_answers():
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        content = '{"title": {"include": ["Platform Engineer"]}, "keyword_filter": {"include": ["kubernetes"], "exclude": ""}, "level": []}'
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    service = AICopyService("test-key")
+    service.openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def run():
+        first = await service.generate_supersearch_filters("Companies that recently adopted Kubernetes", "example.com")
+        first["title"]["include"].append("mutated by caller")
+        second = await service.generate_supersearch_filters("companies that adopted kubernetes recently", "example.com")
+        await service.aclose()
+        return second
+
+    second = asyncio.run(run())
+    assert len(requests) == 1
+    assert second == {"title": {"include": ["Platform Engineer"]}, "keyword_filter": {"include": ["kubernetes"], "exclude": ""}}
+    assert service.filter_cache.stats()["hits"] == 1
+    print("✅ A reworded ICP is answered from the cache without a model call")
+
+
+if __name__ == "__main__":
+    test_near_identical_icps_hit()
+    test_different_icps_miss()
+    test_threshold_ttl_and_eviction()
+    test_lookup_is_fast_with_a_full_index()
+    test_generate_supersearch_filters_reuses_similar_answers()
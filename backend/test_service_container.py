@@ -0,0 +1,179 @@
+import asyncio
+import os
+import time
+from fastapi.testclient import TestClient
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("INSTANTLY_API_KEY", "test-key")
+
+from app.main import app
+from app.services.container import ServiceContainer, StorageUnavailable
+from app.services.memory_storage import InMemoryStorageService
+
+
+def test_services_built_once_per_app_and_closed_on_shutdown():
+    with TestClient(app) as client:
+        services = app.state.services
+        assert client.get("/health").status_code == 200
+        assert client.get("/api/cache/stats").json()["success"] is True
+        assert client.get("/api/domains/inventory").json()["domains"] == 0
+        # Same instances on every request
+        assert app.state.services is services
+        assert client.get("/api/maintenance/lead-lists").json()["reaper"]["tracked"] == 0
+
+        # Pooled client is created once and reused
+        async def open_twice():
+            async with services.instantly._client() as first:
+                pass
+            async with services.instantly._client(timeout=5.0) as second:
+                return first, second._client
+
+        first, second = asyncio.run(open_twice())
+        assert first is second
+
+    assert services.instantly._http is None
+    print("✅ Service container started and closed with the app")
+
+
+def test_webhooks_feed_container_services():
+    services = ServiceContainer.from_env()
+
+    async def run():
+        await services.webhooks.dispatch({"event_type": "email_sent", "campaign_id": "camp_1", "lead_email": "a@x.com", "timestamp": "t"})
+        await services.aclose()
+
+    asyncio.run(run())
+    assert services.campaign_metrics.get("camp_1")["sent"] == 1
+
+
+def test_file_registries_are_single_worker_only():
+    saved = {key: os.environ.get(key) for key in ("WEB_CONCURRENCY", "CAMPAIGN_EVENTS_PATH", "LIST_REAPER_PATH", "INSTANTLY_WEBHOOK_SECRET")}
+    os.environ.update(WEB_CONCURRENCY="4", INSTANTLY_WEBHOOK_SECRET="s", CAMPAIGN_EVENTS_PATH="/tmp/events.jsonl", LIST_REAPER_PATH="/tmp/reaper.jsonl")
+    try:
+        services = ServiceContainer.from_env()
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+    assert services.campaign_metrics.path is None and services.list_reaper.path is None
+    # In-memory state can't fan webhooks out, so no worker sees every event
+    assert services.webhooks.enabled and services.campaign_metrics.live is False
+
+
+def test_readiness_waits_for_background_warm_up():
+    def slow_storage():
+        time.sleep(0.05)  # e.g. Firebase SDK import + app initialization
+        return InMemoryStorageService()
+
+    services = ServiceContainer.from_env()
+    services._db_factory = slow_storage
+
+    async def run():
+        warm_up = asyncio.create_task(services.warm_up())
+        await asyncio.sleep(0)
+        before = services.readiness()
+        await warm_up
+        return before, services.readiness()
+
+    before, after = asyncio.run(run())
+    assert before["ready"] is False and before["checks"]["storage"] == "starting"
+    assert after["ready"] is True and after["warmup_seconds"] >= 0.05
+
+
+def test_requests_await_storage_without_blocking_the_loop():
+    calls = []
+
+    def slow_storage():
+        calls.append(time.perf_counter())
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise RuntimeError("credentials missing")
+        return InMemoryStorageService()
+
+    services = ServiceContainer.from_env()
+    services._db_factory = slow_storage
+
+    async def run():
+        warm_up = asyncio.create_task(services.warm_up())
+        await asyncio.sleep(0)
+        # The loop keeps ticking while the factory runs in a thread
+        ticks = 0
+        waiting = asyncio.create_task(services.get_db())
+        while not waiting.done():
+            await asyncio.sleep(0.01)
+            ticks += 1
+        await warm_up
+        failed = isinstance(waiting.exception(), StorageUnavailable)
+
+        # No inline retry until the retry interval has passed
+        try:
+            await services.get_db()
+            retried_early = True
+        except StorageUnavailable:
+            retried_early = False
+        services._db_failed_at -= services.db_retry_interval
+        db = await services.get_db()
+        return ticks, failed, retried_early, db
+
+    ticks, failed, retried_early, db = asyncio.run(run())
+    assert ticks >= 10, f"event loop blocked during storage init ({ticks} ticks)"
+    assert failed and not retried_early
+    assert isinstance(db, InMemoryStorageService) and len(calls) == 2
+    print(f"✅ Storage init shared by warm-up and requests; loop ticked {ticks}x meanwhile")
+
+
+def test_only_the_server_turns_speculation_on():
+    with TestClient(app) as client:
+        services = app.state.services
+        charged = []
+
+        async def suggest_three_icps(url):
+            return [{"name": "Founders", "target_audience": "Founders of SaaS startups"}]
+
+        async def start(user, url, icps, replace_previous=True):
+            charged.append((user, replace_previous))
+            return len(icps)
+
+        async def verify(token):
+            return "uid-1" if token == "valid-token" else None
+
+        services.ai.suggest_three_icps = suggest_three_icps
+        services.speculative_copy.start = start
+        services.auth.verify = verify
+
+        services.speculative_copy.enabled = False
+        body = {"url": "https://example.com", "speculate": True, "user_id": "someone_else"}
+        assert client.post("/api/icp/analyze", json=body).json()["speculating"] == 0
+
+        services.speculative_copy.enabled = True
+        assert client.post("/api/icp/analyze", json={"url": "https://example.com", "speculate": False}).json()["speculating"] == 0
+        assert client.post("/api/icp/analyze", json=body).json()["speculating"] == 1
+        signed_in = {"Authorization": "Bearer valid-token"}
+        assert client.post("/api/icp/analyze", json=body, headers=signed_in).json()["speculating"] == 1
+        forged = {"Authorization": "Bearer forged-token"}
+        assert client.post("/api/icp/analyze", json=body, headers=forged).json()["speculating"] == 1
+
+    # Charged to the verified user, else the client address (whose analyses don't cancel each other)
+    assert charged == [("ip:testclient", False), ("user:uid-1", True), ("ip:testclient", False)]
+    print("✅ Requests can only opt out of speculation; the budget is charged to the signed-in user or the address")
+
+
+def test_health_is_live_before_ready():
+    with TestClient(app) as client:
+        assert client.get("/health").json() == {"status": "healthy"}
+        ready = client.get("/health/ready")
+        assert ready.status_code in (200, 503)
+        if ready.status_code == 503:
+            assert ready.json()["status"] == "starting"
+
+
+if __name__ == "__main__":
+    test_services_built_once_per_app_and_closed_on_shutdown()
+    test_webhooks_feed_container_services()
+    test_file_registries_are_single_worker_only()
+    test_readiness_waits_for_background_warm_up()
+    test_requests_await_storage_without_blocking_the_loop()
+    test_only_the_server_turns_speculation_on()
+    test_health_is_live_before_ready()
@@ -0,0 +1,245 @@
+"""
+Tests for speculative email-copy generation (no network: mocked transport)
+"""
+import asyncio
+import json
+import re
+import time
+
+import httpx
+
+from app.services.ai_copy import AICopyService, icp_email_context
+from app.services.ai_scheduler import AIRequestScheduler
+from app.services.rate_limit import TokenBucket
+from app.services.speculative_copy import SpeculativeCopy
+from app.services.state_backend import MemoryStateBackend
+
+MODEL_LATENCY = 0.3
+URL = "https://example.com"
+ICPS = [
+    {"name": "Founders", "target_audience": "Founders of seed-stage SaaS startups", "pain_points": ["hiring"]},
+    {"name": "HR", "target_audience": "HR leaders at construction firms", "pain_points": ["turnover"]},
+    {"name": "Finance", "target_audience": "CFOs at logistics companies", "pain_points": ["cash flow"]},
+]
+
+
+def make_speculative(status: int = 200, budget: int = 6):
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["input"]
+        audience = re.search(r"ideal customer profile \(ICP\): (.*)", prompt).group(1)
+        calls.append(audience)
+        await asyncio.sleep(MODEL_LATENCY)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": "overloaded"}})
+        variants = [{"subject": f"For {audience[:20]} #{i}", "body": "Hi {{firstName}}"} for i in range(3)]
+        output = [{"type": "message", "content": [{"type": "output_text", "text": json.dumps(variants)}]}]
+        return httpx.Response(200, json={"output": output})
+
+    state = MemoryStateBackend()
+    ai = AICopyService("test-key", state=state)
+    ai.openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    ai.openai.rate_limiter = TokenBucket(rate=0)
+    ai.openai.scheduler = AIRequestScheduler(rpm=0, tpm=0)
+    return SpeculativeCopy(ai, state, enabled=True, budget=budget), calls
+
+
+def test_picked_icp_reuses_the_speculative_call_and_siblings_are_cancelled():
+    speculative, calls = make_speculative()
+    picked = icp_email_context(ICPS[1])
+
+    async def run():
+        assert await speculative.start("user-1", URL, ICPS) == 3
+        await asyncio.sleep(0.1)  # the user reads the suggestions and picks one
+
+        started = time.perf_counter()
+        speculative.claim(URL, picked)
+        variants = await speculative.ai.generate_email_copy(URL, picked)
+        waited = time.perf_counter() - started
+        await asyncio.sleep(0)
+        await speculative.aclose()
+        await speculative.ai.aclose()
+        return variants, waited
+
+    variants, waited = asyncio.run(run())
+    assert len(calls) == 3, "the pick joined the speculative call instead of starting another"
+    assert variants[0]["subject"].startswith("For HR leaders")
+    assert waited < MODEL_LATENCY - 0.05, f"waited {waited:.2f}s"
+    stats = speculative.stats()
+    assert stats["claimed"] == 1 and stats["cancelled"] == 2 and stats["completed"] == 1 and stats["running"] == 0
+    print(f"✅ Picked ICP's copy ready after {waited:.2f}s (full call: {MODEL_LATENCY}s); 2 unused generations cancelled")
+
+
+def test_picked_generation_is_not_stuck_behind_batch_work():
+    speculative, calls = make_speculative()
+    scheduler = speculative.ai.openai.scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0)
+    picked = icp_email_context(ICPS[1])
+
+    async def batch_job():
+        async with scheduler.slot("gpt-4o", 100, "batch"):
+            await asyncio.sleep(MODEL_LATENCY)
+
+    async def run():
+        # Batch work fills the only slot; the speculative generations queue behind it
+        jobs = [asyncio.create_task(batch_job()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        await speculative.start("user-1", URL, ICPS)
+        await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        speculative.claim(URL, picked)
+        await speculative.ai.generate_email_copy(URL, picked)
+        waited = time.perf_counter() - started
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        await speculative.aclose()
+        await speculative.ai.aclose()
+        return waited
+
+    waited = asyncio.run(run())
+    # Behind the running batch job only, not the two queued ones
+    assert waited < 3 * MODEL_LATENCY - 0.1, f"waited {waited:.2f}s"
+    assert len(calls) == 1, "only the picked generation reached the model"
+    print(f"✅ The picked generation went ahead of queued batch work ({waited:.2f}s)")
+
+
+def test_pick_on_another_worker_raises_the_generation():
+    speculative, calls = make_speculative()
+    speculative.state.shared = True  # stands in for Redis: two workers, one state backend
+    scheduler = speculative.ai.openai.scheduler = AIRequestScheduler(max_concurrency=1, rpm=0, tpm=0)
+    # The worker the pick lands on: same state, none of the first worker's tasks
+    other_worker = SpeculativeCopy(speculative.ai, speculative.state, enabled=True)
+    picked = icp_email_context(ICPS[1])
+
+    async def batch_job():
+        async with scheduler.slot("gpt-4o", 100, "batch"):
+            await asyncio.sleep(MODEL_LATENCY)
+
+    async def run():
+        speculative.start_listener()
+        jobs = [asyncio.create_task(batch_job()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        await speculative.start("user:1", URL, ICPS)
+        await asyncio.sleep(0.05)
+
+        started = time.perf_counter()
+        assert other_worker.claim(URL, picked) is False
+        await other_worker.ai.generate_email_copy(URL, picked)
+        waited = time.perf_counter() - started
+        for job in jobs:
+            job.cancel()
+        await asyncio.gather(*jobs, return_exceptions=True)
+        await speculative.aclose()
+        await speculative.ai.aclose()
+        return waited
+
+    waited = asyncio.run(run())
+    assert waited < 3 * MODEL_LATENCY - 0.1, f"waited {waited:.2f}s"
+    assert len(calls) == 1 and speculative.stats()["cancelled"] == 2
+    print(f"✅ A pick made on another worker raised the generation and cancelled its siblings ({waited:.2f}s)")
+
+
+def test_generation_lock_outlives_its_ttl():
+    speculative, calls = make_speculative()
+    speculative.lock_ttl = MODEL_LATENCY / 3
+
+    async def run():
+        await speculative.start("user:1", URL, ICPS[:1])
+        await asyncio.sleep(0.05)
+        # Not claimed: a request that finds the lock still held waits instead of generating again
+        variants = await speculative.ai.generate_email_copy(URL, icp_email_context(ICPS[0]))
+        await speculative.aclose()
+        await speculative.ai.aclose()
+        return variants
+
+    variants = asyncio.run(run())
+    assert len(calls) == 1, "the lock expired under the running generation"
+    assert variants[0]["subject"].startswith("For Founders")
+    print("✅ A generation that outlasts its lock TTL keeps the lock")
+
+
+def test_finished_copy_is_served_from_the_cache():
+    speculative, calls = make_speculative()
+
+    async def run():
+        await speculative.start("user-1", URL, ICPS)
+        await asyncio.sleep(MODEL_LATENCY + 0.1)
+        started = time.perf_counter()
+        variants = await speculative.ai.generate_email_copy(URL, icp_email_context(ICPS[2]))
+        waited = time.perf_counter() - started
+        # Analysing the same site again doesn't pay twice
+        again = await speculative.start("user-1", URL, ICPS)
+        await speculative.ai.aclose()
+        return variants, waited, again
+
+    variants, waited, again = asyncio.run(run())
+    assert len(calls) == 3 and waited < 0.05 and again == 0
+    assert variants[0]["subject"].startswith("For CFOs at logistics")
+    assert speculative.stats()["skipped_cached"] == 3
+    print(f"✅ Copy finished in the background is returned in {waited * 1000:.1f} ms")
+
+
+def test_budget_and_reanalysis_limit_extra_spend():
+    speculative, calls = make_speculative(budget=4)
+
+    async def run():
+        first = await speculative.start("user-1", URL, ICPS)
+        # A new analysis replaces the old one: its unfinished generations are cancelled
+        other = [dict(icp, target_audience=icp["target_audience"] + " in Texas") for icp in ICPS]
+        second = await speculative.start("user-1", URL, other)
+        third = await speculative.start("user-2", URL, other)
+        await asyncio.sleep(0.05)
+        await speculative.aclose()
+        await speculative.ai.aclose()
+        return first, second, third
+
+    first, second, third = asyncio.run(run())
+    # user-1: 3 + 1 of a budget of 4; user-2 skips the ICP user-1 is already generating
+    assert (first, second, third) == (3, 1, 2)
+    stats = speculative.stats()
+    assert stats["skipped_budget"] == 1 and stats["skipped_cached"] == 1
+    assert stats["cancelled"] == 6 and len(calls) <= 6
+    print("✅ Per-user budget caps speculative generations; re-analysis cancels the old ones")
+
+
+def test_concurrent_analyses_share_one_budget():
+    speculative, calls = make_speculative(budget=4)
+
+    async def run():
+        charges = await asyncio.gather(*(speculative._charge("user:1") for _ in range(10)))
+        await speculative.ai.aclose()
+        return charges
+
+    charges = asyncio.run(run())
+    assert sum(charges) == 4, charges
+    print("✅ Concurrent charges never overspend the budget")
+
+
+def test_failed_speculation_is_not_cached():
+    speculative, calls = make_speculative(status=500)
+
+    async def run():
+        await speculative.start("user-1", URL, ICPS[:1])
+        await asyncio.sleep(MODEL_LATENCY + 0.1)
+        variants = await speculative.ai.generate_email_copy(URL, icp_email_context(ICPS[0]))
+        await speculative.ai.aclose()
+        return variants
+
+    variants = asyncio.run(run())
+    assert len(calls) == 2, "the pick retried after the speculative call failed"
+    assert variants == speculative.ai._get_fallback_variants(URL, icp_email_context(ICPS[0]))
+    assert speculative.stats()["failed"] == 1
+    print("✅ Failed speculation falls through to a normal generation")
+
+
+if __name__ == "__main__":
+    test_picked_icp_reuses_the_speculative_call_and_siblings_are_cancelled()
+    test_picked_generation_is_not_stuck_behind_batch_work()
+    test_pick_on_another_worker_raises_the_generation()
+    test_generation_lock_outlives_its_ttl()
+    test_finished_copy_is_served_from_the_cache()
+    test_budget_and_reanalysis_limit_extra_spend()
+    test_concurrent_analyses_share_one_budget()
+    test_failed_speculation_is_not_cached()
@@ -0,0 +1,219 @@
+"""
+Tests for the shared state backend (memory implementation) and the services using it
+"""
+import asyncio
+import os
+
+from app.services.csv_ingest import UploadProgress
+from app.services.rate_limit import TokenBucket
+from app.services.state_backend import MemoryStateBackend, create_state_backend
+from app.services.webhook_events import WebhookDispatcher
+from serve import state_is_shared, worker_count
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_shared_token_bucket_reserves_across_limiters():
+    clock = FakeClock()
+    state = MemoryStateBackend(clock=clock)
+
+    async def run():
+        # burst 2 at 1/s: two free tokens, then each caller queues one second further back
+        waits = [await state.take_tokens("bucket:api", rate=1.0, burst=2) for _ in range(4)]
+        clock.now = 10.0
+        refilled = await state.take_tokens("bucket:api", rate=1.0, burst=2)
+        return waits, refilled
+
+    waits, refilled = asyncio.run(run())
+    assert waits == [0.0, 0.0, 1.0, 2.0]
+    assert refilled == 0.0
+
+    # Two "workers" with their own TokenBucket objects draw from one budget (clock frozen)
+    state = MemoryStateBackend(clock=FakeClock())
+    first = TokenBucket(rate=1000.0, burst=5, state=state, key="instantly")
+    second = TokenBucket(rate=1000.0, burst=5, state=state, key="instantly")
+
+    async def drain():
+        for bucket in (first, second) * 5:
+            await bucket.acquire()
+        return await state.take_tokens("bucket:instantly", rate=1000.0, burst=5)
+
+    assert asyncio.run(drain()) > 0
+    assert first.stats()["shared"] and first.acquired == second.acquired == 5
+    print("✅ Shared token bucket queues callers from every limiter")
+
+
+def test_try_take_tokens_keeps_a_reserve_and_reserves_nothing_on_failure():
+    clock = FakeClock()
+    state = MemoryStateBackend(clock=clock)
+    bucket = TokenBucket(rate=1.0, burst=10, state=state, key="tpm")
+
+    async def run():
+        # Leave 2 of 10: 8 can go, the 9th is refused (1 s until it would fit)
+        taken = [await bucket.try_acquire(1, keep=2) for _ in range(9)]
+        # Refused calls took nothing, so a caller without a reserve still gets the last two
+        urgent = [await bucket.try_acquire(1) for _ in range(3)]
+        return taken, urgent
+
+    taken, urgent = asyncio.run(run())
+    assert taken == [0.0] * 8 + [1.0]
+    assert urgent == [0.0, 0.0, 1.0]
+    print("✅ try_take_tokens only takes what fits above the reserve")
+
+
+def test_locks_and_cached_call():
+    state = MemoryStateBackend()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return {"answer": 42}
+
+    async def run():
+        token = await state.acquire_lock("job", ttl=5)
+        assert token and await state.acquire_lock("job", ttl=5) is None
+        await state.release_lock("job", "not-the-token")
+        assert await state.acquire_lock("job", ttl=5) is None
+        await state.release_lock("job", token)
+        assert await state.acquire_lock("job", ttl=5) is not None
+
+        # Only the holder can extend a lock, and only while it still holds it
+        token = await state.acquire_lock("long-job", ttl=0.05)
+        assert await state.extend_lock("long-job", "not-the-token", 5) is False
+        assert await state.extend_lock("long-job", token, 0.2)
+        await asyncio.sleep(0.1)
+        assert await state.acquire_lock("long-job", ttl=5) is None
+        await asyncio.sleep(0.15)
+        assert await state.extend_lock("long-job", token, 5) is False
+
+        results = await asyncio.gather(*(state.cached_call("ai:x", compute, ttl=60) for _ in range(10)))
+        cached = await state.cached_call("ai:x", compute, ttl=60)
+        return results, cached
+
+    results, cached = asyncio.run(run())
+    assert len(calls) == 1
+    assert all(result == {"answer": 42} for result in results) and cached == {"answer": 42}
+    print("✅ Locks honour their token (release and extend); cached_call computes once for 11 callers")
+
+
+def test_upload_progress_through_state_backend():
+    state = MemoryStateBackend()
+    writer = UploadProgress(state=state)
+    reader = UploadProgress(state=state)  # e.g. the SSE stream on another worker
+
+    async def run():
+        seen = []
+
+        async def watcher():
+            async for snapshot in reader.watch("up_9", heartbeat=0.05):
+                seen.append(snapshot and snapshot["status"])
+
+        task = asyncio.create_task(watcher())
+        await asyncio.sleep(0.08)  # long enough for a heartbeat
+        await writer.update("up_9", status="in_progress", uploaded=0)
+        await asyncio.sleep(0.01)
+        await writer.update("up_9", status="completed", uploaded=10)
+        await asyncio.wait_for(task, timeout=1)
+        return seen, await reader.get("up_9")
+
+    seen, final = asyncio.run(run())
+    assert None in seen and seen[-2:] == ["in_progress", "completed"]
+    assert final["uploaded"] == 10 and final["version"] == 2
+    print(f"✅ Progress written by one UploadProgress reaches a watcher on another: {seen}")
+
+
+def test_webhook_retries_are_duplicates_on_every_worker():
+    state = MemoryStateBackend()
+    state.shared = True  # stands in for Redis
+    worker_a = WebhookDispatcher(secret="s", state=state)
+    worker_b = WebhookDispatcher(secret="s", state=state)
+    event = {"event_type": "email_sent", "event_id": "evt_1", "campaign_id": "c1"}
+
+    async def run():
+        return await worker_a.dispatch(dict(event)), await worker_b.dispatch(dict(event))
+
+    first, retry = asyncio.run(run())
+    assert first is not None and retry is None
+    assert worker_b.stats()["duplicates"] == 1
+    print("✅ A redelivered webhook landing on another worker is de-duplicated")
+
+
+def test_webhook_dedup_markers_dont_pile_up():
+    clock = [0.0]
+    state = MemoryStateBackend(clock=lambda: clock[0])
+    single_worker = WebhookDispatcher(secret="s", state=state)
+
+    class FlakyState(MemoryStateBackend):
+        shared = True
+        failures = 1
+
+        async def acquire_lock(self, key, ttl):
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError("redis went away")
+            return await super().acquire_lock(key, ttl)
+
+    flaky = WebhookDispatcher(secret="s", state=FlakyState(), fan_out=False)
+    event = {"event_type": "email_sent", "event_id": "evt_1", "campaign_id": "c1"}
+
+    async def run():
+        for i in range(50):
+            await single_worker.dispatch({**event, "event_id": f"evt_{i}"})
+        # One process: _seen de-duplicates, no marker per event
+        assert len(state._locks) == 0
+        for i in range(2000):
+            await state.acquire_lock(f"expiring:{i}", ttl=1)
+        clock[0] = 2.0
+        for i in range(100):
+            await state.acquire_lock(f"fresh:{i}", ttl=1)
+        assert len(state._locks) < 200, "expired locks are pruned"
+
+        try:
+            await flaky.dispatch(dict(event))
+            assert False, "the state backend error should reach the webhook endpoint"
+        except ConnectionError:
+            pass
+        return await flaky.dispatch(dict(event))
+
+    retried = asyncio.run(run())
+    assert retried is not None, "Instantly's retry after a failed dispatch was dropped as a duplicate"
+    print("✅ Dedup markers are only kept when shared; expired locks are pruned; failed dispatches can be retried")
+
+
+def test_runner_configuration():
+    saved = {key: os.environ.pop(key, None) for key in ("STATE_BACKEND", "REDIS_URL", "WEB_CONCURRENCY")}
+    try:
+        assert create_state_backend().name == "memory"
+        assert not state_is_shared()
+        os.environ["REDIS_URL"] = "redis://localhost:6379/0"
+        assert state_is_shared()
+        os.environ["WEB_CONCURRENCY"] = "3"
+        assert worker_count() == 3 and worker_count(5) == 5
+        try:
+            create_state_backend("memcached")
+            assert False, "unknown backend accepted"
+        except ValueError:
+            pass
+    finally:
+        for key, value in saved.items():
+            os.environ.pop(key, None)
+            if value is not None:
+                os.environ[key] = value
+    print("✅ Runner picks workers and state backend from the environment")
+
+
+if __name__ == "__main__":
+    test_shared_token_bucket_reserves_across_limiters()
+    test_try_take_tokens_keeps_a_reserve_and_reserves_nothing_on_failure()
+    test_locks_and_cached_call()
+    test_upload_progress_through_state_backend()
+    test_webhook_retries_are_duplicates_on_every_worker()
+    test_webhook_dedup_markers_dont_pile_up()
+    test_runner_configuration()
@@ -0,0 +1,87 @@
+import asyncio
+import json
+import httpx
+from app.services.storage_backend import create_storage_backend, StorageBackend
+from app.services.memory_storage import InMemoryStorageService
+from app.services.supabase_service import SupabaseService
+
+
+def test_factory_selects_memory_backend():
+    backend = create_storage_backend("memory")
+    assert isinstance(backend, InMemoryStorageService)
+    assert isinstance(backend, StorageBackend)
+    print("✅ STORAGE_BACKEND=memory builds the in-memory backend")
+
+
+def test_memory_backend_round_trip():
+    backend = InMemoryStorageService()
+
+    async def run():
+        await backend.save_campaign("u1", "camp_1", "https://a.com", "CTOs", [{"subject": "Hi", "body": "..."}], "list_1")
+        await backend.save_campaign("u1", "camp_2", "https://b.com", "CMOs", [])
+        await backend.save_campaign("u2", "camp_3", "https://c.com", "VPs", [])
+
+        await backend.update_campaign_stats("camp_1", {"sent": 100, "opened": 40, "replied": 5})
+        await backend.update_campaign_status("camp_2", "paused")
+
+        campaign = await backend.get_campaign("u1", "camp_1")
+        assert campaign["id"] == "camp_1"
+        assert campaign["supersearch_list_id"] == "list_1"
+
+        # Returned records are copies
+        campaign["sent"] = 0
+        assert (await backend.get_campaign("u1", "camp_1"))["sent"] == 100
+
+        campaigns = await backend.get_user_campaigns("u1")
+        assert {c["campaign_id"] for c in campaigns} == {"camp_1", "camp_2"}
+
+        stats = await backend.get_user_stats("u1")
+        assert stats["total_campaigns"] == 2
+        assert stats["active_campaigns"] == 1
+        assert stats["avg_open_rate"] == 40.0
+        assert stats["avg_reply_rate"] == 5.0
+
+        assert await backend.delete_campaign("camp_1") is True
+        assert await backend.get_campaign("u1", "camp_1") is None
+        return stats
+
+    stats = asyncio.run(run())
+    print(f"✅ In-memory backend stats: {stats}")
+
+
+def test_supabase_uses_postgrest_over_httpx():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.method == "GET":
+            return httpx.Response(200, json=[{"id": "uuid-1", "campaign_id": "camp_1", "user_id": "u1"}])
+        body = json.loads(request.content)
+        return httpx.Response(201, json=[{"id": "uuid-2", **body}])
+
+    client = httpx.AsyncClient(
+        base_url="https://project.supabase.co/rest/v1",
+        transport=httpx.MockTransport(handler)
+    )
+    backend = SupabaseService("https://project.supabase.co", "key", client=client)
+
+    async def run():
+        saved = await backend.save_campaign("u1", "camp_9", "https://a.com", "CTOs", [])
+        campaigns = await backend.get_user_campaigns("u1")
+        await backend.aclose()
+        return saved, campaigns
+
+    saved, campaigns = asyncio.run(run())
+
+    assert saved["id"] == "camp_9"
+    assert campaigns[0]["id"] == "camp_1"
+    assert requests[0].headers["Prefer"] == "return=representation"
+    assert requests[1].url.params["user_id"] == "eq.u1"
+    assert requests[1].url.params["order"] == "created_at.desc"
+    print("✅ Supabase backend issues PostgREST queries through the pooled client")
+
+
+if __name__ == "__main__":
+    test_factory_selects_memory_backend()
+    test_memory_backend_round_trip()
+    test_supabase_uses_postgrest_over_httpx()
@@ -0,0 +1,97 @@
+"""
+Verify the Postgres-side campaign analytics (campaign_user_stats RPC + paged listing)
+
+The live check runs against a local Supabase stack, which applies
+backend/supabase/migrations automatically:
+
+    cd backend && supabase start
+    SUPABASE_TEST_URL=http://127.0.0.1:54321 SUPABASE_TEST_KEY=<service_role key> python test_supabase_analytics.py
+"""
+import asyncio
+import os
+import uuid
+import httpx
+from dotenv import load_dotenv
+from app.services.memory_storage import InMemoryStorageService
+from app.services.supabase_service import SupabaseService
+
+load_dotenv()
+
+SEED = [
+    # (status, sent, opened, clicked, replied)
+    ("active", 120, 48, 10, 6),
+    ("active", 80, 20, 4, 1),
+    ("paused", 300, 150, 30, 12),
+    ("completed", 0, 0, 0, 0),
+]
+
+
+def test_get_user_stats_uses_rpc():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json=[{
+            "total_campaigns": 4, "active_campaigns": 2,
+            "total_sent": 500, "total_opened": 218, "total_clicked": 44, "total_replied": 19,
+            "avg_open_rate": 43.6, "avg_reply_rate": 3.8
+        }])
+
+    client = httpx.AsyncClient(base_url="https://p.supabase.co/rest/v1", transport=httpx.MockTransport(handler))
+    backend = SupabaseService("https://p.supabase.co", "key", client=client)
+
+    stats = asyncio.run(backend.get_user_stats("u1"))
+
+    assert len(calls) == 1
+    assert calls[0].url.path.endswith("/rpc/campaign_user_stats")
+    assert stats["total_sent"] == 500 and stats["avg_open_rate"] == 43.6
+    print(f"✅ get_user_stats is a single RPC call: {stats}")
+
+
+async def verify_against_local_postgres(url: str, key: str):
+    backend = SupabaseService(url, key)
+    reference = InMemoryStorageService()
+    user_id = f"harness-{uuid.uuid4().hex[:8]}"
+    campaign_ids = []
+
+    try:
+        for i, (status, sent, opened, clicked, replied) in enumerate(SEED):
+            campaign_id = f"{user_id}-c{i}"
+            campaign_ids.append(campaign_id)
+            analytics = {"sent": sent, "opened": opened, "clicked": clicked, "replied": replied}
+            for store in (backend, reference):
+                await store.save_campaign(user_id, campaign_id, f"https://{i}.example.com", "CTOs", [])
+                await store.update_campaign_stats(campaign_id, analytics)
+                await store.update_campaign_status(campaign_id, status)
+            await asyncio.sleep(0.01)  # distinct created_at values for ordering
+
+        sql_stats = await backend.get_user_stats(user_id)
+        python_stats = await reference.get_user_stats(user_id)
+        print(f"   SQL:    {sql_stats}")
+        print(f"   Python: {python_stats}")
+        assert sql_stats == python_stats, "campaign_user_stats() disagrees with Python aggregation"
+
+        page_1 = await backend.get_user_campaigns(user_id, limit=2)
+        page_2 = await backend.get_user_campaigns(user_id, limit=2, offset=2)
+        listed = [c["campaign_id"] for c in page_1 + page_2]
+        assert listed == list(reversed(campaign_ids)), f"unexpected page order: {listed}"
+        print("✅ Postgres aggregation and paging match the reference backend")
+    finally:
+        for campaign_id in campaign_ids:
+            await backend.delete_campaign(campaign_id)
+        await backend.aclose()
+
+
+def test_local_postgres_harness():
+    url = os.getenv("SUPABASE_TEST_URL")
+    key = os.getenv("SUPABASE_TEST_KEY")
+    if not url or not key:
+        print("⚠️  SUPABASE_TEST_URL/SUPABASE_TEST_KEY not set - skipping local Postgres harness")
+        return
+
+    asyncio.run(verify_against_local_postgres(url, key))
+
+
+if __name__ == "__main__":
+    test_get_user_stats_uses_rpc()
+    test_local_postgres_harness()
@@ -0,0 +1,113 @@
+"""
+Tests for batched SuperSearch filter generation (no network: mocked transport)
+"""
+import asyncio
+import json
+import re
+import time
+
+import httpx
+
+from app.services.ai_copy import AICopyService
+from app.services.ai_scheduler import AIRequestScheduler
+from app.services.rate_limit import TokenBucket
+
+MODEL_LATENCY = 0.2
+
+
+def make_service(latency: float = MODEL_LATENCY, status: int = 200):
+    requests = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        prompt = body["messages"][1]["content"]
+        requests.append(prompt)
+        await asyncio.sleep(latency)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": "overloaded"}})
+
+        if "Target Audiences:" in prompt:
+            icps = re.findall(r'^\d+\. "(.*)"$', prompt, re.M)
+            items = [{"id": i, "filters": {"keyword_filter": {"include": [icp], "exclude": ""}}} for i, icp in enumerate(icps, 1)]
+            if any("broken" in icp for icp in icps):
+                items = items[:-1]  # one answer short: can't tell which is which
+            content = json.dumps(items)
+        else:
+            icp = re.search(r'^Target Audience: "(.*)"$', prompt, re.M).group(1)
+            content = json.dumps({"keyword_filter": {"include": [icp], "exclude": ""}, "level": []})
+        return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+    service = AICopyService("test-key")
+    service.openai._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    # An account with plenty of headroom: this is about batching, not rate limits
+    service.openai.rate_limiter = TokenBucket(rate=1000, burst=1000)
+    service.openai.scheduler = AIRequestScheduler(rpm=100_000, tpm=100_000_000)
+    return service, requests
+
+
+def collect(service, icps, **kwargs):
+    async def run():
+        results, arrivals = [], []
+        started = time.perf_counter()
+        async for result in service.generate_supersearch_filters_batch(icps, "example.com", **kwargs):
+            results.append(result)
+            arrivals.append(time.perf_counter() - started)
+        await service.aclose()
+        return results, arrivals
+
+    return asyncio.run(run())
+
+
+def test_large_batch_is_packed_and_concurrent():
+    icps = [f"Companies that adopted platform {i}" for i in range(200)]
+    service, requests = make_service()
+
+    results, arrivals = collect(service, icps, pack_size=5, concurrency=8)
+    sequential = len(icps) * MODEL_LATENCY
+
+    assert len(requests) == 40
+    assert sorted(result["index"] for result in results) == list(range(200))
+    for result in results:
+        assert result["source"] == "model"
+        assert result["filters"] == {"keyword_filter": {"include": [icps[result["index"]]], "exclude": ""}}
+    assert arrivals[-1] < sequential / 10, f"{arrivals[-1]:.1f}s for 200 ICPs"
+    assert arrivals[0] < arrivals[-1] / 2, "results should stream as packs complete"
+    print(f"✅ 200 ICPs in {len(requests)} requests, {arrivals[-1]:.2f}s (one at a time: {sequential:.0f}s)")
+
+
+def test_unreliable_packs_fall_back_to_single_requests():
+    icps = ["Teams adopting Kubernetes", "broken pack example", "Teams leaving Oracle ERP"]
+    service, requests = make_service(latency=0.01)
+
+    results, _ = collect(service, icps, pack_size=3)
+
+    assert len(requests) == 4, "one packed request, then one per ICP"
+    by_index = {result["index"]: result for result in results}
+    for index, icp in enumerate(icps):
+        assert by_index[index]["filters"]["keyword_filter"]["include"] == [icp]
+        assert by_index[index]["source"] == "model"
+    print("✅ A pack whose reply doesn't line up is retried ICP by ICP")
+
+
+def test_local_answers_duplicates_and_failures():
+    icps = ["CEOs at cybersecurity companies", "Teams adopting Kubernetes", "teams adopting  kubernetes", "Teams leaving Oracle ERP"]
+    service, requests = make_service(latency=0.05)
+    results, _ = collect(service, icps, pack_size=1)
+
+    assert results[0]["index"] == 0 and results[0]["source"] == "compiled"
+    assert len(requests) == 2, "duplicates share one request; pack_size=1 sends singles"
+    by_index = {result["index"]: result for result in results}
+    assert set(by_index) == {0, 1, 2, 3}
+    assert by_index[1]["filters"] == by_index[2]["filters"] and by_index[1]["filters"] is not by_index[2]["filters"]
+
+    failing, _ = make_service(latency=0.01, status=500)
+    results, _ = collect(failing, ["Teams adopting Kubernetes", "Teams leaving Oracle ERP"])
+    assert [result["source"] for result in results] == ["default", "default"]
+    assert results[0]["filters"] == failing._get_default_filters(results[0]["target_audience"])
+    print("✅ Compiled ICPs come back first, duplicates are asked once, failures yield defaults")
+
+
+if __name__ == "__main__":
+    test_large_batch_is_packed_and_concurrent()
+    test_unreliable_packs_fall_back_to_single_requests()
+    test_local_answers_duplicates_and_failures()
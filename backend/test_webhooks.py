@@ -0,0 +1,151 @@
+import asyncio
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routes import webhooks
+from app.services.instantly import InstantlyService
+from app.dependencies import get_webhook_dispatcher
+from app.services.state_backend import MemoryStateBackend
+from app.services.webhook_events import WebhookDispatcher
+
+
+def make_client(dispatcher: WebhookDispatcher) -> TestClient:
+    app = FastAPI()
+    app.include_router(webhooks.router, prefix="/api")
+    app.dependency_overrides[get_webhook_dispatcher] = lambda: dispatcher
+    return TestClient(app)
+
+
+def test_receiver_authenticates_and_deduplicates():
+    dispatcher = WebhookDispatcher(secret="s3cret")
+    replies = []
+    dispatcher.subscribe("reply_received", replies.append)
+    client = make_client(dispatcher)
+
+    event = {"event_type": "reply_received", "campaign_id": "camp_1", "lead_email": "Ada@Example.com", "timestamp": "2026-10-19T10:00:00Z"}
+
+    assert client.post("/api/webhooks/instantly", json=event).status_code == 401
+    assert client.post("/api/webhooks/instantly", json=event, headers={"X-Webhook-Secret": "wrong"}).status_code == 401
+
+    headers = {"X-Webhook-Secret": "s3cret"}
+    first = client.post("/api/webhooks/instantly", json=event, headers=headers).json()
+    retry = client.post("/api/webhooks/instantly?token=s3cret", json=[event, {"no": "type"}]).json()
+
+    assert first["accepted"] == 1
+    assert retry == {"success": True, "accepted": 0, "duplicates": 1, "invalid": 1}
+    assert len(replies) == 1 and replies[0]["lead_email"] == "ada@example.com"
+    assert client.post("/api/webhooks/instantly", json={"no": "type"}, headers=headers).status_code == 422
+    print(f"✅ Webhook receiver stats: {dispatcher.stats()}")
+
+
+def test_receiver_disabled_without_secret():
+    client = make_client(WebhookDispatcher(secret=None))
+    assert client.post("/api/webhooks/instantly", json={"event_type": "lead_added"}).status_code == 503
+
+
+def test_waiters_see_live_and_just_missed_events():
+    dispatcher = WebhookDispatcher(secret="s")
+
+    async def run():
+        waiter = asyncio.create_task(dispatcher.wait_for("job_completed", {"job_id": "job_1"}, timeout=1))
+        await asyncio.sleep(0)
+        await dispatcher.dispatch({"event_type": "background_job_completed", "background_job_id": "job_2"})
+        await dispatcher.dispatch({"event_type": "background_job_failed", "background_job_id": "job_1"})
+        live = await waiter
+
+        # Event arrived before anyone waited
+        late = await dispatcher.wait_for("job_completed", {"job_id": "job_2"}, timeout=0.01)
+        missing = await dispatcher.wait_for("job_completed", {"job_id": "job_3"}, timeout=0.01)
+        return live, late, missing
+
+    live, late, missing = asyncio.run(run())
+    assert live["status"] == "failed"
+    assert late["job_id"] == "job_2" and late["status"] == "completed"
+    assert missing is None
+
+
+def test_background_job_wait_uses_webhook_before_polling():
+    dispatcher = WebhookDispatcher(secret="s")
+    service = InstantlyService("test-key", webhooks=dispatcher)
+
+    class NoPolling:
+        async def get(self, *args, **kwargs):
+            raise AssertionError("should not poll when the webhook arrives")
+
+    async def run():
+        wait = asyncio.create_task(service._wait_for_background_job(NoPolling(), {}, "job_9"))
+        await asyncio.sleep(0.01)
+        await dispatcher.dispatch({"event_type": "job_completed", "job_id": "job_9", "status": "success"})
+        return await wait
+
+    assert asyncio.run(run()) == "success"
+    print("✅ move_leads_to_campaign job wait resolved by webhook")
+
+
+def test_background_job_wait_keeps_polling_when_no_webhook_arrives():
+    service = InstantlyService("test-key", webhooks=WebhookDispatcher(secret="s"))
+    service.job_poll_interval = 0.05
+    polls = []
+
+    class Response:
+        status_code = 200
+
+        def json(self):
+            return {"status": "completed" if len(polls) >= 2 else "in_progress"}
+
+    class Polling:
+        async def get(self, *args, **kwargs):
+            polls.append(time.perf_counter())
+            return Response()
+
+    async def run():
+        started = time.perf_counter()
+        status = await service._wait_for_background_job(Polling(), {}, "job_10")
+        return status, time.perf_counter() - started
+
+    status, elapsed = asyncio.run(run())
+    assert status == "completed" and len(polls) == 2
+    assert elapsed < 0.5, f"waited {elapsed:.2f}s before the first poll"
+    print(f"✅ Missing job_completed webhook costs nothing over polling ({elapsed:.2f}s, {len(polls)} polls)")
+
+
+def test_events_fan_out_to_every_worker():
+    # Two workers sharing one state backend; Instantly posts each event to one of them
+    state = MemoryStateBackend()
+    state.shared = True  # stands in for Redis
+    workers = [WebhookDispatcher(secret="s", state=state) for _ in range(2)]
+    replies = [[], []]
+    for worker, seen in zip(workers, replies):
+        worker.subscribe("reply_received", seen.append)
+
+    async def run():
+        for worker in workers:
+            worker.start()
+        await asyncio.sleep(0)
+        # A launch on worker 1 waits for a job whose webhook lands on worker 0
+        wait = asyncio.create_task(workers[1].wait_for("job_completed", {"job_id": "job_1"}, timeout=1))
+        await asyncio.sleep(0)
+        await workers[0].dispatch({"event_type": "job_completed", "job_id": "job_1"})
+        reply = {"event_type": "reply_received", "campaign_id": "c", "lead_email": "a@x.com", "id": "r1"}
+        await workers[0].dispatch(reply)
+        # Instantly's retry lands on the other worker
+        retry = await workers[1].dispatch(reply)
+        event = await wait
+        await asyncio.sleep(0.01)
+        for worker in workers:
+            await worker.aclose()
+        return event, retry
+
+    event, retry = asyncio.run(run())
+    assert event["job_id"] == "job_1" and retry is None
+    assert [len(seen) for seen in replies] == [1, 1]
+    print("✅ A webhook posted to one worker reaches waiters and subscribers in all of them")
+
+
+if __name__ == "__main__":
+    test_receiver_authenticates_and_deduplicates()
+    test_receiver_disabled_without_secret()
+    test_waiters_see_live_and_just_missed_events()
+    test_background_job_wait_uses_webhook_before_polling()
+    test_background_job_wait_keeps_polling_when_no_webhook_arrives()
+    test_events_fan_out_to_every_worker()
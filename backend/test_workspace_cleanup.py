@@ -0,0 +1,121 @@
+import asyncio
+import os
+import tempfile
+import time
+from app.services.rate_limit import TokenBucket
+from app.services.workspace_cleanup import CleanupCheckpoint, CleanupFilters, WorkspaceCleanup
+
+
+class FakeInstantly:
+    """Paged workspace with slow deletes; fails once on a chosen id"""
+
+    def __init__(self, campaigns, lists, fail_on=None):
+        self.campaigns = campaigns
+        self.lists = lists
+        self.fail_on = fail_on
+        self.paused = []
+        self.deleted = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _pages(self, items):
+        for start in range(0, len(items), 3):
+            await asyncio.sleep(0)
+            for item in items[start:start + 3]:
+                yield item
+
+    def iter_campaigns(self):
+        return self._pages(self.campaigns)
+
+    def iter_lead_lists(self):
+        return self._pages(self.lists)
+
+    async def pause_campaign(self, campaign_id):
+        self.paused.append(campaign_id)
+        return True
+
+    async def _delete(self, item_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if item_id == self.fail_on:
+            self.fail_on = None
+            raise Exception("connection reset")
+        self.deleted.append(item_id)
+        return True
+
+    async def delete_campaign(self, campaign_id):
+        return await self._delete(campaign_id)
+
+    async def delete_lead_list(self, list_id):
+        return await self._delete(list_id)
+
+
+def temp_lists(n):
+    lists = [{"id": f"l{i}", "name": f"Temp list for Acme {i}", "timestamp_created": "2026-01-01T00:00:00Z"} for i in range(n)]
+    lists.append({"id": "keep", "name": "Customers", "timestamp_created": "2026-01-01T00:00:00Z"})
+    lists.append({"id": "fresh", "name": "Temp list for today", "timestamp_created": "2999-01-01T00:00:00Z"})
+    return lists
+
+
+def test_filters_and_bounded_concurrency():
+    campaigns = [
+        {"id": "c1", "name": "Old", "status": 1},
+        {"id": "c2", "name": "Draft", "status": 0},
+        {"id": "c3", "name": "Done", "status": 3},
+    ]
+    fake = FakeInstantly(campaigns, temp_lists(10))
+    filters = CleanupFilters(older_than_days=7, name_pattern="^Temp list for")
+    summary = asyncio.run(WorkspaceCleanup(fake, filters=filters, concurrency=4).run(("list",)))
+
+    assert summary["lists"]["matched"] == summary["lists"]["deleted"] == 10
+    assert "keep" not in fake.deleted and "fresh" not in fake.deleted
+    assert 1 < fake.max_in_flight <= 4
+
+    fake = FakeInstantly(campaigns, [])
+    statuses = CleanupFilters(statuses={1, 0})
+    summary = asyncio.run(WorkspaceCleanup(fake, filters=statuses).run(("campaign",)))
+    assert sorted(fake.deleted) == ["c1", "c2"] and fake.paused == ["c1"]
+    print(f"✅ Cleanup summary: {summary}, max in flight {fake.max_in_flight}")
+
+
+def test_dry_run_deletes_nothing():
+    fake = FakeInstantly([{"id": "c1", "status": 1}], temp_lists(3))
+    summary = asyncio.run(WorkspaceCleanup(fake, dry_run=True).run())
+    assert fake.deleted == [] and fake.paused == []
+    assert summary["campaigns"]["matched"] == 1 and summary["lists"]["matched"] == 5
+
+
+def test_interrupted_run_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "checkpoint.jsonl")
+        fake = FakeInstantly([], temp_lists(6), fail_on="l3")
+        first = asyncio.run(WorkspaceCleanup(fake, checkpoint=CleanupCheckpoint(path)).run(("list",)))
+        assert first["lists"]["failed"] == 1
+
+        # Next run skips everything the first one finished
+        rerun = FakeInstantly([], temp_lists(6))
+        second = asyncio.run(WorkspaceCleanup(rerun, checkpoint=CleanupCheckpoint(path)).run(("list",)))
+        assert rerun.deleted == ["l3"]
+        assert second["lists"]["resumed"] == 7
+
+
+def test_token_bucket_spaces_requests():
+    async def run():
+        bucket = TokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        await asyncio.gather(*(bucket.acquire() for _ in range(7)))
+        return time.monotonic() - start, bucket
+
+    elapsed, bucket = asyncio.run(run())
+    # 2 from the burst, then 5 more at 50/s
+    assert elapsed >= 0.09
+    assert bucket.stats()["acquired"] == 7
+
+
+if __name__ == "__main__":
+    test_filters_and_bounded_concurrency()
+    test_dry_run_deletes_nothing()
+    test_interrupted_run_resumes_from_checkpoint()
+    test_token_bucket_spaces_requests()
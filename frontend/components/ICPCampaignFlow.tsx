@@ -5,6 +5,7 @@ import axios from 'axios'
 import toast from 'react-hot-toast'
 import { Loader2, Sparkles, Check, ArrowLeft, AlertTriangle, RefreshCw, Edit2, ChevronRight, ChevronLeft } from 'lucide-react'
 import Link from 'next/link'
+import { useAuth } from '@/contexts/AuthContext'
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
@@ -47,6 +48,7 @@ interface EmailAccount {
 }
 
 export default function ICPCampaignFlow() {
+  const { user: authUser } = useAuth()
   const user = { id: 'demo_user_123' }
 
   // Form state
@@ -113,11 +115,13 @@ export default function ICPCampaignFlow() {
 
     setLoading(true)
     try {
+      // Signed-in users are identified by their ID token (speculative copy budget)
+      const headers = authUser ? { Authorization: `Bearer ${await authUser.getIdToken()}` } : {}
       // Use longer timeout for GPT-5 web search analysis (3 minutes)
       const response = await axios.post(
         `${API_URL}/api/icp/analyze`,
         { url },
-        { timeout: 180000 } // 3 minutes
+        { timeout: 180000, headers } // 3 minutes
       )
       setSuggestedICPs(response.data.icps)
       setCurrentStep(2)
@@ -246,7 +250,8 @@ export default function ICPCampaignFlow() {
       const response = await axios.post(`${API_URL}/api/icp/regenerate-email`, {
         url,
         selected_icp: selectedICP,
-        variant_index: index
+        variant_index: index,
+        variants: editedVariants
       })
 
       const newVariants = [...editedVariants]